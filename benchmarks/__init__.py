@@ -0,0 +1,3 @@
+"""
+Benchmarks e ferramentas de medição de desempenho do bot.
+"""
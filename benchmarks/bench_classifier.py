@@ -0,0 +1,257 @@
+"""
+Benchmark da classificação de perguntas (classify_question) sobre um corpus grande.
+
+Gera um corpus sintético de perguntas em português (palavras-chave de
+CATEGORIES misturadas a texto comum, com e sem acentos, no singular e no
+plural, e perguntas sem relação com fitness) e mede, pergunta a pergunta, três
+formas de pontuar as categorias:
+
+- per_keyword: uma regex (pré-compilada) por palavra-chave, como na versão original;
+- alternation: uma única regex com todas as palavras-chave;
+- automaton: o KeywordMatcher (Aho-Corasick) usado hoje por classify_question.
+
+Cada forma é medida com as palavras-chave de CATEGORIES e com palavras-chave
+sintéticas extras (--extra-keywords), para mostrar como o custo cresce com o
+número de palavras-chave. O resultado também traz quantas perguntas cada forma
+deixou sem categoria ("Off-topic") — acentos e plurais só são reconhecidos pelo
+autômato.
+
+Uso:
+    python -m benchmarks.bench_classifier
+    python -m benchmarks.bench_classifier --questions 20000 --extra-keywords 0 500 5000
+"""
+import argparse
+import os
+import random
+import re
+import string
+import time
+from typing import Callable, Dict, List
+
+# Os módulos de handlers criam clientes e leem a configuração na importação
+os.environ.setdefault("OWNER_ID", "1")
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-bench-0000")
+
+from benchmarks.common import percentiles, print_table, write_results
+from src.bot.mention_handlers import CATEGORIES, classify_question
+from src.utils.keyword_matcher import KeywordMatcher, plural_forms
+from src.utils.text_utils import normalize_text
+
+FILLER_WORDS = (
+    "galera alguém sabe se vale a pena fazer isso todo dia ou é melhor esperar um pouco "
+    "tô começando agora e queria uma dica de vocês porque ontem fiquei na dúvida depois "
+    "da aula minha namorada disse que não funciona mas o professor falou outra coisa"
+).split()
+
+OFF_TOPIC = [
+    "Alguém viu o jogo ontem? Que golaço no final!",
+    "kkkkk bom dia grupo",
+    "Qual filme vocês recomendam pro fim de semana?",
+    "Onde fica a padaria nova do centro?",
+]
+
+# Formato: {palavra-chave: [categorias]}
+KeywordMap = Dict[str, List[str]]
+
+
+def base_keywords() -> KeywordMap:
+    """Palavras-chave de CATEGORIES."""
+    keywords: KeywordMap = {}
+    for category, data in CATEGORIES.items():
+        for keyword in data["keywords"]:
+            keywords.setdefault(keyword, []).append(category)
+    return keywords
+
+
+def with_extra_keywords(keywords: KeywordMap, count: int, rng: random.Random) -> KeywordMap:
+    """Acrescenta palavras-chave sintéticas (palavras inventadas) a categorias sorteadas."""
+    categories = [category for category in CATEGORIES if CATEGORIES[category]["keywords"]]
+    extended = {keyword: list(categories_) for keyword, categories_ in keywords.items()}
+    while len(extended) < len(keywords) + count:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        extended.setdefault(word, [rng.choice(categories)])
+    return extended
+
+
+def make_corpus(size: int, rng: random.Random) -> List[str]:
+    """
+    Gera o corpus de perguntas.
+
+    Args:
+        size (int): Número de perguntas.
+        rng (random.Random): Gerador aleatório (com semente).
+
+    Returns:
+        List[str]: Perguntas.
+    """
+    keywords = list(base_keywords())
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.15:
+            corpus.append(rng.choice(OFF_TOPIC))
+            continue
+        words = rng.sample(FILLER_WORDS, rng.randint(8, 25))
+        for _ in range(rng.randint(1, 3)):
+            keyword = rng.choice(keywords)
+            if rng.random() < 0.3:
+                keyword = normalize_text(keyword)
+            if rng.random() < 0.2:
+                keyword = (plural_forms(normalize_text(keyword)) or [keyword])[0]
+            if rng.random() < 0.2:
+                keyword = keyword.capitalize()
+            words.insert(rng.randint(0, len(words)), keyword)
+        corpus.append(" ".join(words) + "?")
+    return corpus
+
+
+def _best(scores: Dict[str, int]) -> str:
+    """Categoria com maior pontuação (na ordem de CATEGORIES), ou Off-topic."""
+    best = max(scores.items(), key=lambda item: item[1])
+    return best[0] if best[1] else "Off-topic"
+
+
+def per_keyword_scorer(keywords: KeywordMap) -> Callable[[str], str]:
+    """Uma regex por palavra-chave (a implementação original, com as regex pré-compiladas)."""
+    patterns = [
+        (re.compile(r'\b' + re.escape(keyword) + r'\b'), categories)
+        for keyword, categories in keywords.items()
+    ]
+
+    def score(question: str) -> str:
+        question_lower = question.lower()
+        scores = dict.fromkeys(CATEGORIES, 0)
+        for pattern, categories in patterns:
+            found = len(pattern.findall(question_lower))
+            if found:
+                for category in categories:
+                    scores[category] += found
+        return _best(scores)
+    return score
+
+
+def alternation_scorer(keywords: KeywordMap) -> Callable[[str], str]:
+    """Uma única regex com todas as palavras-chave (as mais longas primeiro)."""
+    ordered = sorted(keywords, key=len, reverse=True)
+    pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, ordered)) + r')\b')
+
+    def score(question: str) -> str:
+        scores = dict.fromkeys(CATEGORIES, 0)
+        for keyword in pattern.findall(question.lower()):
+            for category in keywords[keyword]:
+                scores[category] += 1
+        return _best(scores)
+    return score
+
+
+def automaton_scorer(keywords: KeywordMap) -> Callable[[str], str]:
+    """KeywordMatcher (Aho-Corasick), como em classify_question."""
+    matcher = KeywordMatcher((keyword, category) for keyword, categories in keywords.items()
+                             for category in categories)
+    matcher.build()
+
+    def score(question: str) -> str:
+        scores = dict.fromkeys(CATEGORIES, 0)
+        scores.update(matcher.count(question))
+        return _best(scores)
+    return score
+
+
+SCORERS = {
+    "per_keyword": per_keyword_scorer,
+    "alternation": alternation_scorer,
+    "automaton": automaton_scorer,
+}
+
+
+def measure(score: Callable[[str], str], corpus: List[str], rounds: int) -> Dict[str, float]:
+    """
+    Mede o tempo de cada pergunta do corpus.
+
+    Args:
+        score (Callable[[str], str]): Função de classificação.
+        corpus (List[str]): Perguntas.
+        rounds (int): Passadas sobre o corpus.
+
+    Returns:
+        Dict[str, float]: Percentis por pergunta (em ms), vazão e perguntas sem categoria.
+    """
+    latencies = []
+    off_topic = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for question in corpus:
+            before = time.perf_counter()
+            category = score(question)
+            latencies.append(time.perf_counter() - before)
+            off_topic += category == "Off-topic"
+    elapsed = time.perf_counter() - started
+    return {
+        "latency_ms": {key: value * 1000 for key, value in percentiles(latencies).items()},
+        "questions_per_second": len(latencies) / elapsed,
+        "off_topic_ratio": off_topic / len(latencies),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Executa o benchmark.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict: Resultados de cada forma de pontuação e número de palavras-chave.
+    """
+    rng = random.Random(args.seed)
+    corpus = make_corpus(args.questions, rng)
+
+    # Com as palavras-chave de CATEGORIES, o autômato é o próprio classify_question
+    current = automaton_scorer(base_keywords())
+    mismatches = sum(CATEGORIES[current(question)] is not classify_question(question) for question in corpus)
+    if mismatches:
+        raise AssertionError(f"automaton diverge de classify_question em {mismatches} perguntas")
+
+    scenarios = []
+    for extra in args.extra_keywords:
+        keywords = with_extra_keywords(base_keywords(), extra, random.Random(args.seed + extra))
+        for name, factory in SCORERS.items():
+            built = time.perf_counter()
+            score = factory(keywords)
+            build_ms = (time.perf_counter() - built) * 1000
+            stats = measure(score, corpus, args.rounds)
+            scenarios.append({
+                "scenario": f"{name}_{len(keywords)}",
+                "scorer": name,
+                "keywords": len(keywords),
+                "build_ms": build_ms,
+                **stats,
+            })
+    return {"questions": len(corpus), "rounds": args.rounds, "seed": args.seed, "scenarios": scenarios}
+
+
+def main() -> None:
+    """Ponto de entrada do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark da classificação de perguntas sobre um corpus grande")
+    parser.add_argument("--questions", type=int, default=5000, help="Perguntas no corpus")
+    parser.add_argument("--extra-keywords", type=int, nargs="+", default=[0, 1000],
+                        help="Palavras-chave sintéticas acrescentadas a CATEGORIES (um cenário por valor)")
+    parser.add_argument("--rounds", type=int, default=3, help="Passadas sobre o corpus")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args)
+    path = write_results("classifier", results, args.output)
+
+    rows = [
+        {"forma": r["scorer"], "palavras": r["keywords"], "p50_us": r["latency_ms"]["p50"] * 1000,
+         "p95_us": r["latency_ms"]["p95"] * 1000, "perguntas_s": r["questions_per_second"],
+         "off_topic": f"{r['off_topic_ratio']:.1%}"}
+        for r in results["scenarios"]
+    ]
+    print_table(rows, ["forma", "palavras", "p50_us", "p95_us", "perguntas_s", "off_topic"])
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark do filtro de conteúdo ofensivo do correio elegante (src.utils.content_filter).
+
+Gera um corpus de mensagens de correio (textos limpos, textos com termos do
+léxico e textos com termos disfarçados: "p0rr4", "c a r a l h o",
+"porraaaa") e mede, mensagem a mensagem:
+
+- naive: a implementação original (lista recriada a cada chamada e
+  "palavra in texto" para cada termo);
+- filter: o ContentFilter sem cache (normalização + Aho-Corasick);
+- filter_cached: o ContentFilter com cache, sobre um corpus com textos
+  repetidos (--repeat-ratio), como acontece com respostas e reenvios.
+
+Cada forma é medida com o léxico padrão e com léxicos sintéticos maiores
+(--lexicon-sizes). O resultado também traz a taxa de detecção dos termos
+disfarçados e a de falsos positivos nos textos limpos.
+
+Uso:
+    python -m benchmarks.bench_content_filter
+    python -m benchmarks.bench_content_filter --messages 20000 --lexicon-sizes 14 1000 10000
+"""
+import argparse
+import random
+import string
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.common import percentiles, print_table, write_results
+from src.utils.content_filter import DEFAULT_LEXICON, ContentFilter
+
+CLEAN_TEXTS = [
+    "Oi, adorei te ver no treino hoje, você estava incrível! Quer sair pra tomar um açaí depois?",
+    "Seu sorriso ilumina a academia inteira, parabéns pela evolução no agachamento!",
+    "Você é a pessoa mais dedicada que conheço, sempre disputando o supino com o computador do lado.",
+    "Bom treino! 100 kg no terra hoje, 3 séries de 12.",
+    "Te vejo toda segunda na aula de spinning e nunca tenho coragem de falar oi 🙈",
+]
+
+OFFENSIVE_TERMS = ["merda", "porra", "caralho", "idiota", "babaca", "otário", "desgraçado"]
+
+# Disfarces comuns: (nome, transformação)
+DISGUISES: List[Tuple[str, Callable[[str], str]]] = [
+    ("plain", lambda word: word),
+    ("upper", str.upper),
+    ("leet", lambda word: word.translate(str.maketrans("aeio", "4310"))),
+    ("spaced", lambda word: " ".join(word)),
+    ("dotted", lambda word: ".".join(word)),
+    ("repeated", lambda word: word + word[-1] * 4),
+]
+
+
+def naive_filter(terms: List[str]) -> Callable[[str], bool]:
+    """Implementação original: lista recriada a cada chamada e busca como substring."""
+    words = [term.rstrip("*") for term in terms]
+
+    def contains(text: str) -> bool:
+        offensive_words = list(words)
+        text_lower = text.lower()
+        return any(word in text_lower for word in offensive_words)
+    return contains
+
+
+def make_lexicon(size: int, rng: random.Random) -> List[str]:
+    """Léxico padrão completado com termos sintéticos (palavras inventadas) até size termos."""
+    terms = list(DEFAULT_LEXICON)
+    seen = set(terms)
+    while len(terms) < size:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        if word not in seen:
+            seen.add(word)
+            terms.append(word)
+    return terms
+
+
+def make_corpus(size: int, repeat_ratio: float, rng: random.Random) -> List[Tuple[str, bool]]:
+    """
+    Gera o corpus de mensagens.
+
+    Args:
+        size (int): Número de mensagens.
+        repeat_ratio (float): Fração de mensagens que repetem uma mensagem anterior.
+        rng (random.Random): Gerador aleatório (com semente).
+
+    Returns:
+        List[Tuple[str, bool]]: (texto, contém termo ofensivo).
+    """
+    corpus: List[Tuple[str, bool]] = []
+    for index in range(size):
+        if corpus and rng.random() < repeat_ratio:
+            corpus.append(rng.choice(corpus))
+            continue
+        words = rng.choice(CLEAN_TEXTS).split()
+        # Sufixo único: sem repetição, cada mensagem é um texto diferente
+        words.append(f"#{index}")
+        offensive = rng.random() < 0.3
+        if offensive:
+            _, disguise = rng.choice(DISGUISES)
+            words.insert(rng.randint(0, len(words)), disguise(rng.choice(OFFENSIVE_TERMS)))
+        corpus.append((" ".join(words), offensive))
+    return corpus
+
+
+def measure(contains: Callable[[str], bool], corpus: List[Tuple[str, bool]]) -> Dict:
+    """
+    Mede o tempo de cada mensagem e a qualidade das respostas.
+
+    Args:
+        contains (Callable[[str], bool]): Função do filtro.
+        corpus (List[Tuple[str, bool]]): Mensagens e respostas esperadas.
+
+    Returns:
+        Dict: Percentis por mensagem (em ms), vazão, detecção e falsos positivos.
+    """
+    latencies = []
+    detected = offensive = false_positives = clean = 0
+    started = time.perf_counter()
+    for text, expected in corpus:
+        before = time.perf_counter()
+        verdict = contains(text)
+        latencies.append(time.perf_counter() - before)
+        if expected:
+            offensive += 1
+            detected += verdict
+        else:
+            clean += 1
+            false_positives += verdict
+    elapsed = time.perf_counter() - started
+    return {
+        "latency_ms": {key: value * 1000 for key, value in percentiles(latencies).items()},
+        "messages_per_second": len(corpus) / elapsed,
+        "detection_rate": detected / offensive if offensive else 0.0,
+        "false_positive_rate": false_positives / clean if clean else 0.0,
+    }
+
+
+def uncached(content_filter: ContentFilter) -> ContentFilter:
+    """Desativa o cache de veredictos do filtro."""
+    content_filter.MAX_CACHE = 0
+    return content_filter
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Executa o benchmark.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict: Resultados de cada forma e tamanho de léxico.
+    """
+    rng = random.Random(args.seed)
+    unique_corpus = make_corpus(args.messages, 0.0, rng)
+    repeated_corpus = make_corpus(args.messages, args.repeat_ratio, rng)
+
+    scenarios = []
+    for size in args.lexicon_sizes:
+        terms = make_lexicon(size, random.Random(args.seed + size))
+        built = time.perf_counter()
+        compiled = ContentFilter(terms)
+        build_ms = (time.perf_counter() - built) * 1000
+
+        cases = [
+            ("naive", naive_filter(terms), unique_corpus),
+            ("filter", uncached(ContentFilter(terms)).contains_offensive, unique_corpus),
+            ("filter_cached", compiled.contains_offensive, repeated_corpus),
+        ]
+        for name, contains, corpus in cases:
+            scenarios.append({
+                "scenario": f"{name}_{len(terms)}",
+                "implementation": name,
+                "lexicon_size": len(terms),
+                "build_ms": build_ms if name != "naive" else 0.0,
+                **measure(contains, corpus),
+            })
+    return {
+        "messages": args.messages,
+        "repeat_ratio": args.repeat_ratio,
+        "seed": args.seed,
+        "scenarios": scenarios,
+    }
+
+
+def main() -> None:
+    """Ponto de entrada do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark do filtro de conteúdo ofensivo do correio")
+    parser.add_argument("--messages", type=int, default=5000, help="Mensagens no corpus")
+    parser.add_argument("--lexicon-sizes", type=int, nargs="+", default=[len(DEFAULT_LEXICON), 1000, 5000],
+                        help="Tamanhos de léxico medidos (o léxico padrão completado com termos sintéticos)")
+    parser.add_argument("--repeat-ratio", type=float, default=0.5,
+                        help="Fração de mensagens repetidas no corpus do filter_cached")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args)
+    path = write_results("content_filter", results, args.output)
+
+    rows = [
+        {"forma": r["implementation"], "termos": r["lexicon_size"], "p50_us": r["latency_ms"]["p50"] * 1000,
+         "p95_us": r["latency_ms"]["p95"] * 1000, "msgs_s": r["messages_per_second"],
+         "deteccao": f"{r['detection_rate']:.1%}", "falsos_pos": f"{r['false_positive_rate']:.1%}"}
+        for r in results["scenarios"]
+    ]
+    print_table(rows, ["forma", "termos", "p50_us", "p95_us", "msgs_s", "deteccao", "falsos_pos"])
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Micro-benchmarks das funções puras executadas a cada mensagem ou comando.
+
+Cada função é medida no estilo do pytest-benchmark (várias rodadas, cada uma
+com um número calibrado de chamadas; estatísticas por chamada) com entradas
+representativas em português, comparando a implementação atual com a anterior
+(reproduzida aqui como referência). Antes de medir, o benchmark confere que as
+duas implementações produzem o mesmo resultado para todas as entradas.
+
+Funções medidas:
+- classify_question (mention_handlers);
+- contains_offensive_content (mail_handlers, usado por MailHandlers._contains_offensive_content);
+- escape_markdown_v2 (blacklist_handlers);
+- generate_checkin_response_static e format_checkin_scoreboard (checkin_handlers);
+- _format_blacklist_item (blacklist_handlers).
+
+Uso:
+    python -m benchmarks.bench_hot_functions
+    python -m benchmarks.bench_hot_functions --rounds 20 --only classify_question
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import time
+from datetime import datetime
+from html import escape as escape_html
+from typing import Any, Callable, Dict, List, Sequence
+
+# Os módulos de handlers criam clientes e leem a configuração na importação
+os.environ.setdefault("OWNER_ID", "1")
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-bench-0000")
+
+from benchmarks.common import percentiles, print_table, write_results
+from src.bot import checkin_handlers
+from src.bot.blacklist_handlers import _format_blacklist_item, escape_markdown_v2
+from src.bot.checkin_handlers import format_checkin_scoreboard, generate_checkin_response_static
+from src.bot.mail_handlers import contains_offensive_content
+from src.bot.mention_handlers import CATEGORIES, classify_question
+
+QUESTIONS = [
+    "Qual a melhor dieta pra hipertrofia? Devo tomar whey antes ou depois do treino?",
+    "Quanto de creatina por dia? Pré-treino com cafeína vale a pena ou é só marketing?",
+    "Como manter a motivação e a disciplina pra bater a meta do ano?",
+    "Tô num platô faz 3 meses, a balança não mexe e as medidas também não. Faço mais cardio?",
+    "Alguém viu o jogo ontem? Que golaço no final!",
+    "Posso fazer jejum intermitente e ainda ganhar massa muscular com déficit calórico?",
+    "Sinto dor no ombro no supino, será lesão? Melhor descanso ou alongamento?",
+    "kkkkk bom dia grupo",
+]
+
+MAIL_TEXTS = [
+    "Oi, adorei te ver no treino hoje, você estava incrível! Quer sair pra tomar um açaí depois?",
+    "Seu sorriso ilumina a academia inteira, parabéns pela evolução no agachamento!",
+    "Que merda é essa de não responder as mensagens?",
+    "Você é a pessoa mais dedicada que conheço. " * 4,
+    "Bom treino!",
+]
+
+MARKDOWN_TEXTS = [
+    "João Silva",
+    "Maria Eduarda (@duda_fit) - 12 check-ins!",
+    "Bom dia galera, treino pago hoje. Foco total! [perna + glúteo] #legday",
+    "Ana",
+]
+
+SCORE_VALUES = [0, 1, 2, 5, 10, 15, 22, 28, 45]
+
+
+def legacy_classify_question(question: str) -> Dict[str, Any]:
+    """Implementação anterior: uma regex por palavra-chave."""
+    question_lower = question.lower()
+    category_scores = {}
+    for category, data in CATEGORIES.items():
+        score = 0
+        for keyword in data["keywords"]:
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+            score += len(re.findall(pattern, question_lower))
+        category_scores[category] = score
+    best_category = max(category_scores.items(), key=lambda x: x[1])
+    if best_category[1] == 0:
+        return CATEGORIES["Off-topic"]
+    return CATEGORIES[best_category[0]]
+
+
+LEGACY_OFFENSIVE_WORDS = [
+    'merda', 'porra', 'caralho', 'puta', 'viado', 'idiota', 'burro',
+    'fdp', 'arrombado', 'desgraça', 'otário', 'babaca'
+]
+
+
+def legacy_contains_offensive_content(text: str) -> bool:
+    """Implementação anterior: lista recriada a cada chamada e gerador no any()."""
+    offensive_words = list(LEGACY_OFFENSIVE_WORDS)
+    text_lower = text.lower()
+    return any(word in text_lower for word in offensive_words)
+
+
+def legacy_escape_markdown_v2(text: str) -> str:
+    """Implementação anterior: 18 str.replace encadeados."""
+    special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+    for char in special_chars:
+        text = text.replace(char, f'\\{char}')
+    return text
+
+
+def legacy_generate_checkin_response_static(user_name: str, checkin_count: int) -> str:
+    """Implementação anterior: cadeia de if/elif e str.format."""
+    safe_checkin_count = max(0, int(checkin_count))
+    h = checkin_handlers
+    if safe_checkin_count == 1:
+        chosen_response = random.choice(h.responses_1).format(user_name=user_name)
+    elif 2 <= safe_checkin_count <= 3:
+        chosen_response = random.choice(h.responses_2_3).format(user_name=user_name)
+    elif 4 <= safe_checkin_count <= 7:
+        chosen_response = random.choice(h.responses_4_7).format(user_name=user_name)
+    elif 8 <= safe_checkin_count <= 12:
+        chosen_response = random.choice(h.responses_8_12).format(user_name=user_name)
+    elif 13 <= safe_checkin_count <= 18:
+        chosen_response = random.choice(h.responses_13_18).format(user_name=user_name)
+    elif 19 <= safe_checkin_count <= 25:
+        chosen_response = random.choice(h.responses_19_25).format(user_name=user_name)
+    elif 26 <= safe_checkin_count <= 30:
+        chosen_response = random.choice(h.responses_26_30).format(user_name=user_name)
+    elif safe_checkin_count >= 31:
+        chosen_response = random.choice(h.responses_31_plus).format(user_name=user_name)
+    else:
+        chosen_response = f"Bem-vindo à jornada, {user_name}! Check-in registrado! 💪"
+    return f"{chosen_response}\nSeu score total é <b>{safe_checkin_count}</b>!"
+
+
+def legacy_format_checkin_scoreboard(chat_title, scoreboard_data, total_participants, days_since_first) -> str:
+    """Implementação anterior (trecho do /checkinscore): agrupa todas as entradas antes de exibir 20."""
+    total_group_score = sum(entry.get("score", 0) for entry in scoreboard_data)
+    grouped_scores = {}
+    for entry in scoreboard_data:
+        score = entry.get("score", 0)
+        if score not in grouped_scores:
+            grouped_scores[score] = []
+        grouped_scores[score].append({
+            "name": entry.get("user_name", f"User {entry['user_id']}"),
+            "username": entry.get("username")
+        })
+
+    scoreboard_lines = [f"🏆 <b>{chat_title.upper()} CHECK-INS</b> 🏆\n"]
+    rank_icons = {1: "🥇", 2: "🥈", 3: "🥉"}
+    current_rank_pos = 0
+    processed_users_count = 0
+    max_users_to_show = 20
+    for score_value in sorted(grouped_scores.keys(), reverse=True):
+        if processed_users_count >= max_users_to_show:
+            break
+        users_at_this_score = grouped_scores[score_value]
+        current_rank_pos += 1
+        rank_display = rank_icons.get(current_rank_pos, f"🔹 {current_rank_pos}.")
+        plural = "s" if score_value != 1 else ""
+        scoreboard_lines.append(f"{rank_display} (<b>{score_value}</b> check-in{plural})")
+        for user_info in users_at_this_score:
+            if processed_users_count >= max_users_to_show:
+                scoreboard_lines.append("   ...")
+                break
+            name = user_info['name']
+            username = user_info['username']
+            display_name = f"@{username}" if username else name
+            if len(display_name) > 25:
+                display_name = display_name[:24] + "…"
+            scoreboard_lines.append(f"   👤 {display_name}")
+            processed_users_count += 1
+        if processed_users_count >= max_users_to_show and current_rank_pos < len(grouped_scores):
+            if not scoreboard_lines[-1].strip().endswith("..."):
+                scoreboard_lines.append("   ...")
+            break
+        scoreboard_lines.append("")
+    if scoreboard_lines and scoreboard_lines[-1] == "":
+        scoreboard_lines.pop()
+    scoreboard_lines.append("\n💪 Continue mantendo a consistência! 🔥")
+    scoreboard_lines.append("\n📊 <b>Estatísticas:</b>")
+    scoreboard_lines.append(f"• {total_participants} pessoas já participaram")
+    plural_stats = "s" if total_group_score != 1 else ""
+    scoreboard_lines.append(f"• {total_group_score} check-in{plural_stats} no total")
+    scoreboard_lines.append(f"• Primeiro check-in: {days_since_first}")
+    return "\n".join(scoreboard_lines)
+
+
+def legacy_format_blacklist_item(position: int, item: Dict[str, Any]) -> str:
+    """Implementação anterior: strftime e escape de todos os campos."""
+    added_at = (item.get("added_at") or datetime.now()).strftime("%d/%m/%Y %H:%M")
+    user_name = item.get("user_name", "Usuário desconhecido")
+    username = item.get("username")
+    display_name = f"@{username}" if username else user_name
+    escaped_display_name = escape_html(display_name)
+    formatted_chat_id = str(item.get("chat_id"))
+    if formatted_chat_id.startswith("-100"):
+        formatted_chat_id = formatted_chat_id[4:]
+    elif formatted_chat_id.startswith("-"):
+        formatted_chat_id = formatted_chat_id[1:]
+    message_link = f"https://t.me/c/{formatted_chat_id}/{item.get('message_id')}"
+    message_text = item.get("message_text") or ""
+    escaped_message_text = escape_html(message_text[:100] + ("..." if len(message_text) > 100 else ""))
+    escaped_admin_name = escape_html(item.get("added_by_name", "Admin desconhecido"))
+    return (
+        f"{position}. <b>Usuário:</b> {escaped_display_name} \n"
+        f"   <b>Adicionado por:</b> {escaped_admin_name} em {added_at}\n"
+        f"   <b>Mensagem:</b> <a href='{message_link}'>Link</a> \n"
+        f"   <b>Texto:</b> <i>{escaped_message_text}</i>\n"
+        f"   <b>ID para remover:</b> <code>{item.get('_id')}</code>\n"
+    )
+
+
+def make_scoreboard(users: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Placar sintético, ordenado por score como o retornado pelo MongoDB."""
+    rnd = random.Random(seed)
+    entries = [
+        {
+            "user_id": 1000 + i,
+            "user_name": f"Atleta {rnd.choice(['Ana', 'Bruno', 'Carla', 'Diego', 'Érica'])} {i}",
+            "username": f"atleta_{i}" if i % 3 else None,
+            "score": max(1, int(rnd.paretovariate(1.2))),
+        }
+        for i in range(users)
+    ]
+    entries.sort(key=lambda entry: entry["score"], reverse=True)
+    return entries
+
+
+def make_blacklist_items(count: int) -> List[Dict[str, Any]]:
+    """Entradas sintéticas da blacklist."""
+    return [
+        {
+            "_id": f"65f1a5b5a9c1e2b3c4d5{i:04x}",
+            "chat_id": -1002288213607,
+            "message_id": 1452 + i,
+            "user_name": f"Usuário {i}",
+            "username": f"user_{i}" if i % 2 else None,
+            "message_text": "Vendo curso de emagrecimento <garantido> & barato, chama no privado!" if i % 4 == 0
+            else "mensagem fora das regras do grupo",
+            "added_by_name": "Admin Gym",
+            "added_at": datetime(2025, 3, 14, 9, 26),
+        }
+        for i in range(count)
+    ]
+
+
+def benchmark(func: Callable[[], Any], rounds: int = 10, min_round_time: float = 0.05) -> Dict[str, float]:
+    """
+    Mede uma chamada sem argumentos, no estilo do pytest-benchmark (tempos em microssegundos).
+
+    O número de chamadas por rodada é calibrado para que cada rodada dure ao
+    menos min_round_time; as estatísticas são do tempo médio por chamada em
+    cada rodada.
+
+    Args:
+        func (Callable[[], Any]): Chamada medida.
+        rounds (int): Número de rodadas.
+        min_round_time (float): Duração mínima (em segundos) de cada rodada.
+
+    Returns:
+        Dict[str, float]: Percentis, min, max, média e desvio padrão do tempo por chamada
+            (em microssegundos), ops/s e chamadas por rodada.
+    """
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - started >= min_round_time:
+            break
+        iterations *= 2
+
+    per_call: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        per_call.append((time.perf_counter() - started) / iterations * 1e6)
+
+    stats = percentiles(per_call)
+    return {
+        **stats,
+        "stddev": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "ops_per_second": 1e6 / stats["mean"] if stats["mean"] else 0.0,
+        "iterations": iterations,
+        "rounds": rounds,
+    }
+
+
+def _over_inputs(func: Callable[..., Any], inputs: Sequence[tuple]) -> Callable[[], None]:
+    """Chamada que aplica func a todas as entradas (uma "operação" do benchmark)."""
+    def call() -> None:
+        for args in inputs:
+            func(*args)
+    return call
+
+
+def _same_output(case: Dict[str, Any], args: tuple) -> bool:
+    """Confere se as duas implementações dão o mesmo resultado (mesma semente para random.choice)."""
+    random.seed(7)
+    legacy_output = case["legacy"](*args)
+    random.seed(7)
+    return legacy_output == case["current"](*args)
+
+
+def build_cases() -> List[Dict[str, Any]]:
+    """
+    Monta os casos: (nome, implementação anterior, implementação atual, entradas).
+
+    Returns:
+        List[Dict[str, Any]]: Casos do benchmark.
+    """
+    scoreboard_small = make_scoreboard(30)
+    scoreboard_large = make_scoreboard(5000)
+    blacklist_items = make_blacklist_items(8)
+    return [
+        {"name": "classify_question", "legacy": legacy_classify_question, "current": classify_question,
+         "inputs": [(question,) for question in QUESTIONS]},
+        {"name": "contains_offensive_content", "legacy": legacy_contains_offensive_content,
+         "current": contains_offensive_content, "inputs": [(text,) for text in MAIL_TEXTS]},
+        {"name": "escape_markdown_v2", "legacy": legacy_escape_markdown_v2, "current": escape_markdown_v2,
+         "inputs": [(text,) for text in MARKDOWN_TEXTS]},
+        {"name": "generate_checkin_response_static", "legacy": legacy_generate_checkin_response_static,
+         "current": generate_checkin_response_static,
+         "inputs": [("Maria Eduarda", score) for score in SCORE_VALUES]},
+        {"name": "format_checkin_scoreboard_30", "legacy": legacy_format_checkin_scoreboard,
+         "current": format_checkin_scoreboard, "inputs": [("Gym Nation", scoreboard_small, 30, "120 dias atrás")]},
+        {"name": "format_checkin_scoreboard_5000", "legacy": legacy_format_checkin_scoreboard,
+         "current": format_checkin_scoreboard, "inputs": [("Gym Nation", scoreboard_large, 5000, "120 dias atrás")]},
+        {"name": "format_blacklist_page", "legacy": legacy_format_blacklist_item, "current": _format_blacklist_item,
+         "inputs": [(position, item) for position, item in enumerate(blacklist_items, start=1)]},
+    ]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Executa os micro-benchmarks.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict[str, Any]: Estatísticas das duas implementações e o ganho de cada caso.
+    """
+    selected = set(args.only or [])
+    results = []
+    for case in build_cases():
+        if selected and case["name"] not in selected:
+            continue
+        for inputs in case["inputs"]:
+            if not _same_output(case, inputs):
+                raise AssertionError(f"{case['name']}: resultados diferentes para {inputs!r:.80}")
+
+        legacy = benchmark(_over_inputs(case["legacy"], case["inputs"]), args.rounds)
+        current = benchmark(_over_inputs(case["current"], case["inputs"]), args.rounds)
+        results.append({
+            "scenario": case["name"],
+            "inputs": len(case["inputs"]),
+            "legacy": legacy,
+            "current": current,
+            "speedup": legacy["p50"] / current["p50"] if current["p50"] else 0.0,
+            # Mesmo formato dos demais benchmarks (para o benchmarks.compare), em ms por operação
+            "latency_ms": {key: current[key] / 1000 for key in ("p50", "p95", "p99", "min", "max", "mean")},
+        })
+    return {"rounds": args.rounds, "scenarios": results}
+
+
+def main() -> None:
+    """Ponto de entrada dos micro-benchmarks."""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks das funções puras mais chamadas")
+    parser.add_argument("--rounds", type=int, default=10, help="Rodadas por implementação")
+    parser.add_argument("--only", action="append", help="Executa apenas o caso informado (repetível)")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args)
+    path = write_results("hot_functions", results, args.output)
+
+    rows = [
+        {"caso": r["scenario"], "anterior_us": r["legacy"]["p50"], "atual_us": r["current"]["p50"],
+         "ganho": f"{r['speedup']:.2f}x"}
+        for r in results["scenarios"]
+    ]
+    print_table(rows, ["caso", "anterior_us", "atual_us", "ganho"])
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark do custo de logging por atualização (src.utils.logging_setup).
+
+Simula o logging de uma atualização típica: uma linha INFO de um handler,
+duas linhas DEBUG (descartadas com LOG_LEVEL=INFO), a linha INFO do httpx de
+cada chamada à Bot API e, em parte das atualizações, o aviso de mensagem não
+autorizada (a mesma mensagem repetida). Mede o tempo gasto na thread do loop
+de eventos por atualização em três configurações:
+
+- sync_eager: StreamHandler síncrono (como o basicConfig anterior) e mensagens
+  com f-string, montadas mesmo quando o nível as descarta;
+- queue_text: fila + QueueListener (start_logging), mensagens preguiçosas,
+  amostragem do httpx e limite por mensagem;
+- queue_json: igual ao queue_text, com saída JSON.
+
+A saída vai para um arquivo temporário (a escrita real entra no custo da
+configuração síncrona). Também registra quantas linhas foram escritas e o
+tempo para esvaziar a fila ao final.
+
+Uso:
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --updates 50000 --unauthorized-ratio 0.2
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.common import percentiles, print_table, write_results
+from src.utils import logging_setup
+from src.utils.logging_setup import TextFormatter
+
+handler_logger = logging.getLogger("src.bot.checkin_handlers")
+main_logger = logging.getLogger("src.main")
+httpx_logger = logging.getLogger("httpx")
+
+
+def eager_update(index: int, unauthorized: bool) -> None:
+    """Logging de uma atualização com f-strings (formatação sempre feita)."""
+    chat_id, user_id, message_id = -1001234567890, 100000 + index % 500, index
+    handler_logger.debug(f"Ignorando resposta {message_id}: Nenhum check-in ativo no chat {chat_id}")
+    handler_logger.debug(f"Tentando definir reação '🔥' (como objeto ReactionTypeEmoji) para mensagem {message_id} no chat {chat_id}")
+    handler_logger.info(f"Check-in registrado com sucesso para {user_id}. Novo score total: {index % 40}")
+    httpx_logger.info(f'HTTP Request: POST https://api.telegram.org/bot123/sendMessage "HTTP/1.1 200 OK"')
+    if unauthorized:
+        main_logger.warning(
+            f"Mensagem não autorizada ignorada. "
+            f"Usuário: {user_id}, Chat: {chat_id}, Tipo de chat: supergroup"
+        )
+
+
+def lazy_update(index: int, unauthorized: bool) -> None:
+    """Logging de uma atualização com formatação preguiçosa."""
+    chat_id, user_id, message_id = -1001234567890, 100000 + index % 500, index
+    handler_logger.debug("Ignorando resposta %s: Nenhum check-in ativo no chat %s", message_id, chat_id)
+    handler_logger.debug(
+        "Tentando definir reação '%s' (como objeto ReactionTypeEmoji) para mensagem %s no chat %s",
+        "🔥", message_id, chat_id
+    )
+    handler_logger.info(f"Check-in registrado com sucesso para {user_id}. Novo score total: {index % 40}")
+    httpx_logger.info('HTTP Request: %s %s "%s %d %s"', "POST",
+                      "https://api.telegram.org/bot123/sendMessage", "HTTP/1.1", 200, "OK")
+    if unauthorized:
+        main_logger.warning(
+            "Mensagem não autorizada ignorada. Usuário: %s, Chat: %s, Tipo de chat: %s",
+            user_id, chat_id, "supergroup"
+        )
+
+
+def run_scenario(name: str, args: argparse.Namespace, path: str) -> Dict:
+    """
+    Executa uma configuração de logging.
+
+    Args:
+        name (str): sync_eager, queue_text ou queue_json.
+        args (argparse.Namespace): Argumentos da linha de comando.
+        path (str): Arquivo de saída do log.
+
+    Returns:
+        Dict: Percentis por atualização (em ms), linhas escritas e tempo de esvaziamento.
+    """
+    root = logging.getLogger()
+    stream = open(path, "w", encoding="utf-8")
+    if name == "sync_eager":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(TextFormatter())
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+        log_update = eager_update
+    else:
+        logging_setup.start_logging("INFO", "json" if name == "queue_json" else "text", stream)
+        log_update = lazy_update
+
+    every = max(1, round(1 / args.unauthorized_ratio)) if args.unauthorized_ratio else 0
+    latencies = []
+    try:
+        for index in range(args.updates):
+            before = time.perf_counter()
+            log_update(index, bool(every) and index % every == 0)
+            latencies.append(time.perf_counter() - before)
+    finally:
+        drain_started = time.perf_counter()
+        if name == "sync_eager":
+            root.removeHandler(handler)
+        else:
+            logging_setup.stop_logging()
+        drain_seconds = time.perf_counter() - drain_started
+        stream.close()
+
+    with open(path, encoding="utf-8") as f:
+        lines = sum(1 for _ in f)
+    return {
+        "scenario": name,
+        "updates": args.updates,
+        "latency_ms": {key: value * 1000 for key, value in percentiles(latencies).items()},
+        "total_ms": sum(latencies) * 1000,
+        "lines_written": lines,
+        "drain_ms": drain_seconds * 1000,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Executa o benchmark.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict: Resultados de cada configuração.
+    """
+    os.environ["LOG_RATE_LIMIT"] = str(args.rate_limit)
+    os.environ["LOG_SAMPLE_RATES"] = f"httpx={args.httpx_sample_rate}"
+    scenarios = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("sync_eager", "queue_text", "queue_json"):
+            scenarios.append(run_scenario(name, args, os.path.join(directory, f"{name}.log")))
+    return {
+        "updates": args.updates,
+        "unauthorized_ratio": args.unauthorized_ratio,
+        "rate_limit": args.rate_limit,
+        "httpx_sample_rate": args.httpx_sample_rate,
+        "scenarios": scenarios,
+    }
+
+
+def main() -> None:
+    """Ponto de entrada do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark do custo de logging por atualização")
+    parser.add_argument("--updates", type=int, default=20000, help="Atualizações simuladas")
+    parser.add_argument("--unauthorized-ratio", type=float, default=0.1,
+                        help="Fração de atualizações com o aviso de mensagem não autorizada")
+    parser.add_argument("--rate-limit", type=int, default=30, help="LOG_RATE_LIMIT das configurações com fila")
+    parser.add_argument("--httpx-sample-rate", type=float, default=0.1,
+                        help="Fração mantida das linhas do httpx nas configurações com fila")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args)
+    path = write_results("logging", results, args.output)
+
+    rows = [
+        {"config": r["scenario"], "p50_us": r["latency_ms"]["p50"] * 1000, "p99_us": r["latency_ms"]["p99"] * 1000,
+         "total_ms": r["total_ms"], "linhas": r["lines_written"], "fila_ms": r["drain_ms"]}
+        for r in results["scenarios"]
+    ]
+    print_table(rows, ["config", "p50_us", "p99_us", "total_ms", "linhas", "fila_ms"])
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
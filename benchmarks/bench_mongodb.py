@@ -0,0 +1,219 @@
+"""
+Benchmark dos caminhos quentes do MongoDBClient contra um mongod local.
+
+Gera (ou reaproveita) um conjunto de dados sintético com benchmarks.synthetic_data
+e mede, para cada cenário, a latência por chamada (p50/p95/p99) e a vazão:
+
+- record_user_checkin (check-in novo e repetido na âncora ativa do maior grupo);
+- get_checkin_scoreboard (maior e menor grupo);
+- get_blacklist e get_blacklist_page (primeira página) do maior grupo;
+- get_mail_stats_today, get_mail_stats_total e get_mail_stats_weekly;
+- cotas de perguntas ao bot (QuotaService em janela fixa e deslizante: reserva
+  liberada, reserva recusada e consulta sem reserva).
+
+Os documentos criados pelos cenários são apagados ao final, para que o mesmo
+conjunto possa ser medido novamente após outro commit. Os resultados vão para
+JSON (com o commit atual); compare duas execuções com benchmarks.compare.
+
+Uso:
+    python -m benchmarks.bench_mongodb --checkins 2000000            # gera os dados e mede
+    python -m benchmarks.bench_mongodb --reuse --iterations 500      # mede com os dados existentes
+"""
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.common import check_mongo_uri, percentiles, print_table, write_results
+from benchmarks.synthetic_data import add_spec_arguments, generate, load_dataset, spec_from_args
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.quota_service import CALENDAR_WINDOW, ROLLING_WINDOW, QuotaService
+
+# Escopos das cotas criadas pelo benchmark (apagadas ao final)
+QUOTA_SCOPES = ("bench_qa", "bench_qa_rolling")
+
+
+async def time_calls(
+    name: str,
+    call: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    concurrency: int,
+    warmup: int = 10
+) -> Dict[str, Any]:
+    """
+    Mede um cenário.
+
+    Args:
+        name (str): Nome do cenário.
+        call (Callable[[int], Awaitable[Any]]): Chamada medida; recebe o número da iteração.
+        iterations (int): Número de chamadas medidas.
+        concurrency (int): Chamadas simultâneas.
+        warmup (int): Chamadas de aquecimento (não medidas, com índices negativos).
+
+    Returns:
+        Dict[str, Any]: Latência em ms, vazão e parâmetros do cenário.
+    """
+    for index in range(-warmup, 0):
+        await call(index)
+
+    latencies: List[float] = []
+
+    async def worker(offset: int) -> None:
+        for index in range(offset, iterations, concurrency):
+            started = time.perf_counter()
+            await call(index)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "ops_per_second": iterations / wall if wall else 0.0,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def build_scenarios(dataset: Dict[str, Any]) -> List[tuple]:
+    """
+    Monta os cenários a partir do resumo do conjunto de dados.
+
+    Args:
+        dataset (Dict[str, Any]): Resumo gravado pelo gerador.
+
+    Returns:
+        List[tuple]: (nome, chamada[, preparação]) de cada cenário, na ordem de execução.
+    """
+    spec = dataset["spec"]
+    chat_ids = dataset["chat_ids"]
+    busiest_chat, quietest_chat = chat_ids[0], chat_ids[-1]
+    anchor_id = dataset["active_anchors"][str(busiest_chat)]
+    # Usuários fora da faixa gerada: check-ins novos (removidos ao final); +10 cobre o aquecimento
+    new_user_base = dataset["first_user_id"] + spec["users"] + 10
+    heavy_user = dataset["first_user_id"]
+
+    calendar_quota = QuotaService("bench_qa", limit=2, window=CALENDAR_WINDOW)
+    rolling_quota = QuotaService("bench_qa_rolling", limit=2, window=ROLLING_WINDOW, period=timedelta(hours=24))
+
+    async def reserve_exhausted(quota: QuotaService, index: int) -> None:
+        # Instância nova a cada chamada: sem cache, a recusa passa pelo banco
+        fresh = QuotaService(quota.scope, quota.limit, quota.window, quota.period)
+        await fresh.reserve(f"{busiest_chat}:{heavy_user}")
+
+    async def peek_uncached(quota: QuotaService) -> None:
+        fresh = QuotaService(quota.scope, quota.limit, quota.window, quota.period)
+        await fresh.peek(f"{busiest_chat}:{heavy_user}")
+
+    async def exhaust(quota: QuotaService) -> None:
+        for _ in range(quota.limit):
+            await quota.reserve(f"{busiest_chat}:{heavy_user}")
+
+    def checkin(index: int):
+        user_id = new_user_base + index
+        return mongodb_client.record_user_checkin(busiest_chat, anchor_id, user_id, f"Atleta {user_id}", None)
+
+    return [
+        ("record_user_checkin_new", checkin),
+        ("record_user_checkin_duplicate", checkin),
+        ("get_checkin_scoreboard_busiest", lambda i: mongodb_client.get_checkin_scoreboard(busiest_chat)),
+        ("get_checkin_scoreboard_quietest", lambda i: mongodb_client.get_checkin_scoreboard(quietest_chat)),
+        ("get_blacklist", lambda i: mongodb_client.get_blacklist(busiest_chat)),
+        ("get_blacklist_page", lambda i: mongodb_client.get_blacklist_page(busiest_chat, 20)),
+        ("get_mail_stats_today", lambda i: mongodb_client.get_mail_stats_today()),
+        ("get_mail_stats_total", lambda i: mongodb_client.get_mail_stats_total()),
+        ("get_mail_stats_weekly", lambda i: mongodb_client.get_mail_stats_weekly()),
+        ("qa_quota_reserve_calendar", lambda i: calendar_quota.reserve(f"{busiest_chat}:{new_user_base + i}")),
+        ("qa_quota_reserve_rolling", lambda i: rolling_quota.reserve(f"{busiest_chat}:{new_user_base + i}")),
+        ("qa_quota_exhausted_calendar", lambda i: reserve_exhausted(calendar_quota, i), lambda: exhaust(calendar_quota)),
+        ("qa_quota_exhausted_rolling", lambda i: reserve_exhausted(rolling_quota, i), lambda: exhaust(rolling_quota)),
+        ("qa_quota_peek_calendar", lambda i: peek_uncached(calendar_quota)),
+    ]
+
+
+async def cleanup(dataset: Dict[str, Any]) -> None:
+    """Apaga os documentos criados pelos cenários."""
+    new_user_base = dataset["first_user_id"] + dataset["spec"]["users"]
+    await mongodb_client.db.user_checkins.delete_many({"user_id": {"$gte": new_user_base}})
+    for scope in QUOTA_SCOPES:
+        await mongodb_client.db.quotas.delete_many({"_id": {"$regex": f"^{scope}:"}})
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Executa o benchmark.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict[str, Any]: Conjunto de dados, contagens e resultados por cenário.
+    """
+    mongodb_client.connection_string = args.mongo_uri
+    await mongodb_client.connect(args.db_name)
+    await mongodb_client.ensure_indexes()
+
+    dataset = await load_dataset(mongodb_client.db) if args.reuse else None
+    if dataset is None:
+        dataset = await generate(mongodb_client.db, spec_from_args(args))
+        await mongodb_client.rebuild_mail_stats()
+
+    counts = {
+        name: await mongodb_client.db[name].estimated_document_count()
+        for name in ("user_checkins", "checkin_anchors", "blacklist", "correio_elegante", "monitored_messages")
+    }
+
+    selected = set(args.scenario or [])
+    results = []
+    try:
+        await cleanup(dataset)
+        for name, call, *setup in build_scenarios(dataset):
+            if selected and name not in selected:
+                continue
+            if setup:
+                await setup[0]()
+            result = await time_calls(name, call, args.iterations, args.concurrency)
+            results.append(result)
+            print(f"  {name}: p50={result['latency_ms']['p50']:.2f}ms p95={result['latency_ms']['p95']:.2f}ms")
+    finally:
+        await cleanup(dataset)
+        await mongodb_client.close()
+
+    return {
+        "dataset": dataset["spec"],
+        "counts": counts,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    """Ponto de entrada do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos quentes do MongoDBClient")
+    add_spec_arguments(parser)
+    parser.add_argument("--reuse", action="store_true", help="Reaproveita o conjunto já gerado no banco")
+    parser.add_argument("--iterations", type=int, default=200, help="Chamadas medidas por cenário")
+    parser.add_argument("--concurrency", type=int, default=1, help="Chamadas simultâneas por cenário")
+    parser.add_argument("--scenario", action="append", help="Executa apenas o cenário informado (repetível)")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+    check_mongo_uri(parser, args)
+
+    results = asyncio.run(run(args))
+    path = write_results("mongodb", results, args.output)
+
+    rows = [
+        {"cenário": r["scenario"], "ops/s": r["ops_per_second"], "p50_ms": r["latency_ms"]["p50"],
+         "p95_ms": r["latency_ms"]["p95"], "p99_ms": r["latency_ms"]["p99"]}
+        for r in results["scenarios"]
+    ]
+    print_table(rows, ["cenário", "ops/s", "p50_ms", "p95_ms", "p99_ms"])
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark do agendador de mensagens recorrentes.
+
+Carrega N mensagens recorrentes (padrão: 10.000) com vencimentos espalhados
+por alguns segundos, executa o loop único de envio com um bot falso e mede:
+
+- o custo de carregar e agendar todas as mensagens;
+- o custo de adicionar, editar e remover entradas do heap;
+- o tempo de CPU do processo durante o loop (overhead por envio);
+- o atraso (jitter) entre o vencimento previsto e o envio efetivo.
+
+Uso:
+    python -m benchmarks.bench_recurring_scheduler --messages 10000 --spread 5
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+from benchmarks.common import percentiles, write_results
+from src.utils.recurring_messages_manager import RecurringMessagesManager
+
+
+class FakeBot:
+    """Bot falso que apenas registra o instante de cada envio."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent_at: Dict[int, float] = {}
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent_at[chat_id] = time.time()
+
+
+class FakeMongo:
+    """Substituto em memória dos métodos do MongoDB usados pelo agendador."""
+
+    def __init__(self, messages: List[Dict[str, Any]]):
+        self.db = object()
+        self.messages = messages
+
+    async def get_all_active_recurring_messages(self) -> List[Dict[str, Any]]:
+        return self.messages
+
+    async def update_recurring_message_last_sent(self, message_id: str, fencing_token=None, sent_at=None) -> bool:
+        return True
+
+    async def get_recurring_messages_changed_since(self, since: datetime) -> List[Dict[str, Any]]:
+        return []
+
+
+def build_messages(count: int, spread: float, start_delay: float) -> List[Dict[str, Any]]:
+    """
+    Gera mensagens cujos próximos envios ficam espalhados em [start_delay, start_delay + spread].
+
+    Args:
+        count (int): Número de mensagens.
+        spread (float): Janela (em segundos) em que os vencimentos se distribuem.
+        start_delay (float): Atraso (em segundos) até o primeiro vencimento.
+
+    Returns:
+        List[Dict[str, Any]]: Documentos de mensagens recorrentes.
+    """
+    interval_hours = 1.0
+    now = datetime.now()
+    messages = []
+    for i in range(count):
+        offset = start_delay + spread * i / max(1, count - 1)
+        # last_sent_at tal que o próximo envio caia em now + offset
+        last_sent_at = now + timedelta(seconds=offset) - timedelta(hours=interval_hours)
+        messages.append({
+            "_id": f"msg{i}",
+            "chat_id": i,
+            "message": f"Mensagem {i}",
+            "interval_hours": interval_hours,
+            "last_sent_at": last_sent_at,
+            "active": True,
+        })
+    return messages
+
+
+def bench_heap_operations(manager: RecurringMessagesManager, count: int) -> Dict[str, float]:
+    """
+    Mede o custo médio (em microssegundos) de adicionar, editar e remover entradas.
+
+    Args:
+        manager (RecurringMessagesManager): Gerenciador já carregado.
+        count (int): Número de operações de cada tipo.
+
+    Returns:
+        Dict[str, float]: Custo médio por operação.
+    """
+    far = time.time() + 3600
+    docs = [{"_id": f"extra{i}", "chat_id": -i, "message": "x", "interval_hours": 1.0, "active": True}
+            for i in range(count)]
+
+    start = time.perf_counter()
+    for i, doc in enumerate(docs):
+        manager._schedule_message(doc, due=far + i)
+    add_us = (time.perf_counter() - start) / count * 1e6
+
+    start = time.perf_counter()
+    for i, doc in enumerate(docs):
+        manager._schedule_message(doc, due=far - i)
+    edit_us = (time.perf_counter() - start) / count * 1e6
+
+    start = time.perf_counter()
+    for doc in docs:
+        manager._unschedule_message(doc["_id"])
+    delete_us = (time.perf_counter() - start) / count * 1e6
+
+    return {"add_us": add_us, "edit_us": edit_us, "delete_us": delete_us}
+
+
+async def run(count: int, spread: float, start_delay: float, latency: float) -> Dict[str, Any]:
+    """
+    Executa o benchmark.
+
+    Args:
+        count (int): Número de mensagens.
+        spread (float): Janela de vencimentos em segundos.
+        start_delay (float): Atraso até o primeiro vencimento.
+        latency (float): Latência simulada de cada envio em segundos.
+
+    Returns:
+        Dict[str, Any]: Resultados do benchmark.
+    """
+    bot = FakeBot(latency)
+    application = MagicMock()
+    application.bot = bot
+    messages = build_messages(count, spread, start_delay)
+    due_by_chat = {m["chat_id"]: (m["last_sent_at"] + timedelta(hours=1)).timestamp() for m in messages}
+
+    with patch("src.utils.recurring_messages_manager.mongodb_client", FakeMongo(messages)):
+        manager = RecurringMessagesManager(application)
+
+        load_start = time.perf_counter()
+        await manager.start()
+        load_seconds = time.perf_counter() - load_start
+
+        heap_ops = bench_heap_operations(manager, min(count, 10000))
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        deadline = time.time() + start_delay + spread + 30
+        while len(bot.sent_at) < count and time.time() < deadline:
+            await asyncio.sleep(0.1)
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+
+        stats = manager.get_stats()
+        await manager.stop()
+
+    jitter_ms = [(bot.sent_at[chat_id] - due) * 1000 for chat_id, due in due_by_chat.items()
+                 if chat_id in bot.sent_at]
+
+    return {
+        "messages": count,
+        "spread_seconds": spread,
+        "send_latency_seconds": latency,
+        "sent": len(bot.sent_at),
+        "load_seconds": load_seconds,
+        "heap_operations": heap_ops,
+        "loop_wall_seconds": wall_seconds,
+        "loop_cpu_seconds": cpu_seconds,
+        "cpu_per_send_us": cpu_seconds / max(1, len(bot.sent_at)) * 1e6,
+        "jitter_ms": percentiles(jitter_ms),
+        "manager_stats": stats,
+    }
+
+
+def main() -> None:
+    """Ponto de entrada do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark do agendador de mensagens recorrentes")
+    parser.add_argument("--messages", type=int, default=10000, help="Número de mensagens recorrentes")
+    parser.add_argument("--spread", type=float, default=5.0, help="Janela de vencimentos em segundos")
+    parser.add_argument("--start-delay", type=float, default=2.0, help="Atraso até o primeiro vencimento")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência simulada por envio em segundos")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.messages, args.spread, args.start_delay, args.latency))
+    path = write_results("recurring_scheduler", results, args.output)
+
+    print(f"Mensagens enviadas: {results['sent']}/{results['messages']}")
+    print(f"Carga inicial: {results['load_seconds']:.3f}s")
+    print(f"Heap (µs/op): {results['heap_operations']}")
+    print(f"CPU do loop: {results['loop_cpu_seconds']:.3f}s ({results['cpu_per_send_us']:.1f} µs/envio)")
+    print(f"Jitter (ms): {results['jitter_ms']}")
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
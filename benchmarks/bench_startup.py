@@ -0,0 +1,180 @@
+"""
+Benchmark da inicialização do bot (src.main e src.utils.startup).
+
+Mede duas partes da inicialização a frio:
+
+- imports: tempo de "import src.main" em processos novos (cada repetição
+  começa sem cache de módulos);
+- etapas de rede: criação dos índices do MongoDB e registro dos comandos no
+  Telegram, com latência simulada (--rtt) por comando ao banco e por chamada
+  à Bot API. Compara a forma anterior (um create_index por índice e as quatro
+  chamadas de comandos em sequência) com a atual (um createIndexes por
+  coleção, coleções em paralelo, chamadas de comandos em paralelo e registro
+  dispensado quando o hash gravado não mudou).
+
+Uso:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --rtt 20 --runs 10
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+from benchmarks.common import percentiles, print_table, write_results
+from src.utils.mongodb_client import MongoDBClient
+
+
+class SlowCollection:
+    """Coleção falsa: cada comando leva rtt segundos."""
+
+    def __init__(self, rtt: float, settings: Dict[str, Any]):
+        self.rtt = rtt
+        self.settings = settings
+
+    async def create_index(self, *args, **kwargs) -> None:
+        await asyncio.sleep(self.rtt)
+
+    async def create_indexes(self, indexes) -> None:
+        await asyncio.sleep(self.rtt)
+
+    async def find_one(self, query) -> Any:
+        await asyncio.sleep(self.rtt)
+        value = self.settings.get(query["_id"])
+        return {"value": value} if value is not None else None
+
+    async def update_one(self, query, update, upsert=False) -> None:
+        await asyncio.sleep(self.rtt)
+        self.settings[query["_id"]] = update["$set"]["value"]
+
+
+class SlowDatabase:
+    """Banco falso com latência por comando."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.settings: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> SlowCollection:
+        return SlowCollection(self.rtt, self.settings)
+
+    def __getattr__(self, name: str) -> SlowCollection:
+        return SlowCollection(self.rtt, self.settings)
+
+
+def slow_bot(rtt: float) -> MagicMock:
+    """Bot falso: cada chamada de comandos à Bot API leva rtt segundos."""
+    async def call(*args, **kwargs) -> bool:
+        await asyncio.sleep(rtt)
+        return True
+
+    bot = MagicMock()
+    bot.id = 42
+    bot.set_my_commands = call
+    bot.delete_my_commands = call
+    return bot
+
+
+async def sequential_indexes(db: SlowDatabase) -> None:
+    """Forma anterior: um create_index por índice, em sequência."""
+    for collection, indexes in MongoDBClient.INDEXES.items():
+        for index in indexes:
+            await db[collection].create_index(index.document["key"])
+
+
+async def sequential_commands(bot: MagicMock) -> None:
+    """Forma anterior: quatro chamadas de comandos em sequência, a cada inicialização."""
+    await bot.set_my_commands([])
+    await bot.set_my_commands([])
+    await bot.set_my_commands([])
+    await bot.delete_my_commands()
+
+
+def measure_imports(runs: int) -> Dict:
+    """Tempo de import do src.main em processos novos (em ms)."""
+    code = "import time; t = time.perf_counter(); import src.main; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        samples.append(float(output.stdout.strip().splitlines()[-1]))
+    return {"scenario": "imports", "latency_ms": {key: value * 1000 for key, value in percentiles(samples).items()}}
+
+
+async def measure_network(name: str, runs: int, rtt: float) -> Dict:
+    """
+    Mede uma forma das etapas de rede.
+
+    Args:
+        name (str): sequential, parallel ou parallel_cached.
+        runs (int): Repetições.
+        rtt (float): Latência simulada por comando (em segundos).
+
+    Returns:
+        Dict: Percentis (em ms) do tempo das etapas.
+    """
+    from src.main import setup_commands
+
+    samples = []
+    for _ in range(runs):
+        db = SlowDatabase(rtt)
+        client = MongoDBClient()
+        client.db = db
+        application = MagicMock()
+        application.bot = slow_bot(rtt)
+        with patch("src.main.mongodb_client", client), patch("src.main.Config.get_owner_id", return_value=1):
+            if name == "parallel_cached":
+                # Registro de uma inicialização anterior com os mesmos menus
+                await setup_commands(application)
+            started = time.perf_counter()
+            if name == "sequential":
+                await sequential_indexes(db)
+                await sequential_commands(application.bot)
+            else:
+                await client.ensure_indexes()
+                await setup_commands(application)
+            samples.append(time.perf_counter() - started)
+    return {"scenario": name, "latency_ms": {key: value * 1000 for key, value in percentiles(samples).items()}}
+
+
+def run(args: argparse.Namespace) -> Dict:
+    """
+    Executa o benchmark.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict: Resultados de cada cenário.
+    """
+    scenarios: List[Dict] = [measure_imports(args.import_runs)]
+    rtt = args.rtt / 1000
+    for name in ("sequential", "parallel", "parallel_cached"):
+        scenarios.append(asyncio.run(measure_network(name, args.runs, rtt)))
+    return {"rtt_ms": args.rtt, "runs": args.runs, "import_runs": args.import_runs, "scenarios": scenarios}
+
+
+def main() -> None:
+    """Ponto de entrada do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização do bot")
+    parser.add_argument("--rtt", type=float, default=10.0, help="Latência simulada por comando (em ms)")
+    parser.add_argument("--runs", type=int, default=5, help="Repetições das etapas de rede")
+    parser.add_argument("--import-runs", type=int, default=5, help="Processos novos para medir os imports")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    results = run(args)
+    path = write_results("startup", results, args.output)
+
+    rows = [
+        {"cenario": r["scenario"], "p50_ms": r["latency_ms"]["p50"], "max_ms": r["latency_ms"]["max"]}
+        for r in results["scenarios"]
+    ]
+    print_table(rows, ["cenario", "p50_ms", "max_ms"])
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Utilitários compartilhados pelos benchmarks.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+# Diretório padrão onde os resultados são gravados
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# MongoDB padrão dos benchmarks, que recriam coleções ou apagam o banco --db-name
+LOCAL_MONGO_URI = "mongodb://localhost:27017"
+LOCAL_MONGO_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (50, 95, 99)) -> Dict[str, float]:
+    """
+    Calcula percentis (método do vizinho mais próximo) de uma amostra.
+    
+    Args:
+        values (Sequence[float]): Amostra.
+        points (Sequence[int]): Percentis desejados.
+        
+    Returns:
+        Dict[str, float]: Percentis no formato {"p50": ..., "p95": ...}, além de min, max e média.
+    """
+    if not values:
+        return {f"p{p}": 0.0 for p in points}
+    
+    ordered = sorted(values)
+    result = {
+        f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+        for p in points
+    }
+    result["min"] = ordered[0]
+    result["max"] = ordered[-1]
+    result["mean"] = sum(ordered) / len(ordered)
+    return result
+
+
+def write_results(name: str, results: Dict[str, Any], output: Optional[str] = None) -> str:
+    """
+    Grava os resultados de um benchmark em JSON.
+    
+    Args:
+        name (str): Nome do benchmark.
+        results (Dict[str, Any]): Resultados.
+        output (Optional[str]): Caminho do arquivo. Se omitido, usa benchmarks/results/<name>.json.
+        
+    Returns:
+        str: Caminho do arquivo gravado.
+    """
+    path = output or os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    
+    payload = {
+        "benchmark": name,
+        "timestamp": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False, default=str)
+    return path
+
+
+def _git_commit() -> Optional[str]:
+    """Commit atual do repositório (para comparar resultados entre versões), se disponível."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    """
+    Imprime uma tabela simples de resultados.
+    
+    Args:
+        rows (List[Dict[str, Any]]): Linhas da tabela.
+        columns (Sequence[str]): Colunas a imprimir.
+    """
+    widths = {
+        col: max(len(col), *(len(_fmt(row.get(col))) for row in rows)) if rows else len(col)
+        for col in columns
+    }
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    for row in rows:
+        print("  ".join(_fmt(row.get(col)).ljust(widths[col]) for col in columns))
+
+
+def _fmt(value: Any) -> str:
+    """Formata um valor para a tabela."""
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return str(value)
+
+
+def add_mongo_arguments(parser: argparse.ArgumentParser, db_name: str, db_help: str) -> None:
+    """
+    Adiciona --mongo-uri (padrão: mongod local), --allow-remote-mongo e --db-name a um parser.
+
+    O MONGODB_CONNECTION_STRING do bot não é usado como padrão: ele costuma
+    apontar para o banco de produção, e os benchmarks apagam dados.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser do benchmark.
+        db_name (str): Banco padrão.
+        db_help (str): Ajuda do --db-name (o que o benchmark faz com o banco).
+    """
+    parser.add_argument("--mongo-uri", default=LOCAL_MONGO_URI, help=f"MongoDB usado (padrão: {LOCAL_MONGO_URI})")
+    parser.add_argument("--allow-remote-mongo", action="store_true",
+                        help="Permite um --mongo-uri fora de localhost")
+    parser.add_argument("--db-name", default=db_name, help=db_help)
+
+
+def mongo_uri_hosts(uri: str) -> List[str]:
+    """
+    Extrai os hosts de uma URI do MongoDB, sem consultar DNS.
+
+    Args:
+        uri (str): URI (mongodb:// ou mongodb+srv://).
+
+    Returns:
+        List[str]: Hosts, sem porta e sem colchetes (IPv6).
+    """
+    scheme, _, rest = uri.partition("://")
+    if scheme not in ("mongodb", "mongodb+srv"):
+        return []
+    hosts = rest.split("/", 1)[0].split("?", 1)[0].rpartition("@")[2]
+    result = []
+    for host in hosts.split(","):
+        if host.startswith("["):
+            result.append(host[1:].split("]", 1)[0])
+        else:
+            result.append(host.split(":", 1)[0])
+    return [host.lower() for host in result if host]
+
+
+def check_mongo_uri(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """
+    Encerra com erro se --mongo-uri não apontar para localhost e --allow-remote-mongo não foi passado.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser do benchmark.
+        args (argparse.Namespace): Argumentos de add_mongo_arguments.
+    """
+    hosts = mongo_uri_hosts(args.mongo_uri)
+    if args.allow_remote_mongo or (hosts and all(host in LOCAL_MONGO_HOSTS for host in hosts)):
+        return
+    parser.error(
+        f"--mongo-uri aponta para fora de localhost ({', '.join(hosts) or args.mongo_uri}) e o benchmark "
+        f"apaga dados do banco {args.db_name!r}. Use --allow-remote-mongo para confirmar."
+    )
@@ -0,0 +1,79 @@
+"""
+Compara dois arquivos de resultados de benchmark (por exemplo, de dois commits).
+
+Para cada cenário presente nos dois arquivos (lista "scenarios" com
+"latency_ms"), mostra p50/p95 antes e depois e a variação. Sai com código 1
+se o p95 de algum cenário piorar mais que --threshold.
+
+Uso:
+    python -m benchmarks.compare antes.json depois.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+from benchmarks.common import print_table
+
+
+def load_scenarios(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Lê os cenários de um arquivo de resultados.
+
+    Args:
+        path (str): Arquivo gravado por write_results.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Cenários por nome.
+    """
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    return {scenario["scenario"]: scenario for scenario in payload["results"].get("scenarios", [])}
+
+
+def compare(before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compara os cenários em comum.
+
+    Args:
+        before (Dict[str, Dict[str, Any]]): Cenários da execução de referência.
+        after (Dict[str, Dict[str, Any]]): Cenários da nova execução.
+        threshold (float): Piora relativa do p95 considerada regressão (0.2 = 20%).
+
+    Returns:
+        List[Dict[str, Any]]: Uma linha por cenário, com a variação e se houve regressão.
+    """
+    rows = []
+    for name in before:
+        if name not in after:
+            continue
+        old, new = before[name]["latency_ms"], after[name]["latency_ms"]
+        change = (new["p95"] - old["p95"]) / old["p95"] if old["p95"] else 0.0
+        rows.append({
+            "cenário": name,
+            "p50_antes": old["p50"],
+            "p50_depois": new["p50"],
+            "p95_antes": old["p95"],
+            "p95_depois": new["p95"],
+            "variação_p95": f"{change:+.1%}",
+            "regressão": "SIM" if change > threshold else "",
+        })
+    return rows
+
+
+def main() -> None:
+    """Ponto de entrada da comparação."""
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark")
+    parser.add_argument("before", help="Resultado de referência (JSON)")
+    parser.add_argument("after", help="Novo resultado (JSON)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Piora relativa do p95 tolerada")
+    args = parser.parse_args()
+
+    rows = compare(load_scenarios(args.before), load_scenarios(args.after), args.threshold)
+    print_table(rows, ["cenário", "p50_antes", "p50_depois", "p95_antes", "p95_depois", "variação_p95", "regressão"])
+    if any(row["regressão"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Bot API do Telegram falsa, para testes de carga locais.
+
+Atende o python-telegram-bot apontado para ela via base_url
+(Application.builder().base_url(fake.base_url)), com latência configurável e
+injeção de respostas 429. As atualizações são entregues por getUpdates a
+partir de uma fila alimentada por push_update().
+
+Métodos implementados: getMe, getUpdates, sendMessage, editMessageText,
+setMessageReaction, deleteMessage e banChatMember. Qualquer outro método
+(setMyCommands, deleteWebhook, ...) responde true.
+
+Uso isolado (para apontar um bot de teste manualmente):
+    python -m benchmarks.fake_bot_api --port 8081 --latency 0.05 --rate-limit-ratio 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+from src.utils.http_server import HTTPRequest, HTTPResponse, MiniHTTPServer
+
+# Métodos que nunca sofrem latência simulada nem 429
+CONTROL_METHODS = {"getMe", "getUpdates", "deleteWebhook", "setMyCommands", "deleteMyCommands"}
+
+
+class FakeBotAPI:
+    """Servidor que imita a Bot API do Telegram."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+        bot_id: int = 999000,
+        username: str = "fake_gym_bot"
+    ):
+        """
+        Args:
+            host (str): Endereço de escuta.
+            port (int): Porta de escuta (0 escolhe uma porta livre).
+            latency (float): Latência (em segundos) somada a cada chamada.
+            jitter (float): Variação aleatória máxima (em segundos) somada à latência.
+            rate_limit_ratio (float): Fração das chamadas respondidas com 429.
+            retry_after (int): Valor de retry_after (em segundos) das respostas 429.
+            seed (Optional[int]): Semente do gerador aleatório (execuções reprodutíveis).
+            bot_id (int): ID do bot devolvido por getMe.
+            username (str): Username do bot devolvido por getMe.
+        """
+        self.server = MiniHTTPServer(self._handle, host=host, port=port)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.bot_user = {"id": bot_id, "is_bot": True, "first_name": "Fake Bot", "username": username}
+
+        self._updates: List[Dict[str, Any]] = []
+        self._new_update = asyncio.Event()
+        self._next_update_id = 1
+        self._next_message_id = 1_000_000
+
+        # Contadores por método e respostas 429
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.rate_limited: Dict[str, int] = defaultdict(int)
+        # Formato: {message_id respondido: horário (time.time()) da resposta do bot}
+        self.replies: Dict[int, float] = {}
+        self.sent_messages: List[Dict[str, Any]] = []
+
+    @property
+    def base_url(self) -> str:
+        """base_url para o ApplicationBuilder (o token é concatenado pelo python-telegram-bot)."""
+        return f"http://{self.server.host}:{self.server.port}/bot"
+
+    async def start(self) -> None:
+        """Inicia o servidor."""
+        await self.server.start()
+
+    async def stop(self) -> None:
+        """Para o servidor."""
+        await self.server.stop()
+
+    def push_update(self, update: Dict[str, Any]) -> int:
+        """
+        Enfileira uma atualização para o próximo getUpdates.
+
+        Args:
+            update (Dict[str, Any]): Atualização no formato da Bot API (sem update_id).
+
+        Returns:
+            int: update_id atribuído.
+        """
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        self._updates.append({"update_id": update_id, **update})
+        self._new_update.set()
+        return update_id
+
+    def next_message_id(self) -> int:
+        """Reserva um message_id (para mensagens de usuários simulados ou do bot)."""
+        self._next_message_id += 1
+        return self._next_message_id
+
+    async def _handle(self, request: HTTPRequest) -> HTTPResponse:
+        """Despacha uma chamada /bot<token>/<método>."""
+        parts = request.path.strip("/").split("/")
+        if len(parts) != 2 or not parts[0].startswith("bot"):
+            return self._error(404, "Not Found")
+        method = parts[1]
+        params = self._parse_params(request)
+        self.calls[method] += 1
+
+        if method not in CONTROL_METHODS:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.rate_limit_ratio and self.random.random() < self.rate_limit_ratio:
+                self.rate_limited[method] += 1
+                return self._json(429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                })
+
+        if method == "getMe":
+            return self._ok({**self.bot_user, "can_join_groups": True,
+                             "can_read_all_group_messages": True, "supports_inline_queries": False})
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if method == "sendMessage":
+            return self._ok(self._send_message(params))
+        if method == "editMessageText":
+            if "inline_message_id" in params:
+                return self._ok(True)
+            return self._ok(self._message(params, int(params["message_id"])))
+        return self._ok(True)
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Entrega as atualizações a partir de offset, aguardando até timeout segundos por novas."""
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        timeout = float(params.get("timeout", 0) or 0)
+
+        if offset:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    def _send_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Registra uma mensagem enviada pelo bot e devolve o objeto Message."""
+        message = self._message(params, self.next_message_id())
+        self.sent_messages.append(message)
+
+        reply_to = params.get("reply_to_message_id")
+        reply_parameters = params.get("reply_parameters")
+        if reply_parameters:
+            reply_to = reply_parameters.get("message_id")
+        if reply_to is not None:
+            self.replies.setdefault(int(reply_to), time.time())
+        return message
+
+    def _message(self, params: Dict[str, Any], message_id: int) -> Dict[str, Any]:
+        """Monta um objeto Message enviado pelo bot."""
+        chat_id = int(params["chat_id"])
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private", "title": "Carga"},
+            "from": self.bot_user,
+            "text": params.get("text", ""),
+        }
+
+    @staticmethod
+    def _parse_params(request: HTTPRequest) -> Dict[str, Any]:
+        """
+        Lê os parâmetros da chamada (query string, formulário ou JSON).
+
+        O python-telegram-bot envia formulários com valores compostos codificados
+        em JSON (por exemplo, reply_parameters); esses valores são decodificados.
+        """
+        params: Dict[str, Any] = dict(request.query)
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("application/json") and request.body:
+            params.update(json.loads(request.body))
+        elif content_type.startswith("application/x-www-form-urlencoded"):
+            params.update(parse_qsl(request.body.decode("utf-8")))
+
+        for key, value in params.items():
+            if isinstance(value, str) and value[:1] in ("{", "["):
+                try:
+                    params[key] = json.loads(value)
+                except ValueError:
+                    pass
+        return params
+
+    @staticmethod
+    def _json(status: int, payload: Dict[str, Any]) -> HTTPResponse:
+        return HTTPResponse(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _ok(self, result: Any) -> HTTPResponse:
+        return self._json(200, {"ok": True, "result": result})
+
+    def _error(self, status: int, description: str) -> HTTPResponse:
+        return self._json(status, {"ok": False, "error_code": status, "description": description})
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """Mantém a Bot API falsa no ar até ser interrompida."""
+    fake = FakeBotAPI(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        rate_limit_ratio=args.rate_limit_ratio, retry_after=args.retry_after, seed=args.seed
+    )
+    await fake.start()
+    print(f"Bot API falsa em {fake.base_url}<token>/<método>")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+def main() -> None:
+    """Ponto de entrada da Bot API falsa."""
+    parser = argparse.ArgumentParser(description="Bot API do Telegram falsa para testes de carga")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=8081, help="Porta de escuta")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência por chamada em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variação aleatória máxima da latência")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fração das chamadas respondidas com 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after (segundos) das respostas 429")
+    parser.add_argument("--seed", type=int, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
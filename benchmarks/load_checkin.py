@@ -0,0 +1,214 @@
+"""
+Teste de carga ponta a ponta de uma corrida de check-ins.
+
+Sobe a Bot API falsa (benchmarks.fake_bot_api), cria uma âncora de check-in
+em um MongoDB local e executa a Application do bot, com o mesmo handler de
+check-in do src.main, fazendo polling na API falsa. N usuários simulados
+respondem à âncora com uma foto, a uma taxa configurável, e são medidos:
+
+- a latência ponta a ponta (atualização entregue ao getUpdates até a resposta
+  do bot chegar à API falsa), em percentis;
+- a vazão (check-ins respondidos por segundo);
+- as chamadas por método da Bot API e as respostas 429 injetadas;
+- o detalhamento por handler e o tempo no MongoDB/Telegram (src.utils.perf).
+
+O banco usado (--db-name) é apagado no início e no fim (exceto com --keep-data).
+O MongoDB padrão é mongodb://localhost:27017; outro endereço fora de localhost
+exige --allow-remote-mongo.
+
+Uso:
+    python -m benchmarks.load_checkin --users 500 --rate 100 --latency 0.03
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from telegram.ext import Application, MessageHandler, filters
+
+from benchmarks.common import add_mongo_arguments, check_mongo_uri, percentiles, write_results
+from benchmarks.fake_bot_api import FakeBotAPI
+from src.bot.checkin_handlers import handle_checkin_response
+from src.utils.anthropic_client import AnthropicClient
+from src.utils.mongodb_client import MongoDBClient
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.perf import TimedHTTPXRequest, instrument_application, instrument_class, perf_stats
+
+# Chat e usuários simulados
+CHAT_ID = -1001234567890
+FIRST_USER_ID = 5_000_000
+FAKE_TOKEN = "123456:LOAD-TEST"
+
+
+def build_photo_reply(fake: FakeBotAPI, user_id: int, anchor_message_id: int) -> Dict[str, Any]:
+    """
+    Monta a atualização de um usuário respondendo à âncora com uma foto.
+
+    Args:
+        fake (FakeBotAPI): API falsa (reserva o message_id).
+        user_id (int): ID do usuário simulado.
+        anchor_message_id (int): ID da mensagem âncora.
+
+    Returns:
+        Dict[str, Any]: Atualização no formato da Bot API.
+    """
+    chat = {"id": CHAT_ID, "type": "supergroup", "title": "GYM NATION (carga)"}
+    return {
+        "message": {
+            "message_id": fake.next_message_id(),
+            "date": int(time.time()),
+            "chat": chat,
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Atleta {user_id}",
+                     "username": f"atleta{user_id}"},
+            "photo": [{"file_id": f"photo{user_id}", "file_unique_id": f"u{user_id}",
+                       "width": 640, "height": 480}],
+            "caption": "Treino pago 💪",
+            "reply_to_message": {"message_id": anchor_message_id, "date": int(time.time()) - 60,
+                                 "chat": chat, "from": fake.bot_user, "text": "Check-in de hoje!"},
+        }
+    }
+
+
+def build_application(fake: FakeBotAPI, concurrency: int) -> Application:
+    """
+    Cria a Application apontada para a API falsa, com o handler de check-in do bot.
+
+    Args:
+        fake (FakeBotAPI): API falsa.
+        concurrency (int): Atualizações processadas em paralelo (1 como no bot).
+
+    Returns:
+        Application: Aplicação configurada e instrumentada.
+    """
+    application = (
+        Application.builder()
+        .token(FAKE_TOKEN)
+        .base_url(fake.base_url)
+        .request(TimedHTTPXRequest(connection_pool_size=max(8, concurrency * 2)))
+        .get_updates_request(TimedHTTPXRequest())
+        .concurrent_updates(concurrency)
+        .build()
+    )
+    # Mesmo filtro do src.main, sem o filtro de proprietário
+    application.add_handler(MessageHandler(
+        filters.UpdateType.MESSAGE
+        & (filters.PHOTO | filters.VIDEO | filters.ANIMATION | filters.Document.ALL)
+        & filters.REPLY
+        & ~filters.COMMAND,
+        handle_checkin_response
+    ))
+    instrument_class(MongoDBClient, "mongo")
+    instrument_class(AnthropicClient, "llm")
+    instrument_application(application)
+    return application
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Executa o teste de carga.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict[str, Any]: Resultados do teste.
+    """
+    fake = FakeBotAPI(latency=args.latency, jitter=args.jitter,
+                      rate_limit_ratio=args.rate_limit_ratio, seed=args.seed)
+    await fake.start()
+
+    mongodb_client.connection_string = args.mongo_uri
+    await mongodb_client.connect(args.db_name)
+    await mongodb_client.client.drop_database(args.db_name)
+    await mongodb_client.ensure_indexes()
+
+    anchor_message_id = fake.next_message_id()
+    await mongodb_client.set_checkin_anchor(CHAT_ID, anchor_message_id, points_value=1, anchor_text="Check-in de hoje!")
+
+    application = build_application(fake, args.concurrency)
+    await application.initialize()
+    await application.start()
+    await application.updater.start_polling(poll_interval=0.0, timeout=10)
+
+    injected_at: Dict[int, float] = {}
+    perf_stats.reset()
+    started = time.time()
+    try:
+        for index in range(args.users):
+            update = build_photo_reply(fake, FIRST_USER_ID + index, anchor_message_id)
+            fake.push_update(update)
+            injected_at[update["message"]["message_id"]] = time.time()
+            if args.rate:
+                await asyncio.sleep(1 / args.rate)
+
+        deadline = time.time() + args.timeout
+        while time.time() < deadline and not all(message_id in fake.replies for message_id in injected_at):
+            await asyncio.sleep(0.05)
+        finished = time.time()
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        await fake.stop()
+        if not args.keep_data:
+            await mongodb_client.client.drop_database(args.db_name)
+        await mongodb_client.close()
+
+    latencies_ms: List[float] = [
+        (fake.replies[message_id] - sent) * 1000
+        for message_id, sent in injected_at.items() if message_id in fake.replies
+    ]
+    last_reply = max((fake.replies[message_id] for message_id in injected_at if message_id in fake.replies),
+                     default=finished)
+    elapsed = max(1e-9, last_reply - started)
+
+    return {
+        "users": args.users,
+        "injection_rate": args.rate or "burst",
+        "concurrency": args.concurrency,
+        "api_latency_seconds": args.latency,
+        "rate_limit_ratio": args.rate_limit_ratio,
+        "completed": len(latencies_ms),
+        "missing": args.users - len(latencies_ms),
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": len(latencies_ms) / elapsed,
+        "latency_ms": percentiles(latencies_ms),
+        "api_calls": dict(fake.calls),
+        "api_rate_limited": dict(fake.rate_limited),
+        "perf": perf_stats.summary(),
+    }
+
+
+def main() -> None:
+    """Ponto de entrada do teste de carga."""
+    parser = argparse.ArgumentParser(description="Teste de carga ponta a ponta de check-ins")
+    parser.add_argument("--users", type=int, default=500, help="Número de usuários fazendo check-in")
+    parser.add_argument("--rate", type=float, default=100.0,
+                        help="Check-ins injetados por segundo (0 injeta todos de uma vez)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Atualizações processadas em paralelo pela Application")
+    parser.add_argument("--latency", type=float, default=0.03, help="Latência da Bot API falsa em segundos")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Variação máxima da latência em segundos")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fração das chamadas respondidas com 429")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Tempo máximo de espera pelas respostas")
+    add_mongo_arguments(parser, "bench_load_checkin", "Banco usado (apagado no início e no fim)")
+    parser.add_argument("--keep-data", action="store_true", help="Não apaga o banco ao final")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+    check_mongo_uri(parser, args)
+
+    results = asyncio.run(run(args))
+    path = write_results("load_checkin", results, args.output)
+
+    print(f"Check-ins respondidos: {results['completed']}/{results['users']} "
+          f"em {results['elapsed_seconds']:.2f}s ({results['throughput_per_second']:.1f}/s)")
+    print(f"Latência ponta a ponta (ms): {results['latency_ms']}")
+    print(f"Chamadas à Bot API: {results['api_calls']} (429: {results['api_rate_limited']})")
+    for row in results["perf"][:8]:
+        print(f"  {row['name']:<45} p50={row['p50'] * 1000:.1f}ms p95={row['p95'] * 1000:.1f}ms n={row['count']}")
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
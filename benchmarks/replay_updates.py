@@ -0,0 +1,253 @@
+"""
+Replay de atualizações gravadas em produção (src.utils.update_recorder).
+
+Reproduz um arquivo JSONL de atualizações anonimizadas no mesmo grafo de
+handlers do bot (src.main.register_handlers), com a Bot API trocada pela
+Bot API falsa (benchmarks.fake_bot_api) e a LLM trocada por uma resposta fixa
+com latência configurável. O MongoDB é um mongod local (--mongo-uri; um
+servidor fora de localhost exige --allow-remote-mongo) e o banco --db-name é
+apagado no início e no fim, exceto com --keep-data.
+
+Os intervalos originais entre as atualizações são respeitados, divididos por
+--speed (10 reproduz 10x mais rápido; 0 injeta tudo de uma vez). Ao final, são
+registrados a vazão, o tempo por handler e o tempo no MongoDB/Telegram/LLM
+(src.utils.perf), para comparar mudanças em filtros, caches e handlers com o
+tráfego real antes do deploy.
+
+Uso:
+    python -m benchmarks.replay_updates updates.jsonl --speed 10
+    python -m benchmarks.replay_updates updates.jsonl --speed 0 --latency 0.03 --llm-latency 1.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+
+from benchmarks.common import add_mongo_arguments, check_mongo_uri, write_results
+from benchmarks.fake_bot_api import FakeBotAPI
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.perf import POST_GROUP, TimedHTTPXRequest, instrument_application, instrument_class, perf_stats
+
+FAKE_TOKEN = "123456:REPLAY"
+# Chave falsa: usada pelo cliente em bot_data e pelos clientes que os handlers criam
+# ao responder (ANTHROPIC_API_KEY); as chamadas à LLM são simuladas por stub_llm
+FAKE_ANTHROPIC_KEY = "sk-ant-replay-0000"
+# Campos de data deslocados para o horário do replay
+DATE_KEYS = frozenset({"date", "edit_date", "forward_date"})
+
+
+def load_recording(path: str) -> Tuple[Dict[str, Any], List[Tuple[float, Dict[str, Any]]]]:
+    """
+    Lê uma gravação.
+
+    Args:
+        path (str): Arquivo JSONL gravado pelo UpdateRecorder.
+
+    Returns:
+        Tuple[Dict[str, Any], List[Tuple[float, Dict[str, Any]]]]: Cabeçalho e
+            (tempo desde o início da gravação, atualização) de cada linha.
+    """
+    header: Dict[str, Any] = {}
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get("type") == "header":
+                header = item
+            else:
+                entries.append((float(item["t"]), item["update"]))
+    return header, entries
+
+
+def shift_dates(data: Any, delta: int) -> Any:
+    """Desloca (em segundos) os campos de data de uma atualização serializada."""
+    if isinstance(data, list):
+        return [shift_dates(item, delta) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        key: value + delta if key in DATE_KEYS and isinstance(value, int) else shift_dates(value, delta)
+        for key, value in data.items()
+    }
+
+
+def stub_llm(latency: float) -> None:
+    """
+    Troca a chamada à API da Anthropic por uma resposta fixa.
+
+    Args:
+        latency (float): Tempo simulado (em segundos) de cada resposta.
+    """
+    from src.utils.anthropic_client import AnthropicClient
+
+    async def generate_response(self, prompt_template: str, message_content: str, *args, **kwargs) -> str:
+        await asyncio.sleep(latency)
+        return "Resposta simulada 💪"
+
+    AnthropicClient.generate_response = generate_response
+
+
+def build_application(fake: FakeBotAPI, concurrency: int) -> Application:
+    """
+    Cria a Application apontada para a API falsa, com os handlers do bot.
+
+    Args:
+        fake (FakeBotAPI): API falsa.
+        concurrency (int): Atualizações processadas em paralelo (1 como no bot).
+
+    Returns:
+        Application: Aplicação configurada e instrumentada.
+    """
+    # Importado aqui, depois de run() definir OWNER_ID e ANTHROPIC_API_KEY no ambiente
+    from src.main import register_handlers
+    from src.utils.anthropic_client import AnthropicClient
+    from src.utils.mongodb_client import MongoDBClient
+
+    application = (
+        Application.builder()
+        .token(FAKE_TOKEN)
+        .base_url(fake.base_url)
+        .request(TimedHTTPXRequest(connection_pool_size=max(8, concurrency * 2)))
+        .concurrent_updates(concurrency)
+        .updater(None)
+        .build()
+    )
+    application.bot_data["anthropic_client"] = AnthropicClient(api_key=FAKE_ANTHROPIC_KEY)
+    register_handlers(application)
+    instrument_class(MongoDBClient, "mongo")
+    instrument_class(AnthropicClient, "llm")
+    instrument_application(application)
+    return application
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Executa o replay.
+
+    Args:
+        args (argparse.Namespace): Argumentos da linha de comando.
+
+    Returns:
+        Dict[str, Any]: Resultados do replay.
+    """
+    header, entries = load_recording(args.file)
+    if args.limit:
+        entries = entries[:args.limit]
+
+    # O proprietário da gravação (ID anonimizado) continua sendo o proprietário no replay
+    if header.get("owner_id") is not None:
+        os.environ["OWNER_ID"] = str(header["owner_id"])
+    os.environ.setdefault("ANTHROPIC_API_KEY", FAKE_ANTHROPIC_KEY)
+    stub_llm(args.llm_latency)
+
+    fake = FakeBotAPI(latency=args.latency, jitter=args.jitter, seed=args.seed,
+                      bot_id=header.get("bot_id") or 999000,
+                      username=header.get("bot_username") or "fake_gym_bot")
+    await fake.start()
+
+    mongodb_client.connection_string = args.mongo_uri
+    await mongodb_client.connect(args.db_name)
+    await mongodb_client.client.drop_database(args.db_name)
+    await mongodb_client.ensure_indexes()
+
+    application = build_application(fake, args.concurrency)
+    processed = 0
+    all_processed = asyncio.Event()
+
+    async def count_processed(update: Update, context) -> None:
+        nonlocal processed
+        processed += 1
+        if processed >= len(entries):
+            all_processed.set()
+
+    # Depois do fechamento da medição (POST_GROUP): conta as atualizações já processadas
+    application.add_handler(TypeHandler(Update, count_processed), group=POST_GROUP + 1)
+
+    await application.initialize()
+    await application.start()
+
+    recorded_at = header.get("recorded_at", 0.0)
+    perf_stats.reset()
+    started = time.time()
+    try:
+        for offset, data in entries:
+            if args.speed:
+                wait = started + offset / args.speed - time.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            data = shift_dates(data, int(time.time() - (recorded_at + offset)))
+            await application.update_queue.put(Update.de_json(data, application.bot))
+
+        try:
+            await asyncio.wait_for(all_processed.wait(), timeout=args.timeout)
+        except asyncio.TimeoutError:
+            pass
+        finished = time.time()
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await fake.stop()
+        if not args.keep_data:
+            await mongodb_client.client.drop_database(args.db_name)
+        await mongodb_client.close()
+
+    elapsed = max(1e-9, finished - started)
+    recorded_span = entries[-1][0] - entries[0][0] if entries else 0.0
+    return {
+        "file": os.path.basename(args.file),
+        "updates": len(entries),
+        "processed": processed,
+        "speed": args.speed or "burst",
+        "concurrency": args.concurrency,
+        "api_latency_seconds": args.latency,
+        "llm_latency_seconds": args.llm_latency,
+        "recorded_span_seconds": recorded_span,
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": processed / elapsed,
+        "api_calls": dict(fake.calls),
+        "perf": perf_stats.summary(),
+    }
+
+
+def main() -> None:
+    """Ponto de entrada do replay."""
+    parser = argparse.ArgumentParser(description="Replay de atualizações gravadas no grafo de handlers do bot")
+    parser.add_argument("file", help="Arquivo JSONL gravado com UPDATE_RECORD_FILE")
+    parser.add_argument("--speed", type=float, default=10.0,
+                        help="Compressão do tempo (10 = 10x mais rápido; 0 injeta tudo de uma vez)")
+    parser.add_argument("--limit", type=int, default=0, help="Reproduz apenas as primeiras N atualizações")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Atualizações processadas em paralelo pela Application")
+    parser.add_argument("--latency", type=float, default=0.03, help="Latência da Bot API falsa em segundos")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Variação máxima da latência em segundos")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Latência simulada da LLM em segundos")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Tempo máximo de espera pelo processamento após a última injeção")
+    add_mongo_arguments(parser, "bench_replay", "Banco usado (apagado no início e no fim)")
+    parser.add_argument("--keep-data", action="store_true", help="Não apaga o banco ao final")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+    check_mongo_uri(parser, args)
+
+    results = asyncio.run(run(args))
+    path = write_results("replay", results, args.output)
+
+    print(f"Atualizações processadas: {results['processed']}/{results['updates']} "
+          f"em {results['elapsed_seconds']:.2f}s ({results['throughput_per_second']:.1f}/s; "
+          f"gravação original: {results['recorded_span_seconds']:.0f}s)")
+    print(f"Chamadas à Bot API: {results['api_calls']}")
+    for row in results["perf"][:15]:
+        print(f"  {row['name']:<55} p50={row['p50'] * 1000:.1f}ms p95={row['p95'] * 1000:.1f}ms n={row['count']}")
+    print(f"Resultados gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
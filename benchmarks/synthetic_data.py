@@ -0,0 +1,299 @@
+"""
+Gerador de dados sintéticos para os benchmarks do MongoDB.
+
+Preenche um banco com o volume de produção (ou maior) nas coleções usadas
+pelos caminhos quentes do bot:
+
+- checkin_anchors e user_checkins: milhões de check-ins espalhados por chats,
+  âncoras e usuários, com distribuição desigual (poucos chats e usuários muito
+  ativos, como nos grupos reais);
+- blacklist, correio_elegante (+ pix_payments e mail_stats) e monitored_messages.
+
+A geração é determinística para uma mesma semente. Um resumo do conjunto
+(chats, âncoras ativas, faixa de usuários) é gravado na coleção bench_meta
+para que os cenários possam ser executados de novo sem regerar os dados.
+
+Uso isolado:
+    python -m benchmarks.synthetic_data --checkins 2000000 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from benchmarks.common import add_mongo_arguments, check_mongo_uri
+
+# Documentos por insert_many
+BATCH_SIZE = 10000
+# Primeiro ID dos usuários sintéticos
+FIRST_USER_ID = 10_000_000
+# ID do documento de resumo em bench_meta
+META_ID = "dataset"
+
+
+class DatasetSpec:
+    """Tamanho do conjunto de dados sintético."""
+
+    def __init__(
+        self,
+        chats: int = 20,
+        users: int = 50000,
+        anchors_per_chat: int = 365,
+        checkins: int = 2_000_000,
+        blacklist: int = 200_000,
+        mails: int = 200_000,
+        monitored_messages: int = 1_000_000,
+        seed: int = 42
+    ):
+        """
+        Args:
+            chats (int): Número de grupos.
+            users (int): Número de usuários distintos.
+            anchors_per_chat (int): Âncoras de check-in por grupo (a última fica ativa).
+            checkins (int): Total de check-ins.
+            blacklist (int): Total de entradas na blacklist.
+            mails (int): Total de correios elegantes.
+            monitored_messages (int): Total de mensagens monitoradas.
+            seed (int): Semente do gerador aleatório.
+        """
+        self.chats = chats
+        self.users = users
+        self.anchors_per_chat = anchors_per_chat
+        self.checkins = checkins
+        self.blacklist = blacklist
+        self.mails = mails
+        self.monitored_messages = monitored_messages
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, int]:
+        """Parâmetros do conjunto, gravados junto com os resultados."""
+        return dict(vars(self))
+
+    def chat_ids(self) -> List[int]:
+        """IDs dos grupos sintéticos."""
+        return [-1001000000000 - index for index in range(self.chats)]
+
+
+def _skewed_index(rng: random.Random, size: int, skew: float = 1.2) -> int:
+    """Sorteia um índice em [0, size) com distribuição concentrada nos primeiros (aprox. Zipf)."""
+    return min(size - 1, int(size * rng.random() ** (1 + skew)))
+
+
+async def _insert_batches(
+    collection,
+    total: int,
+    make: Callable[[int], Dict[str, Any]],
+    label: str
+) -> None:
+    """Insere `total` documentos gerados por `make(i)` em lotes de BATCH_SIZE."""
+    started = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+    for index in range(total):
+        batch.append(make(index))
+        if len(batch) >= BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    print(f"  {label}: {total} documentos em {time.perf_counter() - started:.1f}s")
+
+
+def _anchor_documents(spec: DatasetSpec, now: datetime) -> Iterator[Dict[str, Any]]:
+    """Âncoras diárias de cada grupo; a mais recente fica ativa, uma em cada sete vale o dobro."""
+    for chat_id in spec.chat_ids():
+        for day in range(spec.anchors_per_chat):
+            created_at = now - timedelta(days=spec.anchors_per_chat - day)
+            is_last = day == spec.anchors_per_chat - 1
+            yield {
+                "_id": ObjectId(),
+                "chat_id": chat_id,
+                "message_id": 1000 + day,
+                "points_value": 2 if day % 7 == 6 else 1,
+                "anchor_text": f"Check-in do dia {day}",
+                "active": is_last,
+                "created_at": created_at,
+                "ended_at": None if is_last else created_at + timedelta(hours=20),
+            }
+
+
+async def generate(db: AsyncIOMotorDatabase, spec: DatasetSpec) -> Dict[str, Any]:
+    """
+    Apaga as coleções usadas e gera o conjunto de dados.
+
+    Args:
+        db (AsyncIOMotorDatabase): Banco de destino.
+        spec (DatasetSpec): Tamanho do conjunto.
+
+    Returns:
+        Dict[str, Any]: Resumo do conjunto (também gravado em bench_meta).
+    """
+    rng = random.Random(spec.seed)
+    now = datetime.now()
+    chat_ids = spec.chat_ids()
+
+    for name in ("checkin_anchors", "user_checkins", "blacklist", "correio_elegante",
+                 "pix_payments", "mail_stats", "monitored_messages", "quotas", "bench_meta"):
+        await db.drop_collection(name)
+
+    print("Gerando dados sintéticos...")
+    anchors = list(_anchor_documents(spec, now))
+    await db.checkin_anchors.insert_many(anchors, ordered=False)
+    anchors_by_chat: Dict[int, List[Dict[str, Any]]] = {}
+    for anchor in anchors:
+        anchors_by_chat.setdefault(anchor["chat_id"], []).append(anchor)
+    print(f"  checkin_anchors: {len(anchors)} documentos")
+
+    def make_checkin(index: int) -> Dict[str, Any]:
+        chat_id = chat_ids[_skewed_index(rng, len(chat_ids))]
+        anchor = rng.choice(anchors_by_chat[chat_id])
+        user_id = FIRST_USER_ID + _skewed_index(rng, spec.users)
+        return {
+            "chat_id": chat_id,
+            "user_id": user_id,
+            "user_name": f"Atleta {user_id}",
+            "username": f"atleta{user_id}",
+            "anchor_id": anchor["_id"],
+            "checkin_type": "plus" if anchor["points_value"] > 1 else "normal",
+            "points_value": anchor["points_value"],
+            "created_at": anchor["created_at"] + timedelta(seconds=rng.randint(0, 72000)),
+        }
+    await _insert_batches(db.user_checkins, spec.checkins, make_checkin, "user_checkins")
+
+    def make_blacklist(index: int) -> Dict[str, Any]:
+        user_id = FIRST_USER_ID + rng.randrange(spec.users)
+        return {
+            "chat_id": chat_ids[_skewed_index(rng, len(chat_ids))],
+            "message_id": index + 1,
+            "user_id": user_id,
+            "user_name": f"Atleta {user_id}",
+            "username": f"atleta{user_id}",
+            "message_text": f"mensagem suspeita {index}",
+            "added_by": FIRST_USER_ID,
+            "added_by_name": "Admin",
+            "added_at": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+        }
+    await _insert_batches(db.blacklist, spec.blacklist, make_blacklist, "blacklist")
+
+    statuses = ("published", "published", "published", "expired", "pending")
+
+    def make_mail(index: int) -> Dict[str, Any]:
+        sender_id = FIRST_USER_ID + _skewed_index(rng, spec.users)
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        status = rng.choice(statuses)
+        reported = [{"user_id": FIRST_USER_ID + rng.randrange(spec.users), "reported_at": created_at}] \
+            if rng.random() < 0.02 else []
+        return {
+            "sender_id": sender_id,
+            "sender_name": f"Atleta {sender_id}",
+            "recipient_username": f"atleta{FIRST_USER_ID + rng.randrange(spec.users)}",
+            "message_text": f"Correio elegante {index}",
+            "status": status,
+            "created_at": created_at,
+            "published_at": created_at + timedelta(hours=1) if status != "pending" else None,
+            "expires_at": created_at + timedelta(days=1) if status != "pending" else None,
+            "revealed_to": [],
+            "reported_by": reported,
+            "replies": [],
+        }
+    await _insert_batches(db.correio_elegante, spec.mails, make_mail, "correio_elegante")
+
+    def make_payment(index: int) -> Dict[str, Any]:
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        return {
+            "mail_id": str(ObjectId()),
+            "user_id": FIRST_USER_ID + rng.randrange(spec.users),
+            "status": "confirmed" if rng.random() < 0.8 else "pending",
+            "created_at": created_at,
+            "confirmed_at": created_at + timedelta(minutes=10),
+        }
+    await _insert_batches(db.pix_payments, spec.mails // 20, make_payment, "pix_payments")
+
+    def make_monitored(index: int) -> Dict[str, Any]:
+        user_id = FIRST_USER_ID + _skewed_index(rng, spec.users)
+        return {
+            "chat_id": chat_ids[_skewed_index(rng, len(chat_ids))],
+            "message_id": index + 1,
+            "user_id": user_id,
+            "user_name": f"Atleta {user_id}",
+            "text": f"bom dia, treino de hoje: {rng.choice(('peito', 'costas', 'perna', 'ombro'))} {index}",
+            "timestamp": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+        }
+    await _insert_batches(db.monitored_messages, spec.monitored_messages, make_monitored, "monitored_messages")
+
+    dataset = {
+        "_id": META_ID,
+        "spec": spec.to_dict(),
+        "chat_ids": chat_ids,
+        "active_anchors": {str(chat_id): str(anchors_by_chat[chat_id][-1]["_id"]) for chat_id in chat_ids},
+        "first_user_id": FIRST_USER_ID,
+        "generated_at": now,
+    }
+    await db.bench_meta.insert_one(dataset)
+    return dataset
+
+
+async def load_dataset(db: AsyncIOMotorDatabase) -> Optional[Dict[str, Any]]:
+    """
+    Lê o resumo de um conjunto já gerado.
+
+    Args:
+        db (AsyncIOMotorDatabase): Banco com os dados.
+
+    Returns:
+        Optional[Dict[str, Any]]: Resumo gravado por generate(), ou None se não existir.
+    """
+    return await db.bench_meta.find_one({"_id": META_ID})
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adiciona os parâmetros de tamanho do conjunto a um parser."""
+    defaults = DatasetSpec()
+    parser.add_argument("--chats", type=int, default=defaults.chats, help="Número de grupos")
+    parser.add_argument("--users", type=int, default=defaults.users, help="Número de usuários")
+    parser.add_argument("--anchors-per-chat", type=int, default=defaults.anchors_per_chat,
+                        help="Âncoras de check-in por grupo")
+    parser.add_argument("--checkins", type=int, default=defaults.checkins, help="Total de check-ins")
+    parser.add_argument("--blacklist", type=int, default=defaults.blacklist, help="Entradas na blacklist")
+    parser.add_argument("--mails", type=int, default=defaults.mails, help="Correios elegantes")
+    parser.add_argument("--monitored-messages", type=int, default=defaults.monitored_messages,
+                        help="Mensagens monitoradas")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Semente do gerador aleatório")
+    add_mongo_arguments(parser, "bench_mongodb", "Banco usado (coleções recriadas)")
+
+
+def spec_from_args(args: argparse.Namespace) -> DatasetSpec:
+    """Monta o DatasetSpec a partir dos argumentos de add_spec_arguments."""
+    return DatasetSpec(
+        chats=args.chats, users=args.users, anchors_per_chat=args.anchors_per_chat,
+        checkins=args.checkins, blacklist=args.blacklist, mails=args.mails,
+        monitored_messages=args.monitored_messages, seed=args.seed
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from src.utils.mongodb_client import MongoDBClient
+
+    client = MongoDBClient(args.mongo_uri)
+    await client.connect(args.db_name)
+    await client.ensure_indexes()
+    await generate(client.db, spec_from_args(args))
+    await client.rebuild_mail_stats()
+    await client.close()
+
+
+def main() -> None:
+    """Ponto de entrada do gerador."""
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para os benchmarks do MongoDB")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    check_mongo_uri(parser, args)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,34 @@
 Handlers para os comandos de blacklist.
 """
 import logging
-from typing import Optional, List, Dict, Any, Set
+import re
+from typing import Optional, Dict, Any
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReactionTypeEmoji
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode, ReactionEmoji
-from telegram.error import BadRequest, TimedOut
-from datetime import datetime
-import asyncio
+from telegram.error import BadRequest
+from datetime import datetime, timedelta
 from src.utils.mongodb_instance import mongodb_client
-from src.bot.handlers import is_admin, send_temporary_message
+from src.utils.deletion_scheduler import schedule_message_deletion
+from src.utils.chat_directory import chat_directory
+from src.utils.ban_jobs import get_ban_job_manager, format_ban_progress, format_ban_report
+from src.bot.handlers import is_admin, send_temporary_message, spawn_message_deletion
 from html import escape as escape_html
 from bson import ObjectId
+from bson.errors import InvalidId
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
+# Número de entradas exibidas por página no /blacklist
+BLACKLIST_PAGE_SIZE = 8
+
+# Caracteres especiais do MarkdownV2 e suas versões escapadas
+_MARKDOWN_V2_ESCAPES = tuple((char, f'\\{char}') for char in '_*[]()~`>#+-=|{}.!')
+_MARKDOWN_V2_SPECIAL = re.compile(r'[_*\[\]()~`>#+\-=|{}.!]')
+_MARKDOWN_V2_URL_ESCAPES = tuple((char, f'\\{char}') for char in ').!+-_={}|')
+_MARKDOWN_V2_URL_SPECIAL = re.compile(r'[).!+\-_={}|]')
+
 def escape_markdown_v2(text: str) -> str:
     """
     Escapa caracteres especiais do MarkdownV2.
@@ -27,9 +40,12 @@ def escape_markdown_v2(text: str) -> str:
     Returns:
         str: Texto com caracteres especiais escapados.
     """
-    special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-    for char in special_chars:
-        text = text.replace(char, f'\\{char}')
+    # A maioria dos nomes não tem caracteres especiais: uma busca descarta o texto de uma vez
+    if _MARKDOWN_V2_SPECIAL.search(text) is None:
+        return text
+    for char, escaped in _MARKDOWN_V2_ESCAPES:
+        if char in text:
+            text = text.replace(char, escaped)
     return text
 
 def escape_markdown_v2_url(url: str) -> str:
@@ -42,9 +58,11 @@ def escape_markdown_v2_url(url: str) -> str:
     Returns:
         str: URL com caracteres especiais escapados.
     """
-    special_chars = [')', '.', '!', '+', '-', '_', '=', '{', '}', '|']
-    for char in special_chars:
-        url = url.replace(char, f'\\{char}')
+    if _MARKDOWN_V2_URL_SPECIAL.search(url) is None:
+        return url
+    for char, escaped in _MARKDOWN_V2_URL_ESCAPES:
+        if char in url:
+            url = url.replace(char, escaped)
     return url
 
 async def addblacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -177,14 +195,8 @@ async def addblacklist_command(update: Update, context: ContextTypes.DEFAULT_TYP
                     )
                     
                     # Programa a exclusão da mensagem após 60 segundos
-                    context.job_queue.run_once(
-                        lambda context: context.bot.delete_message_after(
-                            chat_id=sent_message.chat_id, 
-                            message_id=sent_message.message_id
-                        ),
-                        60,  # 60 segundos
-                        data={"chat_id": sent_message.chat_id, "message_id": sent_message.message_id}
-                    )
+                    if not await schedule_message_deletion(sent_message.chat_id, sent_message.message_id, 60):
+                        spawn_message_deletion(sent_message, 60)
                     
                     logger.info(f"Enviada notificação pública temporária para {user_id} sobre adição à blacklist")
                 except Exception as e2:
@@ -252,7 +264,6 @@ async def blacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Verifica se foi especificado um nome de grupo
     chat_id = update.effective_chat.id
-    blacklist = []
     
     # Se foram passados argumentos, considera como nome do grupo
     if context.args and len(context.args) > 0:
@@ -261,28 +272,33 @@ async def blacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         if group_name.startswith("@"):
             group_name = group_name[1:]
         logger.info(f"Buscando blacklist para o grupo: {group_name}")
-        blacklist = await mongodb_client.get_blacklist_by_group_name(group_name)
+        lookup = await chat_directory.resolve(group_name)
         
-        # Se não encontrou o grupo ou não está sendo monitorado
-        if not blacklist:
+        # Se não encontrou o grupo (ou o nome corresponde a mais de um grupo)
+        if lookup.chat is None:
             # Deleta o comando original
             try:
                 await update.message.delete()
             except Exception as e:
                 logger.error(f"Erro ao deletar mensagem de comando: {e}")
-                
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="❌ Grupo não encontrado.\n\n"
-                     "Certifique-se de que:\n"
-                     "1. O nome do grupo está correto\n"
-                     "2. O bot está no grupo"
-            )
+            
+            if lookup.is_ambiguous:
+                text = (f"⚠️ Mais de um grupo corresponde a '{group_name}':\n\n"
+                        f"{lookup.describe_candidates()}\n\n"
+                        "Informe o nome completo ou o @ do grupo.")
+            else:
+                text = ("❌ Grupo não encontrado.\n\n"
+                        "Certifique-se de que:\n"
+                        "1. O nome do grupo está correto\n"
+                        "2. O bot está no grupo")
+            await context.bot.send_message(chat_id=chat_id, text=text)
             return
+        
+        chat_id_to_list = lookup.chat["chat_id"]
     else:
-        # Caso contrário, obtém a blacklist do chat atual
+        # Caso contrário, lista a blacklist do chat atual
         logger.info(f"Buscando blacklist para o chat atual: {chat_id}")
-        blacklist = await mongodb_client.get_blacklist(chat_id)
+        chat_id_to_list = chat_id
     
     # Deleta o comando original
     try:
@@ -290,139 +306,216 @@ async def blacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     except Exception as e:
         logger.error(f"Erro ao deletar mensagem de comando: {e}")
     
+    page = await _render_blacklist_page(chat_id_to_list, page=1)
+    
     # Se não houver mensagens na blacklist
-    if not blacklist or len(blacklist) == 0:
+    if page is None:
         await context.bot.send_message(
             chat_id=chat_id,
             text="📋 BLACKLIST\n\nNão há mensagens na blacklist deste chat."
         )
         return
     
-    # Constante para o limite de caracteres por mensagem
-    MESSAGE_LENGTH_LIMIT = 4000
+    text, reply_markup = page
+    try:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,  # Desabilitar preview para economizar espaço e evitar clutter
+            reply_markup=reply_markup
+        )
+    except BadRequest as e:
+        logger.error(f"Erro (BadRequest) ao enviar página da blacklist: {e}")
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="❌ Ocorreu um erro ao formatar ou enviar a lista da blacklist. Verifique os logs."
+        )
+
+async def blacklist_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handler para os botões de navegação da blacklist.
+    Renderiza a página pedida (a partir do cursor no callback) na mesma mensagem.
     
-    # Formata as entradas da blacklist
-    items_text = []
-    for i, item in enumerate(blacklist, start=1):
-        try:
-            # Formata data de adição
-            added_at = item.get("added_at", datetime.now()).strftime("%d/%m/%Y %H:%M")
-            
-            # Formata nome de usuário (escapado para HTML)
-            user_name = item.get("user_name", "Usuário desconhecido")
-            username = item.get("username")
-            display_name = f"@{username}" if username else user_name
-            escaped_display_name = escape_html(display_name)
-            
-            # Formata link da mensagem
-            item_chat_id = item.get("chat_id")
-            message_id = item.get("message_id")
-            
-            # Para grupos, o ID geralmente começa com "-100" e precisa ser formatado para o link
-            formatted_chat_id = str(item_chat_id)
-            if formatted_chat_id.startswith("-100"):
-                formatted_chat_id = formatted_chat_id[4:]
-            elif formatted_chat_id.startswith("-"):
-                formatted_chat_id = formatted_chat_id[1:]
-            
-            message_link = f"https://t.me/c/{formatted_chat_id}/{message_id}"
-            
-            # Formata texto da mensagem (limitado e escapado)
-            message_text = item.get("message_text", "")
-            escaped_message_text = escape_html(message_text[:100] + ("..." if len(message_text) > 100 else "")) # Limita o texto para evitar estouro fácil
-            
-            # Formata nome do admin (escapado)
-            admin_name = item.get("added_by_name", "Admin desconhecido")
-            escaped_admin_name = escape_html(admin_name)
-            
-            # ID único do item para referência (usado no rmblacklist)
-            item_id_str = str(item.get('_id'))
-
-            item_str = (
-                f"{i}. <b>Usuário:</b> {escaped_display_name} \n"
-                f"   <b>Adicionado por:</b> {escaped_admin_name} em {added_at}\n"
-                f"   <b>Mensagem:</b> <a href='{message_link}'>Link</a> \n"
-                f"   <b>Texto:</b> <i>{escaped_message_text}</i>\n"
-                f"   <b>ID para remover:</b> <code>{item_id_str}</code>\n" # Adicionado ID
-            )
-            items_text.append(item_str)
-            
-        except Exception as e:
-            logger.error(f"Erro ao formatar item {item.get('_id', 'N/A')} da blacklist: {e}")
-            items_text.append(f"{i}. Erro ao formatar este item.\n")
-
-    # Lógica de Paginação
-    current_message = ""
-    message_parts = []
-    
-    for item_str in items_text:
-        # Verifica se adicionar o próximo item + uma linha extra excede o limite
-        if len(current_message) + len(item_str) + 1 > MESSAGE_LENGTH_LIMIT:
-            # Se exceder e a mensagem atual não estiver vazia, adiciona a parte atual
-            if current_message:
-                message_parts.append(current_message)
-            # Começa uma nova parte com o item atual
-            current_message = item_str + "\n"
-        else:
-            # Adiciona o item à parte atual
-            current_message += item_str + "\n"
-            
-    # Adiciona a última parte se não estiver vazia
-    if current_message:
-        message_parts.append(current_message)
+    Args:
+        update (Update): Objeto de atualização do Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    query = update.callback_query
+    
+    if not await is_admin(update, context):
+        await query.answer("Apenas administradores podem ver a blacklist")
+        return
+    
+    try:
+        _, chat_id, page, direction, cursor_ms, cursor_id = query.data.split(":")
+        target_chat_id = int(chat_id)
+        page_number = int(page)
+        cursor = (_decode_blacklist_timestamp(cursor_ms), ObjectId(cursor_id))
+    except (ValueError, TypeError, InvalidId) as e:
+        logger.error(f"Callback de página da blacklist inválido '{query.data}': {e}")
+        await query.answer("Página inválida")
+        return
+    
+    rendered = await _render_blacklist_page(
+        target_chat_id, page=page_number, cursor=cursor, newer=(direction == "p")
+    )
+    if rendered is None:
+        # As entradas da página foram removidas: volta para o início da lista
+        rendered = await _render_blacklist_page(target_chat_id, page=1)
+    
+    await query.answer()
+    if rendered is None:
+        await query.edit_message_text("📋 BLACKLIST\n\nNão há mensagens na blacklist deste chat.")
+        return
+    
+    text, reply_markup = rendered
+    try:
+        await query.edit_message_text(
+            text,
+            parse_mode=ParseMode.HTML,
+            disable_web_page_preview=True,
+            reply_markup=reply_markup
+        )
+    except BadRequest as e:
+        # "Message is not modified" quando o botão é clicado duas vezes
+        logger.debug(f"Página da blacklist não atualizada: {e}")
 
-    total_parts = len(message_parts)
+async def _render_blacklist_page(
+    chat_id: int,
+    page: int,
+    cursor: Optional[tuple] = None,
+    newer: bool = False
+) -> Optional[tuple]:
+    """
+    Monta o texto e os botões de navegação de uma página da blacklist.
+    
+    Args:
+        chat_id (int): ID do chat da blacklist.
+        page (int): Número da página a exibir (apenas para o cabeçalho e a numeração).
+        cursor (Optional[tuple]): (added_at, _id) da entrada de referência.
+        newer (bool): Se True, a página contém as entradas mais recentes que o cursor.
+        
+    Returns:
+        Optional[tuple]: (texto HTML, teclado ou None), ou None se a página estiver vazia.
+    """
+    items, has_more = await mongodb_client.get_blacklist_page(
+        chat_id, BLACKLIST_PAGE_SIZE, cursor=cursor, newer=newer
+    )
+    if not items:
+        return None
+    
+    first_position = (page - 1) * BLACKLIST_PAGE_SIZE + 1
+    items_text = [
+        _format_blacklist_item(position, item)
+        for position, item in enumerate(items, start=first_position)
+    ]
+    text = f"<b>📋 BLACKLIST (Página {page})</b>\n\n" + "\n".join(items_text)
+    
+    has_previous = has_more if newer else page > 1
+    has_next = True if newer else has_more
+    buttons = []
+    if has_previous:
+        buttons.append(InlineKeyboardButton(
+            "◀️ Anteriores",
+            callback_data=_blacklist_page_callback_data(chat_id, page - 1, "p", items[0])
+        ))
+    if has_next:
+        buttons.append(InlineKeyboardButton(
+            "Próximos ▶️",
+            callback_data=_blacklist_page_callback_data(chat_id, page + 1, "n", items[-1])
+        ))
+    reply_markup = InlineKeyboardMarkup([buttons]) if buttons else None
+    return text, reply_markup
 
-    # Envia as partes paginadas
-    for i, part in enumerate(message_parts, start=1):
-        header = f"<b>📋 BLACKLIST (Parte {i}/{total_parts})</b>\n\n"
-        final_message = header + part
+def _blacklist_page_callback_data(chat_id: int, page: int, direction: str, item: Dict[str, Any]) -> str:
+    """
+    Monta o callback de navegação com o cursor da entrada de referência.
+    
+    Formato: "blp:<chat_id>:<página>:<n|p>:<added_at em ms, base 36>:<_id>" (até ~60 bytes,
+    dentro do limite de 64 bytes do Telegram).
+    """
+    added_at = item.get("added_at") or datetime(1970, 1, 1)
+    return f"blp:{chat_id}:{page}:{direction}:{_encode_blacklist_timestamp(added_at)}:{item['_id']}"
+
+def _encode_blacklist_timestamp(value: datetime) -> str:
+    """Codifica um instante (precisão de milissegundos, como no MongoDB) em base 36."""
+    milliseconds = (value - datetime(1970, 1, 1)) // timedelta(milliseconds=1)
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        milliseconds, remainder = divmod(milliseconds, 36)
+        encoded = digits[remainder] + encoded
+        if milliseconds == 0:
+            return encoded
+
+def _decode_blacklist_timestamp(value: str) -> datetime:
+    """Decodifica um instante gerado por _encode_blacklist_timestamp."""
+    return datetime(1970, 1, 1) + timedelta(milliseconds=int(value, 36))
+
+_HTML_SPECIAL = re.compile(r'[&<>"\']')
+
+def _escape_html(text: str) -> str:
+    """Escapa HTML apenas quando há caracteres especiais (o caso comum dispensa os cinco replace)."""
+    return escape_html(text) if _HTML_SPECIAL.search(text) else text
+
+def _format_blacklist_item(position: int, item: Dict[str, Any]) -> str:
+    """
+    Formata uma entrada da blacklist em HTML.
+    
+    Args:
+        position (int): Posição da entrada na lista.
+        item (Dict[str, Any]): Documento da blacklist.
         
-        try:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=final_message,
-                parse_mode=ParseMode.HTML,
-                disable_web_page_preview=True # Desabilitar preview para economizar espaço e evitar clutter
-            )
-            # Pequeno delay para evitar flood limits do Telegram
-            if total_parts > 1 and i < total_parts:
-                await asyncio.sleep(0.5) 
-        except BadRequest as e:
-            logger.error(f"Erro (BadRequest) ao enviar parte {i}/{total_parts} da blacklist: {e}")
-            # Tenta enviar uma mensagem de erro genérica se a parte específica falhar
-            if i == 1:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text="❌ Ocorreu um erro ao formatar ou enviar a lista da blacklist. Verifique os logs."
-                )
-            break # Interrompe o envio das demais partes se uma falhar
-        except TimedOut:
-            logger.warning(f"Timeout ao enviar parte {i}/{total_parts} da blacklist. Tentando novamente...")
-            await asyncio.sleep(1) # Espera um pouco mais
-            try:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=final_message,
-                    parse_mode=ParseMode.HTML,
-                    disable_web_page_preview=True
-                )
-            except Exception as e_retry:
-                logger.error(f"Erro (Retry) ao enviar parte {i}/{total_parts} da blacklist: {e_retry}")
-                if i == 1:
-                    await context.bot.send_message(
-                        chat_id=chat_id,
-                        text="❌ Ocorreu um erro de timeout ao enviar a lista da blacklist. Tente novamente mais tarde."
-                    )
-                break # Interrompe
-        except Exception as e:
-            logger.error(f"Erro inesperado ao enviar parte {i}/{total_parts} da blacklist: {e}")
-            if i == 1:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text="❌ Ocorreu um erro inesperado ao processar a blacklist. Verifique os logs."
-                )
-            break # Interrompe
+    Returns:
+        str: Entrada formatada.
+    """
+    try:
+        # Formata data de adição (dd/mm/aaaa hh:mm; mais rápido que strftime)
+        added = item.get("added_at") or datetime.now()
+        added_at = f"{added.day:02d}/{added.month:02d}/{added.year} {added.hour:02d}:{added.minute:02d}"
+        
+        # Formata nome de usuário (escapado para HTML)
+        user_name = item.get("user_name", "Usuário desconhecido")
+        username = item.get("username")
+        display_name = f"@{username}" if username else user_name
+        escaped_display_name = _escape_html(display_name)
+        
+        # Formata link da mensagem
+        item_chat_id = item.get("chat_id")
+        message_id = item.get("message_id")
+        
+        # Para grupos, o ID geralmente começa com "-100" e precisa ser formatado para o link
+        formatted_chat_id = str(item_chat_id)
+        if formatted_chat_id.startswith("-100"):
+            formatted_chat_id = formatted_chat_id[4:]
+        elif formatted_chat_id.startswith("-"):
+            formatted_chat_id = formatted_chat_id[1:]
+        
+        message_link = f"https://t.me/c/{formatted_chat_id}/{message_id}"
+        
+        # Formata texto da mensagem (limitado e escapado)
+        message_text = item.get("message_text") or ""
+        escaped_message_text = _escape_html(message_text[:100] + ("..." if len(message_text) > 100 else "")) # Limita o texto para evitar estouro fácil
+        
+        # Formata nome do admin (escapado)
+        admin_name = item.get("added_by_name", "Admin desconhecido")
+        escaped_admin_name = _escape_html(admin_name)
+        
+        # ID único do item para referência (usado no rmblacklist)
+        item_id_str = str(item.get('_id'))
+
+        return (
+            f"{position}. <b>Usuário:</b> {escaped_display_name} \n"
+            f"   <b>Adicionado por:</b> {escaped_admin_name} em {added_at}\n"
+            f"   <b>Mensagem:</b> <a href='{message_link}'>Link</a> \n"
+            f"   <b>Texto:</b> <i>{escaped_message_text}</i>\n"
+            f"   <b>ID para remover:</b> <code>{item_id_str}</code>\n"
+        )
+        
+    except Exception as e:
+        logger.error(f"Erro ao formatar item {item.get('_id', 'N/A')} da blacklist: {e}")
+        return f"{position}. Erro ao formatar este item.\n"
 
 async def rmblacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -491,8 +584,9 @@ async def rmblacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 async def ban_blacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handler para o comando /ban_blacklist <group_name>.
-    Bane todos os usuários únicos da blacklist de um grupo específico e limpa
-    as entradas correspondentes (apenas dos usuários banidos com sucesso).
+    Cria um job em segundo plano que bane todos os usuários únicos da blacklist
+    de um grupo específico e limpa as entradas correspondentes (apenas dos
+    usuários banidos com sucesso). O progresso é atualizado na mensagem de status.
     """
     # 1. Verificações Iniciais
     if not await is_admin(update, context):
@@ -521,15 +615,24 @@ async def ban_blacklist_command(update: Update, context: ContextTypes.DEFAULT_TY
 
     # 2. Obter Chat ID do Grupo Alvo
     logger.info(f"Buscando chat_id para o grupo: {group_name}")
-    target_chat_id = await mongodb_client.get_chat_id_by_group_name(group_name)
+    lookup = await chat_directory.resolve(group_name, active_only=True)
+
+    if lookup.is_ambiguous:
+        await processing_message.edit_text(
+            f"⚠️ Mais de um grupo monitorado corresponde a '{group_name}':\n\n"
+            f"{lookup.describe_candidates()}\n\n"
+            "Informe o nome completo ou o @ do grupo."
+        )
+        return
 
+    target_chat_id = lookup.chat.get("chat_id") if lookup.chat else None
     if target_chat_id is None:
         await processing_message.edit_text(f"❌ Grupo '{group_name}' não encontrado ou não monitorado ativamente.")
         return
     
     logger.info(f"Chat ID encontrado para '{group_name}': {target_chat_id}")
 
-    # 3. Obter Blacklist e Usuários Únicos
+    # 3. Obter Blacklist
     logger.info(f"Buscando blacklist para o chat: {target_chat_id}")
     blacklist_entries = await mongodb_client.get_blacklist(target_chat_id)
 
@@ -537,105 +640,65 @@ async def ban_blacklist_command(update: Update, context: ContextTypes.DEFAULT_TY
         await processing_message.edit_text(f"✅ A blacklist para o grupo '{group_name}' (ID: {target_chat_id}) já está vazia.")
         return
 
-    unique_user_ids: Set[int] = set()
-    user_details_map: Dict[int, Dict[str, Any]] = {}
-    for entry in blacklist_entries:
-        user_id = entry.get("user_id")
-        if user_id:
-            unique_user_ids.add(user_id)
-            if user_id not in user_details_map: # Armazena detalhes do primeiro encontrado
-                user_details_map[user_id] = {
-                    "name": entry.get("user_name", "Nome Desconhecido"),
-                    "username": entry.get("username")
-                }
-    
-    total_unique_users = len(unique_user_ids)
-    logger.info(f"Encontrados {total_unique_users} usuários únicos na blacklist do chat {target_chat_id}.")
-    await processing_message.edit_text(
-        f"⚙️ Encontrados {total_unique_users} usuários únicos. Iniciando tentativas de banimento em '{group_name}' (ID: {target_chat_id})..."
+    # 4. Cria o job de banimento, executado em segundo plano depois da edição da
+    # mensagem (o job edita a mesma mensagem com o progresso e o relatório final)
+    manager = get_ban_job_manager(context.bot)
+    job = await manager.create_job(
+        chat_id=target_chat_id,
+        group_name=group_name,
+        entries=blacklist_entries,
+        requested_by=admin_user.id,
+        report_chat_id=original_chat_id,
+        status_message_id=processing_message.message_id
     )
+    if job is None:
+        await processing_message.edit_text("❌ Erro ao criar o job de banimento. Verifique os logs.")
+        return
 
-    # 4. Processo de Banimento e Coleta de Resultados
-    banned_count = 0
-    failed_count = 0
-    failed_user_details = []
-    ids_to_delete: List[ObjectId] = [] # Armazena ObjectIds das entradas a remover
-
-    for i, user_id in enumerate(unique_user_ids):
-        user_display = user_details_map.get(user_id, {}).get("username") or user_details_map.get(user_id, {}).get("name")
-        user_display = f"@{user_display}" if user_details_map.get(user_id, {}).get("username") else user_display
-        user_display = escape_html(f"{user_display} ({user_id})")
-        
-        logger.debug(f"Tentando banir usuário {user_id} do chat {target_chat_id} ({i+1}/{total_unique_users})")
-        try:
-            # Tenta banir o usuário
-            # O parâmetro revoke_messages=True não existe mais na v20+, ban apenas bane.
-            success = await context.bot.ban_chat_member(chat_id=target_chat_id, user_id=user_id)
-            
-            if success:
-                banned_count += 1
-                logger.info(f"Usuário {user_id} banido com sucesso do chat {target_chat_id}.")
-                # Coleta os _id de todas as entradas deste usuário neste chat
-                for entry in blacklist_entries:
-                    if entry.get("user_id") == user_id and entry.get("chat_id") == target_chat_id:
-                        entry_obj_id = entry.get("_id")
-                        if isinstance(entry_obj_id, ObjectId):
-                             ids_to_delete.append(entry_obj_id)
-            else:
-                 # Este caso não deve ocorrer com ban_chat_member se não lançar exceção, mas incluído por segurança
-                 raise Exception("ban_chat_member retornou False")
-                 
-        except BadRequest as e:
-            failed_count += 1
-            error_message = str(e)
-            logger.warning(f"Falha ao banir usuário {user_id} do chat {target_chat_id}: {error_message}")
-            failed_user_details.append({"id": user_id, "name": user_display, "error": escape_html(error_message)})
-        except Exception as e: # Captura outras exceções inesperadas
-            failed_count += 1
-            error_message = str(e)
-            logger.error(f"Erro inesperado ao tentar banir usuário {user_id} do chat {target_chat_id}: {error_message}")
-            failed_user_details.append({"id": user_id, "name": user_display, "error": escape_html(f"Erro inesperado: {error_message}")})
-        
-        # Adiciona delay
-        await asyncio.sleep(0.6) 
-
-    # 5. Limpeza da Blacklist
-    deleted_count = 0
-    if ids_to_delete:
-        logger.info(f"Tentando remover {len(ids_to_delete)} itens da blacklist para usuários banidos com sucesso...")
-        deleted_count = await mongodb_client.remove_blacklist_items_by_ids(ids_to_delete)
-        logger.info(f"{deleted_count} itens da blacklist efetivamente removidos.")
-    else:
-        logger.info("Nenhum usuário banido com sucesso, nenhum item removido da blacklist.")
-
-    # 6. Relatório Final
-    report_message = f"<b>📊 Relatório de Banimento da Blacklist</b>\n\n"
-    report_message += f"<b>Grupo:</b> {escape_html(group_name)} (ID: <code>{target_chat_id}</code>)\n"
-    report_message += f"<b>Usuários únicos na blacklist:</b> {total_unique_users}\n"
-    report_message += f"<b>Banidos com sucesso:</b> ✅ {banned_count}\n"
-    report_message += f"<b>Falhas ao banir:</b> ❌ {failed_count}\n"
-    report_message += f"<b>Itens removidos da blacklist:</b> 🗑️ {deleted_count}\n"
-    report_message += f"<i>(Apenas itens de usuários banidos com sucesso foram removidos)</i>\n"
-
-    if failed_user_details:
-        report_message += "\n<b>Detalhes das Falhas:</b>\n"
-        # Limita a exibição de detalhes para não estourar a mensagem
-        max_details = 15
-        for i, detail in enumerate(failed_user_details[:max_details]):
-            report_message += f"- {detail['name']}: {detail['error']}\n"
-        if len(failed_user_details) > max_details:
-            report_message += f"<i>... e mais {len(failed_user_details) - max_details} falhas. Verifique os logs para detalhes completos.</i>\n"
-            
-    # Edita a mensagem de processamento com o resultado final
     try:
-        await processing_message.edit_text(report_message, parse_mode=ParseMode.HTML)
-    except BadRequest as e:
-        logger.error(f"Erro ao enviar relatório final de ban_blacklist: {e}")
-        # Tenta enviar como nova mensagem se a edição falhar
-        await context.bot.send_message(
-            chat_id=original_chat_id, 
-            text="Ocorreu um erro ao editar a mensagem de status. Relatório:\n" + report_message,
-            parse_mode=ParseMode.HTML
+        await processing_message.edit_text(
+            f"⚙️ Encontrados {job['total']} usuários únicos. Banimento em andamento em '{group_name}' (ID: {target_chat_id}).\n\n"
+            f"Job: {job['_id']}\n"
+            f"O progresso será atualizado nesta mensagem. Consulte também com /ban_status {job['_id']}"
         )
-    except Exception as e:
-         logger.error(f"Erro inesperado ao editar mensagem de relatório: {e}") 
\ No newline at end of file
+    finally:
+        manager.start_job(job)
+    logger.info(f"Job de banimento {job['_id']} iniciado para o chat {target_chat_id} ({job['total']} usuários).")
+
+async def ban_status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handler para o comando /ban_status [job_id].
+    Mostra o progresso de um job de banimento ou, sem argumentos, os jobs mais recentes.
+    
+    Args:
+        update (Update): Objeto de atualização do Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    if not await is_admin(update, context):
+        await send_temporary_message(update, context, "Apenas administradores do bot podem usar este comando.")
+        return
+
+    if context.args:
+        job = await mongodb_client.get_ban_job(context.args[0])
+        if job is None:
+            await update.message.reply_text(f"❌ Job de banimento '{context.args[0]}' não encontrado.")
+            return
+        if job.get("status") == "done":
+            failed_items = await mongodb_client.get_failed_ban_items(job["_id"]) if job["failed"] else []
+            await update.message.reply_text(format_ban_report(job, failed_items), parse_mode=ParseMode.HTML)
+        else:
+            await update.message.reply_text(format_ban_progress(job))
+        return
+
+    jobs = await mongodb_client.get_recent_ban_jobs()
+    if not jobs:
+        await update.message.reply_text("Nenhum job de banimento encontrado.")
+        return
+
+    lines = ["📋 Jobs de banimento recentes:\n"]
+    for job in jobs:
+        state = "✅ concluído" if job.get("status") == "done" else "⚙️ em andamento"
+        lines.append(
+            f"• {job['_id']} — {job['group_name']}: {job['banned'] + job['failed']}/{job['total']} ({state})"
+        )
+    await update.message.reply_text("\n".join(lines))
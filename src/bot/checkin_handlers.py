@@ -2,16 +2,18 @@
 Handlers para os comandos de check-in.
 """
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from telegram import Update, ReactionTypeEmoji
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 from telegram.error import TimedOut
 from src.utils.mongodb_instance import mongodb_client
+from src.utils.chat_directory import chat_directory
 from src.bot.handlers import is_admin, send_temporary_message, delete_message_after
 import asyncio
 from datetime import datetime, timedelta
 import random # Importa o módulo random
+from bisect import bisect_left
 from bson import ObjectId
 
 # Configuração de logging
@@ -205,7 +207,7 @@ async def handle_checkin_response(update: Update, context: ContextTypes.DEFAULT_
             update.message.animation or 
             (update.message.document and update.message.document.mime_type and 
              update.message.document.mime_type.startswith('image/'))):
-        logger.debug(f"Mensagem de check-in sem mídia ignorada: {update.message.message_id}")
+        logger.debug("Mensagem de check-in sem mídia ignorada: %s", update.message.message_id)
         return
     
     # Obtém o chat_id e o replied_message_id
@@ -217,7 +219,7 @@ async def handle_checkin_response(update: Update, context: ContextTypes.DEFAULT_
     
     # Se não houver check-ins ativos, retorna
     if not active_checkins:
-        logger.debug(f"Ignorando resposta {update.message.message_id}: Nenhum check-in ativo no chat {chat_id}")
+        logger.debug("Ignorando resposta %s: Nenhum check-in ativo no chat %s", update.message.message_id, chat_id)
         return
     
     # Procura se a resposta é para alguma das âncoras ativas
@@ -232,7 +234,10 @@ async def handle_checkin_response(update: Update, context: ContextTypes.DEFAULT_
     # Se a resposta não for para nenhuma âncora ativa, retorna
     if not matching_checkin:
         active_message_ids = [checkin["message_id"] for checkin in active_checkins]
-        logger.debug(f"Ignorando resposta {update.message.message_id}: Não é para nenhuma âncora ativa {active_message_ids}. Respondeu a {replied_message_id}")
+        logger.debug(
+            "Ignorando resposta %s: Não é para nenhuma âncora ativa %s. Respondeu a %s",
+            update.message.message_id, active_message_ids, replied_message_id
+        )
         return
     
     logger.info(f"Check-in (resposta c/ mídia) detectado de {update.effective_user.full_name} ({update.effective_user.id}) no chat {chat_id} para âncora {matching_checkin['_id']}")
@@ -248,7 +253,7 @@ async def handle_checkin_response(update: Update, context: ContextTypes.DEFAULT_
     
     # Se o usuário já fez check-in para esta âncora específica, envia aviso e retorna
     if new_total_score is None:
-        logger.debug(f"Usuário {user_id} já fez check-in para esta âncora {active_checkin['_id']}")
+        logger.debug("Usuário %s já fez check-in para esta âncora %s", user_id, active_checkin['_id'])
         display_name = f"@{username}" if username else user_name
         await send_temporary_message(
             update, 
@@ -300,7 +305,10 @@ async def handle_checkin_response(update: Update, context: ContextTypes.DEFAULT_
         # Cria o objeto ReactionTypeEmoji explicitamente
         reaction_object = ReactionTypeEmoji(emoji=reaction)
         
-        logger.debug(f"Tentando definir reação '{reaction}' (como objeto ReactionTypeEmoji) para mensagem {update.message.message_id} no chat {chat_id}")
+        logger.debug(
+            "Tentando definir reação '%s' (como objeto ReactionTypeEmoji) para mensagem %s no chat %s",
+            reaction, update.message.message_id, chat_id
+        )
         await context.bot.set_message_reaction(
             chat_id=chat_id,
             message_id=update.message.message_id,
@@ -328,6 +336,96 @@ async def handle_checkin_response(update: Update, context: ContextTypes.DEFAULT_
     # Responde ao usuário com a mensagem final
     await update.message.reply_text(final_response, parse_mode=ParseMode.HTML)
 
+# Limite de usuários exibidos no placar e tamanho máximo do nome exibido
+SCOREBOARD_MAX_USERS = 20
+SCOREBOARD_MAX_NAME_LENGTH = 25
+_RANK_ICONS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+def _entry_score(entry: Dict[str, Any]) -> int:
+    """Pontuação de uma entrada do placar."""
+    return entry.get("score", 0)
+
+def format_checkin_scoreboard(
+    chat_title: str,
+    scoreboard_data: List[Dict[str, Any]],
+    total_participants: int,
+    days_since_first: str
+) -> str:
+    """
+    Monta o texto HTML do placar de check-ins, agrupado por pontuação.
+    
+    Apenas os SCOREBOARD_MAX_USERS primeiros usuários são formatados; os demais
+    só entram no total de pontos do grupo.
+    
+    Args:
+        chat_title (str): Título do grupo.
+        scoreboard_data (List[Dict[str, Any]]): Entradas do placar (user_id, user_name, username, score).
+        total_participants (int): Número de pessoas que já fizeram check-in.
+        days_since_first (str): Descrição de quando foi o primeiro check-in.
+        
+    Returns:
+        str: Placar formatado.
+    """
+    total_group_score = sum(entry.get("score", 0) for entry in scoreboard_data)
+    # Ordenação estável: dentro de cada pontuação, mantém a ordem recebida
+    # (linear quando os dados já vêm ordenados do MongoDB)
+    ordered = sorted(scoreboard_data, key=_entry_score, reverse=True)
+
+    scoreboard_lines = [f"🏆 <b>{chat_title.upper()} CHECK-INS</b> 🏆\n"]
+    current_rank_pos = 0 # Posição no ranking (1, 2, 3...)
+    shown = 0 # Usuários já exibidos
+    index = 0
+    total_entries = len(ordered)
+
+    while index < total_entries and shown < SCOREBOARD_MAX_USERS:
+        score_value = ordered[index].get("score", 0)
+        current_rank_pos += 1
+        rank_display = _RANK_ICONS.get(current_rank_pos) or f"🔹 {current_rank_pos}."
+        plural = "s" if score_value != 1 else ""
+        scoreboard_lines.append(f"{rank_display} (<b>{score_value}</b> check-in{plural})")
+
+        # Lista os usuários com esta pontuação
+        while index < total_entries and ordered[index].get("score", 0) == score_value:
+            if shown >= SCOREBOARD_MAX_USERS:
+                scoreboard_lines.append("   ...") # Indica que há mais usuários não listados
+                break
+            entry = ordered[index]
+            username = entry.get("username")
+            if username:
+                display_name = f"@{username}"
+            else:
+                display_name = entry["user_name"] if "user_name" in entry else f"User {entry['user_id']}"
+            # Limita o tamanho do nome para evitar quebra de linha
+            if len(display_name) > SCOREBOARD_MAX_NAME_LENGTH:
+                display_name = display_name[:SCOREBOARD_MAX_NAME_LENGTH - 1] + "…"
+            scoreboard_lines.append(f"   👤 {display_name}")
+            shown += 1
+            index += 1
+
+        # Pula o restante desta pontuação (não exibido)
+        while index < total_entries and ordered[index].get("score", 0) == score_value:
+            index += 1
+
+        if shown >= SCOREBOARD_MAX_USERS and index < total_entries:
+            if not scoreboard_lines[-1].strip().endswith("..."):
+                scoreboard_lines.append("   ...") # Garante que o ... apareça se cortou no meio de um rank
+            break
+
+        scoreboard_lines.append("") # Linha em branco entre os ranks
+
+    # Remove a última linha em branco se existir
+    if scoreboard_lines[-1] == "":
+        scoreboard_lines.pop()
+
+    # Linha motivacional e estatísticas
+    plural_stats = "s" if total_group_score != 1 else ""
+    scoreboard_lines.append("\n💪 Continue mantendo a consistência! 🔥")
+    scoreboard_lines.append("\n📊 <b>Estatísticas:</b>")
+    scoreboard_lines.append(f"• {total_participants} pessoas já participaram")
+    scoreboard_lines.append(f"• {total_group_score} check-in{plural_stats} no total")
+    scoreboard_lines.append(f"• Primeiro check-in: {days_since_first}")
+    return "\n".join(scoreboard_lines)
+
 async def checkinscore_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handler para o comando /checkinscore.
@@ -344,12 +442,19 @@ async def checkinscore_command(update: Update, context: ContextTypes.DEFAULT_TYP
     # Verifica se um nome de grupo foi fornecido como argumento
     if context.args and len(context.args) > 0:
         target_group_name = ' '.join(context.args)
-        target_chat_info = await mongodb_client.get_chat_info_by_title(target_group_name)
+        lookup = await chat_directory.resolve(target_group_name)
+        target_chat_info = lookup.chat
         
         if target_chat_info:
             chat_id = target_chat_info["chat_id"]
             # Usa o título encontrado no DB para o cabeçalho
             chat_title = target_chat_info.get("title", target_group_name) 
+        elif lookup.is_ambiguous:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=f"Mais de um grupo corresponde a '{target_group_name}':\n{lookup.describe_candidates()}\nInforme o nome completo do grupo."
+            )
+            return
         else:
             await context.bot.send_message(
                 chat_id=update.effective_chat.id,
@@ -402,88 +507,8 @@ async def checkinscore_command(update: Update, context: ContextTypes.DEFAULT_TYP
         delta = now_naive - first_checkin_naive
         days_since_first = f"{delta.days} dias atrás" if delta.days > 0 else ("Hoje" if delta.days == 0 else "Data futura?")
     
-    # 3. Calcula o total de pontos do grupo
-    total_group_score = sum(entry.get("score", 0) for entry in scoreboard_data)
-
-    # 4. Agrupa usuários por score
-    grouped_scores = {}
-    for entry in scoreboard_data:
-        score = entry.get("score", 0)
-        if score not in grouped_scores:
-            grouped_scores[score] = []
-        # Armazena nome e username para exibição
-        user_info = {
-            "name": entry.get("user_name", f"User {entry['user_id']}"),
-            "username": entry.get("username")
-        }
-        grouped_scores[score].append(user_info)
-        
-    # --- Montagem da Mensagem --- 
-    
-    scoreboard_lines = []
-    # Adiciona título
-    scoreboard_lines.append(f"🏆 <b>{chat_title.upper()} CHECK-INS</b> 🏆\n") 
-    
-    rank_icons = {1: "🥇", 2: "🥈", 3: "🥉"}
-    current_rank_pos = 0 # Posição no ranking (1, 2, 3...)
-    processed_users_count = 0 # Conta usuários já exibidos
-    max_users_to_show = 20 # Limite de usuários para exibir
-
-    # Itera sobre os scores únicos ordenados
-    for score_value in sorted(grouped_scores.keys(), reverse=True):
-        if processed_users_count >= max_users_to_show:
-            break # Sai se já exibiu o máximo de usuários
-            
-        users_at_this_score = grouped_scores[score_value]
-        current_rank_pos += 1
-        
-        rank_display = rank_icons.get(current_rank_pos, f"🔹 {current_rank_pos}.")
-        plural = "s" if score_value != 1 else ""
-        
-        # Linha do Rank e Pontuação
-        scoreboard_lines.append(f"{rank_display} (<b>{score_value}</b> check-in{plural})")
-        
-        # Lista usuários neste rank
-        for user_info in users_at_this_score:
-            if processed_users_count >= max_users_to_show:
-                scoreboard_lines.append("   ...") # Indica que há mais usuários não listados
-                break # Sai do loop interno também
-                
-            # Formata nome/username
-            name = user_info['name']
-            username = user_info['username']
-            # Limita o tamanho do nome para evitar quebra de linha (ajuste conforme necessário)
-            max_name_len = 25 
-            display_name = f"@{username}" if username else name
-            if len(display_name) > max_name_len:
-                display_name = display_name[:max_name_len-1] + "…"
-                
-            scoreboard_lines.append(f"   👤 {display_name}")
-            processed_users_count += 1
-            
-        if processed_users_count >= max_users_to_show and current_rank_pos < len(grouped_scores):
-             if not scoreboard_lines[-1].strip().endswith("..."):
-                  scoreboard_lines.append("   ...") # Garante que o ... apareça se cortou no meio de um rank
-             break # Sai do loop externo se atingiu o limite
-
-        scoreboard_lines.append("") # Linha em branco entre os ranks
-
-    # Remove a última linha em branco se existir
-    if scoreboard_lines and scoreboard_lines[-1] == "":
-        scoreboard_lines.pop()
-        
-    # Adiciona linha motivacional
-    scoreboard_lines.append("\n💪 Continue mantendo a consistência! 🔥")
-    
-    # Adiciona seção de estatísticas
-    scoreboard_lines.append("\n📊 <b>Estatísticas:</b>")
-    scoreboard_lines.append(f"• {total_participants} pessoas já participaram")
-    plural_stats = "s" if total_group_score != 1 else ""
-    scoreboard_lines.append(f"• {total_group_score} check-in{plural_stats} no total")
-    scoreboard_lines.append(f"• Primeiro check-in: {days_since_first}")
-
-    # Junta tudo em uma única string
-    scoreboard_message = "\n".join(scoreboard_lines)
+    # 3. Monta o placar
+    scoreboard_message = format_checkin_scoreboard(chat_title, scoreboard_data, total_participants, days_since_first)
 
     # --- Envio da Mensagem --- 
     try:
@@ -614,6 +639,14 @@ responses_31_plus = [
     "Imparável, Imbatível, Inigualável! {user_name} é LENDA! Check-in! 🥇🏆🔥",
 ]
 
+# Faixas de score total (limite superior de cada faixa) e as respostas de cada uma;
+# scores acima do último limite usam responses_31_plus
+_RESPONSE_TIER_LIMITS = (1, 3, 7, 12, 18, 25, 30)
+_RESPONSE_TIERS = (
+    responses_1, responses_2_3, responses_4_7, responses_8_12,
+    responses_13_18, responses_19_25, responses_26_30, responses_31_plus,
+)
+
 def generate_checkin_response_static(user_name: str, checkin_count: int) -> str:
     """
     Gera uma mensagem de resposta ESTÁTICA e ALEATÓRIA para check-in, baseada na faixa de score total.
@@ -623,33 +656,16 @@ def generate_checkin_response_static(user_name: str, checkin_count: int) -> str:
     # Garante que checkin_count é um inteiro >= 0
     safe_checkin_count = max(0, int(checkin_count))
 
-    chosen_response = ""
-
-    # Seleciona a lista apropriada e escolhe uma resposta aleatoriamente
-    if safe_checkin_count == 1:
-        chosen_response = random.choice(responses_1).format(user_name=user_name)
-    elif 2 <= safe_checkin_count <= 3:
-        chosen_response = random.choice(responses_2_3).format(user_name=user_name)
-    elif 4 <= safe_checkin_count <= 7:
-        chosen_response = random.choice(responses_4_7).format(user_name=user_name)
-    elif 8 <= safe_checkin_count <= 12:
-        chosen_response = random.choice(responses_8_12).format(user_name=user_name)
-    elif 13 <= safe_checkin_count <= 18:
-        chosen_response = random.choice(responses_13_18).format(user_name=user_name)
-    elif 19 <= safe_checkin_count <= 25:
-        chosen_response = random.choice(responses_19_25).format(user_name=user_name)
-    elif 26 <= safe_checkin_count <= 30:
-        chosen_response = random.choice(responses_26_30).format(user_name=user_name)
-    elif safe_checkin_count >= 31:
-        chosen_response = random.choice(responses_31_plus).format(user_name=user_name)
-    else: # Fallback para score 0 (ou caso inesperado)
-        # Usa uma mensagem de boas-vindas padrão
+    if safe_checkin_count == 0:
+        # Fallback para score 0: usa uma mensagem de boas-vindas padrão
         chosen_response = f"Bem-vindo à jornada, {user_name}! Check-in registrado! 💪"
+    else:
+        # Seleciona a faixa por busca binária e escolhe uma resposta aleatoriamente
+        # (replace em vez de format: o único campo das respostas é {user_name})
+        responses = _RESPONSE_TIERS[bisect_left(_RESPONSE_TIER_LIMITS, safe_checkin_count)]
+        chosen_response = random.choice(responses).replace("{user_name}", user_name)
 
     # Adiciona a contagem de pontos no final
-    # Remove a antiga lógica de seleção baseada em módulo
-    # chosen_response = responses[safe_checkin_count % len(responses)]
-    # return f"{chosen_response}\nSeu score total é <b>{checkin_count}</b>!"
     return f"{chosen_response}\nSeu score total é <b>{safe_checkin_count}</b>!"
 
 async def confirmcheckin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -0,0 +1,99 @@
+"""
+Handlers para exportação de dados de um chat (blacklist, mensagens, check-ins).
+"""
+import logging
+from telegram import Update
+from telegram.constants import ChatAction
+from telegram.ext import ContextTypes
+from src.utils.chat_directory import chat_directory
+from src.utils.chat_export import (
+    EXPORT_COLLECTIONS,
+    EXPORT_FORMATS,
+    MAX_DOCUMENT_SIZE,
+    export_chat_collection
+)
+from src.bot.handlers import is_admin, send_temporary_message
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+EXPORT_USAGE = (
+    "Uso: /exportar <blacklist|mensagens|checkins> [csv|jsonl] [nome_do_grupo]\n\n"
+    "Sem nome de grupo, exporta os dados do chat atual."
+)
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handler para o comando /exportar.
+    Envia os dados de um chat como um único arquivo compactado (.csv.gz ou .jsonl.gz).
+
+    Args:
+        update (Update): Objeto de atualização do Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    if not await is_admin(update, context):
+        await send_temporary_message(update, context, "Apenas administradores podem usar este comando.")
+        return
+
+    args = list(context.args or [])
+    if not args or args[0].lower() not in EXPORT_COLLECTIONS:
+        await send_temporary_message(update, context, EXPORT_USAGE)
+        return
+
+    kind = args.pop(0).lower()
+    fmt = "csv"
+    if args and args[0].lower() in EXPORT_FORMATS:
+        fmt = args.pop(0).lower()
+    group_name = " ".join(args)
+    chat_id = update.effective_chat.id
+
+    # Deleta o comando original
+    try:
+        await update.message.delete()
+    except Exception as e:
+        logger.error(f"Erro ao deletar mensagem de comando /exportar: {e}")
+
+    target_chat_id = chat_id
+    if group_name:
+        lookup = await chat_directory.resolve(group_name)
+        if lookup.chat is None:
+            if lookup.is_ambiguous:
+                text = (f"⚠️ Mais de um grupo corresponde a '{group_name}':\n\n"
+                        f"{lookup.describe_candidates()}\n\n"
+                        "Informe o nome completo ou o @ do grupo.")
+            else:
+                text = f"❌ Grupo '{group_name}' não encontrado."
+            await context.bot.send_message(chat_id=chat_id, text=text)
+            return
+        target_chat_id = lookup.chat["chat_id"]
+
+    await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.UPLOAD_DOCUMENT)
+    export = await export_chat_collection(kind, target_chat_id, fmt)
+    if export is None:
+        await context.bot.send_message(chat_id=chat_id, text="❌ Erro ao exportar os dados. Verifique os logs.")
+        return
+
+    try:
+        if export.count == 0:
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=f"📦 Não há registros de {kind} para exportar neste chat."
+            )
+            return
+
+        if export.size > MAX_DOCUMENT_SIZE:
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=(f"❌ A exportação de {kind} ({export.count} registros) excede o limite "
+                      f"de {MAX_DOCUMENT_SIZE // (1024 * 1024)} MB do Telegram.")
+            )
+            return
+
+        await context.bot.send_document(
+            chat_id=chat_id,
+            document=export.file,
+            filename=export.filename,
+            caption=f"📦 Exportação de {kind}: {export.count} registros"
+        )
+    finally:
+        export.close()
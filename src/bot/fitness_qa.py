@@ -2,20 +2,34 @@
 Módulo para processamento de dúvidas relacionadas a fitness e nutrição.
 """
 import logging
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Optional
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from src.utils.anthropic_client import AnthropicClient
 from src.utils.config import Config
 
+if TYPE_CHECKING:
+    from src.utils.anthropic_client import AnthropicClient
+
 # Configuração de logging
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
-# Cliente Anthropic
-anthropic_client = AnthropicClient()
+# Cliente Anthropic, criado na primeira pergunta (o import não exige a chave da API)
+_anthropic_client: Optional["AnthropicClient"] = None
+
+def get_anthropic_client() -> "AnthropicClient":
+    """
+    Obtém o cliente Anthropic compartilhado, criando-o no primeiro uso.
+    
+    Returns:
+        AnthropicClient: Cliente da API da Anthropic.
+        
+    Raises:
+        ValueError: Se a chave da API não estiver configurada.
+    """
+    global _anthropic_client
+    if _anthropic_client is None:
+        from src.utils.anthropic_client import AnthropicClient
+        _anthropic_client = AnthropicClient()
+    return _anthropic_client
 
 async def generate_fitness_answer(question: str, category_emoji: str, category_name: str) -> str:
     """
@@ -64,7 +78,7 @@ async def generate_fitness_answer(question: str, category_emoji: str, category_n
     """
     
     try:
-        response = await anthropic_client.generate_response(prompt_template=prompt, message_content=question)
+        response = await get_anthropic_client().generate_response(prompt_template=prompt, message_content=question)
         return response.strip()
     except Exception as e:
         logger.error(f"Erro ao gerar resposta fitness: {e}")
@@ -12,24 +12,20 @@ from telegram import ReactionTypeEmoji
 from telegram.error import BadRequest, TimedOut
 from src.utils.config import Config
 from src.utils.mongodb_instance import mongodb_client
-import time
-from datetime import datetime
+from src.utils.deletion_scheduler import schedule_message_deletion
+from src.utils.chat_directory import chat_directory
+from src.utils.admin_cache import admin_cache
+from src.utils.member_directory import member_directory
+from src.utils.perf import format_perf_report, perf_stats
+from src.utils.task_supervisor import task_supervisor
+from datetime import datetime, timedelta
 
 # Configuração de logging
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
 # Não inicializa o cliente MongoDB aqui, usa a instância do main.py
 # mongodb_client = MongoDBClient()
 
-# Dicionário de cache para armazenar resultados de verificações de admin
-# Formato: {(chat_id, user_id): (is_admin, timestamp)}
-admin_cache = {}
-ADMIN_CACHE_TTL = 300  # 5 minutos em segundos
-
 async def send_temporary_message(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, duration: int = 20, reply: bool = False) -> None:
     """
     Envia uma mensagem temporária que será excluída após a duração especificada.
@@ -62,8 +58,10 @@ async def send_temporary_message(update: Update, context: ContextTypes.DEFAULT_T
                 # Aguarda com timeout para evitar bloqueio
                 message = await asyncio.wait_for(reply_task, timeout=10.0)
                 
-                # Se conseguiu enviar, agenda a exclusão da mensagem
-                asyncio.create_task(delete_message_after(message, duration))
+                # Se conseguiu enviar, agenda a exclusão no agendador único de exclusões
+                # (com fallback para uma tarefa dedicada se o agendador não estiver ativo)
+                if not await schedule_message_deletion(message.chat_id, message.message_id, duration):
+                    spawn_message_deletion(message, duration)
                 
                 # Se chegou aqui, enviou com sucesso
                 logger.debug(f"Mensagem temporária enviada com sucesso na tentativa {attempt+1}")
@@ -105,6 +103,31 @@ async def send_temporary_message(update: Update, context: ContextTypes.DEFAULT_T
         logger.error(f"Erro: {e} - Update: {update}")
         # Em caso de erro grave, apenas loga e não propaga (para não interromper a execução do bot)
 
+def spawn_message_deletion(message, duration: int) -> None:
+    """
+    Exclui uma mensagem após a duração especificada, em uma tarefa supervisionada.
+    
+    Usado quando o agendador de exclusões não está em execução. Se o bot for
+    desligado antes do prazo, a exclusão é gravada no MongoDB e feita pelo
+    agendador de exclusões no próximo início.
+    
+    Args:
+        message: Mensagem do Telegram a ser excluída.
+        duration (int): Duração em segundos antes da exclusão.
+    """
+    delete_at = datetime.now() + timedelta(seconds=duration)
+    
+    async def persist() -> None:
+        if mongodb_client.db is not None:
+            await mongodb_client.add_pending_deletion(message.chat_id, message.message_id, delete_at)
+    
+    task_supervisor.spawn(
+        delete_message_after(message, duration),
+        name=f"delete:{message.chat_id}:{message.message_id}",
+        owner="temporary_messages",
+        persist=persist
+    )
+
 async def delete_message_after(message, duration: int) -> None:
     """
     Exclui uma mensagem após a duração especificada.
@@ -360,6 +383,9 @@ async def is_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     """
     Verifica se o usuário que enviou o comando é administrador do grupo.
     
+    As listas de administradores do bot e de cada chat ficam em cache
+    (admin_cache), então, no caso comum, a verificação não acessa a rede.
+    
     Args:
         update (Update): Objeto de atualização do Telegram.
         context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
@@ -373,62 +399,64 @@ async def is_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
-    cache_key = (chat_id, user_id)
-    
-    # Verifica primeiro no cache para evitar chamadas desnecessárias
-    current_time = time.time()
-    if cache_key in admin_cache:
-        is_admin_result, timestamp = admin_cache[cache_key]
-        # Se o cache ainda é válido (não expirou)
-        if current_time - timestamp < ADMIN_CACHE_TTL:
-            logger.debug(f"Usando resultado em cache para usuário {user_id} no chat {chat_id}: {is_admin_result}")
-            return is_admin_result
     
     # Verifica se é proprietário do bot
-    owner_id = int(Config.get_owner_id())
-    if user_id == owner_id:
-        # Armazena no cache e retorna True
-        admin_cache[cache_key] = (True, current_time)
+    if user_id == int(Config.get_owner_id()):
         return True
     
     # Verifica se é administrador do bot no MongoDB
     try:
-        if mongodb_client.db is not None:
-            is_bot_admin = await mongodb_client.is_admin(user_id)
-            if is_bot_admin:
-                logger.info(f"Usuário {user_id} é administrador do bot no MongoDB")
-                # Armazena no cache e retorna True
-                admin_cache[cache_key] = (True, current_time)
-                return True
+        if await admin_cache.is_bot_admin(user_id):
+            return True
     except Exception as e:
         logger.error(f"Erro ao verificar permissões de administrador do bot no MongoDB: {e}")
         # Aqui não retornamos, continuamos tentando verificar pelo Telegram
     
-    # Última opção: verificar permissões de administrador pelo Telegram
-    try:
-        # Obtém o status do membro no chat com timeout para evitar bloqueio
-        try:
-            # Cria uma tarefa para get_chat_member com timeout de 3 segundos
-            chat_member_task = asyncio.create_task(context.bot.get_chat_member(chat_id, user_id))
-            chat_member = await asyncio.wait_for(chat_member_task, timeout=3.0)
-            
-            # Verifica se é administrador ou criador do grupo
-            is_admin_result = isinstance(chat_member, (ChatMemberAdministrator, ChatMemberOwner))
-            
-            # Armazena no cache
-            admin_cache[cache_key] = (is_admin_result, current_time)
-            
-            return is_admin_result
-        except asyncio.TimeoutError:
-            logger.warning(f"Timeout ao verificar permissões de administrador para usuário {user_id} no chat {chat_id}")
-            # Se for um retry após timeout anterior, assumimos false para não ficar em loop
-            admin_cache[cache_key] = (False, current_time)
-            return False
-    except Exception as e:
-        logger.error(f"Erro ao verificar permissões de administrador: {e}")
-        # Em caso de erro, não permite o comando
-        admin_cache[cache_key] = (False, current_time)
-        return False
+    # Última opção: verificar se está na lista de administradores do chat
+    return await admin_cache.is_chat_admin(context.bot, chat_id, user_id)
+
+async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handler para atualizações chat_member.
+    Mantém a lista de administradores em cache quando alguém é promovido ou rebaixado
+    e registra entradas e saídas no diretório de membros.
+    
+    Args:
+        update (Update): Objeto de atualização do Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    member_update = update.chat_member
+    if member_update is None:
+        return
+    
+    new_member = member_update.new_chat_member
+    is_chat_admin = isinstance(new_member, (ChatMemberAdministrator, ChatMemberOwner))
+    admin_cache.apply_member_update(member_update.chat.id, new_member.user.id, is_chat_admin)
+    member_directory.observe(member_update.chat.id, new_member.user, new_member.status)
+    logger.debug(
+        f"Status do membro {new_member.user.id} no chat {member_update.chat.id} "
+        f"atualizado: {new_member.status}"
+    )
+
+async def record_member_activity(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handler que registra no diretório de membros os autores de mensagens em grupos
+    (incluindo check-ins), os membros que entraram e os que saíram.
+    
+    Args:
+        update (Update): Objeto de atualização do Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    message = update.effective_message
+    chat = update.effective_chat
+    if message is None or chat is None or chat.type not in ["group", "supergroup"]:
+        return
+    
+    member_directory.observe(chat.id, message.from_user)
+    for user in message.new_chat_members or ():
+        member_directory.observe(chat.id, user)
+    if message.left_chat_member:
+        member_directory.observe(chat.id, message.left_chat_member, "left")
 
 async def motivation_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -928,6 +956,7 @@ async def setadmin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         admin_name=user_name,
         added_by=update.effective_user.id
     )
+    admin_cache.invalidate_bot_admins()
     
     if result:
         await update.message.reply_text(
@@ -998,6 +1027,7 @@ async def deladmin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     
     # Remove o usuário da lista de administradores
     result = await mongodb_client.remove_admin(user_id=user_id)
+    admin_cache.invalidate_bot_admins()
     
     if result:
         await update.message.reply_text(
@@ -1047,6 +1077,24 @@ async def listadmins_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await update.message.reply_text(admin_list)
     logger.info(f"Lista de administradores solicitada por {update.effective_user.id}")
 
+async def perf_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handler para o comando /perf.
+    Mostra p50/p95/p99 da duração de cada handler, das atualizações, do atraso
+    de fila e do tempo gasto no MongoDB, no Telegram e na LLM.
+    Use /perf reset para descartar as amostras.
+    
+    Args:
+        update (Update): Objeto de atualização do Telegram.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    if context.args and context.args[0].lower() == "reset":
+        perf_stats.reset()
+        await update.message.reply_text("📊 Amostras de desempenho descartadas.")
+        return
+    
+    await update.message.reply_text(format_perf_report(), parse_mode=ParseMode.HTML)
+
 # Handlers para monitoramento de mensagens
 
 async def monitor_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1077,6 +1125,7 @@ async def monitor_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         title=chat_title,
         username=chat_username
     )
+    chat_directory.invalidate()
     
     # Tenta deletar a mensagem de comando
     try:
@@ -1118,6 +1167,7 @@ async def unmonitor_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Para o monitoramento
     success = await mongodb_client.stop_monitoring(chat_id)
+    chat_directory.invalidate()
     
     # Tenta deletar a mensagem de comando
     try:
@@ -1698,8 +1748,16 @@ async def _admin_correio_status(update: Update, context: ContextTypes.DEFAULT_TY
     try:
         # Verificar se o agendador está rodando
         from src.utils.mail_scheduler import mail_scheduler
-        
-        scheduler_status = "🟢 Ativo" if mail_scheduler and mail_scheduler.is_running else "🔴 Inativo"
+        from src.utils.leader_election import leader_electors
+        
+        elector = leader_electors.get("mail_scheduler")
+        if mail_scheduler and mail_scheduler.is_running:
+            scheduler_status = "🟢 Ativo"
+        elif mail_scheduler and elector and elector.is_running:
+            # O ciclo periódico roda na réplica líder; a publicação manual funciona aqui
+            scheduler_status = "🟢 Ativo (em outra réplica)"
+        else:
+            scheduler_status = "🔴 Inativo"
         
         # Verificar configurações
         try:
@@ -1719,7 +1777,7 @@ async def _admin_correio_status(update: Update, context: ContextTypes.DEFAULT_TY
             f"**Chave Pix:** {pix_status}\n"
             f"**Grupo GYM NATION:** {gym_nation_status}\n"
             f"**Chat ID:** `{gym_nation_chat_id or 'N/A'}`\n\n"
-            f"**Sistema:** {'🟢 Operacional' if scheduler_status == '🟢 Ativo' and pix_status == '🟢 Configurado' and gym_nation_status == '🟢 Encontrado' else '🟡 Parcial/🔴 Inativo'}"
+            f"**Sistema:** {'🟢 Operacional' if scheduler_status.startswith('🟢') and pix_status == '🟢 Configurado' and gym_nation_status == '🟢 Encontrado' else '🟡 Parcial/🔴 Inativo'}"
         )
         
         await update.message.reply_text(status_text, parse_mode=ParseMode.MARKDOWN)
@@ -1759,7 +1817,9 @@ async def _admin_correio_stats(update: Update, context: ContextTypes.DEFAULT_TYP
             
             f"**🔄 Status dos correios:**\n"
             f"• Pendentes: {total_stats['pending']}\n"
+            f"• Em publicação: {total_stats['publishing'] + total_stats['queued']}\n"
             f"• Publicados: {total_stats['published']}\n"
+            f"• Falhas na publicação: {total_stats['failed']}\n"
             f"• Expirados: {total_stats['expired']}\n\n"
             
             f"_Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M')}_"
@@ -1860,8 +1920,7 @@ async def _admin_correio_send(update: Update, context: ContextTypes.DEFAULT_TYPE
             from src.utils.mongodb_instance import mongodb_client
             
             # Contar pendentes antes
-            pending_before = await mongodb_client.get_pending_mails()
-            count_before = len(pending_before)
+            count_before = await mongodb_client.count_pending_mails()
             
             if count_before == 0:
                 await update.message.reply_text(
@@ -1871,12 +1930,10 @@ async def _admin_correio_send(update: Update, context: ContextTypes.DEFAULT_TYPE
                 return
             
             # Publicar todos
-            await publish_all_pending_mails()
+            count_sent = await publish_all_pending_mails()
             
             # Contar pendentes depois
-            pending_after = await mongodb_client.get_pending_mails()
-            count_after = len(pending_after)
-            count_sent = count_before - count_after
+            count_after = await mongodb_client.count_pending_mails()
             
             await update.message.reply_text(
                 f"✅ **CORREIOS ENVIADOS**\n\n"
@@ -11,6 +11,9 @@ from telegram.constants import ParseMode
 
 from src.utils.mongodb_instance import mongodb_client
 from src.utils.config import Config
+from src.utils.quota_service import mail_quota
+from src.utils.member_directory import member_directory, is_present
+from src.utils.content_filter import content_filter
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,18 @@ MAIL_MESSAGE, MAIL_RECIPIENT = range(2)
 # Estados do ConversationHandler para resposta anônima
 REPLY_MESSAGE = 2
 
+def contains_offensive_content(text: str) -> bool:
+    """
+    Verifica se o texto contém algum termo do léxico do filtro de conteúdo.
+    
+    Args:
+        text (str): Texto a verificar.
+        
+    Returns:
+        bool: True se o filtro (src.utils.content_filter) encontra algum termo ofensivo.
+    """
+    return content_filter.contains_offensive(text)
+
 
 class MailHandlers:
     """Classe para gerenciar handlers do correio elegante."""
@@ -40,11 +55,11 @@ class MailHandlers:
         user_id = update.effective_user.id
         user_name = update.effective_user.full_name
         
-        # Verificar limite diário de correios
-        daily_count = await mongodb_client.get_daily_mail_count(user_id)
-        if daily_count >= 2:
+        # Verificar limite diário de correios (a reserva só acontece na confirmação)
+        quota = await mail_quota.peek(str(user_id))
+        if not quota.allowed:
             await update.message.reply_text(
-                "📬 Você já enviou 2 correios hoje.\n"
+                f"📬 Você já enviou {quota.limit} correios hoje.\n"
                 "Limite diário atingido. Tente novamente amanhã!"
             )
             return ConversationHandler.END
@@ -126,7 +141,14 @@ class MailHandlers:
             )
             return ConversationHandler.END
         
-        # Pular verificação - sempre assumir que o usuário está no grupo
+        # Recusar apenas quem comprovadamente não está no grupo; sem confirmação, o envio segue
+        in_group = await MailHandlers._check_user_in_group(context.bot, gym_nation_chat_id, recipient_username)
+        if in_group is False:
+            await update.message.reply_text(
+                f"❌ @{recipient_username} não está no grupo GYM NATION.\n"
+                "Digite outro @username:"
+            )
+            return MAIL_RECIPIENT
         
         # Exibir pré-visualização
         sender_id = context.user_data['mail_sender_id']
@@ -178,6 +200,16 @@ class MailHandlers:
             await query.edit_message_text("❌ Erro: Mensagem não encontrada.")
             return
         
+        # Reservar um correio da cota diária antes de gravar
+        quota_key = str(sender_id)
+        quota = await mail_quota.reserve(quota_key)
+        if not quota.allowed:
+            await query.edit_message_text(
+                f"📬 Você já enviou {quota.limit} correios hoje.\n"
+                "Limite diário atingido. Tente novamente amanhã!"
+            )
+            return
+        
         # Salvar no banco de dados
         mail_id = await mongodb_client.create_mail(
             sender_id=sender_id,
@@ -186,6 +218,9 @@ class MailHandlers:
             message_text=message_text
         )
         
+        if not mail_id:
+            await mail_quota.refund(quota.reservation, quota_key)
+        
         if mail_id:
             await query.edit_message_text(
                 "✅ **Correio enviado com sucesso!** 📬\n\n"
@@ -893,26 +928,33 @@ class MailHandlers:
     
     @staticmethod
     async def _contains_offensive_content(text: str) -> bool:
-        """Filtro básico de conteúdo ofensivo."""
-        # Lista básica de palavras ofensivas (expandir conforme necessário)
-        offensive_words = [
-            'merda', 'porra', 'caralho', 'puta', 'viado', 'idiota', 'burro',
-            'fdp', 'arrombado', 'desgraça', 'otário', 'babaca'
-        ]
-        
-        text_lower = text.lower()
-        return any(word in text_lower for word in offensive_words)
+        """Filtro de conteúdo ofensivo (src.utils.content_filter)."""
+        return contains_offensive_content(text)
     
     @staticmethod
-    async def _check_user_in_group(bot, chat_id: int, username: str) -> bool:
-        """Verifica se um usuário está no grupo pelo username."""
+    async def _check_user_in_group(bot, chat_id: int, username: str) -> Optional[bool]:
+        """
+        Verifica se um usuário está no grupo pelo username.
+        
+        Consulta primeiro o diretório de membros (usuários vistos no grupo); a API
+        do Telegram só é chamada para usernames que nunca foram vistos.
+        
+        Returns:
+            True se está no grupo, False se o diretório ou a API informam que saiu ou foi
+            removido e None se não foi possível verificar (qualquer erro).
+        """
         try:
             # Primeiro, tentar sem @ para evitar problemas com API
             username_clean = username.lstrip('@')
             
+            known_member = await member_directory.lookup(chat_id, username_clean)
+            if known_member is not None:
+                return is_present(known_member)
+            
             # Método 1: Tentar com @ na frente (mais comum)
             try:
                 member = await bot.get_chat_member(chat_id, f"@{username_clean}")
+                member_directory.observe(chat_id, member.user, member.status)
                 return member.status in ['member', 'administrator', 'creator']
             except Exception as e:
                 # Log específico do erro para análise
@@ -925,17 +967,13 @@ class MailHandlers:
                 else:
                     logger.warning(f"Erro inesperado ao verificar @{username_clean}: {e}")
                 
-                # Implementar fallback: assumir que podem estar no grupo se for um erro 400 ou problemas de privacidade
-                # (erro 400 geralmente indica configurações de privacidade, não que o usuário não está no grupo)
-                if any(x in str(e) for x in ["400", "Bad Request", "Invalid user_id specified", "Forbidden"]):
-                    logger.info(f"Assumindo que @{username_clean} pode estar no grupo devido ao erro de privacidade/API")
-                    return None  # Retorna None para indicar "não conseguiu verificar"
-                
-                return False
+                # Erros (privacidade, username inválido, timeout, rede) não provam que o
+                # usuário saiu do grupo: retorna None para indicar "não conseguiu verificar"
+                return None
                 
         except Exception as e:
             logger.error(f"Erro geral ao verificar membro {username} no grupo {chat_id}: {e}")
-            return False
+            return None
     
     @staticmethod
     async def _generate_pix_payment(user_id: int, mail_id: str) -> tuple[Optional[str], Optional[str]]:
@@ -964,24 +1002,38 @@ class MailHandlers:
 
 
 # Conversation handlers
-def get_mail_conversation_handler():
-    """Retorna o ConversationHandler para correio elegante."""
+def get_mail_conversation_handler(persistent: bool = False):
+    """
+    Retorna o ConversationHandler para correio elegante.
+    
+    Args:
+        persistent (bool): Se o estado da conversa é salvo pela persistência da Application.
+    """
     return ConversationHandler(
         entry_points=[CommandHandler("correio", MailHandlers.correio_command, filters=filters.ChatType.PRIVATE)],
         states={
             MAIL_MESSAGE: [MessageHandler(filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE, MailHandlers.handle_mail_message)],
             MAIL_RECIPIENT: [MessageHandler(filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE, MailHandlers.handle_mail_recipient)]
         },
-        fallbacks=[CommandHandler("cancelar", MailHandlers.cancel_conversation)]
+        fallbacks=[CommandHandler("cancelar", MailHandlers.cancel_conversation)],
+        name="correio",
+        persistent=persistent
     )
 
 
-def get_reply_conversation_handler():
-    """Retorna o ConversationHandler para resposta anônima."""
+def get_reply_conversation_handler(persistent: bool = False):
+    """
+    Retorna o ConversationHandler para resposta anônima.
+    
+    Args:
+        persistent (bool): Se o estado da conversa é salvo pela persistência da Application.
+    """
     return ConversationHandler(
         entry_points=[CommandHandler("respondercorreio", MailHandlers.responder_correio_command, filters=filters.ChatType.PRIVATE)],
         states={
             REPLY_MESSAGE: [MessageHandler(filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE, MailHandlers.handle_reply_message)]
         },
-        fallbacks=[CommandHandler("cancelar", MailHandlers.cancel_conversation)]
+        fallbacks=[CommandHandler("cancelar", MailHandlers.cancel_conversation)],
+        name="resposta_correio",
+        persistent=persistent
     )
\ No newline at end of file
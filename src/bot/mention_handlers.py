@@ -12,21 +12,20 @@ from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
-from src.utils.anthropic_client import AnthropicClient
 from src.utils.mongodb_instance import mongodb_client
 from src.utils.config import Config
+from src.utils.quota_service import qa_quota
 from src.bot.fitness_qa import generate_fitness_answer
+from src.utils.keyword_matcher import KeywordMatcher
+from src.utils.text_utils import normalize_text
 import asyncio
 import time
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
-# Cliente da Anthropic
-anthropic_client = AnthropicClient()
-
 # Limite diário de consultas por usuário por chat
-QA_DAILY_LIMIT = int(Config.get_env("QA_DAILY_LIMIT", "2"))
+QA_DAILY_LIMIT = qa_quota.limit
 
 # Nome de usuário do bot
 BOT_USERNAME = Config.get_bot_username()
@@ -113,23 +112,21 @@ async def handle_mention(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await message.reply_text("Por favor, faça uma pergunta junto com a menção ou mencione-me em resposta a uma mensagem com conteúdo.")
         return
     
+    quota_key = f"{chat_id}:{user_id}"
+    reservation = None
     try:
-        # Verifica se o usuário atingiu o limite diário
-        daily_count = await mongodb_client.get_daily_qa_count(user_id, chat_id)
-        if daily_count >= QA_DAILY_LIMIT:
-            last_timestamp = await mongodb_client.get_last_qa_timestamp(user_id, chat_id)
-            if last_timestamp:
-                reset_time = last_timestamp + timedelta(days=1)
-                now = datetime.now()
-                if now < reset_time:
-                    time_left = reset_time - now
-                    hours = time_left.seconds // 3600
-                    minutes = (time_left.seconds % 3600) // 60
-                    await message.reply_text(
-                        f"Você atingiu o limite diário de {QA_DAILY_LIMIT} perguntas. "
-                        f"Tente novamente em {hours}h {minutes}min."
-                    )
-                    return
+        # Reserva uma pergunta da cota do usuário (atômico entre requisições simultâneas)
+        quota = await qa_quota.reserve(quota_key)
+        if not quota.allowed:
+            time_left = max(timedelta(0), quota.reset_at - datetime.now())
+            hours = int(time_left.total_seconds()) // 3600
+            minutes = (int(time_left.total_seconds()) % 3600) // 60
+            await message.reply_text(
+                f"Você atingiu o limite diário de {quota.limit} perguntas. "
+                f"Tente novamente em {hours}h {minutes}min."
+            )
+            return
+        reservation = quota.reservation
         
         # Envia mensagem de espera
         wait_message = await context.bot.send_message(
@@ -193,10 +190,9 @@ async def handle_mention(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         }
         qa_id = await mongodb_client.store_qa_interaction(qa_interaction)
         
-        # Incrementa contador de uso
-        await mongodb_client.increment_qa_usage(user_id, chat_id)
-        
     except Exception as e:
+        # A pergunta não foi respondida: devolve a unidade reservada
+        await qa_quota.refund(reservation, quota_key)
         error_message = f"❌ Ocorreu um erro ao processar sua pergunta: {str(e)}"
         logging.error(f"Erro ao processar menção: {e}")
         
@@ -260,6 +256,37 @@ async def handle_qa_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.answer("An error occurred while processing your feedback.", show_alert=True)
         return None
 
+def _build_keyword_matcher() -> KeywordMatcher:
+    """
+    Monta o autômato usado por classify_question.
+    
+    Cada palavra-chave de CATEGORIES (e de QA_EXTRA_KEYWORDS) é associada à sua
+    categoria. Acentos, maiúsculas e o plural regular são ignorados ("proteinas"
+    conta "proteína"), e as palavras-chave que aparecem dentro de outras como
+    palavra inteira também contam ("pré-treino" também conta "treino").
+    
+    Returns:
+        KeywordMatcher: Autômato com as palavras-chave de todas as categorias.
+    """
+    matcher = KeywordMatcher()
+    for category, data in CATEGORIES.items():
+        for keyword in data["keywords"]:
+            matcher.add(keyword, category)
+    
+    categories_by_name = {normalize_text(category): category for category in CATEGORIES}
+    for name, keywords in Config.get_qa_extra_keywords().items():
+        category = categories_by_name.get(normalize_text(name))
+        if category is None:
+            logger.error(f"Categoria desconhecida em QA_EXTRA_KEYWORDS: {name}")
+            continue
+        for keyword in keywords:
+            matcher.add(keyword, category)
+    
+    matcher.build()
+    return matcher
+
+_KEYWORD_MATCHER = _build_keyword_matcher()
+
 def classify_question(question: str) -> Dict[str, Any]:
     """
     Classifica uma pergunta em uma das categorias predefinidas.
@@ -270,27 +297,15 @@ def classify_question(question: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Um dicionário com informações da categoria.
     """
-    # Converte a pergunta para minúsculas
-    question_lower = question.lower()
-    
-    # Conta a ocorrência de palavras-chave para cada categoria
-    category_scores = {}
-    
-    for category, data in CATEGORIES.items():
-        score = 0
-        for keyword in data["keywords"]:
-            # Procura pela palavra-chave na pergunta
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            matches = re.findall(pattern, question_lower)
-            score += len(matches)
-        
-        category_scores[category] = score
+    # Conta a ocorrência de palavras-chave para cada categoria (uma única passada na pergunta)
+    category_scores = dict.fromkeys(CATEGORIES, 0)
+    category_scores.update(_KEYWORD_MATCHER.count(question))
     
     # Encontra a categoria com maior pontuação
     best_category = max(category_scores.items(), key=lambda x: x[1])
     
-    # Se nenhuma categoria tiver pontuação, usa "treino" como padrão
+    # Se nenhuma categoria tiver pontuação, usa "Off-topic" como padrão
     if best_category[1] == 0:
         return CATEGORIES["Off-topic"]
     
-    return CATEGORIES[best_category[0]] 
\ No newline at end of file
+    return CATEGORIES[best_category[0]]
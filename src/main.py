@@ -1,11 +1,20 @@
 """
 Ponto de entrada principal para o GYM NATION Bot.
 """
+import time
+
+# Início da contagem do tempo de inicialização (inclui os imports abaixo)
+_IMPORTS_STARTED = time.perf_counter()
+
+import hashlib
+import json
 import logging
 import asyncio
 import sys
 import os
+import signal
 import httpx
+from typing import List, Tuple
 
 # Adiciona o diretório raiz ao path para permitir imports relativos
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -16,15 +25,18 @@ from telegram.ext import (
     MessageHandler,
     filters,
     ContextTypes,
-    CallbackQueryHandler
+    CallbackQueryHandler,
+    ChatMemberHandler
 )
-from telegram import BotCommand, BotCommandScopeAllGroupChats, BotCommandScopeDefault, BotCommandScopeAllChatAdministrators, BotCommandScopeChat, Update
-from telegram.request import HTTPXRequest
+from telegram import BotCommand, BotCommandScope, BotCommandScopeAllGroupChats, BotCommandScopeDefault, BotCommandScopeAllChatAdministrators, BotCommandScopeChat, Update
 
 from src.utils.config import Config
 from src.utils.filters import CustomFilters
 from src.utils.mongodb_instance import mongodb_client, initialize_mongodb
 from src.utils.anthropic_client import AnthropicClient
+from src.utils.mongodb_client import MongoDBClient
+from src.utils.perf import TimedHTTPXRequest, instrument_application, instrument_class
+from src.utils.logging_setup import start_logging, stop_logging
 from src.bot.handlers import (
     start_command,
     help_command,
@@ -45,7 +57,10 @@ from src.bot.handlers import (
     listrecurrent_command,
     delrecurrent_command,
     rules_command,
-    admin_correio_command
+    admin_correio_command,
+    handle_chat_member_update,
+    record_member_activity,
+    perf_command
 )
 from src.bot.checkin_handlers import (
     checkin_command,
@@ -64,21 +79,27 @@ from src.bot.blacklist_handlers import (
     blacklist_command,
     rmblacklist_command,
     blacklist_button,
-    ban_blacklist_command
+    blacklist_page_callback,
+    ban_blacklist_command,
+    ban_status_command
 )
+from src.bot.export_handlers import export_command
 from src.bot.mail_handlers import (
     MailHandlers,
     get_mail_conversation_handler,
     get_reply_conversation_handler
 )
 
-# Configuração de logging
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.DEBUG
-)
+from src.utils.startup import StartupTimer, warm_up_caches
+
+# Tempo gasto nos imports do bot (em segundos)
+_IMPORTS_SECONDS = time.perf_counter() - _IMPORTS_STARTED
+
 logger = logging.getLogger(__name__)
 
+# Configuração (bot_settings) com o hash dos últimos menus de comandos registrados
+COMMANDS_HASH_SETTING = "commands_hash"
+
 async def setup_commands(application: Application) -> None:
     """Configura os comandos do bot para aparecerem no menu de comandos do Telegram."""
     
@@ -107,7 +128,9 @@ async def setup_commands(application: Application) -> None:
         BotCommand("addblacklist", "Adiciona uma mensagem à blacklist"),
         BotCommand("blacklist", "Lista mensagens na blacklist do chat"),
         BotCommand("rmblacklist", "Remove uma mensagem da blacklist pelo ID"),
-        BotCommand("ban_blacklist", "Bane usuários da blacklist e limpa entradas")
+        BotCommand("ban_blacklist", "Bane usuários da blacklist e limpa entradas"),
+        BotCommand("ban_status", "Mostra o progresso dos banimentos em massa"),
+        BotCommand("exportar", "Exporta blacklist, mensagens ou check-ins em arquivo")
     ]
     
     # Comandos exclusivos do proprietário
@@ -121,32 +144,238 @@ async def setup_commands(application: Application) -> None:
         BotCommand("say", "Envia uma mensagem como bot"),
         BotCommand("sayrecurrent", "Configura mensagem recorrente"),
         BotCommand("listrecurrent", "Lista mensagens recorrentes"),
-        BotCommand("delrecurrent", "Remove mensagem recorrente")
+        BotCommand("delrecurrent", "Remove mensagem recorrente"),
+        BotCommand("perf", "Mostra os percentis de tempo dos handlers")
     ]
     
-    # Configura comandos para chat privado com o proprietário
-    await application.bot.set_my_commands(
-        owner_commands, 
-        scope=BotCommandScopeChat(chat_id=Config.get_owner_id())
-    )
-    
-    # Configura comandos padrão para todos os outros usuários em chat privado
-    await application.bot.set_my_commands(public_commands, scope=BotCommandScopeDefault())
+    # Menu de cada escopo; uma lista vazia remove os comandos do escopo
+    menus = [
+        # Chat privado com o proprietário
+        (BotCommandScopeChat(chat_id=Config.get_owner_id()), owner_commands),
+        # Padrão para todos os outros usuários em chat privado
+        (BotCommandScopeDefault(), public_commands),
+        # Apenas administradores nos grupos
+        (BotCommandScopeAllChatAdministrators(), admin_commands),
+        # Membros comuns nos grupos não veem comandos
+        (BotCommandScopeAllGroupChats(), []),
+    ]
     
-    # Configura comandos apenas para administradores nos grupos
-    await application.bot.set_my_commands(admin_commands, scope=BotCommandScopeAllChatAdministrators())
+    # Os menus só mudam com uma nova versão do bot: se o hash gravado no último
+    # registro for o mesmo, as chamadas à Bot API são dispensadas
+    digest = commands_digest(application.bot.id, menus)
+    if mongodb_client.db is not None and await mongodb_client.get_bot_setting(COMMANDS_HASH_SETTING) == digest:
+        logger.info("Comandos do bot inalterados desde o último registro; registro ignorado.")
+        return
     
-    # Remove comandos para membros comuns nos grupos
-    await application.bot.delete_my_commands(scope=BotCommandScopeAllGroupChats())
+    await asyncio.gather(*(
+        application.bot.set_my_commands(commands, scope=scope) if commands
+        else application.bot.delete_my_commands(scope=scope)
+        for scope, commands in menus
+    ))
+    if mongodb_client.db is not None:
+        await mongodb_client.set_bot_setting(COMMANDS_HASH_SETTING, digest)
     
     logger.info("Comandos do bot configurados: públicos para todos em chat privado, completos para proprietário, administrativos para admins nos grupos")
 
+def commands_digest(bot_id: int, menus: List[Tuple[BotCommandScope, List[BotCommand]]]) -> str:
+    """
+    Calcula o hash dos menus de comandos do bot.
+    
+    Args:
+        bot_id (int): ID do bot (um novo token leva a um novo registro).
+        menus (List[Tuple[BotCommandScope, List[BotCommand]]]): Comandos de cada escopo.
+        
+    Returns:
+        str: Hash SHA-256 (hexadecimal) do bot, dos escopos e dos comandos.
+    """
+    payload = {
+        "bot_id": bot_id,
+        "menus": [[scope.to_dict(), [command.to_dict() for command in commands]] for scope, commands in menus],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def register_handlers(application: Application) -> None:
+    """
+    Registra os handlers de comandos, mensagens e botões do bot.
+    
+    Usado pelo main_async e pelo replay de atualizações gravadas
+    (benchmarks.replay_updates), para que ambos usem o mesmo grafo de handlers.
+    
+    Args:
+        application (Application): Aplicação do Telegram.
+    """
+    # Cria o filtro de proprietário
+    owner_filter = CustomFilters.owner_filter()
+    only_owner_filter = CustomFilters.only_owner_filter()
+
+    # Comandos públicos disponíveis para todos os usuários em chat privado
+    application.add_handler(CommandHandler("start", start_command, filters=filters.ChatType.PRIVATE))
+    application.add_handler(CommandHandler("help", help_command, filters=filters.ChatType.PRIVATE))
+    application.add_handler(CommandHandler("checkinscore", checkinscore_command, filters=filters.ChatType.PRIVATE))
+
+    # Comandos restritos ao proprietário/administradores
+    application.add_handler(CommandHandler("motivacao", motivation_command, filters=owner_filter))
+    application.add_handler(CommandHandler("fecho", fecho_command, filters=owner_filter))
+    application.add_handler(CommandHandler("apresentacao", presentation_command, filters=owner_filter))
+    application.add_handler(CommandHandler("macros", macros_command, filters=owner_filter))
+    application.add_handler(CommandHandler("regras", rules_command, filters=owner_filter))
+
+    # Comandos exclusivos do proprietário
+    application.add_handler(CommandHandler("say", say_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("sayrecurrent", sayrecurrent_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("listrecurrent", listrecurrent_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("delrecurrent", delrecurrent_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("admincorreio", admin_correio_command, filters=only_owner_filter))
+
+    # Adiciona handlers para comandos de check-in (apenas para o proprietário)
+    application.add_handler(CommandHandler("checkin", checkin_command, filters=owner_filter))
+    application.add_handler(CommandHandler("checkinplus", checkinplus_command, filters=owner_filter))
+    application.add_handler(CommandHandler("endcheckin", endcheckin_command, filters=owner_filter))
+    # Comando checkinscore é público para todos os usuários
+    application.add_handler(CommandHandler("checkinscore", checkinscore_command))
+    application.add_handler(CommandHandler("confirmcheckin", confirmcheckin_command, filters=owner_filter))
+
+    # Adiciona handlers para comandos de blacklist (apenas para o proprietário)
+    application.add_handler(CommandHandler("addblacklist", addblacklist_command, filters=owner_filter))
+    application.add_handler(CommandHandler("blacklist", blacklist_command, filters=owner_filter))
+    application.add_handler(CommandHandler("rmblacklist", rmblacklist_command, filters=owner_filter))
+    application.add_handler(CommandHandler("ban_blacklist", ban_blacklist_command, filters=owner_filter))
+    application.add_handler(CommandHandler("ban_status", ban_status_command, filters=owner_filter))
+    application.add_handler(CommandHandler("exportar", export_command, filters=owner_filter))
+
+    # Adiciona handler para os botões da blacklist
+    application.add_handler(CallbackQueryHandler(
+        blacklist_button,
+        pattern=r'^rmblacklist_'
+    ))
+    application.add_handler(CallbackQueryHandler(
+        blacklist_page_callback,
+        pattern=r'^blp:'
+    ))
+
+    # Mantém o cache de administradores atualizado com as mudanças de status dos membros
+    application.add_handler(ChatMemberHandler(handle_chat_member_update, ChatMemberHandler.CHAT_MEMBER))
+
+    # Registra os membros vistos nos grupos (grupo -1: roda antes e não bloqueia os demais handlers)
+    application.add_handler(
+        MessageHandler(filters.ChatType.GROUPS & filters.UpdateType.MESSAGE, record_member_activity),
+        group=-1
+    )
+
+    # Adiciona conversation handlers para correio elegante primeiro (prioridade máxima)
+    persistent_conversations = application.persistence is not None
+    application.add_handler(get_mail_conversation_handler(persistent_conversations))
+    application.add_handler(get_reply_conversation_handler(persistent_conversations))
+
+    # Adiciona handlers para comandos individuais de correio elegante
+    application.add_handler(CommandHandler("revelarcorreio", MailHandlers.revelar_correio_command, filters=filters.ChatType.PRIVATE))
+    application.add_handler(CommandHandler("denunciarcorreio", MailHandlers.denunciar_correio_command, filters=filters.ChatType.PRIVATE))
+    application.add_handler(CommandHandler("respondercorreio", MailHandlers.responder_correio_command, filters=filters.ChatType.PRIVATE))
+
+    # Adiciona handlers para botões do correio elegante
+    application.add_handler(CallbackQueryHandler(
+        MailHandlers.handle_mail_confirmation,
+        pattern=r'^mail_(confirm_|cancel)'
+    ))
+    application.add_handler(CallbackQueryHandler(
+        MailHandlers.handle_pix_confirmation,
+        pattern=r'^pix_confirm_'
+    ))
+    application.add_handler(CallbackQueryHandler(
+        MailHandlers.handle_mail_buttons,
+        pattern=r'^mail_(reveal_|reply_|report_)'
+    ))
+    application.add_handler(CallbackQueryHandler(
+        MailHandlers.handle_report_confirmation,
+        pattern=r'^report_(confirm_|cancel_)'
+    ))
+    application.add_handler(CallbackQueryHandler(
+        MailHandlers.handle_write_reply_button,
+        pattern=r'^write_reply_'
+    ))
+
+    # Handler para confirmação de PIX pelo proprietário
+    application.add_handler(CallbackQueryHandler(
+        MailHandlers.handle_owner_pix_confirmation,
+        pattern=r'^(owner_yes_|owner_no_)'
+    ))
+
+    # Adiciona handlers para comandos de administração (apenas para o proprietário do bot)
+    application.add_handler(CommandHandler("setadmin", setadmin_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("deladmin", deladmin_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("listadmins", listadmins_command, filters=only_owner_filter))
+
+    # Adiciona handlers para monitoramento de mensagens (apenas para o proprietário do bot)
+    application.add_handler(CommandHandler("monitor", monitor_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("unmonitor", unmonitor_command, filters=only_owner_filter))
+    application.add_handler(CommandHandler("perf", perf_command, filters=only_owner_filter))
+
+    # Adiciona handler para respostas anônimas simples (prioridade alta)
+    application.add_handler(MessageHandler(
+        filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE,
+        MailHandlers.handle_simple_reply_message
+    ))
+
+    # Adiciona handler para menções ao bot (sem restrição de usuário)
+    # IMPORTANTE: Deve vir APÓS os ConversationHandlers para não interferir
+    application.add_handler(MessageHandler(
+        (filters.TEXT & ~filters.COMMAND & (filters.Entity("mention") | filters.REPLY)),
+        handle_mention
+    ))
+
+    # Adiciona handler para processamento de feedback de Q&A
+    application.add_handler(CallbackQueryHandler(
+        handle_qa_feedback,
+        pattern=r'^qa_'
+    ))
+
+    # Adiciona handler para processar todas as mensagens (para check-ins) (apenas para o proprietário)
+    # Importante: este handler deve ser adicionado por último para não interferir com outros handlers
+    application.add_handler(
+        MessageHandler(
+            # Filtro para capturar NOVAS mensagens com mídias (fotos, vídeos, animações, documentos) 
+            # que são respostas, não são comandos, e vêm do proprietário (se owner_filter ativo).
+            filters.UpdateType.MESSAGE # Garante que é uma nova mensagem
+            & (filters.PHOTO | filters.VIDEO | filters.ANIMATION | filters.Document.ALL)
+            & filters.REPLY
+            & ~filters.COMMAND
+            & owner_filter,
+            handle_checkin_response
+        )
+    )
+
+    # Adiciona handler para mensagens não autorizadas 
+    # Exclui comandos e mensagens de conversação do sistema de correio
+    # Este handler deve vir ANTES do monitored_message para não interferir
+    application.add_handler(
+        MessageHandler(
+            (~owner_filter) & filters.TEXT & filters.COMMAND & (~filters.Regex(r'^/(correio|revelarcorreio|respondercorreio|denunciarcorreio|checkinscore)')),
+            unauthorized_message_handler
+        )
+    )
+
+    # Adiciona handler para monitorar mensagens de texto (apenas para o proprietário)
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & ~filters.COMMAND & owner_filter,
+            handle_monitored_message
+        )
+    )
+
+    # Adiciona handler para erros
+    application.add_error_handler(error_handler)
+
 async def main_async():
     """Função principal assíncrona para iniciar o bot."""
+    # Tempo de cada etapa da inicialização, resumido no log ao final
+    timer = StartupTimer(started_at=_IMPORTS_STARTED)
+    timer.record("imports", _IMPORTS_SECONDS)
+    
     # Inicializa a conexão com o MongoDB
     try:
         logger.info("Conectando ao MongoDB...")
-        await initialize_mongodb()
+        with timer.phase("mongo"):
+            await initialize_mongodb()
         logger.info("Conexão com o MongoDB estabelecida com sucesso.")
     except Exception as e:
         logger.error(f"Erro ao conectar ao MongoDB: {e}")
@@ -166,11 +395,13 @@ async def main_async():
     for attempt in range(1, max_retries + 1):
         try:
             logger.info(f"Tentativa {attempt}/{max_retries} de inicializar o bot...")
+            app_started = time.perf_counter()
             
             # Configura HTTPX com retries para problemas temporários de rede
             # Define a política de retry para o cliente HTTPX que é usado pelo python-telegram-bot
             # Cria o request personalizado para o python-telegram-bot com configurações compatíveis
-            request = HTTPXRequest(
+            # O tempo das chamadas à Bot API entra no detalhamento de cada atualização (/perf)
+            request = TimedHTTPXRequest(
                 connection_pool_size=8,  # Aumenta o tamanho do pool de conexões
                 connect_timeout=20.0,  # Timeout de conexão em segundos
                 read_timeout=20.0,  # Timeout de leitura em segundos
@@ -178,7 +409,14 @@ async def main_async():
             )
             
             # Cria a aplicação com timeout ajustado e o request personalizado
-            application = Application.builder().token(token).request(request).build()
+            # (o getUpdates também é medido: a sonda /ready verifica o último polling bem-sucedido)
+            builder = Application.builder().token(token).request(request).get_updates_request(TimedHTTPXRequest())
+            # Estado das conversas do correio salvo no MongoDB (sobrevive a reinícios; entre
+            # réplicas em execução, apenas o user_data é compartilhado)
+            if mongodb_client.db is not None:
+                from src.utils.mongo_persistence import MongoPersistence
+                builder = builder.persistence(MongoPersistence())
+            application = builder.build()
             
             # Instanciar e armazenar o cliente Anthropic no bot_data
             try:
@@ -192,175 +430,79 @@ async def main_async():
             except Exception as e:
                 logger.error(f"Erro ao inicializar o cliente Anthropic: {e}")
             
-            # Cria o filtro de proprietário
-            owner_filter = CustomFilters.owner_filter()
-            only_owner_filter = CustomFilters.only_owner_filter()
-            
-            # Comandos públicos disponíveis para todos os usuários em chat privado
-            application.add_handler(CommandHandler("start", start_command, filters=filters.ChatType.PRIVATE))
-            application.add_handler(CommandHandler("help", help_command, filters=filters.ChatType.PRIVATE))
-            application.add_handler(CommandHandler("checkinscore", checkinscore_command, filters=filters.ChatType.PRIVATE))
-            
-            # Comandos restritos ao proprietário/administradores
-            application.add_handler(CommandHandler("motivacao", motivation_command, filters=owner_filter))
-            application.add_handler(CommandHandler("fecho", fecho_command, filters=owner_filter))
-            application.add_handler(CommandHandler("apresentacao", presentation_command, filters=owner_filter))
-            application.add_handler(CommandHandler("macros", macros_command, filters=owner_filter))
-            application.add_handler(CommandHandler("regras", rules_command, filters=owner_filter))
-            
-            # Comandos exclusivos do proprietário
-            application.add_handler(CommandHandler("say", say_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("sayrecurrent", sayrecurrent_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("listrecurrent", listrecurrent_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("delrecurrent", delrecurrent_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("admincorreio", admin_correio_command, filters=only_owner_filter))
-            
-            # Adiciona handlers para comandos de check-in (apenas para o proprietário)
-            application.add_handler(CommandHandler("checkin", checkin_command, filters=owner_filter))
-            application.add_handler(CommandHandler("checkinplus", checkinplus_command, filters=owner_filter))
-            application.add_handler(CommandHandler("endcheckin", endcheckin_command, filters=owner_filter))
-            # Comando checkinscore é público para todos os usuários
-            application.add_handler(CommandHandler("checkinscore", checkinscore_command))
-            application.add_handler(CommandHandler("confirmcheckin", confirmcheckin_command, filters=owner_filter))
+            # Registra os handlers de comandos, mensagens e botões
+            register_handlers(application)
             
-            # Adiciona handlers para comandos de blacklist (apenas para o proprietário)
-            application.add_handler(CommandHandler("addblacklist", addblacklist_command, filters=owner_filter))
-            application.add_handler(CommandHandler("blacklist", blacklist_command, filters=owner_filter))
-            application.add_handler(CommandHandler("rmblacklist", rmblacklist_command, filters=owner_filter))
-            application.add_handler(CommandHandler("ban_blacklist", ban_blacklist_command, filters=owner_filter))
+            # Mede cada handler registrado e o tempo gasto no MongoDB e na LLM por atualização
+            instrument_class(MongoDBClient, "mongo")
+            instrument_class(AnthropicClient, "llm")
+            instrument_application(application)
             
-            # Adiciona handler para os botões da blacklist
-            application.add_handler(CallbackQueryHandler(
-                blacklist_button,
-                pattern=r'^rmblacklist_'
-            ))
-            
-            # Adiciona conversation handlers para correio elegante primeiro (prioridade máxima)
-            application.add_handler(get_mail_conversation_handler())
-            application.add_handler(get_reply_conversation_handler())
-            
-            # Adiciona handlers para comandos individuais de correio elegante
-            application.add_handler(CommandHandler("revelarcorreio", MailHandlers.revelar_correio_command, filters=filters.ChatType.PRIVATE))
-            application.add_handler(CommandHandler("denunciarcorreio", MailHandlers.denunciar_correio_command, filters=filters.ChatType.PRIVATE))
-            application.add_handler(CommandHandler("respondercorreio", MailHandlers.responder_correio_command, filters=filters.ChatType.PRIVATE))
-            
-            # Adiciona handlers para botões do correio elegante
-            application.add_handler(CallbackQueryHandler(
-                MailHandlers.handle_mail_confirmation,
-                pattern=r'^mail_(confirm_|cancel)'
-            ))
-            application.add_handler(CallbackQueryHandler(
-                MailHandlers.handle_pix_confirmation,
-                pattern=r'^pix_confirm_'
-            ))
-            application.add_handler(CallbackQueryHandler(
-                MailHandlers.handle_mail_buttons,
-                pattern=r'^mail_(reveal_|reply_|report_)'
-            ))
-            application.add_handler(CallbackQueryHandler(
-                MailHandlers.handle_report_confirmation,
-                pattern=r'^report_(confirm_|cancel_)'
-            ))
-            application.add_handler(CallbackQueryHandler(
-                MailHandlers.handle_write_reply_button,
-                pattern=r'^write_reply_'
-            ))
-            
-            # Handler para confirmação de PIX pelo proprietário
-            application.add_handler(CallbackQueryHandler(
-                MailHandlers.handle_owner_pix_confirmation,
-                pattern=r'^(owner_yes_|owner_no_)'
-            ))
-            
-            # Adiciona handlers para comandos de administração (apenas para o proprietário do bot)
-            application.add_handler(CommandHandler("setadmin", setadmin_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("deladmin", deladmin_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("listadmins", listadmins_command, filters=only_owner_filter))
-            
-            # Adiciona handlers para monitoramento de mensagens (apenas para o proprietário do bot)
-            application.add_handler(CommandHandler("monitor", monitor_command, filters=only_owner_filter))
-            application.add_handler(CommandHandler("unmonitor", unmonitor_command, filters=only_owner_filter))
-            
-            # Adiciona handler para respostas anônimas simples (prioridade alta)
-            application.add_handler(MessageHandler(
-                filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE,
-                MailHandlers.handle_simple_reply_message
-            ))
-            
-            # Adiciona handler para menções ao bot (sem restrição de usuário)
-            # IMPORTANTE: Deve vir APÓS os ConversationHandlers para não interferir
-            application.add_handler(MessageHandler(
-                (filters.TEXT & ~filters.COMMAND & (filters.Entity("mention") | filters.REPLY)),
-                handle_mention
-            ))
-            
-            # Adiciona handler para processamento de feedback de Q&A
-            application.add_handler(CallbackQueryHandler(
-                handle_qa_feedback,
-                pattern=r'^qa_'
-            ))
-            
-            # Adiciona handler para processar todas as mensagens (para check-ins) (apenas para o proprietário)
-            # Importante: este handler deve ser adicionado por último para não interferir com outros handlers
-            application.add_handler(
-                MessageHandler(
-                    # Filtro para capturar NOVAS mensagens com mídias (fotos, vídeos, animações, documentos) 
-                    # que são respostas, não são comandos, e vêm do proprietário (se owner_filter ativo).
-                    filters.UpdateType.MESSAGE # Garante que é uma nova mensagem
-                    & (filters.PHOTO | filters.VIDEO | filters.ANIMATION | filters.Document.ALL)
-                    & filters.REPLY
-                    & ~filters.COMMAND
-                    & owner_filter,
-                    handle_checkin_response
-                )
-            )
-            
-            # Adiciona handler para mensagens não autorizadas 
-            # Exclui comandos e mensagens de conversação do sistema de correio
-            # Este handler deve vir ANTES do monitored_message para não interferir
-            application.add_handler(
-                MessageHandler(
-                    (~owner_filter) & filters.TEXT & filters.COMMAND & (~filters.Regex(r'^/(correio|revelarcorreio|respondercorreio|denunciarcorreio|checkinscore)')),
-                    unauthorized_message_handler
-                )
-            )
-            
-            # Adiciona handler para monitorar mensagens de texto (apenas para o proprietário)
-            application.add_handler(
-                MessageHandler(
-                    filters.TEXT & ~filters.COMMAND & owner_filter,
-                    handle_monitored_message
-                )
-            )
-            
-
-            
-            # Adiciona handler para erros
-            application.add_error_handler(error_handler)
+            # Grava as atualizações recebidas (anonimizadas) para replay, se UPDATE_RECORD_FILE estiver definido
+            from src.utils.update_recorder import start_update_recorder
+            start_update_recorder(application)
+            timer.record("app", time.perf_counter() - app_started)
             
             # Configura os comandos do bot para aparecerem no menu
             # Configuramos os comandos diretamente em vez de usar post_init
             logger.info("Iniciando o GYM NATION Bot...")
             
-            # Inicializa o gerenciador de mensagens recorrentes
+            # Inicia o outbox antes dos agendadores: correios e mensagens recorrentes
+            # são gravados no MongoDB antes do envio
+            if mongodb_client.db is not None:
+                from src.utils.outbox import start_outbox
+                with timer.phase("outbox"):
+                    await start_outbox(application.bot)
+            
+            # Inicializa o gerenciador de mensagens recorrentes e o agendador de correio
+            # elegante. Com várias réplicas, apenas a líder eleita executa cada agendador.
             from src.utils.recurring_messages_manager import initialize_recurring_messages_manager
+            from src.utils.mail_scheduler import initialize_mail_scheduler, start_mail_scheduler, stop_mail_scheduler
+            from src.utils.leader_election import start_leader_election
             recurring_messages_manager = initialize_recurring_messages_manager(application)
-            await recurring_messages_manager.start()
+            # Criado em todas as réplicas (publicação manual); só a líder roda o ciclo periódico
+            initialize_mail_scheduler(application.bot)
+            
+            async def on_recurring_elected(token: int) -> None:
+                recurring_messages_manager.fencing_token = token
+                await recurring_messages_manager.start()
             
-            # Inicializa o agendador de correio elegante
-            from src.utils.mail_scheduler import start_mail_scheduler
-            await start_mail_scheduler(application.bot, interval_minutes=60)
+            async def on_mail_elected(token: int) -> None:
+                await start_mail_scheduler(application.bot, interval_minutes=60)
+            
+            # Agendador único de exclusão de mensagens temporárias, executor de jobs de
+            # /ban_blacklist (retomando jobs interrompidos) e /metrics, /health e /ready
+            # (porta METRICS_PORT)
+            from src.utils.deletion_scheduler import start_deletion_scheduler
+            from src.utils.ban_jobs import start_ban_jobs
+            from src.utils.metrics_server import start_metrics_server
+            
+            # Os serviços são independentes entre si: iniciam em paralelo, junto com o
+            # aquecimento dos caches usados pelas primeiras atualizações
+            await timer.gather("services", {
+                "recurring_leader": start_leader_election(
+                    "recurring_messages", on_recurring_elected, recurring_messages_manager.stop
+                ),
+                "mail_leader": start_leader_election("mail_scheduler", on_mail_elected, stop_mail_scheduler),
+                "deletion": start_deletion_scheduler(application.bot),
+                "ban_jobs": start_ban_jobs(application.bot),
+                "metrics": start_metrics_server(application),
+                "caches": warm_up_caches(),
+            })
             
             # Inicia o polling
             try:
                 # Define um timeout para a inicialização
-                init_task = asyncio.create_task(application.initialize())
-                await asyncio.wait_for(init_task, timeout=15.0)  # 15 segundos de timeout para inicialização
+                with timer.phase("telegram_init"):
+                    init_task = asyncio.create_task(application.initialize())
+                    await asyncio.wait_for(init_task, timeout=15.0)  # 15 segundos de timeout para inicialização
                 
-                # Configura os comandos
-                await setup_commands(application)
+                # Configura os comandos (apenas se os menus mudaram desde o último registro)
+                with timer.phase("commands"):
+                    await setup_commands(application)
                 
                 # Inicia o bot com timeout
+                polling_started = time.perf_counter()
                 start_task = asyncio.create_task(application.start())
                 await asyncio.wait_for(start_task, timeout=15.0)  # 15 segundos de timeout para start
                 
@@ -371,12 +513,16 @@ async def main_async():
                         timeout=10.0,  # Timeout de 10 segundos para requests de polling
                         bootstrap_retries=5,  # Número de retries para bootstrap
                         read_timeout=7.0,  # Timeout de leitura (mais longo)
-                        write_timeout=7.0  # Timeout de escrita (mais longo)
+                        write_timeout=7.0,  # Timeout de escrita (mais longo)
+                        # chat_member só é entregue se pedido explicitamente (mantém o cache de admins)
+                        allowed_updates=Update.ALL_TYPES
                     )
                 )
                 await asyncio.wait_for(polling_task, timeout=20.0)  # 20 segundos de timeout para polling
+                timer.record("polling", time.perf_counter() - polling_started)
                 
                 logger.info("Bot inicializado com sucesso!")
+                logger.info(timer.summary())
                 
                 # Inicialização bem-sucedida, sai do loop de retry
                 break
@@ -402,17 +548,104 @@ async def main_async():
                 logger.critical(f"Falha ao inicializar o bot após {max_retries} tentativas.")
                 raise  # Re-levanta a exceção para encerrar o programa
     
-    # Mantém o bot rodando até ser interrompido
+    # Mantém o bot rodando até receber SIGTERM (deploy, docker stop) ou SIGINT (Ctrl+C)
+    stop_event = asyncio.Event()
+    install_stop_signals(stop_event)
     try:
-        # Aguarda indefinidamente
-        await asyncio.Event().wait()
+        await stop_event.wait()
     finally:
-        # Encerra o bot quando for interrompido
-        await application.stop()
+        await shutdown_bot(application)
+
+def install_stop_signals(stop_event: asyncio.Event) -> None:
+    """
+    Faz SIGTERM e SIGINT iniciarem o desligamento ordenado do bot.
+    
+    Sem isso, o SIGTERM encerra o processo na hora, sem executar o desligamento.
+    
+    Args:
+        stop_event (asyncio.Event): Evento definido ao receber um dos sinais.
+    """
+    loop = asyncio.get_running_loop()
+    
+    def request_stop(signum: signal.Signals) -> None:
+        logger.info(f"Sinal {signum.name} recebido. Desligando o bot...")
+        stop_event.set()
+    
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, request_stop, signum)
+        except (NotImplementedError, RuntimeError):
+            # Windows: o Ctrl+C continua levantando KeyboardInterrupt
+            pass
+
+async def shutdown_bot(application: Application) -> None:
+    """
+    Desliga o bot sem perder trabalho pendente, dentro de SHUTDOWN_TIMEOUT_SECONDS.
+    
+    1. A sonda /ready e o polling param: nenhuma atualização nova é recebida.
+    2. As atualizações em processamento terminam (application.stop).
+    3. As tarefas em segundo plano terminam ou gravam o trabalho pendente no
+       MongoDB (task_supervisor.drain), no tempo que restar do prazo.
+    4. Os serviços param: as eleições liberam os leases (outra réplica assume
+       na hora), o outbox e os jobs de banimento gravam o lote em andamento (no
+       tempo que restar do prazo) e o restante, como as exclusões, continua no
+       MongoDB para o próximo início.
+    5. As gravações em lote (membros, estado das conversas) são feitas e as
+       conexões com o Telegram e o MongoDB são fechadas.
+    
+    Args:
+        application (Application): Aplicação do Telegram.
+    """
+    from src.utils.deletion_scheduler import stop_deletion_scheduler
+    from src.utils.leader_election import stop_leader_elections
+    from src.utils.ban_jobs import stop_ban_jobs
+    from src.utils.member_directory import member_directory
+    from src.utils.outbox import stop_outbox
+    from src.utils.metrics_server import stop_metrics_server
+    from src.utils.update_recorder import stop_update_recorder
+    from src.utils.task_supervisor import task_supervisor
+    
+    started = time.perf_counter()
+    timeout = Config.get_shutdown_timeout()
+    
+    def remaining() -> float:
+        return max(0.0, timeout - (time.perf_counter() - started))
+    
+    await stop_metrics_server()
+    try:
+        if application.updater is not None and application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await asyncio.wait_for(application.stop(), timeout=remaining())
+    except asyncio.TimeoutError:
+        logger.warning("Prazo de desligamento esgotado aguardando as atualizações em processamento.")
+    
+    await task_supervisor.drain(remaining())
+    
+    await stop_leader_elections()
+    await stop_ban_jobs(remaining())
+    await stop_outbox(remaining())
+    await stop_deletion_scheduler()
+    await member_directory.stop()
+    stop_update_recorder()
+    await task_supervisor.cancel_all()
+    
+    # Grava o estado das conversas (persistência) e fecha a conexão com a Bot API
+    try:
+        await application.shutdown()
+    except Exception as e:
+        logger.error(f"Erro ao encerrar a aplicação: {e}")
+    await mongodb_client.close()
+    logger.info(f"Bot desligado em {time.perf_counter() - started:.2f}s.")
 
 def main() -> None:
     """Função principal para iniciar o bot."""
-    asyncio.run(main_async())
+    # Logging em fila: formatação e escrita em uma thread separada do loop de eventos
+    start_logging()
+    try:
+        asyncio.run(main_async())
+    finally:
+        stop_logging()
 
 async def unauthorized_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -427,9 +660,11 @@ async def unauthorized_message_handler(update: Update, context: ContextTypes.DEF
     chat_id = update.effective_chat.id
     chat_type = update.effective_chat.type
     
+    # Este ponto de log (arquivo e linha) é limitado por LOG_RATE_LIMIT; a formatação
+    # preguiçosa só evita montar o texto das mensagens descartadas
     logger.warning(
-        f"Mensagem não autorizada ignorada. "
-        f"Usuário: {user_id}, Chat: {chat_id}, Tipo de chat: {chat_type}"
+        "Mensagem não autorizada ignorada. Usuário: %s, Chat: %s, Tipo de chat: %s",
+        user_id, chat_id, chat_type
     )
     # Não responde à mensagem para não revelar que o bot está ativo
     
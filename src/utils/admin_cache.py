@@ -0,0 +1,172 @@
+"""
+Cache das listas de administradores (dos chats no Telegram e do bot no MongoDB).
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from telegram import Bot
+
+from src.utils.mongodb_instance import mongodb_client
+
+logger = logging.getLogger(__name__)
+
+
+class AdminCache:
+    """
+    Cache dos administradores de cada chat e dos administradores do bot.
+
+    A lista completa de administradores de um chat é obtida com uma única
+    chamada a getChatAdministrators e guardada por chat (LRU limitado a
+    MAX_CHATS, com validade TTL). Um usuário que não está na lista não é
+    administrador, então a resposta negativa também vem do cache. As
+    atualizações chat_member mantêm a lista em dia entre as recargas.
+
+    Falhas ao obter a lista (timeout, bot sem acesso ao chat) são guardadas
+    como lista vazia por FAILURE_TTL, para não repetir a chamada a cada mensagem.
+    """
+
+    # Validade (em segundos) da lista de administradores de um chat
+    TTL = 600
+    # Validade (em segundos) de uma falha ao obter a lista
+    FAILURE_TTL = 30
+    # Número máximo de chats mantidos no cache
+    MAX_CHATS = 1000
+    # Tempo máximo (em segundos) de espera pela API do Telegram
+    FETCH_TIMEOUT = 3.0
+    # Validade (em segundos) da lista de administradores do bot
+    BOT_ADMINS_TTL = 300
+
+    def __init__(self):
+        """Inicializa o cache vazio."""
+        # Formato: {chat_id: (ids dos administradores, expira_em)}
+        self._chats: "OrderedDict[int, Tuple[FrozenSet[int], float]]" = OrderedDict()
+        self._fetches: Dict[int, asyncio.Future] = {}
+        self._bot_admins: Optional[Tuple[FrozenSet[int], float]] = None
+
+    async def is_chat_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        """
+        Verifica se um usuário é administrador (ou criador) de um chat.
+
+        Args:
+            bot (Bot): Instância do bot, usada apenas se a lista não estiver em cache.
+            chat_id (int): ID do chat.
+            user_id (int): ID do usuário.
+
+        Returns:
+            bool: True se o usuário é administrador do chat.
+        """
+        return user_id in await self.get_chat_admins(bot, chat_id)
+
+    async def get_chat_admins(self, bot: Bot, chat_id: int) -> FrozenSet[int]:
+        """
+        Obtém os IDs dos administradores de um chat.
+
+        Chamadas simultâneas para o mesmo chat compartilham uma única consulta à API.
+
+        Args:
+            bot (Bot): Instância do bot.
+            chat_id (int): ID do chat.
+
+        Returns:
+            FrozenSet[int]: IDs dos administradores (vazio se a consulta falhar).
+        """
+        entry = self._chats.get(chat_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self._chats.move_to_end(chat_id)
+            return entry[0]
+
+        fetch = self._fetches.get(chat_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_chat_admins(bot, chat_id))
+            self._fetches[chat_id] = fetch
+            fetch.add_done_callback(lambda _: self._fetches.pop(chat_id, None))
+        return await asyncio.shield(fetch)
+
+    async def _fetch_chat_admins(self, bot: Bot, chat_id: int) -> FrozenSet[int]:
+        """Consulta a lista de administradores na API do Telegram e a guarda no cache."""
+        try:
+            administrators = await asyncio.wait_for(
+                bot.get_chat_administrators(chat_id), timeout=self.FETCH_TIMEOUT
+            )
+            admins = frozenset(member.user.id for member in administrators)
+            self._store(chat_id, admins, self.TTL)
+            logger.debug(f"Administradores do chat {chat_id} carregados: {len(admins)}")
+            return admins
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout ao obter administradores do chat {chat_id}")
+        except Exception as e:
+            logger.error(f"Erro ao obter administradores do chat {chat_id}: {e}")
+        self._store(chat_id, frozenset(), self.FAILURE_TTL)
+        return frozenset()
+
+    def _store(self, chat_id: int, admins: FrozenSet[int], ttl: float) -> None:
+        """Grava a lista de um chat, descartando o chat menos usado se o cache estiver cheio."""
+        self._chats[chat_id] = (admins, time.monotonic() + ttl)
+        self._chats.move_to_end(chat_id)
+        while len(self._chats) > self.MAX_CHATS:
+            self._chats.popitem(last=False)
+
+    def apply_member_update(self, chat_id: int, user_id: int, is_admin: bool) -> None:
+        """
+        Aplica uma mudança de status de membro (atualização chat_member) à lista em cache.
+
+        Args:
+            chat_id (int): ID do chat.
+            user_id (int): ID do membro.
+            is_admin (bool): Se o membro passou a ser (ou continua) administrador.
+        """
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            return
+        admins, expires_at = entry
+        admins = admins | {user_id} if is_admin else admins - {user_id}
+        self._chats[chat_id] = (frozenset(admins), expires_at)
+
+    def invalidate_chat(self, chat_id: int) -> None:
+        """
+        Descarta a lista de um chat (recarregada na próxima verificação).
+
+        Args:
+            chat_id (int): ID do chat.
+        """
+        self._chats.pop(chat_id, None)
+
+    async def is_bot_admin(self, user_id: int) -> bool:
+        """
+        Verifica se um usuário é administrador do bot (coleção bot_admins).
+
+        Args:
+            user_id (int): ID do usuário.
+
+        Returns:
+            bool: True se o usuário é administrador do bot.
+        """
+        if self._bot_admins is None or self._bot_admins[1] <= time.monotonic():
+            if mongodb_client.db is None:
+                return False
+            await self.refresh_bot_admins()
+        return user_id in self._bot_admins[0]
+
+    async def refresh_bot_admins(self) -> FrozenSet[int]:
+        """
+        Recarrega a lista de administradores do bot do MongoDB.
+
+        Returns:
+            FrozenSet[int]: IDs dos administradores do bot.
+        """
+        admins = frozenset(doc.get("admin_id") for doc in await mongodb_client.get_admins())
+        # Uma lista vazia pode ser um erro do banco: guarda por menos tempo
+        ttl = self.BOT_ADMINS_TTL if admins else self.FAILURE_TTL
+        self._bot_admins = (admins, time.monotonic() + ttl)
+        return admins
+
+    def invalidate_bot_admins(self) -> None:
+        """Descarta a lista de administradores do bot (após /setadmin ou /deladmin)."""
+        self._bot_admins = None
+
+
+# Cache global de administradores
+admin_cache = AdminCache()
@@ -7,6 +7,8 @@ import httpx
 import base64
 from typing import Optional, List, Dict, Any, Union
 
+from src.utils.metrics import record_llm_usage
+
 logger = logging.getLogger(__name__)
 
 class AnthropicClient:
@@ -136,6 +138,7 @@ class AnthropicClient:
                 # Processa a resposta
                 response_data = response.json()
                 logger.debug("Resposta da API recebida com sucesso")
+                record_llm_usage(response_data.get("usage"))
                 
                 # Extrai o texto da resposta
                 if response_data.get("content") and len(response_data["content"]) > 0:
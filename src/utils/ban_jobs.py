@@ -0,0 +1,424 @@
+"""
+Jobs de banimento em massa da blacklist (/ban_blacklist), executados em segundo plano.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from html import escape as escape_html
+from typing import Any, Dict, List, Optional
+
+from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter
+
+from src.utils.config import Config
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+from src.utils.rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def group_blacklist_entries(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Agrupa as entradas da blacklist por usuário, em uma única passagem.
+
+    Args:
+        entries (List[Dict[str, Any]]): Entradas da blacklist de um chat.
+
+    Returns:
+        List[Dict[str, Any]]: Um item por usuário (user_id, display, entry_ids),
+                              na ordem da primeira entrada de cada usuário.
+    """
+    users: Dict[int, Dict[str, Any]] = {}
+    for entry in entries:
+        user_id = entry.get("user_id")
+        if not user_id:
+            continue
+        item = users.get(user_id)
+        if item is None:
+            # Usa os detalhes da primeira entrada encontrada
+            username = entry.get("username")
+            name = f"@{username}" if username else entry.get("user_name", "Nome Desconhecido")
+            item = users[user_id] = {"user_id": user_id, "display": f"{name} ({user_id})", "entry_ids": []}
+        if entry.get("_id") is not None:
+            item["entry_ids"].append(entry["_id"])
+    return list(users.values())
+
+
+def format_ban_report(job: Dict[str, Any], failed_items: List[Dict[str, Any]]) -> str:
+    """
+    Monta o relatório final (HTML) de um job de banimento.
+
+    Args:
+        job (Dict[str, Any]): Job concluído.
+        failed_items (List[Dict[str, Any]]): Amostra dos usuários cujo banimento falhou.
+
+    Returns:
+        str: Relatório formatado.
+    """
+    report_message = "<b>📊 Relatório de Banimento da Blacklist</b>\n\n"
+    report_message += f"<b>Grupo:</b> {escape_html(job['group_name'])} (ID: <code>{job['chat_id']}</code>)\n"
+    report_message += f"<b>Usuários únicos na blacklist:</b> {job['total']}\n"
+    report_message += f"<b>Banidos com sucesso:</b> ✅ {job['banned']}\n"
+    report_message += f"<b>Falhas ao banir:</b> ❌ {job['failed']}\n"
+    report_message += f"<b>Itens removidos da blacklist:</b> 🗑️ {job['removed']}\n"
+    report_message += "<i>(Apenas itens de usuários banidos com sucesso foram removidos)</i>\n"
+
+    if failed_items:
+        report_message += "\n<b>Detalhes das Falhas:</b>\n"
+        for item in failed_items:
+            report_message += f"- {escape_html(item['display'])}: {escape_html(item.get('error', ''))}\n"
+        if job["failed"] > len(failed_items):
+            report_message += (f"<i>... e mais {job['failed'] - len(failed_items)} falhas. "
+                               f"Verifique os logs para detalhes completos.</i>\n")
+    return report_message
+
+
+def format_ban_progress(job: Dict[str, Any]) -> str:
+    """
+    Monta o texto de progresso de um job de banimento.
+
+    Args:
+        job (Dict[str, Any]): Job (com os contadores atuais).
+
+    Returns:
+        str: Texto de progresso.
+    """
+    done = job["banned"] + job["failed"]
+    return (f"⚙️ Banindo usuários da blacklist de '{job['group_name']}' (job {job['_id']})\n\n"
+            f"Progresso: {done}/{job['total']}\n"
+            f"✅ Banidos: {job['banned']}  ❌ Falhas: {job['failed']}  🗑️ Itens removidos: {job['removed']}")
+
+
+class BanJobManager:
+    """
+    Executor dos jobs de banimento em massa.
+
+    O estado do job (um item por usuário, com as entradas da blacklist a
+    remover) fica no MongoDB. Os banimentos são feitos com concorrência
+    limitada dentro de um limite de taxa, e os resultados são gravados em lotes.
+    O heartbeat do job é renovado em um timer próprio (um lote parado em um
+    RetryAfter longo não deixa o job parecer abandonado). Um job interrompido
+    (reinício ou queda da réplica) deixa de receber heartbeats e é retomado a
+    partir dos itens pendentes por qualquer réplica.
+    """
+
+    # Número máximo de banimentos simultâneos
+    MAX_CONCURRENCY = 5
+    # Número de usuários processados entre duas gravações de resultado
+    FLUSH_SIZE = 25
+    # Intervalo mínimo (em segundos) entre edições da mensagem de progresso
+    PROGRESS_INTERVAL = 5.0
+    # Tempo (em segundos) sem heartbeat para considerar um job abandonado
+    STALE_AFTER = 120
+    # Intervalo (em segundos) entre renovações do heartbeat de um job em execução
+    HEARTBEAT_INTERVAL = STALE_AFTER / 4
+    # Intervalo (em segundos) entre buscas por jobs abandonados
+    RESUME_INTERVAL = 60
+    # Tentativas de banimento de um usuário após um RetryAfter
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, bot: Bot, rate_per_second: Optional[int] = None):
+        """
+        Inicializa o executor.
+
+        Args:
+            bot (Bot): Instância do bot Telegram.
+            rate_per_second (Optional[int]): Banimentos por segundo (padrão: BAN_RATE_PER_SECOND).
+        """
+        self.bot = bot
+        rate = rate_per_second or Config.get_ban_rate()
+        self.rate_limiter = AsyncRateLimiter(rate, capacity=rate)
+        self.owner = Config.get_instance_id()
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def create_job(
+        self,
+        chat_id: int,
+        group_name: str,
+        entries: List[Dict[str, Any]],
+        requested_by: int,
+        report_chat_id: int,
+        status_message_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cria um job de banimento para as entradas da blacklist de um chat.
+
+        O job não é iniciado: o chamador edita a mensagem de progresso e então
+        chama start_job, para que a edição não sobrescreva o progresso ou o
+        relatório final gravados pelo job. Um job criado e não iniciado é
+        retomado após STALE_AFTER.
+
+        Args:
+            chat_id (int): Chat de onde os usuários serão banidos.
+            group_name (str): Nome do grupo informado pelo admin.
+            entries (List[Dict[str, Any]]): Entradas da blacklist do chat.
+            requested_by (int): ID do admin que pediu o banimento.
+            report_chat_id (int): Chat da mensagem de progresso.
+            status_message_id (int): Mensagem de progresso (editada pelo job).
+
+        Returns:
+            Optional[Dict[str, Any]]: Job criado, ou None em caso de erro.
+        """
+        items = group_blacklist_entries(entries)
+        job = {
+            "_id": uuid.uuid4().hex[:8],
+            "chat_id": chat_id,
+            "group_name": group_name,
+            "requested_by": requested_by,
+            "report_chat_id": report_chat_id,
+            "status_message_id": status_message_id,
+            "owner": self.owner
+        }
+        if not await mongodb_client.create_ban_job(job, items):
+            return None
+
+        job.update(total=len(items), banned=0, failed=0, removed=0, status="running")
+        logger.info(f"Job de banimento {job['_id']} criado para o chat {chat_id}: {len(items)} usuários.")
+        return job
+
+    async def start(self) -> None:
+        """Inicia a busca periódica por jobs abandonados (inclusive os desta réplica antes de reiniciar)."""
+        if self._watcher is None:
+            self._watcher = task_supervisor.spawn(self._watch(), name="watcher", owner="ban_jobs", drain=False)
+
+    async def stop(self, timeout: float = 0.0) -> None:
+        """
+        Interrompe os jobs em execução. O estado persistido permite retomá-los depois.
+
+        Cada job conclui e grava o lote em andamento, sem iniciar o próximo; os
+        que não terminarem dentro do prazo são cancelados.
+
+        Args:
+            timeout (float): Prazo (em segundos) para concluir os lotes em andamento.
+        """
+        self._stopping = True
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+        tasks = list(self._jobs.values())
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            if pending:
+                logger.warning(f"Prazo esgotado aguardando {len(pending)} jobs de banimento. Cancelando.")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        self._jobs.clear()
+        self._stopping = False
+
+    async def resume_stale_jobs(self) -> int:
+        """
+        Reserva e retoma os jobs abandonados.
+
+        Returns:
+            int: Número de jobs retomados.
+        """
+        resumed = 0
+        while True:
+            job = await mongodb_client.claim_ban_job(self.owner, self.STALE_AFTER, list(self._jobs))
+            if job is None:
+                return resumed
+            logger.info(f"Retomando job de banimento {job['_id']} ({job['banned'] + job['failed']}/{job['total']}).")
+            self.start_job(job)
+            resumed += 1
+
+    def start_job(self, job: Dict[str, Any]) -> None:
+        """
+        Executa o job em uma tarefa de segundo plano.
+
+        Args:
+            job (Dict[str, Any]): Job criado ou reservado por esta réplica.
+        """
+        if job["_id"] in self._jobs:
+            return
+        task = task_supervisor.spawn(self._run(job), name=f"job:{job['_id']}", owner="ban_jobs", drain=False)
+        self._jobs[job["_id"]] = task
+        task.add_done_callback(lambda _: self._jobs.pop(job["_id"], None))
+
+    async def _watch(self) -> None:
+        """Loop que retoma jobs abandonados periodicamente."""
+        while True:
+            try:
+                await self.resume_stale_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao retomar jobs de banimento: {e}")
+            await asyncio.sleep(self.RESUME_INTERVAL)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """
+        Processa os itens pendentes de um job e publica o relatório final.
+
+        Args:
+            job (Dict[str, Any]): Job reservado por esta réplica.
+        """
+        job_id = job["_id"]
+        heartbeat = task_supervisor.spawn(
+            self._heartbeat(job_id), name=f"heartbeat:{job_id}", owner="ban_jobs", drain=False
+        )
+        try:
+            pending = await mongodb_client.get_pending_ban_items(job_id)
+            if pending is None:
+                logger.error(f"Itens do job de banimento {job_id} não lidos; o job será retomado depois.")
+                return
+            last_progress = time.monotonic()
+            for start in range(0, len(pending), self.FLUSH_SIZE):
+                if self._stopping:
+                    logger.info(f"Job de banimento {job_id} interrompido; será retomado a partir dos itens pendentes.")
+                    return
+                batch = pending[start:start + self.FLUSH_SIZE]
+                results = await asyncio.gather(*(self._ban(job["chat_id"], item) for item in batch))
+
+                banned = [item for item, error in zip(batch, results) if error is None]
+                failed = [(item["user_id"], error) for item, error in zip(batch, results) if error is not None]
+                # Remove as entradas antes de marcar os itens: se o job for interrompido
+                # entre as duas etapas, o item é banido e limpo de novo (idempotente)
+                entry_ids = [entry_id for item in banned for entry_id in item.get("entry_ids", [])]
+                removed = await mongodb_client.remove_blacklist_items_by_ids(entry_ids) if entry_ids else 0
+
+                still_owner = await mongodb_client.record_ban_job_results(
+                    job_id, self.owner, [item["user_id"] for item in banned], failed, removed
+                )
+                if not still_owner:
+                    logger.warning(f"Job de banimento {job_id} assumido por outra réplica. Interrompendo.")
+                    return
+                job["banned"] += len(banned)
+                job["failed"] += len(failed)
+                job["removed"] += removed
+
+                if time.monotonic() - last_progress >= self.PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    await self._edit_status(job, format_ban_progress(job))
+
+            finished = await mongodb_client.finish_ban_job(job_id, self.owner)
+            if finished is None:
+                return
+            failed_items = await mongodb_client.get_failed_ban_items(job_id) if finished["failed"] else []
+            await self._edit_status(finished, format_ban_report(finished, failed_items), parse_mode=ParseMode.HTML)
+            logger.info(f"Job de banimento {job_id} concluído: {finished['banned']} banidos, {finished['failed']} falhas.")
+        except asyncio.CancelledError:
+            logger.info(f"Job de banimento {job_id} interrompido; será retomado a partir dos itens pendentes.")
+            raise
+        except Exception as e:
+            logger.error(f"Erro no job de banimento {job_id}: {e}")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """
+        Renova o heartbeat do job a cada HEARTBEAT_INTERVAL, independente dos lotes.
+
+        Args:
+            job_id (str): ID do job.
+        """
+        while True:
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
+            if await mongodb_client.heartbeat_ban_job(job_id, self.owner) is False:
+                logger.warning(f"Job de banimento {job_id} assumido por outra réplica. Heartbeat interrompido.")
+                return
+
+    async def _ban(self, chat_id: int, item: Dict[str, Any]) -> Optional[str]:
+        """
+        Bane um usuário respeitando a concorrência e o limite de taxa.
+
+        Args:
+            chat_id (int): Chat de onde banir.
+            item (Dict[str, Any]): Item do job.
+
+        Returns:
+            Optional[str]: None se o usuário foi banido, ou a mensagem de erro.
+        """
+        user_id = item["user_id"]
+        async with self._semaphore:
+            for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                await self.rate_limiter.acquire()
+                try:
+                    if await self.bot.ban_chat_member(chat_id=chat_id, user_id=user_id):
+                        return None
+                    return "Erro inesperado: ban_chat_member retornou False"
+                except RetryAfter as e:
+                    self.rate_limiter.penalize(e.retry_after)
+                    logger.warning(f"Limite do Telegram ao banir usuário {user_id}. Aguardando {e.retry_after}s.")
+                    if attempt == self.MAX_ATTEMPTS:
+                        return f"Limite do Telegram: {e}"
+                except BadRequest as e:
+                    logger.warning(f"Falha ao banir usuário {user_id} do chat {chat_id}: {e}")
+                    return str(e)
+                except Exception as e:
+                    logger.error(f"Erro inesperado ao tentar banir usuário {user_id} do chat {chat_id}: {e}")
+                    return f"Erro inesperado: {e}"
+
+    async def _edit_status(self, job: Dict[str, Any], text: str, parse_mode: Optional[str] = None) -> None:
+        """Edita a mensagem de progresso do job; se falhar, envia uma nova mensagem."""
+        try:
+            await self.bot.edit_message_text(
+                text,
+                chat_id=job["report_chat_id"],
+                message_id=job["status_message_id"],
+                parse_mode=parse_mode
+            )
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return
+            logger.error(f"Erro ao editar a mensagem do job de banimento {job['_id']}: {e}")
+            if parse_mode is not None:
+                # Relatório final: envia como nova mensagem para não perdê-lo
+                await self.bot.send_message(chat_id=job["report_chat_id"], text=text, parse_mode=parse_mode)
+        except Exception as e:
+            logger.error(f"Erro inesperado ao editar a mensagem do job de banimento {job['_id']}: {e}")
+
+
+# Instância global do executor de jobs de banimento
+ban_job_manager: Optional[BanJobManager] = None
+
+
+def get_ban_job_manager(bot: Bot) -> BanJobManager:
+    """
+    Obtém o executor global, criando-o se necessário.
+
+    Args:
+        bot (Bot): Instância do bot.
+
+    Returns:
+        BanJobManager: Executor global.
+    """
+    global ban_job_manager
+
+    if ban_job_manager is None:
+        ban_job_manager = BanJobManager(bot)
+    return ban_job_manager
+
+
+async def start_ban_jobs(bot: Bot) -> BanJobManager:
+    """
+    Inicia o executor global e a retomada de jobs interrompidos.
+
+    Args:
+        bot (Bot): Instância do bot.
+
+    Returns:
+        BanJobManager: Executor global.
+    """
+    manager = get_ban_job_manager(bot)
+    await manager.start()
+    return manager
+
+
+async def stop_ban_jobs(timeout: float = 0.0) -> None:
+    """
+    Interrompe o executor global.
+
+    Args:
+        timeout (float): Prazo (em segundos) para concluir os lotes em andamento.
+    """
+    if ban_job_manager:
+        await ban_job_manager.stop(timeout)
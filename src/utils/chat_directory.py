@@ -0,0 +1,183 @@
+"""
+Resolução de nomes de grupos monitorados (título ou username) para chat_id.
+"""
+import bisect
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.text_utils import normalize_chat_name
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLookup:
+    """Resultado da resolução de um nome de grupo."""
+
+    def __init__(self, query: str, matches: List[Dict[str, Any]]):
+        """
+        Args:
+            query (str): Nome procurado.
+            matches (List[Dict[str, Any]]): Chats que correspondem ao nome.
+        """
+        self.query = query
+        self.matches = matches
+
+    @property
+    def chat(self) -> Optional[Dict[str, Any]]:
+        """O chat encontrado, se a correspondência for única."""
+        return self.matches[0] if len(self.matches) == 1 else None
+
+    @property
+    def is_ambiguous(self) -> bool:
+        """Se mais de um chat corresponde ao nome."""
+        return len(self.matches) > 1
+
+    def describe_candidates(self, limit: int = 5) -> str:
+        """
+        Lista os chats candidatos, um por linha, para mensagens de ambiguidade.
+
+        Args:
+            limit (int): Número máximo de candidatos listados.
+
+        Returns:
+            str: Candidatos formatados.
+        """
+        lines = []
+        for chat in self.matches[:limit]:
+            label = chat.get("title") or str(chat.get("chat_id"))
+            if chat.get("username"):
+                label += f" (@{chat['username']})"
+            lines.append(f"• {label}")
+        if len(self.matches) > limit:
+            lines.append(f"• ... e mais {len(self.matches) - limit}")
+        return "\n".join(lines)
+
+
+class ChatDirectory:
+    """
+    Índice em memória dos chats monitorados, por título e username normalizados.
+
+    Um nome é resolvido por correspondência exata; se não houver, por prefixo
+    (busca binária nas chaves ordenadas) e, por último, por trecho do nome.
+    Se mais de um chat corresponder na mesma etapa, o resultado é ambíguo em vez
+    de escolher o primeiro.
+
+    O índice é recarregado do MongoDB periodicamente, quando invalidado (ao
+    iniciar ou parar o monitoramento de um chat) ou quando um nome não é
+    encontrado e a última carga já tem alguns segundos.
+    """
+
+    # Intervalo máximo entre recargas do índice (em segundos)
+    REFRESH_INTERVAL = 300
+
+    # Intervalo mínimo entre recargas motivadas por nomes não encontrados
+    MISS_REFRESH_INTERVAL = 30
+
+    def __init__(self):
+        """Inicializa o índice vazio."""
+        self._chats: Dict[int, Dict[str, Any]] = {}
+        self._keys: Dict[str, Set[int]] = {}
+        self._sorted_keys: List[str] = []
+        self._loaded_at: Optional[float] = None
+
+    def load(self, chats: List[Dict[str, Any]]) -> None:
+        """
+        Reconstrói o índice a partir de uma lista de chats.
+
+        Args:
+            chats (List[Dict[str, Any]]): Chats com chat_id, title, username e active.
+        """
+        self._chats = {}
+        self._keys = {}
+        for chat in chats:
+            chat_id = chat.get("chat_id")
+            if chat_id is None:
+                continue
+            self._chats[chat_id] = chat
+            for name in (chat.get("title"), chat.get("username")):
+                key = normalize_chat_name(name or "")
+                if key:
+                    self._keys.setdefault(key, set()).add(chat_id)
+        self._sorted_keys = sorted(self._keys)
+        self._loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        """Número de chats no índice."""
+        return len(self._chats)
+
+    async def refresh(self) -> None:
+        """Recarrega o índice do MongoDB."""
+        self.load(await mongodb_client.get_monitored_chat_names())
+        logger.debug(f"Índice de chats recarregado: {len(self._chats)} chats")
+
+    def invalidate(self) -> None:
+        """Força a recarga do índice na próxima resolução."""
+        self._loaded_at = None
+
+    async def resolve(self, name: str, active_only: bool = False) -> ChatLookup:
+        """
+        Resolve um nome (título ou username, com ou sem @) para os chats correspondentes.
+
+        Args:
+            name (str): Nome procurado.
+            active_only (bool): Considera apenas chats com monitoramento ativo.
+
+        Returns:
+            ChatLookup: Resultado (único, ambíguo ou vazio).
+        """
+        age = None if self._loaded_at is None else time.monotonic() - self._loaded_at
+        if age is None or age >= self.REFRESH_INTERVAL:
+            await self.refresh()
+            age = 0.0
+
+        matches = self._match(name, active_only)
+        if not matches and age >= self.MISS_REFRESH_INTERVAL:
+            # O chat pode ter sido registrado por outra réplica desde a última carga
+            await self.refresh()
+            matches = self._match(name, active_only)
+
+        if len(matches) > 1:
+            logger.info(f"Nome de grupo ambíguo '{name}': {len(matches)} chats correspondem")
+        return ChatLookup(name, matches)
+
+    def _match(self, name: str, active_only: bool) -> List[Dict[str, Any]]:
+        """Aplica as etapas de correspondência (exata, prefixo, trecho) no índice."""
+        key = normalize_chat_name(name)
+        if not key:
+            return []
+
+        stages = (
+            lambda: self._keys.get(key, set()),
+            lambda: self._ids_for_keys(self._prefixed_keys(key)),
+            lambda: self._ids_for_keys(k for k in self._sorted_keys if key in k),
+        )
+        for stage in stages:
+            chats = [self._chats[chat_id] for chat_id in stage()]
+            if active_only:
+                chats = [chat for chat in chats if chat.get("active")]
+            if chats:
+                return sorted(chats, key=lambda chat: normalize_chat_name(chat.get("title") or ""))
+        return []
+
+    def _prefixed_keys(self, prefix: str) -> List[str]:
+        """Chaves que começam com o prefixo (busca binária nas chaves ordenadas)."""
+        start = bisect.bisect_left(self._sorted_keys, prefix)
+        keys = []
+        for key in self._sorted_keys[start:]:
+            if not key.startswith(prefix):
+                break
+            keys.append(key)
+        return keys
+
+    def _ids_for_keys(self, keys) -> Set[int]:
+        """União dos chat_ids associados às chaves."""
+        chat_ids: Set[int] = set()
+        for key in keys:
+            chat_ids |= self._keys[key]
+        return chat_ids
+
+
+# Índice global de chats monitorados
+chat_directory = ChatDirectory()
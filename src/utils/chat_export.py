@@ -0,0 +1,147 @@
+"""
+Exportação em lote de coleções por chat (CSV ou JSONL compactado com gzip).
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from src.utils.mongodb_instance import mongodb_client
+
+logger = logging.getLogger(__name__)
+
+# Coleções exportáveis: {nome no comando: (coleção, campos em ordem)}
+EXPORT_COLLECTIONS: Dict[str, tuple] = {
+    "blacklist": (
+        "blacklist",
+        ["_id", "chat_id", "message_id", "user_id", "user_name", "username",
+         "message_text", "added_by", "added_by_name", "added_at"]
+    ),
+    "mensagens": (
+        "monitored_messages",
+        ["_id", "chat_id", "message_id", "user_id", "user_name", "text", "timestamp"]
+    ),
+    "checkins": (
+        "user_checkins",
+        ["_id", "chat_id", "user_id", "user_name", "username", "anchor_id",
+         "checkin_type", "points_value", "created_at"]
+    ),
+}
+
+# Formatos suportados
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Tamanho a partir do qual o arquivo em memória passa para o disco (em bytes)
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Tamanho máximo de documento enviado por bots no Telegram (em bytes)
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024
+
+
+class ChatExport:
+    """Arquivo gerado por uma exportação, pronto para `send_document`."""
+
+    def __init__(self, file, filename: str, count: int, size: int):
+        """
+        Args:
+            file: Arquivo compactado, posicionado no início.
+            filename (str): Nome sugerido para o documento.
+            count (int): Número de registros exportados.
+            size (int): Tamanho do arquivo compactado (em bytes).
+        """
+        self.file = file
+        self.filename = filename
+        self.count = count
+        self.size = size
+
+    def close(self) -> None:
+        """Libera o arquivo (em memória ou temporário em disco)."""
+        self.file.close()
+
+
+def _serialize(value: Any) -> Any:
+    """Converte valores do BSON em tipos aceitos por CSV e JSON."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+async def export_chat_collection(kind: str, chat_id: int, fmt: str = "csv") -> Optional[ChatExport]:
+    """
+    Exporta os documentos de um chat para um arquivo compactado.
+
+    Os documentos são lidos do cursor em lotes e escritos diretamente no
+    gzip, sem montar a lista completa; o arquivo fica em memória até
+    SPOOL_MAX_SIZE e depois passa para um arquivo temporário.
+
+    Args:
+        kind (str): Tipo de exportação (chave de EXPORT_COLLECTIONS).
+        chat_id (int): ID do chat.
+        fmt (str): "csv" ou "jsonl".
+
+    Returns:
+        Optional[ChatExport]: Arquivo exportado, ou None em caso de erro.
+    """
+    if kind not in EXPORT_COLLECTIONS:
+        raise ValueError(f"Tipo de exportação inválido: {kind}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação inválido: {fmt}")
+
+    collection, fields = EXPORT_COLLECTIONS[kind]
+    filename = f"{kind}_{chat_id}_{datetime.now():%Y%m%d_%H%M}.{fmt}"
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    # O GzipFile não fecha o arquivo recebido em fileobj
+    compressed = gzip.GzipFile(filename=filename, mode="wb", fileobj=spool)
+    text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+    count = 0
+
+    try:
+        writer = _make_writer(text, fields, fmt)
+        async for document in mongodb_client.find_chat_documents(collection, chat_id, fields):
+            writer(document)
+            count += 1
+        text.close()
+    except PyMongoError as e:
+        logger.error(f"Erro ao exportar {collection} do chat {chat_id}: {e}")
+        text.close()
+        spool.close()
+        return None
+
+    size = spool.tell()
+    spool.seek(0)
+    logger.info(f"Exportação de {collection} do chat {chat_id}: {count} registros, {size} bytes")
+    return ChatExport(spool, f"{filename}.gz", count, size)
+
+
+def _make_writer(text, fields: List[str], fmt: str):
+    """
+    Cria a função que escreve um documento no arquivo.
+
+    Args:
+        text: Arquivo de texto de destino.
+        fields (List[str]): Campos exportados, em ordem.
+        fmt (str): "csv" ou "jsonl".
+
+    Returns:
+        Callable[[Dict[str, Any]], None]: Função de escrita.
+    """
+    if fmt == "csv":
+        rows = csv.writer(text)
+        rows.writerow(fields)
+        return lambda document: rows.writerow([_serialize(document.get(field)) for field in fields])
+
+    def write_line(document: Dict[str, Any]) -> None:
+        record = {field: _serialize(document.get(field)) for field in fields}
+        text.write(json.dumps(record, ensure_ascii=False, default=str))
+        text.write("\n")
+
+    return write_line
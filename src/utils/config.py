@@ -2,8 +2,9 @@
 Configurações do bot.
 """
 import os
+import socket
 from dotenv import load_dotenv
-from typing import Optional, List
+from typing import Dict, Optional, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -94,6 +95,55 @@ class Config:
         """
         return os.getenv("LOG_LEVEL", "INFO")
     
+    @staticmethod
+    def get_log_format() -> str:
+        """
+        Obtém o formato da saída de log.
+        
+        Returns:
+            str: "text" (padrão) ou "json" (um objeto por linha).
+        """
+        value = os.getenv("LOG_FORMAT", "text").strip().lower()
+        if value not in ("text", "json"):
+            logger.error(f"LOG_FORMAT inválido: {value}. Usando text.")
+            return "text"
+        return value
+    
+    @staticmethod
+    def get_log_rate_limit() -> int:
+        """
+        Obtém o número máximo de registros por minuto de um mesmo ponto de log (linha do código).
+        
+        Returns:
+            int: Limite por ponto de log (padrão: 30; 0 desativa o limite).
+        """
+        value = os.getenv("LOG_RATE_LIMIT", "30")
+        try:
+            return max(0, int(value))
+        except ValueError:
+            logger.error(f"LOG_RATE_LIMIT inválido: {value}. Usando 30.")
+            return 30
+    
+    @staticmethod
+    def get_log_sample_rates() -> Dict[str, float]:
+        """
+        Obtém a fração mantida dos registros (abaixo de WARNING) de loggers ruidosos.
+        
+        Formato: "logger=fração,logger2=fração" (por exemplo, "httpx=0.1,telegram.ext=0.5").
+        
+        Returns:
+            Dict[str, float]: Fração (0 a 1) por logger (padrão: httpx=0.1).
+        """
+        value = os.getenv("LOG_SAMPLE_RATES", "httpx=0.1").strip()
+        rates: Dict[str, float] = {}
+        for entry in filter(None, (part.strip() for part in value.split(","))):
+            name, _, rate = entry.partition("=")
+            try:
+                rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                logger.error(f"LOG_SAMPLE_RATES inválido: {entry}. Ignorando.")
+        return rates
+    
     @staticmethod
     def get_welcome_message() -> str:
         """
@@ -376,4 +426,238 @@ Onde X são os valores numéricos calculados. Não inclua nenhum texto adicional
             except ValueError:
                 logger.error(f"Chat ID inválido: {chat_id}. Deve ser um número inteiro.")
                 return None
-        return None
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def get_instance_id() -> str:
+        """
+        Obtém o identificador desta réplica do bot, usado na eleição de líder.
+        
+        Returns:
+            str: Valor de INSTANCE_ID ou, se não definido, "<hostname>-<pid>".
+        """
+        instance_id = os.getenv("INSTANCE_ID")
+        if instance_id:
+            return instance_id
+        return f"{socket.gethostname()}-{os.getpid()}"
+    
+    @staticmethod
+    def get_leader_lease_ttl() -> float:
+        """
+        Obtém a duração (em segundos) do lease de liderança dos agendadores.
+        
+        Returns:
+            float: Duração do lease (padrão: 15 segundos).
+        """
+        value = os.getenv("LEADER_LEASE_TTL_SECONDS", "15")
+        try:
+            return max(3.0, float(value))
+        except ValueError:
+            logger.error(f"LEADER_LEASE_TTL_SECONDS inválido: {value}. Usando 15 segundos.")
+            return 15.0
+    
+    @staticmethod
+    def get_shutdown_timeout() -> float:
+        """
+        Obtém o prazo (em segundos) para concluir as tarefas em segundo plano ao desligar o bot.
+        
+        Returns:
+            float: Prazo do desligamento (padrão: 20 segundos).
+        """
+        value = os.getenv("SHUTDOWN_TIMEOUT_SECONDS", "20")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            logger.error(f"SHUTDOWN_TIMEOUT_SECONDS inválido: {value}. Usando 20 segundos.")
+            return 20.0
+    
+    @staticmethod
+    def get_mail_publish_rate() -> int:
+        """
+        Obtém o limite de correios publicados por minuto no grupo.
+        
+        Returns:
+            int: Correios por minuto (padrão: 20, o limite do Telegram para um grupo).
+        """
+        value = os.getenv("MAIL_PUBLISH_RATE_PER_MINUTE", "20")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.error(f"MAIL_PUBLISH_RATE_PER_MINUTE inválido: {value}. Usando 20.")
+            return 20
+    
+    @staticmethod
+    def get_ban_rate() -> int:
+        """
+        Obtém o limite de banimentos por segundo dos jobs de /ban_blacklist.
+        
+        Returns:
+            int: Banimentos por segundo (padrão: 10).
+        """
+        value = os.getenv("BAN_RATE_PER_SECOND", "10")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.error(f"BAN_RATE_PER_SECOND inválido: {value}. Usando 10.")
+            return 10
+    
+    @staticmethod
+    def get_persistence_interval() -> float:
+        """
+        Obtém o intervalo (em segundos) de gravação do estado das conversas no MongoDB.
+        
+        Returns:
+            float: Intervalo de gravação (padrão: 5 segundos).
+        """
+        value = os.getenv("PERSISTENCE_INTERVAL_SECONDS", "5")
+        try:
+            return max(1.0, float(value))
+        except ValueError:
+            logger.error(f"PERSISTENCE_INTERVAL_SECONDS inválido: {value}. Usando 5 segundos.")
+            return 5.0
+    
+    @staticmethod
+    def get_conversation_state_ttl() -> int:
+        """
+        Obtém por quanto tempo (em horas) o estado de uma conversa abandonada é mantido.
+        
+        Returns:
+            int: Validade do estado (padrão: 24 horas).
+        """
+        value = os.getenv("CONVERSATION_STATE_TTL_HOURS", "24")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.error(f"CONVERSATION_STATE_TTL_HOURS inválido: {value}. Usando 24 horas.")
+            return 24
+    
+    @staticmethod
+    def get_slow_update_threshold() -> float:
+        """
+        Obtém a duração (em segundos) a partir da qual uma atualização é registrada como lenta no log.
+        
+        Returns:
+            float: Limite de atualização lenta (padrão: 2 segundos).
+        """
+        value = os.getenv("SLOW_UPDATE_SECONDS", "2")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            logger.error(f"SLOW_UPDATE_SECONDS inválido: {value}. Usando 2 segundos.")
+            return 2.0
+    
+    @staticmethod
+    def get_metrics_port() -> int:
+        """
+        Obtém a porta do servidor de métricas e sondas (/metrics, /health, /ready).
+        
+        Returns:
+            int: Porta do servidor (padrão: 8080; 0 desativa).
+        """
+        value = os.getenv("METRICS_PORT", "8080")
+        try:
+            port = int(value)
+            if not 0 <= port <= 65535:
+                raise ValueError(value)
+            return port
+        except ValueError:
+            logger.error(f"METRICS_PORT inválido: {value}. Usando a porta 8080.")
+            return 8080
+    
+    @staticmethod
+    def get_qa_daily_limit() -> int:
+        """
+        Obtém o limite diário de perguntas ao bot por usuário em cada chat.
+        
+        Returns:
+            int: Limite de perguntas (padrão: 2).
+        """
+        value = os.getenv("QA_DAILY_LIMIT", "2")
+        try:
+            return max(0, int(value))
+        except ValueError:
+            logger.error(f"QA_DAILY_LIMIT inválido: {value}. Usando 2.")
+            return 2
+    
+    @staticmethod
+    def get_qa_quota_window() -> str:
+        """
+        Obtém o tipo de janela da cota de perguntas.
+        
+        Returns:
+            str: "calendar" (reinicia à meia-noite, padrão) ou "rolling" (últimas 24 horas).
+        """
+        value = os.getenv("QA_QUOTA_WINDOW", "calendar").strip().lower()
+        if value not in ("calendar", "rolling"):
+            logger.error(f"QA_QUOTA_WINDOW inválido: {value}. Usando calendar.")
+            return "calendar"
+        return value
+    
+    @staticmethod
+    def get_qa_extra_keywords() -> Dict[str, List[str]]:
+        """
+        Obtém palavras-chave extras para a classificação das perguntas ao bot.
+        
+        Formato: "categoria:palavra1,palavra2;categoria2:palavra3" (por exemplo,
+        "nutrição:marmita,ovo;treino:supino,agachamento").
+        
+        Returns:
+            Dict[str, List[str]]: Palavras-chave por categoria (padrão: nenhuma).
+        """
+        value = os.getenv("QA_EXTRA_KEYWORDS", "").strip()
+        keywords: Dict[str, List[str]] = {}
+        for entry in filter(None, (part.strip() for part in value.split(";"))):
+            category, separator, words = entry.partition(":")
+            category = category.strip()
+            if not separator or not category:
+                logger.error(f"QA_EXTRA_KEYWORDS inválido: {entry}. Ignorando.")
+                continue
+            keywords.setdefault(category, []).extend(
+                word.strip() for word in words.split(",") if word.strip()
+            )
+        return keywords
+    
+    @staticmethod
+    def get_content_filter_lexicon_file() -> str:
+        """
+        Obtém o arquivo com termos extras do filtro de conteúdo ofensivo (correio elegante).
+        
+        Returns:
+            str: Caminho do arquivo, um termo por linha (vazio, o padrão, usa só o léxico padrão).
+        """
+        return os.getenv("CONTENT_FILTER_LEXICON_FILE", "").strip()
+    
+    @staticmethod
+    def get_mail_daily_limit() -> int:
+        """
+        Obtém o limite diário de correios elegantes enviados por usuário.
+        
+        Returns:
+            int: Limite de correios (padrão: 2).
+        """
+        value = os.getenv("MAIL_DAILY_LIMIT", "2")
+        try:
+            return max(0, int(value))
+        except ValueError:
+            logger.error(f"MAIL_DAILY_LIMIT inválido: {value}. Usando 2.")
+            return 2
+    
+    @staticmethod
+    def get_update_record_file() -> str:
+        """
+        Obtém o arquivo onde as atualizações recebidas são gravadas (anonimizadas) para replay.
+        
+        Returns:
+            str: Caminho do arquivo JSONL (vazio, o padrão, desativa a gravação).
+        """
+        return os.getenv("UPDATE_RECORD_FILE", "").strip()
+    
+    @staticmethod
+    def get_update_record_keep_text() -> bool:
+        """
+        Indica se a gravação de atualizações mantém o texto das mensagens sem mascarar.
+        
+        Returns:
+            bool: True para manter o texto (padrão: False).
+        """
+        return os.getenv("UPDATE_RECORD_KEEP_TEXT", "false").strip().lower() in ("1", "true", "yes", "sim")
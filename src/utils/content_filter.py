@@ -0,0 +1,203 @@
+"""
+Filtro de conteúdo ofensivo (correio elegante e respostas).
+"""
+import logging
+import re
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from src.utils.config import Config
+from src.utils.keyword_matcher import KeywordMatcher
+from src.utils.text_utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Léxico padrão; termos terminados em "*" são prefixos ("desgraç*" também pega "desgraçado").
+# Os demais termos também valem no plural e no diminutivo ("putinha", "viadinho").
+# "viado" não é prefixo para não pegar "viaduto".
+DEFAULT_LEXICON = (
+    "merd*", "porra", "caralh*", "puta", "putaria", "viado", "idiot*", "burro", "burra",
+    "fdp", "arromb*", "desgraç*", "otári*", "babaca",
+)
+
+# Troca de números e símbolos por letras (leetspeak)
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s"})
+# "!" e "|" no lugar de "i" só no meio de palavras ("porra!" continua sendo "porra!")
+_LEET_I = re.compile(r"(?<=[a-z0-9])[!|](?=[a-z0-9])")
+# Palavras com letras e números ou símbolos misturados ("p0rr4", "m3rd@")
+_MIXED_TOKEN = re.compile(r"[a-z0-9@$]*[0-9@$][a-z0-9@$]*")
+_LETTER = re.compile("[a-z]")
+# Três ou mais caracteres isolados separados por espaços ou pontuação ("c a r a l h o", "p.o.r.r.a")
+_SPACED_LETTERS = re.compile(r"(?<![\w@$])(?:[a-z0-9@$][\s.\-_*,]+){2,}[a-z0-9@$](?![\w@$])")
+_SEPARATORS = re.compile(r"[\s.\-_*,]+")
+# Letras repetidas ("porraaaa")
+_REPEATED = re.compile(r"(\w)\1+")
+
+
+def diminutive_forms(term: str) -> List[str]:
+    """
+    Diminutivos regulares de um termo terminado em "a" ou "o".
+
+    "merda" → "merdinha", "merdinho", "merdazinha"; "babaca" → "babaquinha".
+
+    Args:
+        term (str): Termo (uma palavra).
+
+    Returns:
+        List[str]: Diminutivos (vazio se o termo não tiver a forma regular).
+    """
+    if len(term) < 4 or term[-1] not in "ao" or not term.isalpha() or term[-2] in "aeiou":
+        return []
+    stem = term[:-1]
+    if stem.endswith("c"):
+        stem = stem[:-1] + "qu"
+    elif stem.endswith("g"):
+        stem = stem[:-1] + "gu"
+    return [f"{stem}inha", f"{stem}inho", f"{term}zinha", f"{term}zinho"]
+
+
+def _join_spaced_letters(match: "re.Match[str]") -> str:
+    """
+    Junta uma sequência de letras espaçadas.
+
+    Palavras de uma letra vizinhas ("o", "e") podem ter entrado na sequência
+    ("o c a r a l h o"), então também são devolvidas as versões sem a primeira
+    e/ou a última letra.
+    """
+    joined = _SEPARATORS.sub("", match.group()).translate(_LEET)
+    return " ".join(dict.fromkeys((joined, joined[1:], joined[:-1], joined[1:-1])))
+
+
+def normalize_for_filter(text: str) -> str:
+    """
+    Normaliza um texto (ou um termo do léxico) para o filtro.
+
+    Remove acentos e maiúsculas, junta letras espaçadas ("c a r a l h o"),
+    troca leetspeak por letras ("p0rr4") e colapsa letras repetidas
+    ("porraaa" e "porra" viram "pora"). Termos e textos passam pela mesma
+    normalização, então as comparações continuam valendo.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto normalizado.
+    """
+    normalized = normalize_text(text)
+    if not normalized:
+        return ""
+    normalized = _SPACED_LETTERS.sub(_join_spaced_letters, normalized)
+    normalized = _LEET_I.sub("i", normalized)
+    normalized = _MIXED_TOKEN.sub(
+        lambda match: match.group().translate(_LEET) if _LETTER.search(match.group()) else match.group(),
+        normalized
+    )
+    return _REPEATED.sub(r"\1", normalized)
+
+
+class ContentFilter:
+    """
+    Verifica se um texto contém termos do léxico, em uma única passada.
+
+    O léxico é compilado uma vez em um KeywordMatcher (Aho-Corasick, palavras
+    inteiras, plural e diminutivo regulares). O texto passa por normalize_for_filter, então
+    variações como "P0RRA", "c a r a l h o" e "porraaa" também são
+    encontradas, mas palavras que só contêm um termo ("computador") não. Os
+    veredictos dos últimos MAX_CACHE textos ficam em cache (LRU), porque o
+    mesmo texto costuma ser verificado mais de uma vez (envio, revisão,
+    respostas repetidas).
+    """
+
+    # Número máximo de veredictos em cache
+    MAX_CACHE = 4096
+
+    def __init__(self, terms: Iterable[str]):
+        """
+        Args:
+            terms (Iterable[str]): Termos do léxico (com "*" no final para prefixos).
+        """
+        self._matcher = KeywordMatcher()
+        self._term_count = 0
+        for term in terms:
+            term = term.strip()
+            if term:
+                self._term_count += 1
+            if term.endswith("*"):
+                normalized = normalize_for_filter(term.rstrip("*"))
+                if normalized:
+                    self._matcher.add(normalized + "*", True)
+                continue
+            # Diminutivos gerados antes da normalização ("burro" → "burrinho" → "burinho")
+            for variant in [term] + diminutive_forms(normalize_text(term)):
+                normalized = normalize_for_filter(variant)
+                if normalized:
+                    self._matcher.add(normalized, True)
+        self._matcher.build()
+        # Formato: {texto: contém termo ofensivo}
+        self._cache: "OrderedDict[str, bool]" = OrderedDict()
+
+    @property
+    def term_count(self) -> int:
+        """Número de termos do léxico."""
+        return self._term_count
+
+    def contains_offensive(self, text: Optional[str]) -> bool:
+        """
+        Verifica se o texto contém algum termo do léxico.
+
+        Args:
+            text (Optional[str]): Texto a verificar.
+
+        Returns:
+            bool: True se algum termo aparece no texto.
+        """
+        if not text:
+            return False
+        verdict = self._cache.get(text)
+        if verdict is not None:
+            self._cache.move_to_end(text)
+            return verdict
+
+        verdict = self._matcher.search(normalize_for_filter(text)) is not None
+        self._cache[text] = verdict
+        if len(self._cache) > self.MAX_CACHE:
+            self._cache.popitem(last=False)
+        return verdict
+
+
+def load_lexicon(path: str) -> List[str]:
+    """
+    Lê um arquivo de léxico: um termo por linha; linhas vazias e iniciadas por # são ignoradas.
+
+    Args:
+        path (str): Caminho do arquivo.
+
+    Returns:
+        List[str]: Termos do arquivo (vazio se não puder ser lido).
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    except OSError as e:
+        logger.error(f"Não foi possível ler o léxico do filtro de conteúdo em {path}: {e}")
+        return []
+
+
+def load_content_filter() -> ContentFilter:
+    """
+    Cria o filtro com o léxico padrão e os termos de CONTENT_FILTER_LEXICON_FILE.
+
+    Returns:
+        ContentFilter: Filtro compilado.
+    """
+    terms = list(DEFAULT_LEXICON)
+    path = Config.get_content_filter_lexicon_file()
+    if path:
+        extra = load_lexicon(path)
+        terms.extend(extra)
+        logger.info(f"Filtro de conteúdo: {len(extra)} termos extras carregados de {path}")
+    return ContentFilter(terms)
+
+
+# Instância global, compilada uma vez na importação
+content_filter = load_content_filter()
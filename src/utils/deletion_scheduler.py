@@ -0,0 +1,259 @@
+"""
+Agendador único para exclusão de mensagens temporárias.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from telegram import Bot
+from telegram.error import RetryAfter, TelegramError, TimedOut
+
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+from src.utils.timer_heap import TimerHeap
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionScheduler:
+    """
+    Agendador de exclusões baseado em um único worker.
+
+    Em vez de uma tarefa asyncio por mensagem, as exclusões ficam em um heap de
+    prazos. O worker dorme até o próximo prazo e, quando acorda, agrupa as
+    mensagens vencidas por chat e as exclui em lotes com deleteMessages.
+    """
+
+    # Limite de mensagens por chamada de deleteMessages na Bot API
+    MAX_BATCH_SIZE = 100
+    # Número máximo de tentativas para um lote que falhou por timeout
+    MAX_ATTEMPTS = 3
+    # Espera (em segundos) antes de tentar novamente um lote que falhou
+    RETRY_DELAY = 5
+
+    def __init__(self, bot: Bot, persist: bool = True):
+        """
+        Inicializa o agendador.
+
+        Args:
+            bot (Bot): Instância do bot Telegram.
+            persist (bool): Se True, as exclusões pendentes são gravadas no MongoDB
+                            e recarregadas na inicialização.
+        """
+        self.bot = bot
+        self.persist = persist
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._timers = TimerHeap()
+        self._wakeup = asyncio.Event()
+        # Métricas
+        self.deleted_total = 0
+        self.failed_total = 0
+        self.batches_total = 0
+        self.last_lag = 0.0
+
+    @property
+    def pending_count(self) -> int:
+        """Número de exclusões pendentes."""
+        return len(self._timers)
+
+    async def start(self) -> None:
+        """Inicia o worker, recarregando as exclusões persistidas."""
+        if self.is_running:
+            logger.warning("Agendador de exclusões já está em execução.")
+            return
+
+        if self.persist:
+            for item in await mongodb_client.get_pending_deletions():
+                due = item["delete_at"].timestamp()
+                self._timers.push((item["chat_id"], item["message_id"]), due, 0)
+
+        self.is_running = True
+        self.task = task_supervisor.spawn(self._run(), name="worker", owner="deletion_scheduler", drain=False)
+        logger.info(f"Agendador de exclusões iniciado com {self.pending_count} exclusões pendentes.")
+
+    async def stop(self) -> None:
+        """Para o worker. As exclusões persistidas serão retomadas no próximo start."""
+        self.is_running = False
+        self._wakeup.set()
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        logger.info("Agendador de exclusões parado.")
+
+    async def schedule(self, chat_id: int, message_id: int, delay: float) -> None:
+        """
+        Agenda a exclusão de uma mensagem.
+
+        Args:
+            chat_id (int): ID do chat.
+            message_id (int): ID da mensagem.
+            delay (float): Atraso em segundos até a exclusão.
+        """
+        due = time.time() + delay
+        self._timers.push((chat_id, message_id), due, 0)
+
+        if self.persist:
+            await mongodb_client.add_pending_deletion(
+                chat_id, message_id, datetime.fromtimestamp(due)
+            )
+
+        # Acorda o worker apenas se o novo prazo for o mais próximo
+        if self._timers.peek_due() == due:
+            self._wakeup.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as métricas do agendador.
+
+        Returns:
+            Dict[str, Any]: Exclusões pendentes, concluídas, falhas, lotes e atraso do último lote.
+        """
+        return {
+            "pending": self.pending_count,
+            "deleted_total": self.deleted_total,
+            "failed_total": self.failed_total,
+            "batches_total": self.batches_total,
+            "last_lag_seconds": round(self.last_lag, 3),
+        }
+
+    async def _run(self) -> None:
+        """Loop principal do worker."""
+        while self.is_running:
+            try:
+                # Limpa o sinal antes de ler o heap para não perder agendamentos
+                self._wakeup.clear()
+                next_due = self._timers.peek_due()
+                timeout = None if next_due is None else max(0.0, next_due - time.time())
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    # Novo prazo mais próximo ou parada: recalcula
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+                await self._process_due()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro no agendador de exclusões: {e}")
+                await asyncio.sleep(1)
+
+    async def _process_due(self) -> None:
+        """Exclui em lotes todas as mensagens vencidas."""
+        now = time.time()
+        due_entries = self._timers.pop_due(now)
+        if not due_entries:
+            return
+
+        self.last_lag = now - due_entries[0][1]
+
+        # Agrupa por chat, preservando o número de tentativas de cada mensagem
+        by_chat: Dict[int, List[int]] = defaultdict(list)
+        attempts: Dict[tuple, int] = {}
+        for (chat_id, message_id), _, attempt in due_entries:
+            by_chat[chat_id].append(message_id)
+            attempts[(chat_id, message_id)] = attempt
+
+        for chat_id, message_ids in by_chat.items():
+            for start in range(0, len(message_ids), self.MAX_BATCH_SIZE):
+                batch = message_ids[start:start + self.MAX_BATCH_SIZE]
+                await self._delete_batch(chat_id, batch, attempts)
+
+    async def _delete_batch(self, chat_id: int, message_ids: List[int], attempts: Dict[tuple, int]) -> None:
+        """
+        Exclui um lote de mensagens de um chat.
+
+        Args:
+            chat_id (int): ID do chat.
+            message_ids (List[int]): IDs das mensagens (no máximo MAX_BATCH_SIZE).
+            attempts (Dict[tuple, int]): Tentativas já feitas por (chat_id, message_id).
+        """
+        self.batches_total += 1
+        try:
+            await self.bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+            self.deleted_total += len(message_ids)
+        except RetryAfter as e:
+            # Respeita o limite do Telegram e reagenda o lote inteiro
+            retry_at = time.time() + e.retry_after
+            for message_id in message_ids:
+                self._timers.push((chat_id, message_id), retry_at, attempts[(chat_id, message_id)])
+            logger.warning(f"Limite do Telegram ao excluir mensagens. Reagendando em {e.retry_after}s.")
+            return
+        except TimedOut:
+            retry_at = time.time() + self.RETRY_DELAY
+            exhausted = []
+            for message_id in message_ids:
+                attempt = attempts[(chat_id, message_id)] + 1
+                if attempt < self.MAX_ATTEMPTS:
+                    self._timers.push((chat_id, message_id), retry_at, attempt)
+                else:
+                    exhausted.append(message_id)
+            self.failed_total += len(exhausted)
+            logger.warning(f"Timeout ao excluir {len(message_ids)} mensagens do chat {chat_id}.")
+            # Apenas as mensagens que esgotaram as tentativas saem da persistência
+            message_ids = exhausted
+        except TelegramError as e:
+            # Mensagens já excluídas ou sem permissão: não adianta tentar de novo
+            self.failed_total += len(message_ids)
+            logger.error(f"Erro ao excluir mensagens temporárias do chat {chat_id}: {e}")
+
+        if self.persist and message_ids:
+            await mongodb_client.remove_pending_deletions(chat_id, message_ids)
+
+
+# Instância global do agendador
+deletion_scheduler: Optional[DeletionScheduler] = None
+
+
+async def start_deletion_scheduler(bot: Bot, persist: bool = True) -> DeletionScheduler:
+    """
+    Inicia o agendador de exclusões global.
+
+    Args:
+        bot (Bot): Instância do bot.
+        persist (bool): Se True, persiste as exclusões pendentes no MongoDB.
+
+    Returns:
+        DeletionScheduler: Instância do agendador.
+    """
+    global deletion_scheduler
+
+    if deletion_scheduler is None:
+        deletion_scheduler = DeletionScheduler(bot, persist=persist)
+
+    await deletion_scheduler.start()
+    return deletion_scheduler
+
+
+async def stop_deletion_scheduler() -> None:
+    """Para o agendador de exclusões global."""
+    if deletion_scheduler:
+        await deletion_scheduler.stop()
+
+
+async def schedule_message_deletion(chat_id: int, message_id: int, delay: float) -> bool:
+    """
+    Agenda a exclusão de uma mensagem no agendador global.
+
+    Args:
+        chat_id (int): ID do chat.
+        message_id (int): ID da mensagem.
+        delay (float): Atraso em segundos até a exclusão.
+
+    Returns:
+        bool: True se a exclusão foi agendada, False se o agendador não está em execução.
+    """
+    if deletion_scheduler is None or not deletion_scheduler.is_running:
+        return False
+
+    await deletion_scheduler.schedule(chat_id, message_id, delay)
+    return True
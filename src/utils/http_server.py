@@ -0,0 +1,182 @@
+"""
+Servidor HTTP/1.1 mínimo sobre asyncio, para métricas, sondas e testes locais.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPRequest:
+    """Requisição recebida pelo servidor."""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        """
+        Args:
+            method (str): Método HTTP.
+            target (str): Caminho com query string.
+            headers (Dict[str, str]): Cabeçalhos (nomes em minúsculas).
+            body (bytes): Corpo da requisição.
+        """
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = dict(parse_qsl(parts.query))
+        self.headers = headers
+        self.body = body
+
+
+class HTTPResponse:
+    """Resposta a ser enviada pelo servidor."""
+
+    def __init__(self, status: int = 200, body: bytes = b"", content_type: str = "text/plain; charset=utf-8"):
+        """
+        Args:
+            status (int): Código HTTP.
+            body (bytes): Corpo da resposta.
+            content_type (str): Tipo do conteúdo.
+        """
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+
+
+RequestHandler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+
+class MiniHTTPServer:
+    """
+    Servidor HTTP/1.1 com conexões persistentes e corpo por Content-Length.
+
+    Não implementa chunked nem TLS: destina-se a tráfego interno (scrapes do
+    Prometheus, sondas do orquestrador e a Bot API falsa dos testes de carga).
+    """
+
+    # Tamanho máximo do corpo aceito (em bytes)
+    MAX_BODY = 10 * 1024 * 1024
+    # Tempo máximo (em segundos) de espera por uma requisição numa conexão ociosa
+    IDLE_TIMEOUT = 30.0
+
+    def __init__(self, handler: RequestHandler, host: str = "0.0.0.0", port: int = 8080):
+        """
+        Args:
+            handler (RequestHandler): Função que responde a cada requisição.
+            host (str): Endereço de escuta.
+            port (int): Porta de escuta (0 escolhe uma porta livre).
+        """
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se o servidor está escutando."""
+        return self._server is not None
+
+    async def start(self) -> None:
+        """Começa a escutar; com port=0, self.port passa a ser a porta escolhida."""
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Servidor HTTP escutando em {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Para de escutar e fecha o servidor."""
+        if self._server is None:
+            return
+        self._server.close()
+        # Conexões persistentes (e long polls) não são encerradas pelo close() do servidor
+        connections = list(self._connections)
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atende as requisições de uma conexão até o cliente fechá-la."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                if isinstance(request, HTTPResponse):
+                    await self._write_response(writer, request, keep_alive=False)
+                    break
+
+                try:
+                    response = await self.handler(request)
+                except Exception as e:
+                    logger.error(f"Erro ao responder {request.method} {request.path}: {e}")
+                    response = HTTPResponse(500, b"internal error")
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write_response(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelada por stop(): a tarefa termina normalmente (o asyncio do Python 3.11
+            # registra como erro o cancelamento de tarefas de conexão)
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """
+        Lê uma requisição.
+
+        Returns:
+            HTTPRequest, HTTPResponse (erro a enviar antes de fechar) ou None (conexão fechada).
+        """
+        request_line = await asyncio.wait_for(reader.readline(), timeout=self.IDLE_TIMEOUT)
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return HTTPResponse(400, b"bad request line")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return HTTPResponse(400, b"bad content-length")
+        if length > self.MAX_BODY:
+            return HTTPResponse(413, b"payload too large")
+        body = await reader.readexactly(length) if length else b""
+        return HTTPRequest(method.upper(), target, headers, body)
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response: HTTPResponse, keep_alive: bool) -> None:
+        """Envia uma resposta."""
+        head = (
+            f"HTTP/1.1 {response.status} {REASONS.get(response.status, 'Unknown')}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
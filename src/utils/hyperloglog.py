@@ -0,0 +1,102 @@
+"""
+Contador aproximado de elementos distintos (HyperLogLog).
+"""
+import hashlib
+import math
+from typing import Dict, Optional, Tuple
+
+# Precisão padrão: 2^10 = 1024 registradores (erro típico de ~3%)
+DEFAULT_PRECISION = 10
+
+
+def hll_register(value, precision: int = DEFAULT_PRECISION) -> Tuple[int, int]:
+    """
+    Calcula o registrador e o valor (posição do primeiro bit 1) de um elemento.
+
+    Como a atualização de um registrador é um máximo, ela pode ser aplicada
+    diretamente no MongoDB com `$max`, sem ler o estado atual.
+
+    Args:
+        value: Elemento (convertido para texto antes do hash).
+        precision (int): Número de bits usados para escolher o registrador.
+
+    Returns:
+        Tuple[int, int]: (índice do registrador, valor do registrador).
+    """
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    hashed = int.from_bytes(digest, "big")
+    remaining_bits = 64 - precision
+    index = hashed >> remaining_bits
+    rest = hashed & ((1 << remaining_bits) - 1)
+    return index, remaining_bits - rest.bit_length() + 1
+
+
+class HyperLogLog:
+    """
+    Estimador de cardinalidade com memória fixa.
+
+    Os registradores são guardados de forma esparsa ({índice: valor}), no mesmo
+    formato dos documentos de estatísticas, e podem ser combinados (união) com
+    `merge`.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[Dict] = None):
+        """
+        Inicializa o estimador.
+
+        Args:
+            precision (int): Bits de precisão (4 a 16).
+            registers (Optional[Dict]): Registradores já existentes ({índice: valor}).
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("A precisão do HyperLogLog deve estar entre 4 e 16")
+        self.precision = precision
+        self.registers: Dict[int, int] = {}
+        if registers:
+            self.merge(registers)
+
+    @property
+    def size(self) -> int:
+        """Número total de registradores."""
+        return 1 << self.precision
+
+    def add(self, value) -> None:
+        """
+        Adiciona um elemento.
+
+        Args:
+            value: Elemento a contar.
+        """
+        index, rank = hll_register(value, self.precision)
+        if rank > self.registers.get(index, 0):
+            self.registers[index] = rank
+
+    def merge(self, registers: Dict) -> None:
+        """
+        Combina registradores de outro estimador (união dos conjuntos).
+
+        Args:
+            registers (Dict): Registradores ({índice: valor}); índices podem ser texto.
+        """
+        for index, rank in registers.items():
+            index = int(index)
+            if rank > self.registers.get(index, 0):
+                self.registers[index] = rank
+
+    def count(self) -> int:
+        """
+        Estima o número de elementos distintos.
+
+        Returns:
+            int: Cardinalidade estimada.
+        """
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        zeros = m - len(self.registers)
+        harmonic = zeros + sum(2.0 ** -rank for rank in self.registers.values())
+        estimate = alpha * m * m / harmonic
+
+        # Correção para cardinalidades pequenas (linear counting)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
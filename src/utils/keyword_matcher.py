@@ -0,0 +1,194 @@
+"""
+Busca de várias palavras-chave em uma única passada (autômato de Aho-Corasick).
+"""
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from src.utils.text_utils import normalize_text
+
+
+def is_word_char(char: str) -> bool:
+    """Indica se o caractere faz parte de uma palavra (letra, dígito ou _)."""
+    return char.isalnum() or char == "_"
+
+
+def plural_forms(term: str) -> List[str]:
+    """
+    Gera o plural regular (português) da última palavra de um termo normalizado.
+
+    Cobre as regras comuns (vogal + s, r/z + es, ão → ões, l → is, m → ns); não
+    tenta tratar plurais irregulares.
+
+    Args:
+        term (str): Termo já normalizado (sem acentos, minúsculo).
+
+    Returns:
+        List[str]: Formas no plural (vazia se o termo não terminar em letra).
+    """
+    if not term or not term[-1].isalpha():
+        return []
+    if term.endswith("ao"):
+        return [term[:-2] + "oes", term[:-2] + "aes", term + "s"]
+    last = term[-1]
+    if last in "aeiou":
+        return [term + "s"]
+    if last in "rz":
+        return [term + "es"]
+    if last == "l":
+        return [term[:-1] + "is"]
+    if last == "m":
+        return [term[:-1] + "ns"]
+    return []
+
+
+class KeywordMatcher:
+    """
+    Autômato de Aho-Corasick sobre texto normalizado (sem acentos, minúsculo).
+
+    Cada termo é associado a um rótulo (por exemplo, a categoria de uma
+    pergunta); um mesmo termo pode ter vários rótulos. Uma ocorrência só conta
+    se for uma palavra inteira (ou sequência de palavras): o caractere antes e
+    o depois dela não podem ser letra, dígito ou _. Termos terminados em "*"
+    são prefixos ("desgrac*" encontra "desgracado"). Ocorrências sobrepostas
+    contam todas ("pre-treino" também encontra "treino").
+
+    Os termos são adicionados com add() e o autômato é montado na primeira
+    busca (ou com build()); adicionar termos depois disso o remonta.
+    """
+
+    def __init__(self, terms: Optional[Iterable[Tuple[str, Hashable]]] = None, inflect: bool = True):
+        """
+        Args:
+            terms (Optional[Iterable[Tuple[str, Hashable]]]): Pares (termo, rótulo) iniciais.
+            inflect (bool): Também reconhece o plural regular de cada termo.
+        """
+        self.inflect = inflect
+        # Formato: por estado, {caractere: próximo estado}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Formato: por estado, ((tamanho do termo, rótulo, é prefixo), ...) dos termos que terminam nele
+        self._output: List[Tuple[Tuple[int, Hashable, bool], ...]] = [()]
+        self._built = True
+        self.term_count = 0
+        for term, label in terms or ():
+            self.add(term, label)
+
+    def add(self, term: str, label: Hashable) -> None:
+        """
+        Adiciona um termo.
+
+        Args:
+            term (str): Palavra ou expressão (acentos e maiúsculas são ignorados);
+                com "*" no final, é um prefixo.
+            label (Hashable): Rótulo devolvido quando o termo é encontrado.
+        """
+        normalized = normalize_text(term)
+        prefix = normalized.endswith("*")
+        normalized = normalized.rstrip("*").rstrip()
+        if not normalized:
+            return
+        if prefix:
+            variants = [normalized]
+        else:
+            variants = [normalized] + (plural_forms(normalized) if self.inflect else [])
+        for variant in dict.fromkeys(variants):
+            self._insert(variant, label, prefix)
+        self.term_count += 1
+        self._built = False
+
+    def _insert(self, term: str, label: Hashable, prefix: bool) -> None:
+        """Insere um termo normalizado na trie."""
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        if (len(term), label, prefix) not in self._output[state]:
+            self._output[state] += ((len(term), label, prefix),)
+
+    def build(self) -> None:
+        """Calcula os links de falha (busca em largura) e junta as saídas de cada estado."""
+        if self._built:
+            return
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # Termos que terminam no estado de falha também terminam aqui
+                inherited = tuple(item for item in self._output[self._fail[next_state]]
+                                  if item not in self._output[next_state])
+                self._output[next_state] += inherited
+        self._built = True
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """
+        Encontra todas as ocorrências (palavras inteiras) em uma passada.
+
+        Args:
+            text (str): Texto original (é normalizado antes da busca).
+
+        Yields:
+            Tuple[int, int, Hashable]: (início, fim, rótulo) no texto normalizado.
+        """
+        self.build()
+        normalized = normalize_text(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        size = len(normalized)
+        state = 0
+        for index, char in enumerate(normalized):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            end = index + 1
+            word_end = end == size or not is_word_char(normalized[end])
+            for length, label, prefix in output[state]:
+                if not (word_end or prefix):
+                    continue
+                start = end - length
+                if start == 0 or not is_word_char(normalized[start - 1]):
+                    yield start, end, label
+
+    def count(self, text: str) -> Dict[Hashable, int]:
+        """
+        Conta as ocorrências por rótulo.
+
+        Args:
+            text (str): Texto a analisar.
+
+        Returns:
+            Dict[Hashable, int]: Ocorrências por rótulo (apenas os encontrados).
+        """
+        counts: Dict[Hashable, int] = {}
+        for _, _, label in self.finditer(text):
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def search(self, text: str) -> Optional[Hashable]:
+        """
+        Procura a primeira ocorrência.
+
+        Args:
+            text (str): Texto a analisar.
+
+        Returns:
+            Optional[Hashable]: Rótulo da primeira ocorrência, ou None se não houver.
+        """
+        for _, _, label in self.finditer(text):
+            return label
+        return None
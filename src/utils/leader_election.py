@@ -0,0 +1,180 @@
+"""
+Eleição de líder entre réplicas do bot, baseada em leases no MongoDB.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.utils.config import Config
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElector:
+    """
+    Mantém a liderança de um papel (por exemplo, um agendador) entre réplicas.
+
+    Cada réplica tenta adquirir um lease no MongoDB. A líder o renova a cada
+    terço do TTL; as demais tentam assumi-lo na mesma cadência, então uma falha
+    da líder é coberta em no máximo TTL + TTL/3. Se a líder não conseguir renovar
+    antes do fim do lease, ela se rebaixa localmente mesmo sem falar com o banco.
+
+    A cada nova liderança o MongoDB emite um token de fencing crescente, que os
+    agendadores gravam junto com suas escritas para rejeitar uma líder antiga.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_elected: Callable[[int], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        ttl_seconds: Optional[float] = None,
+        holder_id: Optional[str] = None
+    ):
+        """
+        Inicializa o eleitor.
+
+        Args:
+            name (str): Nome do papel disputado (chave do lease).
+            on_elected (Callable[[int], Awaitable[None]]): Chamado com o token de fencing
+                                                          quando a réplica assume a liderança.
+            on_demoted (Callable[[], Awaitable[None]]): Chamado quando a réplica perde a liderança.
+            ttl_seconds (Optional[float]): Duração do lease. Padrão: LEADER_LEASE_TTL_SECONDS.
+            holder_id (Optional[str]): Identificador da réplica. Padrão: Config.get_instance_id().
+        """
+        self.name = name
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.ttl = ttl_seconds or Config.get_leader_lease_ttl()
+        self.holder_id = holder_id or Config.get_instance_id()
+        self.is_leader = False
+        self.fencing_token: Optional[int] = None
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self._lease_deadline = 0.0
+
+    @property
+    def renew_interval(self) -> float:
+        """Intervalo entre renovações (ou tentativas de aquisição) do lease."""
+        return self.ttl / 3
+
+    async def start(self) -> None:
+        """Inicia o loop de eleição."""
+        if self.is_running:
+            return
+        self.is_running = True
+        self.task = task_supervisor.spawn(self._run(), name=self.name, owner="leader_election", drain=False)
+        logger.info(f"Eleição de líder '{self.name}' iniciada (réplica {self.holder_id}, TTL {self.ttl}s).")
+
+    async def stop(self) -> None:
+        """Para o loop de eleição e libera o lease para failover imediato."""
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+        if self.is_leader:
+            await self._demote()
+            if mongodb_client.db is not None:
+                await mongodb_client.release_lease(self.name, self.holder_id)
+
+    async def _run(self) -> None:
+        """Loop de aquisição e renovação do lease."""
+        while self.is_running:
+            try:
+                await self._tick()
+                await asyncio.sleep(self.renew_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro na eleição de líder '{self.name}': {e}")
+                await asyncio.sleep(self.renew_interval)
+
+    async def _tick(self) -> None:
+        """Tenta adquirir ou renovar o lease e aplica a transição de papel."""
+        # Sem MongoDB não há como coordenar réplicas: assume execução única
+        if mongodb_client.db is None:
+            if not self.is_leader:
+                logger.warning(f"MongoDB indisponível. Réplica assume '{self.name}' sem eleição.")
+                await self._elect(0)
+            return
+
+        started = time.monotonic()
+        token = await mongodb_client.acquire_lease(self.name, self.holder_id, self.ttl)
+
+        if token is not None:
+            # O prazo local é contado a partir do início da requisição (conservador)
+            self._lease_deadline = started + self.ttl
+            if not self.is_leader or token != self.fencing_token:
+                await self._elect(token)
+            return
+
+        if self.is_leader and time.monotonic() >= self._lease_deadline - self.renew_interval:
+            logger.warning(f"Réplica {self.holder_id} perdeu a liderança de '{self.name}'.")
+            await self._demote()
+
+    async def _elect(self, token: int) -> None:
+        """Assume a liderança com o token informado."""
+        if self.is_leader:
+            await self._demote()
+        self.is_leader = True
+        self.fencing_token = token
+        logger.info(f"Réplica {self.holder_id} é líder de '{self.name}' (token {token}).")
+        try:
+            await self.on_elected(token)
+        except Exception as e:
+            logger.error(f"Erro ao assumir a liderança de '{self.name}': {e}")
+
+    async def _demote(self) -> None:
+        """Deixa a liderança."""
+        self.is_leader = False
+        self.fencing_token = None
+        try:
+            await self.on_demoted()
+        except Exception as e:
+            logger.error(f"Erro ao deixar a liderança de '{self.name}': {e}")
+
+
+# Eleitores ativos, por nome do papel
+leader_electors: Dict[str, LeaderElector] = {}
+
+
+async def start_leader_election(
+    name: str,
+    on_elected: Callable[[int], Awaitable[None]],
+    on_demoted: Callable[[], Awaitable[None]]
+) -> LeaderElector:
+    """
+    Inicia (uma única vez) a eleição de líder para um papel.
+
+    Args:
+        name (str): Nome do papel disputado.
+        on_elected (Callable[[int], Awaitable[None]]): Chamado ao assumir a liderança.
+        on_demoted (Callable[[], Awaitable[None]]): Chamado ao perder a liderança.
+
+    Returns:
+        LeaderElector: Eleitor do papel.
+    """
+    elector = leader_electors.get(name)
+    if elector is None:
+        elector = LeaderElector(name, on_elected, on_demoted)
+        leader_electors[name] = elector
+    else:
+        # Reinicializações da aplicação trocam as instâncias controladas
+        elector.on_elected = on_elected
+        elector.on_demoted = on_demoted
+    await elector.start()
+    return elector
+
+
+async def stop_leader_elections() -> None:
+    """Para todos os eleitores, liberando os leases mantidos por esta réplica."""
+    for elector in list(leader_electors.values()):
+        await elector.stop()
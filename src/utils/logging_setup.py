@@ -0,0 +1,256 @@
+"""
+Configuração do logging: fila em memória, saída em texto ou JSON, limite e amostragem de mensagens.
+
+Os handlers só colocam o registro (ainda não formatado) em uma fila; a
+formatação e a escrita no stderr acontecem em uma thread separada
+(QueueListener), fora do loop de eventos. Antes de entrar na fila, cada
+registro passa por dois filtros:
+
+- SamplingFilter: para os loggers configurados em LOG_SAMPLE_RATES (ou
+  registros com extra={"sample_rate": ...}), mantém só uma fração dos
+  registros abaixo de WARNING;
+- RateLimitFilter: limita cada ponto de log (arquivo e linha da chamada) a
+  LOG_RATE_LIMIT registros por minuto; os descartados são contados e
+  informados no próximo registro aceito. Erros nunca são descartados.
+
+A chave dos filtros é o ponto de log, e não o texto da mensagem: uma linha
+com f-string gera um texto diferente a cada chamada, mas continua sendo
+limitada e amostrada como uma só mensagem. Em caminhos quentes, a formatação
+preguiçosa (logger.info("... %s", valor)) ainda evita montar mensagens que
+serão descartadas.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils.config import Config
+
+# Atributos padrão de um LogRecord (os demais vêm de extra= e vão para o JSON)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+Key = Tuple[str, str, int]
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def call_site(record: logging.LogRecord) -> Key:
+    """Ponto de log de um registro: logger, arquivo e linha da chamada."""
+    return record.name, record.pathname, record.lineno
+
+
+class TextFormatter(logging.Formatter):
+    """Formato de texto do bot, com a contagem de mensagens descartadas pelos filtros."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (+{suppressed} suprimidas)"
+        sampled = getattr(record, "sampled", 1)
+        if sampled > 1:
+            text += f" (amostra 1/{sampled})"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha: horário, nível, logger, mensagem e os campos de extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key != "sample_rate":
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita cada ponto de log a `limit` registros por janela de `window` segundos.
+
+    Registros de nível ERROR ou acima sempre passam. Os descartados são
+    contados e o total vai no atributo "suppressed" do próximo registro
+    aceito da mesma mensagem.
+    """
+
+    # Número máximo de mensagens distintas acompanhadas (as contagens são zeradas ao atingir)
+    MAX_KEYS = 10_000
+
+    def __init__(self, limit: int, window: float = 60.0):
+        """
+        Args:
+            limit (int): Registros aceitos por mensagem em cada janela.
+            window (float): Duração da janela em segundos.
+        """
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.suppressed_total = 0
+        # Formato: {(logger, arquivo, linha): [início da janela, aceitos, descartados]}
+        self._counters: Dict[Key, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = call_site(record)
+        now = time.monotonic()
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.MAX_KEYS:
+                self._counters.clear()
+            counter = self._counters[key] = [now, 0, 0]
+        elif now - counter[0] >= self.window:
+            counter[0], counter[1] = now, 0
+
+        if counter[1] >= self.limit:
+            counter[2] += 1
+            self.suppressed_total += 1
+            return False
+        counter[1] += 1
+        if counter[2]:
+            record.suppressed = counter[2]
+            counter[2] = 0
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Mantém uma fração dos registros abaixo de WARNING de loggers ruidosos.
+
+    A fração vem de extra={"sample_rate": ...} ou, se ausente, do prefixo mais
+    longo do nome do logger em `rates` ("telegram" vale para
+    "telegram.ext.Application"). A amostragem é determinística: com fração
+    0.1, passa o 1º, o 11º, o 21º... registro de cada ponto de log.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            rates (Optional[Dict[str, float]]): Fração mantida por logger (0 a 1).
+        """
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._logger_rates: Dict[str, float] = {}
+        # Formato: {(logger, arquivo, linha): registros vistos}
+        self._seen: Dict[Key, int] = {}
+
+    def _rate_for(self, name: str) -> float:
+        """Fração configurada para um logger (prefixo mais longo; 1.0 se nenhum)."""
+        rate = self._logger_rates.get(name)
+        if rate is None:
+            rate = 1.0
+            parts = name.split(".")
+            for size in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:size])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            self._logger_rates[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, "sample_rate", None)
+        if rate is None:
+            rate = self._rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+
+        every = max(1, round(1 / rate))
+        key = call_site(record)
+        if len(self._seen) >= RateLimitFilter.MAX_KEYS:
+            self._seen.clear()
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if seen % every:
+            return False
+        record.sampled = every
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata o registro antes de colocá-lo na fila.
+
+    O QueueHandler padrão monta a mensagem na thread que registrou (para
+    poder enviá-la a outro processo); aqui a fila é local, então a mensagem é
+    montada só na thread do QueueListener. Por isso, os argumentos de uma
+    mensagem não devem ser alterados depois de registrados.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Listener global, criado por start_logging
+log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def start_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                  stream=None) -> logging.handlers.QueueListener:
+    """
+    Configura o logging raiz com a fila, os filtros e o formato escolhido.
+
+    Args:
+        level (Optional[str]): Nível mínimo (padrão: LOG_LEVEL).
+        log_format (Optional[str]): "text" ou "json" (padrão: LOG_FORMAT).
+        stream: Destino da saída (padrão: sys.stderr).
+
+    Returns:
+        logging.handlers.QueueListener: Listener em execução.
+    """
+    global log_listener
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if (log_format or Config.get_log_format()) == "json" else TextFormatter())
+
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    handler.addFilter(SamplingFilter(Config.get_log_sample_rates()))
+    rate_limit = Config.get_log_rate_limit()
+    if rate_limit:
+        handler.addFilter(RateLimitFilter(rate_limit))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    level = (level or Config.get_log_level()).upper()
+    valid_level = isinstance(logging.getLevelName(level), int)
+    root.setLevel(level if valid_level else logging.INFO)
+
+    log_listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    log_listener.start()
+    if not valid_level:
+        logging.getLogger(__name__).error(f"LOG_LEVEL inválido: {level}. Usando INFO.")
+    return log_listener
+
+
+def stop_logging() -> None:
+    """Esvazia a fila, encerra o listener e remove o handler da fila do logging raiz."""
+    global log_listener
+    if log_listener is None:
+        return
+    log_listener.stop()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, DeferredQueueHandler):
+            root.removeHandler(existing)
+    log_listener = None
@@ -3,19 +3,41 @@ Agendador para publicação automática de correios elegantes.
 """
 import asyncio
 import logging
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from typing import Optional, List, Dict, Any, Tuple
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter
 
 from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
 from src.utils.config import Config
+from src.utils.rate_limiter import AsyncRateLimiter
+from src.utils.outbox import build_outbox_message, get_outbox
 
 logger = logging.getLogger(__name__)
 
 
 class MailScheduler:
-    """Agendador para publicação automática de correios elegantes."""
+    """
+    Agendador para publicação automática de correios elegantes.
+    
+    A cada ciclo, os correios pendentes são reservados em lotes de forma atômica
+    (seguro com várias réplicas), publicados com concorrência limitada dentro do
+    orçamento de mensagens por minuto do grupo e têm o resultado gravado em uma
+    única operação em lote por lote reservado.
+    
+    Com o outbox em execução, o lote reservado é gravado no outbox (chave
+    "mail:<id>") e o correio passa a "queued"; o envio e a marcação como
+    publicado ficam a cargo do outbox, sem perder nem duplicar correios se o
+    processo parar no meio.
+    """
+    
+    # Tamanho de cada lote reservado no banco
+    BATCH_SIZE = 20
+    # Número máximo de publicações simultâneas
+    MAX_CONCURRENCY = 3
     
     def __init__(self, bot: Bot):
         """
@@ -27,6 +49,11 @@ class MailScheduler:
         self.bot = bot
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
+        self.interval_minutes = 60
+        self.rate_per_minute = Config.get_mail_publish_rate()
+        self.rate_limiter = AsyncRateLimiter(self.rate_per_minute, period=60)
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._chat_id: Optional[int] = None
     
     async def start(self, interval_minutes: int = 60) -> None:
         """
@@ -40,7 +67,10 @@ class MailScheduler:
             return
         
         self.is_running = True
-        self.task = asyncio.create_task(self._run_scheduler(interval_minutes))
+        self.interval_minutes = interval_minutes
+        self.task = task_supervisor.spawn(
+            self._run_scheduler(interval_minutes), name="publisher", owner="mail_scheduler", drain=False
+        )
         logger.info(f"Agendador de correio iniciado. Intervalo: {interval_minutes} minutos.")
     
     async def stop(self) -> None:
@@ -74,33 +104,228 @@ class MailScheduler:
                 logger.error(f"Erro no agendador de correio: {e}")
                 await asyncio.sleep(60)  # Aguardar 1 minuto antes de tentar novamente
     
-    async def _process_pending_mails(self) -> None:
-        """Processa e publica correios pendentes."""
+    async def _get_target_chat_id(self) -> Optional[int]:
+        """
+        Obtém (e mantém em cache) o chat_id do GYM NATION.
+        
+        Returns:
+            Optional[int]: Chat ID do grupo ou None se não encontrado.
+        """
+        if self._chat_id is None:
+            self._chat_id = await mongodb_client.get_gym_nation_chat_id()
+        return self._chat_id
+    
+    async def _process_pending_mails(self) -> int:
+        """
+        Processa e publica correios pendentes.
+        
+        Cada ciclo publica no máximo o orçamento do intervalo (taxa por minuto ×
+        minutos do intervalo); o restante continua pendente para o próximo ciclo.
+        Cada lote tem sua própria reserva. Se o resultado de um lote não puder ser
+        gravado, o ciclo termina: os correios desse lote continuam reservados e
+        voltam a ficar disponíveis quando a reserva expirar.
+        
+        Returns:
+            int: Número de correios publicados.
+        """
         try:
-            # Obter correios pendentes
-            pending_mails = await mongodb_client.get_pending_mails()
-            
-            if not pending_mails:
-                logger.debug("Nenhum correio pendente encontrado.")
-                return
-            
             # Obter chat_id do GYM NATION
-            gym_nation_chat_id = await mongodb_client.get_gym_nation_chat_id()
+            gym_nation_chat_id = await self._get_target_chat_id()
             if not gym_nation_chat_id:
                 logger.error("Chat do GYM NATION não encontrado. Correios não podem ser publicados.")
-                return
+                return 0
             
-            logger.info(f"Processando {len(pending_mails)} correios pendentes.")
+            budget = self.rate_per_minute * max(1, self.interval_minutes)
+            published_total = 0
+            
+            while published_total < budget:
+                claim_id = f"{Config.get_instance_id()}-{uuid.uuid4().hex}"
+                batch = await mongodb_client.claim_pending_mails(
+                    claim_id, min(self.BATCH_SIZE, budget - published_total)
+                )
+                if not batch:
+                    break
+                
+                outbox = get_outbox()
+                if outbox is not None:
+                    queued = await self._enqueue_claimed_mails(outbox, claim_id, batch, gym_nation_chat_id)
+                    if queued is None:
+                        break
+                    published_total += queued
+                    continue
+                
+                logger.info(f"Publicando lote de {len(batch)} correios.")
+                message_ids = await asyncio.gather(
+                    *(self._publish_claimed_mail(mail, gym_nation_chat_id) for mail in batch)
+                )
+                
+                published = [
+                    (str(mail["_id"]), message_id)
+                    for mail, message_id in zip(batch, message_ids) if message_id is not None
+                ]
+                failed = [str(mail["_id"]) for mail, message_id in zip(batch, message_ids) if message_id is None]
+                recorded = await mongodb_client.record_mail_publish_results(claim_id, published, failed)
+                
+                published_total += len(published)
+                if recorded is None:
+                    logger.error("Resultado do lote de correios não gravado. Encerrando o ciclo.")
+                    break
+                if failed:
+                    logger.warning(f"{len(failed)} correios falharam e serão tentados novamente mais tarde.")
             
-            for mail in pending_mails:
-                try:
-                    await self._publish_mail(mail, gym_nation_chat_id)
-                    await asyncio.sleep(2)  # Evitar spam
-                except Exception as e:
-                    logger.error(f"Erro ao publicar correio {mail['_id']}: {e}")
+            if published_total:
+                logger.info(f"{published_total} correios publicados neste ciclo.")
+            else:
+                logger.debug("Nenhum correio pendente encontrado.")
+            return published_total
         
         except Exception as e:
             logger.error(f"Erro ao processar correios pendentes: {e}")
+            return 0
+    
+    async def _enqueue_claimed_mails(
+        self, outbox, claim_id: str, batch: List[Dict[str, Any]], chat_id: int
+    ) -> Optional[int]:
+        """
+        Grava no outbox os correios de um lote reservado e os marca como "queued".
+        
+        Args:
+            outbox (OutboxSender): Outbox em execução.
+            claim_id (str): Identificador da reserva.
+            batch (List[Dict[str, Any]]): Correios reservados.
+            chat_id (int): ID do chat onde publicar.
+            
+        Returns:
+            Optional[int]: Número de correios gravados no outbox, ou None se o
+                           resultado não pôde ser gravado no banco.
+        """
+        messages = [self._build_outbox_mail(mail, chat_id) for mail in batch]
+        queued_keys = set(await outbox.enqueue(messages))
+        
+        queued = [str(mail["_id"]) for mail, message in zip(batch, messages) if message["_id"] in queued_keys]
+        failed = [str(mail["_id"]) for mail, message in zip(batch, messages) if message["_id"] not in queued_keys]
+        await mongodb_client.mark_mails_queued(claim_id, queued)
+        if failed:
+            logger.warning(f"{len(failed)} correios não foram gravados no outbox e serão tentados novamente mais tarde.")
+            if await mongodb_client.record_mail_publish_results(claim_id, [], failed) is None:
+                logger.error("Resultado do lote de correios não gravado. Encerrando o ciclo.")
+                return None
+        
+        logger.info(f"{len(queued)} correios enviados ao outbox.")
+        return len(queued)
+    
+    def _build_outbox_mail(self, mail: Dict[str, Any], chat_id: int) -> Dict[str, Any]:
+        """
+        Monta a mensagem do outbox para um correio.
+        
+        Args:
+            mail (Dict[str, Any]): Dados do correio.
+            chat_id (int): ID do chat onde publicar.
+            
+        Returns:
+            Dict[str, Any]: Documento para o outbox.
+        """
+        mail_id = str(mail['_id'])
+        text, keyboard = self._format_mail(mail)
+        return build_outbox_message(
+            f"mail:{mail_id}",
+            chat_id,
+            text,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=keyboard,
+            effect={"type": "mail_published", "mail_id": mail_id}
+        )
+    
+    async def _publish_claimed_mail(self, mail: Dict[str, Any], chat_id: int) -> Optional[int]:
+        """
+        Publica um correio reservado, respeitando o limite de taxa do grupo.
+        
+        Args:
+            mail (Dict[str, Any]): Dados do correio.
+            chat_id (int): ID do chat onde publicar.
+            
+        Returns:
+            Optional[int]: ID da mensagem publicada ou None em caso de falha.
+        """
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            try:
+                sent_message = await self._send_mail(mail, chat_id)
+                return sent_message.message_id
+            except RetryAfter as e:
+                self.rate_limiter.penalize(e.retry_after)
+                logger.warning(f"Limite do Telegram ao publicar correio {mail['_id']}. Aguardando {e.retry_after}s.")
+            except BadRequest as e:
+                # Chat inválido: força nova busca do chat_id no próximo ciclo
+                self._chat_id = None
+                logger.error(f"Erro ao publicar correio {mail['_id']}: {e}")
+            except Exception as e:
+                logger.error(f"Erro ao publicar correio {mail['_id']}: {e}")
+            return None
+    
+    async def _send_mail(self, mail: Dict[str, Any], chat_id: int) -> Message:
+        """
+        Envia a mensagem de um correio ao grupo.
+        
+        Args:
+            mail (Dict[str, Any]): Dados do correio.
+            chat_id (int): ID do chat onde publicar.
+            
+        Returns:
+            Message: Mensagem enviada.
+        """
+        mail_message, keyboard = self._format_mail(mail)
+        
+        # Enviar mensagem com botão
+        return await self.bot.send_message(
+            chat_id=chat_id,
+            text=mail_message,
+            parse_mode=ParseMode.MARKDOWN,
+            reply_markup=keyboard
+        )
+    
+    @staticmethod
+    def _format_mail(mail: Dict[str, Any]) -> Tuple[str, InlineKeyboardMarkup]:
+        """
+        Monta o texto e os botões da publicação de um correio.
+        
+        Args:
+            mail (Dict[str, Any]): Dados do correio.
+            
+        Returns:
+            Tuple[str, InlineKeyboardMarkup]: Texto (Markdown) e teclado inline.
+        """
+        mail_id = str(mail['_id'])
+        recipient_username = mail['recipient_username']
+        message_text = mail['message_text']
+        
+        # Montar mensagem do correio
+        mail_message = (
+            f"📬 *CORREIO ELEGANTE* 💌💚\n\n"
+            f"*Para:* @{recipient_username}\n\n"
+            f"💭 _{message_text}_\n\n"
+            f"━━━━━━━━━━━━━━━━━━━━\n"
+            f"_Mensagem anônima • Expira em 24h_\n\n"
+            f"💡 *Interaja com este correio usando os botões abaixo:*"
+        )
+        
+        # Criar botões para interagir com o correio
+        bot_username = Config.get_bot_username()
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton(
+                "🔍 Descobrir remetente (R$ 2,00)", 
+                url=f"https://t.me/{bot_username}?start=revelar_{mail_id}"
+            )],
+            [InlineKeyboardButton(
+                "💌 Responder anonimamente", 
+                url=f"https://t.me/{bot_username}?start=responder_{mail_id}"
+            )],
+            [InlineKeyboardButton(
+                "🚨 Denunciar conteúdo", 
+                url=f"https://t.me/{bot_username}?start=denunciar_{mail_id}"
+            )]
+        ])
+        return mail_message, keyboard
     
     async def _publish_mail(self, mail: Dict[str, Any], chat_id: int) -> None:
         """
@@ -112,43 +337,15 @@ class MailScheduler:
         """
         try:
             mail_id = str(mail['_id'])
-            recipient_username = mail['recipient_username']
-            message_text = mail['message_text']
-            
-            # Montar mensagem do correio
-            mail_message = (
-                f"📬 *CORREIO ELEGANTE* 💌💚\n\n"
-                f"*Para:* @{recipient_username}\n\n"
-                f"💭 _{message_text}_\n\n"
-                f"━━━━━━━━━━━━━━━━━━━━\n"
-                f"_Mensagem anônima • Expira em 24h_\n\n"
-                f"💡 *Interaja com este correio usando os botões abaixo:*"
-            )
-            
-            # Criar botões para interagir com o correio
-            bot_username = Config.get_bot_username()
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton(
-                    "🔍 Descobrir remetente (R$ 2,00)", 
-                    url=f"https://t.me/{bot_username}?start=revelar_{mail_id}"
-                )],
-                [InlineKeyboardButton(
-                    "💌 Responder anonimamente", 
-                    url=f"https://t.me/{bot_username}?start=responder_{mail_id}"
-                )],
-                [InlineKeyboardButton(
-                    "🚨 Denunciar conteúdo", 
-                    url=f"https://t.me/{bot_username}?start=denunciar_{mail_id}"
-                )]
-            ])
+            outbox = get_outbox()
+            if outbox is not None:
+                if await outbox.enqueue([self._build_outbox_mail(mail, chat_id)]):
+                    logger.info(f"Correio {mail_id} enviado ao outbox.")
+                else:
+                    logger.error(f"Erro ao gravar correio {mail_id} no outbox.")
+                return
             
-            # Enviar mensagem com botão
-            sent_message = await self.bot.send_message(
-                chat_id=chat_id,
-                text=mail_message,
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=keyboard
-            )
+            sent_message = await self._send_mail(mail, chat_id)
             
             # Marcar como publicado no banco de dados
             success = await mongodb_client.publish_mail(mail_id, sent_message.message_id)
@@ -175,6 +372,26 @@ class MailScheduler:
 mail_scheduler: Optional[MailScheduler] = None
 
 
+def initialize_mail_scheduler(bot: Bot) -> MailScheduler:
+    """
+    Cria o agendador de correio global, sem iniciar o ciclo periódico.
+
+    Chamado em todas as réplicas: a publicação manual (/admincorreio) usa o
+    agendador mesmo onde o ciclo não roda; apenas a líder eleita o inicia.
+
+    Args:
+        bot (Bot): Instância do bot.
+
+    Returns:
+        MailScheduler: Agendador global.
+    """
+    global mail_scheduler
+
+    if mail_scheduler is None:
+        mail_scheduler = MailScheduler(bot)
+    return mail_scheduler
+
+
 async def start_mail_scheduler(bot: Bot, interval_minutes: int = 60, process_immediately: bool = False) -> None:
     """
     Inicia o agendador de correio global.
@@ -184,10 +401,7 @@ async def start_mail_scheduler(bot: Bot, interval_minutes: int = 60, process_imm
         interval_minutes (int): Intervalo em minutos.
         process_immediately (bool): Se True, processa correios pendentes imediatamente na inicialização.
     """
-    global mail_scheduler
-    
-    if mail_scheduler is None:
-        mail_scheduler = MailScheduler(bot)
+    initialize_mail_scheduler(bot)
     
     # Se solicitado, processar correios pendentes imediatamente
     if process_immediately:
@@ -238,7 +452,7 @@ async def publish_mail_by_id(mail_id: str) -> bool:
             return False
         
         # Obter chat_id do GYM NATION
-        gym_nation_chat_id = await mongodb_client.get_gym_nation_chat_id()
+        gym_nation_chat_id = await mail_scheduler._get_target_chat_id()
         if not gym_nation_chat_id:
             logger.error("Chat do GYM NATION não encontrado. Correio não pode ser publicado.")
             return False
@@ -256,7 +470,7 @@ async def publish_mail_by_id(mail_id: str) -> bool:
 
 async def publish_all_pending_mails() -> int:
     """
-    Publica todos os correios pendentes imediatamente.
+    Publica todos os correios pendentes imediatamente (dentro do orçamento do ciclo).
     
     Returns:
         int: Número de correios publicados.
@@ -269,15 +483,11 @@ async def publish_all_pending_mails() -> int:
     
     try:
         # Forçar processamento de correios pendentes
-        await mail_scheduler._process_pending_mails()
+        published = await mail_scheduler._process_pending_mails()
         
-        # Contar quantos foram processados
-        from src.utils.mongodb_instance import mongodb_client
-        remaining_pending = await mongodb_client.get_pending_mails()
-        
-        logger.info("Todos os correios pendentes foram processados manualmente.")
-        return len(remaining_pending)
+        logger.info(f"Publicação manual concluída: {published} correios publicados.")
+        return published
         
     except Exception as e:
         logger.error(f"Erro ao publicar todos os correios pendentes: {e}")
-        return 0 
\ No newline at end of file
+        return 0
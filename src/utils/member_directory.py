@@ -0,0 +1,242 @@
+"""
+Diretório de membros dos grupos (username → user_id), montado a partir das atualizações recebidas.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram import User
+
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+
+logger = logging.getLogger(__name__)
+
+# Status de quem está no grupo (os demais, "left" e "kicked", indicam que saiu)
+PRESENT_STATUSES = frozenset({"member", "administrator", "creator", "restricted"})
+
+
+def normalize_username(username: Optional[str]) -> str:
+    """
+    Normaliza um username do Telegram (sem @ e em minúsculas) para comparação.
+
+    Args:
+        username (Optional[str]): Username, com ou sem @.
+
+    Returns:
+        str: Username normalizado (vazio se não houver).
+    """
+    return (username or "").strip().lstrip("@").lower()
+
+
+def is_present(member: Dict[str, Any]) -> bool:
+    """
+    Verifica se um membro do diretório está no grupo.
+
+    Args:
+        member (Dict[str, Any]): Membro retornado por MemberDirectory.lookup.
+
+    Returns:
+        bool: True se o último status conhecido indica que o usuário está no grupo.
+    """
+    return member.get("status") in PRESENT_STATUSES
+
+
+class MemberDirectory:
+    """
+    Diretório dos membros vistos em cada grupo, por username normalizado.
+
+    Cada mensagem, check-in ou atualização chat_member registra o usuário
+    (user_id, username, status e último acesso) em um índice em memória
+    limitado a MAX_MEMBERS. A gravação na coleção chat_members é adiada e
+    feita em lote a cada FLUSH_INTERVAL; um membro já gravado só é regravado
+    se mudar de username ou status, ou se o último acesso gravado tiver mais
+    de TOUCH_INTERVAL, para não gerar uma escrita por mensagem.
+
+    Uma consulta por username procura primeiro no índice e depois no MongoDB;
+    usernames não encontrados no banco ficam em cache por MISS_TTL.
+    """
+
+    # Intervalo mínimo (em segundos) entre gravações do último acesso de um membro
+    TOUCH_INTERVAL = 3600
+    # Atraso (em segundos) da gravação em lote das alterações pendentes
+    FLUSH_INTERVAL = 5.0
+    # Número máximo de membros mantidos em memória
+    MAX_MEMBERS = 50000
+    # Validade (em segundos) de um username não encontrado no banco
+    MISS_TTL = 300
+
+    def __init__(self):
+        """Inicializa o diretório vazio."""
+        # Formato: {(chat_id, user_id): membro}
+        self._members: "OrderedDict[Tuple[int, int], Dict[str, Any]]" = OrderedDict()
+        # Formato: {(chat_id, username normalizado): user_id}
+        self._usernames: Dict[Tuple[int, str], int] = {}
+        # Formato: {(chat_id, user_id): momento da última gravação (monotonic)}
+        self._persisted_at: Dict[Tuple[int, int], float] = {}
+        self._pending: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        # Formato: {(chat_id, username normalizado): expira_em}
+        self._misses: Dict[Tuple[int, str], float] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def observe(self, chat_id: int, user: Optional[User], status: str = "member") -> None:
+        """
+        Registra que um usuário foi visto em um grupo.
+
+        Args:
+            chat_id (int): ID do grupo.
+            user (Optional[User]): Usuário visto (bots são ignorados).
+            status (str): Status do usuário no grupo ("member", "left", ...).
+        """
+        if user is None or user.is_bot:
+            return
+
+        key = (chat_id, user.id)
+        current = self._members.get(key)
+        username = normalize_username(user.username)
+        if current is None and not username:
+            return
+
+        member = {
+            "chat_id": chat_id,
+            "user_id": user.id,
+            "username": user.username,
+            "username_normalized": username or None,
+            "status": status,
+            "last_seen": datetime.now(),
+        }
+        changed = (
+            current is None
+            or current["username_normalized"] != member["username_normalized"]
+            or current["status"] != status
+        )
+        if current is not None and current["username_normalized"] and current["username_normalized"] != username:
+            self._forget_username(chat_id, current["username_normalized"], user.id)
+        self._store(member)
+
+        persisted_at = self._persisted_at.get(key)
+        if changed or persisted_at is None or time.monotonic() - persisted_at >= self.TOUCH_INTERVAL:
+            self._persisted_at[key] = time.monotonic()
+            self._pending[key] = member
+            self._schedule_flush()
+
+    async def lookup(self, chat_id: int, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Procura um membro de um grupo pelo username.
+
+        Args:
+            chat_id (int): ID do grupo.
+            username (str): Username, com ou sem @.
+
+        Returns:
+            Optional[Dict[str, Any]]: Membro (user_id, username, status, last_seen) ou None se nunca foi visto.
+        """
+        username = normalize_username(username)
+        if not username:
+            return None
+
+        user_id = self._usernames.get((chat_id, username))
+        if user_id is not None:
+            self._members.move_to_end((chat_id, user_id))
+            return self._members[(chat_id, user_id)]
+
+        expires_at = self._misses.get((chat_id, username))
+        if expires_at is not None and expires_at > time.monotonic():
+            return None
+        if mongodb_client.db is None:
+            return None
+
+        member = await mongodb_client.find_chat_member_by_username(chat_id, username)
+        if member is None:
+            if len(self._misses) >= self.MAX_MEMBERS:
+                self._misses.clear()
+            self._misses[(chat_id, username)] = time.monotonic() + self.MISS_TTL
+            return None
+
+        # O usuário pode ter sido visto enquanto a consulta estava em andamento
+        user_id = self._usernames.get((chat_id, username))
+        if user_id is not None:
+            return self._members[(chat_id, user_id)]
+        member.pop("_id", None)
+        self._store(member)
+        self._persisted_at[(chat_id, member["user_id"])] = time.monotonic()
+        return member
+
+    def _store(self, member: Dict[str, Any]) -> None:
+        """Grava um membro no índice, descartando o menos usado se estiver cheio."""
+        key = (member["chat_id"], member["user_id"])
+        self._members[key] = member
+        self._members.move_to_end(key)
+        if member.get("username_normalized"):
+            self._usernames[(member["chat_id"], member["username_normalized"])] = member["user_id"]
+            self._misses.pop((member["chat_id"], member["username_normalized"]), None)
+
+        while len(self._members) > self.MAX_MEMBERS:
+            (chat_id, user_id), evicted = self._members.popitem(last=False)
+            self._persisted_at.pop((chat_id, user_id), None)
+            if evicted.get("username_normalized"):
+                self._forget_username(chat_id, evicted["username_normalized"], user_id)
+
+    def _forget_username(self, chat_id: int, username: str, user_id: int) -> None:
+        """Remove um username do índice, se ainda apontar para o usuário informado."""
+        if self._usernames.get((chat_id, username)) == user_id:
+            del self._usernames[(chat_id, username)]
+
+    def _schedule_flush(self) -> None:
+        """Agenda a gravação em lote das alterações pendentes."""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = task_supervisor.spawn(
+                self._delayed_flush(), name="flush", owner="member_directory", drain=False
+            )
+        except RuntimeError:
+            # Fora de um loop de eventos: as alterações ficam para a próxima gravação
+            pass
+
+    async def _delayed_flush(self) -> None:
+        """Aguarda FLUSH_INTERVAL e grava as alterações pendentes."""
+        await asyncio.sleep(self.FLUSH_INTERVAL)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Grava no MongoDB os membros alterados desde a última gravação.
+
+        Em caso de erro, as alterações voltam para a fila (sem sobrescrever
+        alterações mais recentes do mesmo membro).
+
+        Returns:
+            int: Número de membros gravados.
+        """
+        if not self._pending or mongodb_client.db is None:
+            return 0
+
+        pending = self._pending
+        self._pending = {}
+        members: List[Dict[str, Any]] = list(pending.values())
+        if not await mongodb_client.upsert_chat_members(members):
+            for key, member in pending.items():
+                self._pending.setdefault(key, member)
+            return 0
+
+        logger.debug(f"Diretório de membros: {len(members)} membros gravados")
+        return len(members)
+
+    async def stop(self) -> None:
+        """Cancela a gravação agendada e grava as alterações pendentes."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+
+
+# Diretório global de membros
+member_directory = MemberDirectory()
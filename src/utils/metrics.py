@@ -0,0 +1,322 @@
+"""
+Métricas do bot no formato de exposição de texto do Prometheus.
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Limites (em segundos) dos buckets padrão dos histogramas de latência
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label(value: str) -> str:
+    """Escapa um valor de label conforme o formato de texto."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Monta o trecho {a="1",b="2"} de uma amostra."""
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Formata um valor de amostra (inteiros sem casas decimais)."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base das métricas: nome, descrição e nomes das labels."""
+
+    TYPE = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        """
+        Args:
+            name (str): Nome da métrica.
+            documentation (str): Descrição exibida em # HELP.
+            labelnames (Iterable[str]): Nomes das labels.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Tuple) -> LabelValues:
+        """Valida e normaliza os valores das labels."""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: esperadas labels {self.labelnames}, recebidas {labels}")
+        return tuple(str(label) for label in labels)
+
+    def render(self) -> List[str]:
+        """Linhas # HELP, # TYPE e amostras da métrica."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Contador monotônico."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        """
+        Incrementa o contador.
+
+        Args:
+            *labels: Valores das labels, na ordem de labelnames.
+            amount (float): Incremento.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        """Valor atual do contador para as labels informadas."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    """Valor instantâneo."""
+
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels) -> None:
+        """
+        Define o valor.
+
+        Args:
+            value (float): Novo valor.
+            *labels: Valores das labels, na ordem de labelnames.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, *labels) -> Optional[float]:
+        """Valor atual para as labels informadas (None se nunca definido)."""
+        return self._values.get(self._key(labels))
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(Metric):
+    """Histograma com buckets cumulativos, soma e contagem."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Formato: {labels: [contagem por bucket (não cumulativa) + overflow, soma]}
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        """
+        Registra uma observação.
+
+        Args:
+            value (float): Valor observado (em segundos, para latências).
+            *labels: Valores das labels, na ordem de labelnames.
+        """
+        key = self._key(labels)
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, *labels) -> int:
+        """Número de observações para as labels informadas."""
+        counts = self._values.get(self._key(labels))
+        return 0 if counts is None else int(sum(counts[:-1]))
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in items:
+            cumulative = 0.0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts[:-1]):
+                cumulative += bucket_count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas expostas em /metrics.
+
+    Além das métricas registradas, coletores são chamados a cada leitura para
+    atualizar valores que já existem em outros componentes (filas, atrasos).
+    """
+
+    def __init__(self):
+        """Inicializa o registro vazio."""
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Registra uma métrica e a devolve."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Cria e registra um contador."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        """Cria e registra um gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Cria e registra um histograma."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Registra uma função chamada antes de cada leitura.
+
+        Args:
+            collector (Callable[[], None]): Função que atualiza gauges deste registro.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Gera o texto de exposição de todas as métricas.
+
+        Returns:
+            str: Métricas no formato de texto 0.0.4 do Prometheus.
+        """
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro global
+registry = MetricsRegistry()
+
+# Atualizações e handlers
+UPDATES = registry.counter("bot_updates_total", "Atualizações processadas, por tipo.", ("type",))
+UPDATE_DURATION = registry.histogram("bot_update_duration_seconds", "Tempo total de processamento de uma atualização.")
+UPDATE_QUEUE_DELAY = registry.histogram(
+    "bot_update_queue_delay_seconds",
+    "Atraso entre o envio da mensagem e o início do processamento.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+HANDLER_DURATION = registry.histogram("bot_handler_duration_seconds", "Duração de cada handler.", ("handler",))
+HANDLER_ERRORS = registry.counter("bot_handler_errors_total", "Exceções levantadas pelos handlers.", ("handler",))
+
+# Chamadas externas
+MONGO_DURATION = registry.histogram(
+    "bot_mongo_operation_duration_seconds", "Duração das operações do MongoDBClient.", ("operation",)
+)
+LLM_DURATION = registry.histogram(
+    "bot_llm_request_duration_seconds", "Duração das chamadas à LLM.", ("operation",),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+)
+LLM_TOKENS = registry.counter("bot_llm_tokens_total", "Tokens consumidos na LLM.", ("direction",))
+TELEGRAM_DURATION = registry.histogram(
+    "bot_telegram_api_duration_seconds", "Duração das chamadas à Bot API.", ("method",)
+)
+TELEGRAM_REQUESTS = registry.counter(
+    "bot_telegram_api_requests_total", "Chamadas à Bot API por método e código HTTP.", ("method", "code")
+)
+TELEGRAM_RATE_LIMITED = registry.counter(
+    "bot_telegram_api_rate_limited_total", "Respostas 429 (flood control) da Bot API.", ("method",)
+)
+LAST_POLL = registry.gauge(
+    "bot_telegram_last_poll_timestamp_seconds", "Horário (Unix) do último getUpdates bem-sucedido."
+)
+
+# Tarefas em segundo plano (src.utils.task_supervisor)
+BACKGROUND_TASKS = registry.gauge("bot_background_tasks", "Tarefas em segundo plano em execução, por dono.", ("owner",))
+BACKGROUND_TASK_OLDEST_AGE = registry.gauge(
+    "bot_background_task_oldest_age_seconds", "Idade da tarefa em segundo plano mais antiga, por dono.", ("owner",)
+)
+BACKGROUND_TASK_FAILURES = registry.counter(
+    "bot_background_task_failures_total", "Tarefas em segundo plano encerradas com exceção, por dono.", ("owner",)
+)
+
+
+def observe_telegram_call(method: str, code: Optional[int], seconds: float) -> None:
+    """
+    Registra uma chamada à Bot API.
+
+    Args:
+        method (str): Método da Bot API (por exemplo, sendMessage).
+        code (Optional[int]): Código HTTP da resposta (None em erro de rede).
+        seconds (float): Duração da chamada.
+    """
+    TELEGRAM_DURATION.observe(seconds, method)
+    TELEGRAM_REQUESTS.inc(method, code if code is not None else "error")
+    if code == 429:
+        TELEGRAM_RATE_LIMITED.inc(method)
+    elif code == 200 and method == "getUpdates":
+        LAST_POLL.set(time.time())
+
+
+def record_llm_usage(usage: Optional[Dict[str, int]]) -> None:
+    """
+    Soma os tokens informados pela API da Anthropic.
+
+    Args:
+        usage (Optional[Dict[str, int]]): Campo "usage" da resposta (input_tokens, output_tokens).
+    """
+    if not usage:
+        return
+    LLM_TOKENS.inc("input", amount=usage.get("input_tokens", 0) or 0)
+    LLM_TOKENS.inc("output", amount=usage.get("output_tokens", 0) or 0)
@@ -0,0 +1,185 @@
+"""
+Servidor de métricas (/metrics) e sondas de vida (/health) e prontidão (/ready).
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.ext import Application
+
+from src.utils.config import Config
+from src.utils.http_server import HTTPRequest, HTTPResponse, MiniHTTPServer
+from src.utils.metrics import LAST_POLL, MetricsRegistry, registry
+from src.utils.mongodb_instance import mongodb_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """
+    Expõe as métricas do registro e as sondas do bot.
+
+    - /metrics: métricas no formato do Prometheus. A cada leitura, os get_stats()
+      do agendador de exclusões, das mensagens recorrentes e do outbox viram
+      gauges bot_<componente>_<métrica> (ou contadores, se terminarem em _total),
+      junto com o tamanho da fila de atualizações da Application.
+    - /health: responde 200 enquanto o processo está de pé.
+    - /ready: responde 200 se o MongoDB responde ao ping e o polling está ativo
+      (getUpdates bem-sucedido há menos de POLL_STALE_AFTER segundos); 503 caso contrário.
+    """
+
+    # Tempo máximo (em segundos) sem getUpdates bem-sucedido para o bot ser considerado pronto
+    POLL_STALE_AFTER = 60.0
+    # Tempo máximo (em segundos) de espera pelo ping do MongoDB na sonda de prontidão
+    PING_TIMEOUT = 2.0
+
+    def __init__(self, application: Application, port: int, metrics_registry: MetricsRegistry = registry):
+        """
+        Args:
+            application (Application): Aplicação do Telegram.
+            port (int): Porta de escuta.
+            metrics_registry (MetricsRegistry): Registro exposto em /metrics.
+        """
+        self.application = application
+        self.registry = metrics_registry
+        self.server = MiniHTTPServer(self._handle, port=port)
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se o servidor está escutando."""
+        return self.server.is_running
+
+    async def start(self) -> None:
+        """Inicia o servidor."""
+        await self.server.start()
+        logger.info(f"Métricas disponíveis em :{self.server.port}/metrics")
+
+    async def stop(self) -> None:
+        """Para o servidor."""
+        await self.server.stop()
+
+    async def _handle(self, request: HTTPRequest) -> HTTPResponse:
+        """Responde às rotas do servidor."""
+        if request.method not in ("GET", "HEAD"):
+            return HTTPResponse(405, b"method not allowed")
+        if request.path == "/metrics":
+            return HTTPResponse(200, self.render().encode("utf-8"), METRICS_CONTENT_TYPE)
+        if request.path == "/health":
+            return HTTPResponse(200, b"ok")
+        if request.path == "/ready":
+            ready, checks = await self.check_ready()
+            body = json.dumps({"ready": ready, "checks": checks}).encode("utf-8")
+            return HTTPResponse(200 if ready else 503, body, "application/json")
+        return HTTPResponse(404, b"not found")
+
+    def render(self) -> str:
+        """
+        Gera o texto de /metrics.
+
+        Returns:
+            str: Métricas do registro seguidas das métricas dos componentes.
+        """
+        lines = [self.registry.render()]
+        for name, (metric_type, value) in sorted(self._component_metrics().items()):
+            lines.append(f"# TYPE {name} {metric_type}\n{name} {value}\n")
+        return "".join(lines)
+
+    def _component_metrics(self) -> Dict[str, Tuple[str, Any]]:
+        """
+        Lê as métricas dos componentes em execução.
+
+        Returns:
+            Dict[str, Tuple[str, Any]]: Tipo e valor por nome de métrica.
+        """
+        metrics: Dict[str, Tuple[str, Any]] = {
+            "bot_update_queue_depth": ("gauge", self.application.update_queue.qsize()),
+        }
+        for component, stats in self._component_stats().items():
+            for key, value in stats.items():
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                metric_type = "counter" if key.endswith("_total") else "gauge"
+                metrics[f"bot_{component}_{key}"] = (metric_type, value)
+        return metrics
+
+    @staticmethod
+    def _component_stats() -> Dict[str, Dict[str, Any]]:
+        """Coleta o get_stats() dos componentes globais que estiverem ativos."""
+        from src.utils import deletion_scheduler, outbox, recurring_messages_manager
+
+        components = {
+            "deletion_scheduler": deletion_scheduler.deletion_scheduler,
+            "recurring_messages": recurring_messages_manager.recurring_messages_manager,
+            "outbox": outbox.outbox_sender,
+        }
+        return {
+            name: component.get_stats()
+            for name, component in components.items()
+            if component is not None
+        }
+
+    async def check_ready(self) -> Tuple[bool, Dict[str, bool]]:
+        """
+        Verifica se o bot está pronto para atender.
+
+        Returns:
+            Tuple[bool, Dict[str, bool]]: Pronto e o resultado de cada verificação.
+        """
+        try:
+            mongo_ok = await asyncio.wait_for(mongodb_client.ping(), timeout=self.PING_TIMEOUT)
+        except asyncio.TimeoutError:
+            mongo_ok = False
+
+        updater = self.application.updater
+        last_poll = LAST_POLL.value()
+        polling_ok = bool(
+            updater is not None and updater.running
+            and last_poll is not None and time.time() - last_poll < self.POLL_STALE_AFTER
+        )
+        checks = {"mongodb": mongo_ok, "polling": polling_ok}
+        return all(checks.values()), checks
+
+
+# Instância global
+metrics_server: Optional[MetricsServer] = None
+
+
+async def start_metrics_server(application: Application) -> Optional[MetricsServer]:
+    """
+    Inicia o servidor de métricas na porta METRICS_PORT (0 desativa).
+
+    Args:
+        application (Application): Aplicação do Telegram.
+
+    Returns:
+        Optional[MetricsServer]: Servidor iniciado, ou None se desativado ou se a porta estiver ocupada.
+    """
+    global metrics_server
+    if metrics_server is not None and metrics_server.is_running:
+        return metrics_server
+
+    port = Config.get_metrics_port()
+    if not port:
+        logger.info("Servidor de métricas desativado (METRICS_PORT=0)")
+        return None
+
+    server = MetricsServer(application, port)
+    try:
+        await server.start()
+    except OSError as e:
+        logger.error(f"Não foi possível iniciar o servidor de métricas na porta {port}: {e}")
+        return None
+    metrics_server = server
+    return metrics_server
+
+
+async def stop_metrics_server() -> None:
+    """Para o servidor de métricas."""
+    global metrics_server
+    if metrics_server is not None:
+        await metrics_server.stop()
+        metrics_server = None
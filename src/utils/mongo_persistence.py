@@ -0,0 +1,237 @@
+"""
+Persistência do python-telegram-bot no MongoDB (user_data e estados das conversas).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from src.utils.config import Config
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+
+logger = logging.getLogger(__name__)
+
+# Chave de uma conversa (IDs do chat e/ou do usuário) e estados por chave, como no ConversationHandler
+ConversationKey = Tuple[Union[int, str], ...]
+ConversationDict = Dict[ConversationKey, object]
+
+
+class MongoPersistence(BasePersistence):
+    """
+    Guarda no MongoDB o user_data e os estados dos ConversationHandlers persistentes,
+    para que os fluxos do correio elegante sobrevivam a reinícios.
+
+    Entre réplicas em execução, apenas o user_data é compartilhado. Os estados
+    das conversas são lidos só na inicialização (o python-telegram-bot chama
+    get_conversations uma vez por ConversationHandler): uma conversa iniciada
+    em uma réplica continua nela e só é vista por outra réplica que iniciar
+    depois da gravação.
+
+    - Gravação adiada: a cada update_interval a Application informa os usuários e
+      conversas alterados; as alterações são acumuladas (a última vence) e
+      gravadas com um bulk_write por coleção, WRITE_DELAY segundos depois.
+    - Carga sob demanda: o user_data não é lido ao iniciar; o de um usuário é lido
+      na primeira atualização dele e relido apenas se ficou parado por mais de
+      reload_after segundos (tempo suficiente para que alterações locais já
+      tenham sido gravadas), o que traz o estado gravado por outra réplica.
+    - Expiração: cada gravação renova a validade (CONVERSATION_STATE_TTL_HOURS);
+      estados de conversas abandonadas são apagados pelo índice TTL.
+
+    bot_data (que guarda o cliente da Anthropic) e chat_data não são persistidos.
+    """
+
+    # Atraso (em segundos) entre a chegada das alterações e a gravação em lote
+    WRITE_DELAY = 1.0
+    # Intervalo mínimo (em segundos) entre releituras do user_data de um usuário
+    MIN_RELOAD_AFTER = 60.0
+    # Número de usuários acompanhados a partir do qual os inativos são esquecidos
+    MAX_TRACKED_USERS = 10000
+
+    def __init__(self, update_interval: Optional[float] = None, ttl_hours: Optional[int] = None):
+        """
+        Args:
+            update_interval (Optional[float]): Intervalo de update_persistence da Application
+                (padrão: Config.get_persistence_interval()).
+            ttl_hours (Optional[int]): Validade dos estados gravados
+                (padrão: Config.get_conversation_state_ttl()).
+        """
+        if update_interval is None:
+            update_interval = Config.get_persistence_interval()
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.ttl_seconds = (ttl_hours or Config.get_conversation_state_ttl()) * 3600
+        self.reload_after = max(self.MIN_RELOAD_AFTER, 2 * update_interval + self.WRITE_DELAY)
+        # Formato: {user_id: última atualização processada (monotonic)}
+        self._last_access: Dict[int, float] = {}
+        self._pending_users: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._pending_conversations: Dict[Tuple[str, ConversationKey], Optional[object]] = {}
+        self._write_task: Optional[asyncio.Task] = None
+
+    # Leitura
+
+    async def get_user_data(self) -> Dict[int, Dict[Any, Any]]:
+        """O user_data é carregado sob demanda em refresh_user_data."""
+        return {}
+
+    async def get_chat_data(self) -> Dict[int, Dict[Any, Any]]:
+        """chat_data não é persistido."""
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        """bot_data não é persistido."""
+        return {}
+
+    async def get_callback_data(self) -> None:
+        """Dados de callback não são persistidos."""
+        return None
+
+    async def get_conversations(self, name: str) -> ConversationDict:
+        """
+        Carrega os estados não expirados de um ConversationHandler.
+
+        Chamado apenas na inicialização da Application: estados gravados depois
+        por outras réplicas não são relidos.
+
+        Args:
+            name (str): Nome do ConversationHandler.
+
+        Returns:
+            ConversationDict: Estado por chave da conversa.
+        """
+        states = await mongodb_client.get_conversation_states(name)
+        conversations = {tuple(state["key"]): state["state"] for state in states}
+        logger.info(f"Conversa {name}: {len(conversations)} estados restaurados")
+        return conversations
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict[Any, Any]) -> None:
+        """
+        Carrega o user_data gravado, na primeira atualização do usuário ou após um período parado.
+
+        Args:
+            user_id (int): ID do usuário.
+            user_data (Dict[Any, Any]): user_data em memória, atualizado no lugar.
+        """
+        now = time.monotonic()
+        last_access = self._last_access.get(user_id)
+        self._track_access(user_id, now)
+        if last_access is not None and now - last_access < self.reload_after:
+            return
+        if user_id in self._pending_users:
+            return
+
+        data = await mongodb_client.get_user_state(user_id)
+        # Sem resposta do banco ou com alteração local feita durante a leitura: mantém a memória
+        if data is None or user_id in self._pending_users:
+            return
+        user_data.clear()
+        user_data.update(data)
+
+    def _track_access(self, user_id: int, now: float) -> None:
+        """Registra o acesso de um usuário, esquecendo os inativos se houver muitos."""
+        self._last_access[user_id] = now
+        if len(self._last_access) > self.MAX_TRACKED_USERS:
+            self._last_access = {
+                tracked_id: accessed_at for tracked_id, accessed_at in self._last_access.items()
+                if now - accessed_at < self.reload_after
+            }
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict[Any, Any]) -> None:
+        """chat_data não é persistido."""
+
+    async def refresh_bot_data(self, bot_data: Dict[Any, Any]) -> None:
+        """bot_data não é persistido."""
+
+    # Gravação
+
+    async def update_user_data(self, user_id: int, data: Dict[Any, Any]) -> None:
+        """
+        Agenda a gravação do user_data de um usuário.
+
+        Args:
+            user_id (int): ID do usuário.
+            data (Dict[Any, Any]): Cópia do user_data.
+        """
+        self._pending_users[user_id] = data
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        """
+        Agenda a remoção do user_data de um usuário.
+
+        Args:
+            user_id (int): ID do usuário.
+        """
+        self._pending_users[user_id] = None
+        self._schedule_write()
+
+    async def update_conversation(self, name: str, key: ConversationKey, new_state: Optional[object]) -> None:
+        """
+        Agenda a gravação do estado de uma conversa.
+
+        Args:
+            name (str): Nome do ConversationHandler.
+            key (ConversationKey): Chave da conversa.
+            new_state (Optional[object]): Novo estado (None se a conversa terminou).
+        """
+        self._pending_conversations[(name, key)] = new_state
+        self._schedule_write()
+
+    async def update_chat_data(self, chat_id: int, data: Dict[Any, Any]) -> None:
+        """chat_data não é persistido."""
+
+    async def update_bot_data(self, data: Dict[Any, Any]) -> None:
+        """bot_data não é persistido."""
+
+    async def update_callback_data(self, data: Any) -> None:
+        """Dados de callback não são persistidos."""
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        """chat_data não é persistido."""
+
+    def _schedule_write(self) -> None:
+        """Agenda a gravação em lote das alterações pendentes."""
+        if self._write_task is None or self._write_task.done():
+            self._write_task = task_supervisor.spawn(
+                self._delayed_write(), name="write", owner="persistence", drain=False
+            )
+
+    async def _delayed_write(self) -> None:
+        """Aguarda WRITE_DELAY e grava as alterações pendentes."""
+        await asyncio.sleep(self.WRITE_DELAY)
+        await self._write_pending()
+
+    async def _write_pending(self) -> None:
+        """
+        Grava as alterações pendentes com um bulk_write por coleção.
+
+        Alterações que falharem voltam para a fila, sem sobrescrever alterações
+        mais recentes, e são regravadas na próxima rodada.
+        """
+        users, self._pending_users = self._pending_users, {}
+        conversations, self._pending_conversations = self._pending_conversations, {}
+
+        if users and not await mongodb_client.save_user_states(users, self.ttl_seconds):
+            for user_id, data in users.items():
+                self._pending_users.setdefault(user_id, data)
+        if conversations and not await mongodb_client.save_conversation_states(conversations, self.ttl_seconds):
+            for key, state in conversations.items():
+                self._pending_conversations.setdefault(key, state)
+
+        if users or conversations:
+            logger.debug(f"Persistência: {len(users)} usuários e {len(conversations)} conversas gravados")
+
+    async def flush(self) -> None:
+        """Grava imediatamente as alterações pendentes (chamado ao parar a Application)."""
+        if self._write_task is not None and not self._write_task.done():
+            self._write_task.cancel()
+            try:
+                await self._write_task
+            except asyncio.CancelledError:
+                pass
+        self._write_task = None
+        await self._write_pending()
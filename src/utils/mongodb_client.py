@@ -1,15 +1,20 @@
 """
 Cliente para o MongoDB.
 """
+import asyncio
 import os
 import logging
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 import motor.motor_asyncio
-from pymongo.errors import PyMongoError
+from pymongo import DeleteOne, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError, DuplicateKeyError
 import re
 from bson import ObjectId
 
+from src.utils.hyperloglog import HyperLogLog, hll_register
+from src.utils.text_utils import normalize_chat_name
+
 logger = logging.getLogger(__name__)
 
 class MongoDBClient:
@@ -53,7 +58,89 @@ class MongoDBClient:
         if self.client:
             self.client.close()
             logger.info("Conexão com o MongoDB fechada")
-    
+
+    async def ping(self) -> bool:
+        """
+        Verifica se o MongoDB está respondendo (usado pela sonda de prontidão).
+
+        Returns:
+            bool: True se o servidor respondeu ao ping.
+        """
+        if self.db is None:
+            return False
+        try:
+            await self.db.command("ping")
+            return True
+        except PyMongoError as e:
+            logger.warning(f"MongoDB não respondeu ao ping: {e}")
+            return False
+
+    # Índices usados pelas consultas frequentes do bot, por coleção
+    INDEXES = {
+        "pending_deletions": [
+            IndexModel([("chat_id", 1), ("message_id", 1)], unique=True),
+            IndexModel("delete_at"),
+        ],
+        "recurring_messages": [IndexModel("updated_at")],
+        "correio_elegante": [
+            IndexModel([("status", 1), ("created_at", 1)]),
+            IndexModel("claim_id", sparse=True),
+        ],
+        "quotas": [IndexModel("expires_at", expireAfterSeconds=0)],
+        "blacklist": [IndexModel([("chat_id", 1), ("added_at", -1), ("_id", -1)])],
+        "monitored_messages": [IndexModel([("chat_id", 1), ("_id", 1)])],
+        "user_checkins": [IndexModel([("chat_id", 1), ("_id", 1)])],
+        "ban_jobs": [IndexModel([("status", 1), ("created_at", -1)])],
+        "ban_job_items": [
+            IndexModel([("job_id", 1), ("user_id", 1)], unique=True),
+            IndexModel([("job_id", 1), ("state", 1)]),
+        ],
+        "chat_members": [
+            IndexModel([("chat_id", 1), ("user_id", 1)], unique=True),
+            IndexModel([("chat_id", 1), ("username_normalized", 1), ("last_seen", -1)]),
+        ],
+        "outbox": [
+            IndexModel([("status", 1), ("next_attempt_at", 1)]),
+            IndexModel("effect_pending", sparse=True),
+            IndexModel("expires_at", expireAfterSeconds=0),
+        ],
+        "user_states": [IndexModel("expires_at", expireAfterSeconds=0)],
+        "conversation_states": [
+            IndexModel("expires_at", expireAfterSeconds=0),
+            IndexModel("name"),
+        ],
+        "monitored_chats": [
+            IndexModel("chat_id"),
+            IndexModel("title_normalized"),
+            IndexModel("username_normalized", sparse=True),
+        ],
+    }
+
+    async def ensure_indexes(self) -> None:
+        """
+        Cria os índices usados pelas consultas frequentes do bot.
+
+        A criação é idempotente: índices já existentes não são recriados. Cada
+        coleção recebe seus índices em um único comando createIndexes, e as
+        coleções são processadas em paralelo.
+        """
+        async def create(collection: str, indexes: List[IndexModel]) -> None:
+            await self.db[collection].create_indexes(indexes)
+
+        results = await asyncio.gather(
+            *(create(collection, indexes) for collection, indexes in self.INDEXES.items()),
+            return_exceptions=True
+        )
+        failed = False
+        for collection, result in zip(self.INDEXES, results):
+            if isinstance(result, PyMongoError):
+                logger.error(f"Erro ao criar índices do MongoDB ({collection}): {result}")
+                failed = True
+            elif isinstance(result, BaseException):
+                raise result
+        if not failed:
+            logger.info("Índices do MongoDB verificados")
+
     # Métodos para gerenciar o check-in
     
     async def set_checkin_anchor(self, chat_id: int, message_id: int, points_value: int = 1, anchor_text: str = None) -> bool:
@@ -168,6 +255,19 @@ class MongoDBClient:
             logger.error(f"Erro ao obter check-ins ativos: {e}")
             return None
     
+    async def count_active_checkin_anchors(self) -> int:
+        """
+        Conta as âncoras de check-in ativas em todos os chats.
+        
+        Returns:
+            int: Número de âncoras ativas (0 em caso de erro).
+        """
+        try:
+            return await self.db.checkin_anchors.count_documents({"active": True})
+        except PyMongoError as e:
+            logger.error(f"Erro ao contar check-ins ativos: {e}")
+            return 0
+    
     async def get_anchor_details(self, anchor_id: str) -> Optional[Dict]:
         """
         Obtém detalhes completos de uma âncora específica.
@@ -694,81 +794,6 @@ class MongoDBClient:
             logging.error(f"Erro ao obter interação Q&A: {e}")
             return None
     
-    async def get_daily_qa_count(self, user_id: int, chat_id: int) -> int:
-        """
-        Obtém o número de perguntas feitas por um usuário em um chat no dia atual.
-        
-        Args:
-            user_id (int): ID do usuário.
-            chat_id (int): ID do chat.
-            
-        Returns:
-            int: Número de perguntas feitas no dia atual.
-        """
-        try:
-            # Define o início do dia atual
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            # Conta as interações do usuário no chat no dia atual
-            count = await self.db.qa_usage.count_documents({
-                "user_id": user_id,
-                "chat_id": chat_id,
-                "timestamp": {"$gte": today_start}
-            })
-            
-            return count
-        except Exception as e:
-            logging.error(f"Erro ao obter contagem diária de Q&A: {e}")
-            return 0
-    
-    async def get_last_qa_timestamp(self, user_id: int, chat_id: int) -> Optional[datetime]:
-        """
-        Obtém o timestamp da última pergunta feita por um usuário em um chat.
-        
-        Args:
-            user_id (int): ID do usuário.
-            chat_id (int): ID do chat.
-            
-        Returns:
-            Optional[datetime]: Timestamp da última pergunta, ou None se não houver.
-        """
-        try:
-            # Busca a última interação do usuário no chat
-            result = await self.db.qa_usage.find_one(
-                {"user_id": user_id, "chat_id": chat_id},
-                sort=[("timestamp", -1)]  # Ordena por timestamp decrescente
-            )
-            
-            if result:
-                return result.get("timestamp")
-            return None
-        except Exception as e:
-            logging.error(f"Erro ao obter timestamp da última Q&A: {e}")
-            return None
-    
-    async def increment_qa_usage(self, user_id: int, chat_id: int) -> bool:
-        """
-        Incrementa o contador de uso de Q&A para um usuário em um chat.
-        
-        Args:
-            user_id (int): ID do usuário.
-            chat_id (int): ID do chat.
-            
-        Returns:
-            bool: True se a operação foi bem-sucedida, False caso contrário.
-        """
-        try:
-            result = await self.db.qa_usage.insert_one({
-                "user_id": user_id,
-                "chat_id": chat_id,
-                "timestamp": datetime.now()
-            })
-            
-            return result.acknowledged
-        except Exception as e:
-            logging.error(f"Erro ao incrementar uso de Q&A: {e}")
-            return False
-    
     def get_database(self):
         """
         Obtém a referência para o banco de dados padrão.
@@ -802,8 +827,10 @@ class MongoDBClient:
                     update_data = {}
                     if title:
                         update_data["title"] = title
+                        update_data["title_normalized"] = normalize_chat_name(title)
                     if username:
                         update_data["username"] = username
+                        update_data["username_normalized"] = normalize_chat_name(username)
                     
                     if update_data:
                         await self.db.monitored_chats.update_one(
@@ -821,8 +848,10 @@ class MongoDBClient:
             # Adiciona título e username se fornecidos
             if title:
                 update_data["title"] = title
+                update_data["title_normalized"] = normalize_chat_name(title)
             if username:
                 update_data["username"] = username
+                update_data["username_normalized"] = normalize_chat_name(username)
             
             result = await self.db.monitored_chats.update_one(
                 {"chat_id": chat_id},
@@ -940,6 +969,7 @@ class MongoDBClient:
                 "added_by": added_by,
                 "added_by_name": added_by_name,
                 "created_at": datetime.now(),
+                "updated_at": datetime.now(),
                 "last_sent_at": None,
                 "active": True
             })
@@ -1003,26 +1033,65 @@ class MongoDBClient:
             logger.error(f"Erro ao obter mensagens recorrentes ativas: {e}")
             return []
     
-    async def update_recurring_message_last_sent(self, message_id: str) -> bool:
+    async def get_recurring_messages_changed_since(self, since: datetime) -> List[Dict]:
+        """
+        Obtém as mensagens recorrentes criadas, editadas ou desativadas desde um instante.
+        
+        Args:
+            since (datetime): Instante da última sincronização.
+            
+        Returns:
+            List[Dict]: Lista de mensagens alteradas (ativas e inativas).
+        """
+        try:
+            cursor = self.db.recurring_messages.find({"updated_at": {"$gt": since}})
+            return await cursor.to_list(length=None)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter mensagens recorrentes alteradas: {e}")
+            return []
+    
+    async def update_recurring_message_last_sent(
+        self,
+        message_id: str,
+        fencing_token: Optional[int] = None,
+        sent_at: Optional[datetime] = None
+    ) -> Optional[bool]:
         """
         Atualiza o timestamp da última vez que a mensagem foi enviada.
         
+        Com token de fencing, serve como reivindicação do envio: o gerenciador
+        grava antes de enviar e só envia se a escrita for aceita.
+        
         Args:
             message_id (str): ID da mensagem recorrente.
+            fencing_token (Optional[int]): Token de fencing do líder que enviou a mensagem.
+                                           Se informado, a escrita é rejeitada quando um
+                                           líder mais novo já gravou um token maior.
+            sent_at (Optional[datetime]): Momento do envio (padrão: agora).
             
         Returns:
-            bool: True se a operação foi bem-sucedida, False caso contrário.
+            Optional[bool]: True se gravado, False se rejeitado (token obsoleto ou
+                            mensagem inexistente), None em caso de erro.
         """
         try:
+            query: Dict[str, Any] = {"_id": ObjectId(message_id)}
+            update: Dict[str, Any] = {"last_sent_at": sent_at or datetime.now()}
+            if fencing_token is not None:
+                query["$or"] = [
+                    {"fencing_token": {"$exists": False}},
+                    {"fencing_token": {"$lte": fencing_token}}
+                ]
+                update["fencing_token"] = fencing_token
+            
             result = await self.db.recurring_messages.update_one(
-                {"_id": ObjectId(message_id)},
-                {"$set": {"last_sent_at": datetime.now()}}
+                query,
+                {"$set": update}
             )
             
-            return result.modified_count > 0
+            return result.matched_count > 0
         except PyMongoError as e:
             logger.error(f"Erro ao atualizar timestamp da mensagem recorrente: {e}")
-            return False
+            return None
     
     async def delete_recurring_message(self, message_id: str) -> bool:
         """
@@ -1037,7 +1106,7 @@ class MongoDBClient:
         try:
             result = await self.db.recurring_messages.update_one(
                 {"_id": ObjectId(message_id)},
-                {"$set": {"active": False}}
+                {"$set": {"active": False, "updated_at": datetime.now()}}
             )
             
             return result.modified_count > 0
@@ -1114,6 +1183,57 @@ class MongoDBClient:
             logger.error(f"Erro ao obter blacklist do chat {chat_id}: {e}")
             return []
     
+    async def get_blacklist_page(
+        self,
+        chat_id: int,
+        limit: int,
+        cursor: Optional[Tuple[datetime, ObjectId]] = None,
+        newer: bool = False
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Obtém uma página da blacklist de um chat, da entrada mais recente para a mais antiga.
+        
+        A paginação é por chave (keyset): a página começa logo após a entrada
+        `cursor` (added_at, _id), então cada página custa uma única consulta no
+        índice (chat_id, added_at, _id), independentemente da posição na lista.
+        
+        Args:
+            chat_id (int): ID do chat.
+            limit (int): Número de entradas por página.
+            cursor (Optional[Tuple[datetime, ObjectId]]): Entrada de referência. None para a primeira página.
+            newer (bool): Se True, retorna as entradas mais recentes que o cursor (página anterior).
+            
+        Returns:
+            Tuple[List[Dict[str, Any]], bool]: (entradas em ordem decrescente, se há mais
+                                              entradas na mesma direção).
+        """
+        query: Dict[str, Any] = {"chat_id": chat_id}
+        if cursor is not None:
+            added_at, item_id = cursor
+            op = "$gt" if newer else "$lt"
+            query["$or"] = [
+                {"added_at": {op: added_at}},
+                {"added_at": added_at, "_id": {op: item_id}}
+            ]
+        direction = 1 if newer else -1
+        projection = {
+            "chat_id": 1, "message_id": 1, "user_id": 1, "user_name": 1, "username": 1,
+            "message_text": 1, "added_by_name": 1, "added_at": 1
+        }
+        
+        try:
+            items = await self.db.blacklist.find(query, projection).sort(
+                [("added_at", direction), ("_id", direction)]
+            ).limit(limit + 1).to_list(length=limit + 1)
+            has_more = len(items) > limit
+            items = items[:limit]
+            if newer:
+                items.reverse()
+            return items, has_more
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter página da blacklist do chat {chat_id}: {e}")
+            return [], False
+    
     async def get_blacklist_by_group_name(self, group_name: str) -> List[Dict[str, Any]]:
         """
         Obtém a lista de mensagens na blacklist de um grupo pelo nome.
@@ -1164,43 +1284,97 @@ class MongoDBClient:
             group_name (str): Nome ou username do grupo.
             
         Returns:
-            Optional[int]: ID do chat ou None se não encontrado.
+            Optional[int]: ID do chat ou None se não encontrado ou ambíguo.
+        """
+        chats = await self.find_monitored_chats_by_name(group_name)
+        if len(chats) == 1:
+            return chats[0].get("chat_id")
+        if len(chats) > 1:
+            titles = ", ".join(str(chat.get("title") or chat.get("chat_id")) for chat in chats)
+            logger.warning(f"Nome de grupo ambíguo '{group_name}': {titles}")
+        else:
+            logger.info(f"Nenhum grupo encontrado com nome/username '{group_name}'")
+        return None
+    
+    async def find_monitored_chats_by_name(self, name: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
-        try:
-            # Log para debug
-            logger.info(f"Buscando grupo com nome/username: {group_name}")
-            
-            # Escapa caracteres especiais do regex
-            escaped_name = re.escape(group_name)
-            
-            # Procura por nome exato ou parcial (case insensitive) no título ou username
-            chat_data = await self.db.monitored_chats.find_one({
-                "$or": [
-                    {"title": {"$regex": f"^{escaped_name}$", "$options": "i"}},  # Match exato
-                    {"title": {"$regex": escaped_name, "$options": "i"}},  # Match parcial
-                    {"username": {"$regex": f"^{escaped_name}$", "$options": "i"}},  # Match exato
-                    {"username": {"$regex": escaped_name, "$options": "i"}}  # Match parcial
-                ]
-            })
+        Busca chats monitorados pelo título ou username normalizados (sem acentos,
+        sem diferenciar maiúsculas e minúsculas).
+        
+        Primeiro procura correspondências exatas; se não houver, procura títulos ou
+        usernames que comecem com o nome informado. As duas consultas usam os índices
+        de title_normalized e username_normalized.
+        
+        Args:
+            name (str): Título ou username (com ou sem @).
+            limit (int): Número máximo de chats retornados.
             
-            # Log para debug
-            if chat_data:
-                logger.info(f"Grupo encontrado: {chat_data}")
-                return chat_data.get("chat_id")
-            else:
-                logger.info("Nenhum grupo encontrado")
-
-                # Lista todos os grupos monitorados para debug
-                cursor = self.db.monitored_chats.find({})
-                all_chats = []
-                async for chat in cursor:
-                    all_chats.append(chat)
-                logger.debug(f"Grupos monitorados atualmente: {all_chats}")
-
-                return None
+        Returns:
+            List[Dict[str, Any]]: Chats encontrados (mais de um indica nome ambíguo).
+        """
+        key = normalize_chat_name(name)
+        if not key:
+            return []
+        
+        try:
+            chats = await self.db.monitored_chats.find({
+                "$or": [{"title_normalized": key}, {"username_normalized": key}]
+            }).to_list(length=limit)
+            if chats:
+                return chats
+            
+            prefix = {"$regex": f"^{re.escape(key)}"}
+            return await self.db.monitored_chats.find({
+                "$or": [{"title_normalized": prefix}, {"username_normalized": prefix}]
+            }).to_list(length=limit)
         except PyMongoError as e:
-            logger.error(f"Erro ao obter ID do chat pelo nome/username '{group_name}': {e}")
-            return None
+            logger.error(f"Erro ao buscar chats pelo nome '{name}': {e}")
+            return []
+    
+    async def get_monitored_chat_names(self) -> List[Dict[str, Any]]:
+        """
+        Obtém o ID, título, username e estado de todos os chats monitorados.
+        
+        Returns:
+            List[Dict[str, Any]]: Chats monitorados (apenas os campos de identificação).
+        """
+        try:
+            cursor = self.db.monitored_chats.find(
+                {}, {"_id": 0, "chat_id": 1, "title": 1, "username": 1, "active": 1}
+            )
+            return await cursor.to_list(length=None)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter chats monitorados: {e}")
+            return []
+    
+    async def backfill_chat_name_keys(self) -> int:
+        """
+        Preenche title_normalized e username_normalized dos chats gravados antes
+        desses campos existirem.
+        
+        Returns:
+            int: Número de chats atualizados.
+        """
+        try:
+            cursor = self.db.monitored_chats.find(
+                {"title": {"$exists": True}, "title_normalized": {"$exists": False}},
+                {"title": 1, "username": 1}
+            )
+            operations = []
+            async for chat in cursor:
+                update_data = {"title_normalized": normalize_chat_name(chat.get("title") or "")}
+                if chat.get("username"):
+                    update_data["username_normalized"] = normalize_chat_name(chat["username"])
+                operations.append(UpdateOne({"_id": chat["_id"]}, {"$set": update_data}))
+            
+            if not operations:
+                return 0
+            result = await self.db.monitored_chats.bulk_write(operations, ordered=False)
+            logger.info(f"Nomes normalizados preenchidos em {result.modified_count} chats monitorados")
+            return result.modified_count
+        except PyMongoError as e:
+            logger.error(f"Erro ao preencher nomes normalizados dos chats: {e}")
+            return 0
             
     async def remove_from_blacklist(self, item_id: str) -> bool:
         """
@@ -1296,18 +1470,16 @@ class MongoDBClient:
 
     async def get_chat_info_by_title(self, title: str) -> Optional[Dict]:
         """
-        Obtém informações sobre um chat pelo título (case-insensitive) 
-        a partir da coleção 'monitored_chats'.
+        Obtém informações sobre um chat pelo título (sem diferenciar maiúsculas,
+        minúsculas e acentos) a partir da coleção 'monitored_chats'.
         Retorna o primeiro chat encontrado com o título correspondente.
         """
         try:
-            # Busca case-insensitive usando regex
-            # Adiciona ^ e $ para buscar o título exato (ignorando maiúsculas/minúsculas)
-            regex_pattern = re.compile(f"^{re.escape(title)}$", re.IGNORECASE)
+            key = normalize_chat_name(title)
+            if not key:
+                return None
             
-            logger.debug(f"Buscando chat pelo título em 'monitored_chats': '{title}' (regex: {regex_pattern})")
-            # Busca na coleção correta ('monitored_chats')
-            chat_info = await self.db.monitored_chats.find_one({"title": regex_pattern})
+            chat_info = await self.db.monitored_chats.find_one({"title_normalized": key})
             
             if chat_info:
                 logger.debug(f"Chat encontrado em 'monitored_chats' pelo título '{title}': ID {chat_info.get('chat_id')}")
@@ -1420,7 +1592,7 @@ class MongoDBClient:
                 "sender_name": sender_name,
                 "recipient_username": recipient_username,
                 "message_text": message_text,
-                "status": "pending",  # pending, published, expired
+                "status": "pending",  # pending, publishing, queued, published, failed, expired
                 "created_at": datetime.now(),
                 "published_at": None,
                 "expires_at": None,
@@ -1433,6 +1605,7 @@ class MongoDBClient:
             
             if result.acknowledged:
                 logger.info(f"Correio criado: ID {result.inserted_id}")
+                await self._record_mail_stats({"sent": 1}, sender_id=sender_id, status="pending")
                 return str(result.inserted_id)
             
             return None
@@ -1441,50 +1614,163 @@ class MongoDBClient:
             logger.error(f"Erro ao criar correio: {e}")
             return None
     
-    async def get_daily_mail_count(self, user_id: int) -> int:
+    async def get_pending_mails(self) -> List[Dict[str, Any]]:
+        """
+        Obtém todos os correios pendentes para publicação.
+        
+        Returns:
+            List[Dict[str, Any]]: Lista de correios pendentes.
+        """
+        try:
+            cursor = self.db.correio_elegante.find({"status": "pending"})
+            mails = await cursor.to_list(length=None)
+            return mails
+            
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter correios pendentes: {e}")
+            return []
+    
+    async def count_pending_mails(self) -> int:
+        """
+        Conta os correios aguardando publicação.
+        
+        Returns:
+            int: Número de correios pendentes.
+        """
+        try:
+            return await self.db.correio_elegante.count_documents({"status": "pending"})
+        except PyMongoError as e:
+            logger.error(f"Erro ao contar correios pendentes: {e}")
+            return 0
+    
+    async def claim_pending_mails(self, claim_id: str, limit: int, stale_after_seconds: int = 900) -> List[Dict[str, Any]]:
         """
-        Obtém o número de correios enviados pelo usuário hoje.
+        Reserva atomicamente um lote de correios pendentes para publicação.
+        
+        Cada correio passa para o status "publishing" com o ID da reserva, em uma
+        atualização condicional ao status. Réplicas concorrentes nunca recebem o
+        mesmo correio. Reservas abandonadas (réplica que caiu no meio da
+        publicação) voltam a ficar disponíveis após stale_after_seconds.
         
         Args:
-            user_id (int): ID do usuário.
+            claim_id (str): Identificador único da reserva (um novo a cada lote: a
+                            releitura pelo ID devolveria correios de um lote anterior
+                            que ainda estivessem em "publishing").
+            limit (int): Número máximo de correios no lote.
+            stale_after_seconds (int): Idade a partir da qual uma reserva é considerada abandonada.
             
         Returns:
-            int: Número de correios enviados hoje.
+            List[Dict[str, Any]]: Correios reservados, do mais antigo ao mais novo.
         """
         try:
-            # Início e fim do dia atual
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
+            now = datetime.now()
+            claimable = {
+                "$and": [
+                    {"$or": [
+                        {"status": "pending"},
+                        {"status": "publishing", "claimed_at": {"$lt": now - timedelta(seconds=stale_after_seconds)}}
+                    ]},
+                    {"$or": [
+                        {"next_attempt_at": {"$exists": False}},
+                        {"next_attempt_at": {"$lte": now}}
+                    ]}
+                ]
+            }
             
-            count = await self.db.correio_elegante.count_documents({
-                "sender_id": user_id,
-                "created_at": {
-                    "$gte": today_start,
-                    "$lt": today_end
-                }
-            })
+            cursor = self.db.correio_elegante.find(claimable, {"_id": 1, "status": 1}).sort("created_at", 1).limit(limit)
+            candidates = await cursor.to_list(length=limit)
+            if not candidates:
+                return []
             
-            return count
+            # Correios pendentes e reservas abandonadas são reservados em atualizações
+            # separadas, para que o contador de pendentes acompanhe apenas os primeiros
+            for status in ("pending", "publishing"):
+                status_ids = [doc["_id"] for doc in candidates if doc.get("status") == status]
+                if not status_ids:
+                    continue
+                result = await self.db.correio_elegante.update_many(
+                    {"_id": {"$in": status_ids}, **claimable, "status": status},
+                    {"$set": {"status": "publishing", "claim_id": claim_id, "claimed_at": now}}
+                )
+                await self._shift_mail_status(status, "publishing", result.modified_count)
+            
+            cursor = self.db.correio_elegante.find(
+                {"claim_id": claim_id, "status": "publishing"},
+                {"recipient_username": 1, "message_text": 1, "created_at": 1, "publish_attempts": 1}
+            ).sort("created_at", 1)
+            return await cursor.to_list(length=limit)
             
         except PyMongoError as e:
-            logger.error(f"Erro ao obter contagem diária de correios: {e}")
-            return 0
+            logger.error(f"Erro ao reservar correios pendentes: {e}")
+            return []
     
-    async def get_pending_mails(self) -> List[Dict[str, Any]]:
-        """
-        Obtém todos os correios pendentes para publicação.
+    async def record_mail_publish_results(
+        self,
+        claim_id: str,
+        published: List[Tuple[str, int]],
+        failed: List[str],
+        retry_delay_seconds: int = 300
+    ) -> Optional[int]:
+        """
+        Grava em operações em lote o resultado da publicação de uma reserva.
         
+        Publicados e falhas vão em lotes separados (apenas um quando só há um
+        tipo de resultado), para atualizar os contadores por status com o número
+        exato de correios alterados.
+        
+        Args:
+            claim_id (str): Identificador da reserva.
+            published (List[Tuple[str, int]]): Pares (ID do correio, ID da mensagem publicada).
+            failed (List[str]): IDs dos correios cuja publicação falhou.
+            retry_delay_seconds (int): Espera antes de um correio que falhou poder ser reservado de novo.
+            
         Returns:
-            List[Dict[str, Any]]: Lista de correios pendentes.
+            Optional[int]: Número de correios atualizados, ou None em caso de erro.
         """
+        if not published and not failed:
+            return 0
+        
         try:
-            cursor = self.db.correio_elegante.find({"status": "pending"})
-            mails = await cursor.to_list(length=None)
-            return mails
+            now = datetime.now()
+            published_operations = [
+                UpdateOne(
+                    {"_id": ObjectId(mail_id), "claim_id": claim_id},
+                    {
+                        "$set": {
+                            "status": "published",
+                            "published_at": now,
+                            "published_message_id": message_id,
+                            "expires_at": now + timedelta(hours=24)
+                        },
+                        "$unset": {"claim_id": "", "claimed_at": "", "next_attempt_at": ""}
+                    }
+                )
+                for mail_id, message_id in published
+            ]
+            failed_operations = [
+                UpdateOne(
+                    {"_id": ObjectId(mail_id), "claim_id": claim_id},
+                    {
+                        "$set": {"status": "pending", "next_attempt_at": now + timedelta(seconds=retry_delay_seconds)},
+                        "$unset": {"claim_id": "", "claimed_at": ""},
+                        "$inc": {"publish_attempts": 1}
+                    }
+                )
+                for mail_id in failed
+            ]
+            
+            modified = 0
+            for operations, status in ((published_operations, "published"), (failed_operations, "pending")):
+                if not operations:
+                    continue
+                result = await self.db.correio_elegante.bulk_write(operations, ordered=False)
+                await self._shift_mail_status("publishing", status, result.modified_count)
+                modified += result.modified_count
+            return modified
             
         except PyMongoError as e:
-            logger.error(f"Erro ao obter correios pendentes: {e}")
-            return []
+            logger.error(f"Erro ao gravar resultado da publicação de correios: {e}")
+            return None
     
     async def publish_mail(self, mail_id: str, published_message_id: int) -> bool:
         """
@@ -1501,7 +1787,7 @@ class MongoDBClient:
             # Define expiração para 24 horas após publicação
             expires_at = datetime.now() + timedelta(hours=24)
             
-            result = await self.db.correio_elegante.update_one(
+            previous = await self.db.correio_elegante.find_one_and_update(
                 {"_id": ObjectId(mail_id)},
                 {
                     "$set": {
@@ -1510,15 +1796,76 @@ class MongoDBClient:
                         "published_message_id": published_message_id,
                         "expires_at": expires_at
                     }
-                }
+                },
+                projection={"status": 1},
+                return_document=ReturnDocument.BEFORE
             )
+            if previous is None:
+                return False
             
-            return result.modified_count > 0
+            await self._shift_mail_status(previous.get("status"), "published")
+            return True
             
         except PyMongoError as e:
             logger.error(f"Erro ao marcar correio como publicado: {e}")
             return False
     
+    async def mark_mails_queued(self, claim_id: str, mail_ids: List[str]) -> int:
+        """
+        Marca como "queued" os correios de uma reserva já gravados no outbox.
+        
+        Apenas correios ainda em "publishing" são marcados: o outbox pode enviar
+        a mensagem e marcar o correio como publicado antes desta gravação.
+        
+        Args:
+            claim_id (str): Identificador da reserva.
+            mail_ids (List[str]): IDs dos correios.
+            
+        Returns:
+            int: Número de correios atualizados.
+        """
+        if not mail_ids:
+            return 0
+        try:
+            result = await self.db.correio_elegante.update_many(
+                {
+                    "_id": {"$in": [ObjectId(mail_id) for mail_id in mail_ids]},
+                    "claim_id": claim_id,
+                    "status": "publishing"
+                },
+                {
+                    "$set": {"status": "queued", "queued_at": datetime.now()},
+                    "$unset": {"claim_id": "", "claimed_at": "", "next_attempt_at": ""}
+                }
+            )
+            await self._shift_mail_status("publishing", "queued", result.modified_count)
+            return result.modified_count
+        except PyMongoError as e:
+            logger.error(f"Erro ao marcar correios como enviados ao outbox: {e}")
+            return 0
+    
+    async def mark_mail_publish_failed(self, mail_id: str, error: str) -> bool:
+        """
+        Marca um correio cuja publicação falhou definitivamente.
+        
+        Args:
+            mail_id (str): ID do correio.
+            error (str): Erro da última tentativa.
+            
+        Returns:
+            bool: True se a operação foi bem-sucedida, False caso contrário.
+        """
+        try:
+            result = await self.db.correio_elegante.update_one(
+                {"_id": ObjectId(mail_id), "status": "queued"},
+                {"$set": {"status": "failed", "publish_error": error}}
+            )
+            await self._shift_mail_status("queued", "failed", result.modified_count)
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao marcar falha na publicação do correio {mail_id}: {e}")
+            return False
+    
     async def get_mail_by_id(self, mail_id: str) -> Optional[Dict[str, Any]]:
         """
         Obtém um correio pelo ID.
@@ -1535,10 +1882,7 @@ class MongoDBClient:
             # Verificar se não expirou
             if mail and mail.get("expires_at") and mail["expires_at"] < datetime.now():
                 # Marcar como expirado
-                await self.db.correio_elegante.update_one(
-                    {"_id": ObjectId(mail_id)},
-                    {"$set": {"status": "expired"}}
-                )
+                await self._expire_mail(mail)
                 return None
             
             return mail
@@ -1547,6 +1891,22 @@ class MongoDBClient:
             logger.error(f"Erro ao obter correio por ID: {e}")
             return None
     
+    async def _expire_mail(self, mail: Dict[str, Any]) -> None:
+        """
+        Marca um correio como expirado (condicional ao status lido).
+        
+        Args:
+            mail (Dict[str, Any]): Correio lido do banco.
+        """
+        status = mail.get("status")
+        if status == "expired":
+            return
+        result = await self.db.correio_elegante.update_one(
+            {"_id": mail["_id"], "status": status},
+            {"$set": {"status": "expired"}}
+        )
+        await self._shift_mail_status(status, "expired", result.modified_count)
+    
     async def reveal_mail(self, mail_id: str, user_id: int) -> Optional[Dict[str, Any]]:
         """
         Marca que um usuário revelou o remetente de um correio.
@@ -1598,14 +1958,13 @@ class MongoDBClient:
                 {"_id": ObjectId(mail_id)},
                 {"$addToSet": {"reported_by": report_data}}
             )
+            if result.modified_count > 0:
+                await self._record_mail_stats({"reported": 1})
             
             # Se chegou a 3 denúncias, marcar como expirado
             mail = await self.get_mail_by_id(mail_id)
             if mail and len(mail.get("reported_by", [])) >= 3:
-                await self.db.correio_elegante.update_one(
-                    {"_id": ObjectId(mail_id)},
-                    {"$set": {"status": "expired"}}
-                )
+                await self._expire_mail(mail)
             
             return result.modified_count > 0
             
@@ -1661,9 +2020,9 @@ class MongoDBClient:
                 logger.info(f"Usando Chat ID configurado: {configured_chat_id}")
                 return configured_chat_id
             
-            # Fallback: Buscar pelo título "GYM NATION" (case insensitive)
+            # Fallback: Buscar pelo título "GYM NATION" (prefixo do título normalizado)
             gym_nation = await self.db.monitored_chats.find_one({
-                "title": {"$regex": "^GYM NATION.*$", "$options": "i"},
+                "title_normalized": {"$regex": "^gym nation"},
                 "active": True
             })
             
@@ -1768,13 +2127,176 @@ class MongoDBClient:
                 }
             )
             
-            return result.modified_count > 0
+            if result.modified_count > 0:
+                await self._record_mail_stats({"revealed": 1})
+                return True
+            return False
             
         except PyMongoError as e:
             logger.error(f"Erro ao confirmar pagamento Pix: {e}")
             return False
 
     # Métodos para estatísticas do correio elegante
+    #
+    # As estatísticas são mantidas em documentos de resumo na coleção mail_stats:
+    # um por dia ("AAAA-MM-DD") e um acumulado ("total"). Cada documento guarda os
+    # contadores sent, revealed e reported e os registradores de um HyperLogLog
+    # (campo senders) para estimar remetentes únicos. O acumulado também guarda
+    # quantos correios estão em cada status (campo status), atualizado a cada
+    # transição com o número de documentos efetivamente alterados.
+    
+    MAIL_STATS_TOTAL_ID = "total"
+    # Status de um correio, na ordem do ciclo de vida
+    MAIL_STATUSES = ("pending", "publishing", "queued", "published", "failed", "expired")
+    
+    async def _record_mail_stats(
+        self,
+        counters: Dict[str, int],
+        sender_id: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> None:
+        """
+        Incrementa os contadores do dia e do acumulado do correio elegante.
+        
+        Falhas são apenas registradas no log: a operação principal já foi concluída.
+        
+        Args:
+            counters (Dict[str, int]): Incrementos (por exemplo, {"sent": 1}).
+            sender_id (Optional[int]): Remetente, para o contador de remetentes únicos.
+            status (Optional[str]): Status de um correio novo (contado apenas no acumulado).
+        """
+        update: Dict[str, Any] = {"$inc": counters}
+        if sender_id is not None:
+            index, rank = hll_register(sender_id)
+            update["$max"] = {f"senders.{index}": rank}
+        total_update = update
+        if status is not None:
+            total_update = {**update, "$inc": {**counters, f"status.{status}": 1}}
+        
+        day_id = datetime.now().strftime("%Y-%m-%d")
+        try:
+            await self.db.mail_stats.bulk_write([
+                UpdateOne({"_id": day_id}, update, upsert=True),
+                UpdateOne({"_id": self.MAIL_STATS_TOTAL_ID}, total_update, upsert=True)
+            ], ordered=False)
+        except PyMongoError as e:
+            logger.error(f"Erro ao atualizar estatísticas do correio: {e}")
+    
+    async def _shift_mail_status(self, from_status: Optional[str], to_status: str, count: int = 1) -> None:
+        """
+        Move correios entre os contadores por status do acumulado.
+        
+        Falhas são apenas registradas no log: a transição já foi gravada.
+        
+        Args:
+            from_status (Optional[str]): Status anterior.
+            to_status (str): Novo status.
+            count (int): Número de correios alterados.
+        """
+        if count <= 0 or from_status == to_status:
+            return
+        increments = {f"status.{to_status}": count}
+        if from_status is not None:
+            increments[f"status.{from_status}"] = -count
+        try:
+            await self.db.mail_stats.update_one(
+                {"_id": self.MAIL_STATS_TOTAL_ID}, {"$inc": increments}, upsert=True
+            )
+        except PyMongoError as e:
+            logger.error(f"Erro ao atualizar contadores de status do correio: {e}")
+    
+    async def ensure_mail_stats(self) -> None:
+        """
+        Reconstrói os resumos de estatísticas a partir do histórico se eles ainda
+        não existirem (primeira execução após a criação da coleção mail_stats) ou
+        se o acumulado ainda não tiver os contadores por status.
+        """
+        try:
+            total = await self.db.mail_stats.find_one({"_id": self.MAIL_STATS_TOTAL_ID}, {"status": 1})
+            if total and "status" in total:
+                return
+            await self.rebuild_mail_stats()
+        except PyMongoError as e:
+            logger.error(f"Erro ao verificar estatísticas do correio: {e}")
+    
+    async def rebuild_mail_stats(self) -> bool:
+        """
+        Recalcula todos os resumos de estatísticas a partir do histórico completo.
+        
+        Returns:
+            bool: True se a operação foi bem-sucedida, False caso contrário.
+        """
+        def day_of(field: str) -> Dict[str, Any]:
+            return {"$dateToString": {"format": "%Y-%m-%d", "date": field}}
+        
+        try:
+            days: Dict[str, Dict[str, Any]] = {}
+            
+            def day_doc(day_id: str) -> Dict[str, Any]:
+                return days.setdefault(day_id, {"sent": 0, "revealed": 0, "reported": 0, "hll": HyperLogLog()})
+            
+            sent_cursor = self.db.correio_elegante.aggregate([
+                {"$match": {"created_at": {"$type": "date"}}},
+                {"$group": {"_id": {"day": day_of("$created_at"), "sender": "$sender_id"}, "count": {"$sum": 1}}}
+            ])
+            async for row in sent_cursor:
+                doc = day_doc(row["_id"]["day"])
+                doc["sent"] += row["count"]
+                doc["hll"].add(row["_id"]["sender"])
+            
+            revealed_cursor = self.db.pix_payments.aggregate([
+                {"$match": {"status": "confirmed"}},
+                {"$group": {"_id": day_of({"$ifNull": ["$confirmed_at", "$created_at"]}), "count": {"$sum": 1}}}
+            ])
+            async for row in revealed_cursor:
+                if row["_id"]:
+                    day_doc(row["_id"])["revealed"] += row["count"]
+            
+            reported_cursor = self.db.correio_elegante.aggregate([
+                {"$match": {"reported_by.reported_at": {"$exists": True}}},
+                {"$unwind": "$reported_by"},
+                {"$group": {"_id": day_of("$reported_by.reported_at"), "count": {"$sum": 1}}}
+            ])
+            async for row in reported_cursor:
+                if row["_id"]:
+                    day_doc(row["_id"])["reported"] += row["count"]
+            
+            status_counts = dict.fromkeys(self.MAIL_STATUSES, 0)
+            status_cursor = self.db.correio_elegante.aggregate([
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ])
+            async for row in status_cursor:
+                if row["_id"]:
+                    status_counts[row["_id"]] = row["count"]
+            
+            total = {"sent": 0, "revealed": 0, "reported": 0, "hll": HyperLogLog(), "status": status_counts}
+            operations = []
+            for day_id, doc in days.items():
+                for field in ("sent", "revealed", "reported"):
+                    total[field] += doc[field]
+                total["hll"].merge(doc["hll"].registers)
+                operations.append(self._mail_stats_replacement(day_id, doc))
+            operations.append(self._mail_stats_replacement(self.MAIL_STATS_TOTAL_ID, total))
+            
+            await self.db.mail_stats.bulk_write(operations, ordered=False)
+            logger.info(f"Estatísticas do correio reconstruídas para {len(days)} dias")
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao reconstruir estatísticas do correio: {e}")
+            return False
+    
+    @staticmethod
+    def _mail_stats_replacement(stats_id: str, doc: Dict[str, Any]) -> UpdateOne:
+        """Monta a gravação de um resumo de estatísticas recalculado."""
+        fields = {
+            "sent": doc["sent"],
+            "revealed": doc["revealed"],
+            "reported": doc["reported"],
+            "senders": {str(index): rank for index, rank in doc["hll"].registers.items()}
+        }
+        if "status" in doc:
+            fields["status"] = doc["status"]
+        return UpdateOne({"_id": stats_id}, {"$set": fields}, upsert=True)
     
     async def get_mail_stats_today(self) -> Dict[str, int]:
         """
@@ -1784,48 +2306,13 @@ class MongoDBClient:
             Dict[str, int]: Estatísticas do dia (sent, revealed, reported).
         """
         try:
-            # Início e fim do dia atual
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = today_start + timedelta(days=1)
-            
-            # Correios enviados hoje
-            mails_sent_today = await self.db.correio_elegante.count_documents({
-                "created_at": {
-                    "$gte": today_start,
-                    "$lt": today_end
-                }
-            })
-            
-            # Revelações pagas hoje
-            revelations_today = await self.db.pix_payments.count_documents({
-                "created_at": {
-                    "$gte": today_start,
-                    "$lt": today_end
-                },
-                "status": "confirmed"
-            })
-            
-            # Denúncias hoje
-            reports_today = 0
-            cursor = self.db.correio_elegante.find({
-                "reported_by.reported_at": {
-                    "$gte": today_start,
-                    "$lt": today_end
-                }
-            })
-            
-            async for mail in cursor:
-                reports_in_period = [
-                    report for report in mail.get("reported_by", [])
-                    if report.get("reported_at") and 
-                    today_start <= report["reported_at"] < today_end
-                ]
-                reports_today += len(reports_in_period)
+            day_id = datetime.now().strftime("%Y-%m-%d")
+            stats = await self.db.mail_stats.find_one({"_id": day_id}) or {}
             
             return {
-                "sent": mails_sent_today,
-                "revealed": revelations_today,
-                "reported": reports_today
+                "sent": stats.get("sent", 0),
+                "revealed": stats.get("revealed", 0),
+                "reported": stats.get("reported", 0)
             }
             
         except PyMongoError as e:
@@ -1840,39 +2327,20 @@ class MongoDBClient:
             Dict[str, Any]: Estatísticas totais.
         """
         try:
-            # Total de correios criados
-            total_mails = await self.db.correio_elegante.count_documents({})
-            
-            # Arrecadação total (R$ 2,00 por revelação confirmada)
-            total_revelations = await self.db.pix_payments.count_documents({
-                "status": "confirmed"
-            })
-            total_revenue = total_revelations * 2.0
-            
-            # Usuários únicos que enviaram correios
-            pipeline = [
-                {"$group": {"_id": "$sender_id"}},
-                {"$count": "unique_senders"}
-            ]
+            stats = await self.db.mail_stats.find_one({"_id": self.MAIL_STATS_TOTAL_ID}) or {}
             
-            result = await self.db.correio_elegante.aggregate(pipeline).to_list(length=1)
-            unique_senders = result[0]["unique_senders"] if result else 0
+            # Usuários únicos que enviaram correios (estimativa)
+            unique_senders = HyperLogLog(registers=stats.get("senders", {})).count()
             
-            # Correios por status
-            pipeline_status = [
-                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-            ]
-            
-            status_results = await self.db.correio_elegante.aggregate(pipeline_status).to_list(length=None)
-            status_counts = {item["_id"]: item["count"] for item in status_results}
+            # Correios por status (contadores mantidos a cada transição)
+            status_counts = stats.get("status", {})
             
             return {
-                "total_mails": total_mails,
-                "total_revenue": total_revenue,
+                "total_mails": stats.get("sent", 0),
+                # Arrecadação total (R$ 2,00 por revelação confirmada)
+                "total_revenue": stats.get("revealed", 0) * 2.0,
                 "unique_senders": unique_senders,
-                "pending": status_counts.get("pending", 0),
-                "published": status_counts.get("published", 0),
-                "expired": status_counts.get("expired", 0)
+                **{status: max(0, status_counts.get(status, 0)) for status in self.MAIL_STATUSES}
             }
             
         except PyMongoError as e:
@@ -1881,38 +2349,947 @@ class MongoDBClient:
                 "total_mails": 0,
                 "total_revenue": 0.0,
                 "unique_senders": 0,
-                "pending": 0,
-                "published": 0,
-                "expired": 0
+                **dict.fromkeys(self.MAIL_STATUSES, 0)
             }
     
     async def get_mail_stats_weekly(self) -> Dict[str, int]:
         """
-        Obtém estatísticas da última semana.
+        Obtém estatísticas da última semana (hoje e os seis dias anteriores).
         
         Returns:
             Dict[str, int]: Estatísticas da semana.
         """
         try:
-            # Últimos 7 dias
-            week_start = datetime.now() - timedelta(days=7)
+            today = datetime.now()
+            day_ids = [(today - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(7)]
+            cursor = self.db.mail_stats.find(
+                {"_id": {"$in": day_ids}}, {"sent": 1, "revealed": 1}
+            )
+            
+            totals = {"sent": 0, "revealed": 0}
+            async for stats in cursor:
+                totals["sent"] += stats.get("sent", 0)
+                totals["revealed"] += stats.get("revealed", 0)
+            return totals
             
-            # Correios da semana
-            mails_week = await self.db.correio_elegante.count_documents({
-                "created_at": {"$gte": week_start}
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter estatísticas semanais: {e}")
+            return {"sent": 0, "revealed": 0}
+    
+    # Métodos para gerenciar exclusões agendadas de mensagens temporárias
+    
+    async def add_pending_deletion(self, chat_id: int, message_id: int, delete_at: datetime) -> bool:
+        """
+        Registra uma mensagem para ser excluída no instante informado.
+        
+        Args:
+            chat_id (int): ID do chat.
+            message_id (int): ID da mensagem.
+            delete_at (datetime): Instante em que a mensagem deve ser excluída.
+            
+        Returns:
+            bool: True se a operação foi bem-sucedida, False caso contrário.
+        """
+        try:
+            await self.db.pending_deletions.update_one(
+                {"chat_id": chat_id, "message_id": message_id},
+                {"$set": {"delete_at": delete_at}},
+                upsert=True
+            )
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao registrar exclusão agendada: {e}")
+            return False
+    
+    async def get_pending_deletions(self) -> List[Dict[str, Any]]:
+        """
+        Obtém todas as exclusões agendadas ainda não executadas.
+        
+        Returns:
+            List[Dict[str, Any]]: Lista de exclusões (chat_id, message_id, delete_at).
+        """
+        try:
+            cursor = self.db.pending_deletions.find(
+                {}, {"_id": 0, "chat_id": 1, "message_id": 1, "delete_at": 1}
+            ).sort("delete_at", 1)
+            return await cursor.to_list(length=None)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter exclusões agendadas: {e}")
+            return []
+    
+    async def remove_pending_deletions(self, chat_id: int, message_ids: List[int]) -> int:
+        """
+        Remove exclusões agendadas já executadas de um chat.
+        
+        Args:
+            chat_id (int): ID do chat.
+            message_ids (List[int]): IDs das mensagens.
+            
+        Returns:
+            int: Número de registros removidos.
+        """
+        try:
+            result = await self.db.pending_deletions.delete_many({
+                "chat_id": chat_id,
+                "message_id": {"$in": message_ids}
             })
+            return result.deleted_count
+        except PyMongoError as e:
+            logger.error(f"Erro ao remover exclusões agendadas: {e}")
+            return 0
+    
+    # Métodos para eleição de líder entre réplicas
+    
+    async def acquire_lease(self, name: str, holder: str, ttl_seconds: float) -> Optional[int]:
+        """
+        Adquire ou renova um lease de liderança de forma atômica.
+        
+        O prazo é calculado com o relógio do servidor ($$NOW), então réplicas com
+        relógios dessincronizados não disputam o mesmo lease. O token de fencing
+        só é incrementado quando o lease troca de dono.
+        
+        Args:
+            name (str): Nome do lease (por exemplo, "recurring_messages").
+            holder (str): Identificador da réplica candidata.
+            ttl_seconds (float): Duração do lease em segundos.
             
-            # Revelações da semana
-            revelations_week = await self.db.pix_payments.count_documents({
-                "created_at": {"$gte": week_start},
-                "status": "confirmed"
+        Returns:
+            Optional[int]: Token de fencing se a réplica detém o lease, None caso contrário.
+        """
+        try:
+            result = await self.db.leases.find_one_and_update(
+                {
+                    "_id": name,
+                    "$or": [
+                        {"holder": holder},
+                        {"$expr": {"$lt": ["$expires_at", "$$NOW"]}}
+                    ]
+                },
+                [{"$set": {
+                    "token": {"$cond": [
+                        {"$eq": ["$holder", holder]},
+                        "$token",
+                        {"$add": [{"$ifNull": ["$token", 0]}, 1]}
+                    ]},
+                    "holder": holder,
+                    "expires_at": {"$add": ["$$NOW", int(ttl_seconds * 1000)]},
+                    "renewed_at": "$$NOW"
+                }}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return result["token"] if result else None
+        except DuplicateKeyError:
+            # O lease existe e pertence a outra réplica ainda válida
+            return None
+        except PyMongoError as e:
+            logger.error(f"Erro ao adquirir lease {name}: {e}")
+            return None
+    
+    async def release_lease(self, name: str, holder: str) -> bool:
+        """
+        Libera um lease para que outra réplica assuma imediatamente.
+        
+        Args:
+            name (str): Nome do lease.
+            holder (str): Identificador da réplica que detém o lease.
+            
+        Returns:
+            bool: True se o lease foi liberado, False caso contrário.
+        """
+        try:
+            result = await self.db.leases.update_one(
+                {"_id": name, "holder": holder},
+                {"$set": {"expires_at": datetime(1970, 1, 1)}}
+            )
+            return result.modified_count > 0
+        except PyMongoError as e:
+            logger.error(f"Erro ao liberar lease {name}: {e}")
+            return False
+    
+    # Métodos para cotas de uso (Q&A, correio elegante)
+    
+    async def reserve_calendar_quota(self, quota_id: str, limit: int, expires_at: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Reserva uma unidade de uma cota de janela fixa (por exemplo, um dia do calendário).
+        
+        A verificação e o incremento acontecem em uma única atualização condicional:
+        o contador só é incrementado se ainda estiver abaixo do limite. Se o documento
+        existe e o limite foi atingido, o upsert colide com o _id existente.
+        
+        Args:
+            quota_id (str): ID do documento da cota (escopo, chave e janela).
+            limit (int): Limite da janela.
+            expires_at (datetime): Fim da janela (o documento é removido pelo índice TTL).
+            
+        Returns:
+            Optional[Dict[str, Any]]: {"allowed": bool, "used": int}, ou None em caso de erro.
+        """
+        try:
+            result = await self.db.quotas.find_one_and_update(
+                {"_id": quota_id, "count": {"$lt": limit}},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return {"allowed": True, "used": result["count"]}
+        except DuplicateKeyError:
+            return {"allowed": False, "used": limit}
+        except PyMongoError as e:
+            logger.error(f"Erro ao reservar cota {quota_id}: {e}")
+            return None
+    
+    async def reserve_rolling_quota(
+        self,
+        quota_id: str,
+        limit: int,
+        now: datetime,
+        window_seconds: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reserva uma unidade de uma cota de janela deslizante.
+        
+        O documento guarda os instantes de uso. Em uma única atualização (pipeline),
+        os usos fora da janela são descartados e o novo uso é anexado, desde que
+        os usos restantes estejam abaixo do limite.
+        
+        Args:
+            quota_id (str): ID do documento da cota (escopo e chave).
+            limit (int): Limite da janela.
+            now (datetime): Instante do uso.
+            window_seconds (int): Duração da janela em segundos.
+            
+        Returns:
+            Optional[Dict[str, Any]]: {"allowed": bool, "used": int, "oldest": datetime | None},
+                                      ou None em caso de erro.
+        """
+        cutoff = now - timedelta(seconds=window_seconds)
+        recent_hits = {"$filter": {
+            "input": {"$ifNull": ["$hits", []]},
+            "cond": {"$gt": ["$$this", cutoff]}
+        }}
+        
+        try:
+            result = await self.db.quotas.find_one_and_update(
+                {"_id": quota_id, "$expr": {"$lt": [{"$size": recent_hits}, limit]}},
+                [{"$set": {
+                    "hits": {"$concatArrays": [recent_hits, [now]]},
+                    "expires_at": now + timedelta(seconds=window_seconds)
+                }}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            hits = result.get("hits", [])
+            return {"allowed": True, "used": len(hits), "oldest": min(hits) if hits else None}
+        except DuplicateKeyError:
+            current = await self.db.quotas.find_one({"_id": quota_id})
+            hits = [hit for hit in (current or {}).get("hits", []) if hit > cutoff]
+            return {"allowed": False, "used": len(hits), "oldest": min(hits) if hits else None}
+        except PyMongoError as e:
+            logger.error(f"Erro ao reservar cota {quota_id}: {e}")
+            return None
+    
+    async def get_quota_usage(self, quota_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém o documento de uma cota, sem reservar.
+        
+        Args:
+            quota_id (str): ID do documento da cota.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Documento da cota ou None se não existir.
+        """
+        try:
+            return await self.db.quotas.find_one({"_id": quota_id})
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter cota {quota_id}: {e}")
+            return None
+    
+    async def refund_quota(self, quota_id: str, hit: Optional[datetime] = None) -> bool:
+        """
+        Devolve uma unidade reservada (por exemplo, quando a operação falhou).
+        
+        Args:
+            quota_id (str): ID do documento da cota.
+            hit (Optional[datetime]): Instante do uso, para cotas de janela deslizante.
+            
+        Returns:
+            bool: True se a unidade foi devolvida.
+        """
+        try:
+            if hit is not None:
+                result = await self.db.quotas.update_one({"_id": quota_id}, {"$pull": {"hits": hit}})
+            else:
+                result = await self.db.quotas.update_one(
+                    {"_id": quota_id, "count": {"$gt": 0}},
+                    {"$inc": {"count": -1}}
+                )
+            return result.modified_count > 0
+        except PyMongoError as e:
+            logger.error(f"Erro ao devolver cota {quota_id}: {e}")
+            return False
+
+    # Métodos para exportação de dados por chat
+    
+    def find_chat_documents(self, collection: str, chat_id: int, fields: List[str], batch_size: int = 500):
+        """
+        Abre um cursor com os documentos de um chat em uma coleção, em ordem de inserção.
+        
+        O cursor é lido em lotes de `batch_size`, sem carregar a coleção inteira
+        em memória. Erros do banco são levantados (PyMongoError) durante a
+        iteração, para que a exportação não seja entregue incompleta.
+        
+        Args:
+            collection (str): Nome da coleção.
+            chat_id (int): ID do chat.
+            fields (List[str]): Campos a retornar.
+            batch_size (int): Número de documentos por lote.
+            
+        Returns:
+            AsyncIOMotorCursor: Cursor assíncrono com os documentos.
+        """
+        projection = {field: 1 for field in fields}
+        return self.db[collection].find(
+            {"chat_id": chat_id}, projection, batch_size=batch_size
+        ).sort("_id", 1)
+    
+    # Métodos para jobs de banimento em massa (/ban_blacklist)
+    
+    async def create_ban_job(self, job: Dict[str, Any], items: List[Dict[str, Any]]) -> bool:
+        """
+        Cria um job de banimento com um item por usuário a banir.
+        
+        Args:
+            job (Dict[str, Any]): Documento do job (com _id e owner, a réplica que o executará).
+            items (List[Dict[str, Any]]): Usuários do job (user_id, display, entry_ids).
+            
+        Returns:
+            bool: True se o job foi criado.
+        """
+        try:
+            now = datetime.now()
+            await self.db.ban_jobs.insert_one({
+                **job,
+                "status": "running",
+                "total": len(items),
+                "banned": 0,
+                "failed": 0,
+                "removed": 0,
+                "heartbeat_at": now,
+                "created_at": now,
+                "updated_at": now
             })
+            if items:
+                await self.db.ban_job_items.insert_many(
+                    [{**item, "job_id": job["_id"], "state": "pending"} for item in items],
+                    ordered=False
+                )
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao criar job de banimento {job.get('_id')}: {e}")
+            return False
+    
+    async def claim_ban_job(
+        self,
+        owner: str,
+        stale_seconds: float,
+        exclude_ids: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reserva a execução de um job em andamento de forma atômica.
+        
+        Um job pode ser reservado pela réplica que já é dona dele ou, se o último
+        sinal de vida (heartbeat, no relógio do servidor) for mais antigo que
+        `stale_seconds`, por qualquer réplica; assim, um job interrompido é
+        retomado em outra réplica ou após o reinício.
+        
+        Args:
+            owner (str): Identificador da réplica.
+            stale_seconds (float): Tempo sem heartbeat para considerar o job abandonado.
+            exclude_ids (Optional[List[str]]): Jobs já em execução nesta réplica.
             
-            return {
-                "sent": mails_week,
-                "revealed": revelations_week
+        Returns:
+            Optional[Dict[str, Any]]: Job reservado, ou None.
+        """
+        query: Dict[str, Any] = {
+            "status": "running",
+            "$or": [
+                {"owner": owner},
+                {"$expr": {"$lt": ["$heartbeat_at", {"$subtract": ["$$NOW", int(stale_seconds * 1000)]}]}}
+            ]
+        }
+        if exclude_ids:
+            query["_id"] = {"$nin": exclude_ids}
+        try:
+            return await self.db.ban_jobs.find_one_and_update(
+                query,
+                [{"$set": {"owner": owner, "heartbeat_at": "$$NOW"}}],
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError as e:
+            logger.error(f"Erro ao reservar job de banimento: {e}")
+            return None
+    
+    async def get_pending_ban_items(self, job_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obtém os usuários de um job que ainda não foram processados.
+        
+        Args:
+            job_id (str): ID do job.
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: Itens pendentes, ou None em caso de erro.
+        """
+        try:
+            return await self.db.ban_job_items.find(
+                {"job_id": job_id, "state": "pending"},
+                {"user_id": 1, "display": 1, "entry_ids": 1}
+            ).to_list(length=None)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter itens pendentes do job de banimento {job_id}: {e}")
+            return None
+    
+    async def record_ban_job_results(
+        self,
+        job_id: str,
+        owner: str,
+        banned: List[int],
+        failed: List[Tuple[int, str]],
+        removed: int
+    ) -> bool:
+        """
+        Grava o resultado de um lote de banimentos e renova o heartbeat do job.
+        
+        Os itens são atualizados em uma única operação em lote; os contadores do
+        job só são incrementados se a réplica ainda for a dona do job.
+        
+        Args:
+            job_id (str): ID do job.
+            owner (str): Réplica que executou o lote.
+            banned (List[int]): IDs dos usuários banidos.
+            failed (List[Tuple[int, str]]): (user_id, erro) dos banimentos que falharam.
+            removed (int): Entradas removidas da blacklist neste lote.
+            
+        Returns:
+            bool: True se a réplica ainda é a dona do job.
+        """
+        try:
+            operations = [
+                UpdateOne({"job_id": job_id, "user_id": user_id}, {"$set": {"state": "banned"}})
+                for user_id in banned
+            ] + [
+                UpdateOne({"job_id": job_id, "user_id": user_id}, {"$set": {"state": "failed", "error": error}})
+                for user_id, error in failed
+            ]
+            if operations:
+                await self.db.ban_job_items.bulk_write(operations, ordered=False)
+            result = await self.db.ban_jobs.update_one(
+                {"_id": job_id, "owner": owner, "status": "running"},
+                [{"$set": {
+                    "banned": {"$add": ["$banned", len(banned)]},
+                    "failed": {"$add": ["$failed", len(failed)]},
+                    "removed": {"$add": ["$removed", removed]},
+                    "heartbeat_at": "$$NOW",
+                    "updated_at": "$$NOW"
+                }}]
+            )
+            return result.modified_count > 0
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar resultados do job de banimento {job_id}: {e}")
+            return False
+    
+    async def heartbeat_ban_job(self, job_id: str, owner: str) -> Optional[bool]:
+        """
+        Renova o heartbeat de um job em execução.
+        
+        Args:
+            job_id (str): ID do job.
+            owner (str): Réplica que executa o job.
+            
+        Returns:
+            Optional[bool]: True se renovado, False se a réplica não for mais a dona,
+                            None em caso de erro.
+        """
+        try:
+            result = await self.db.ban_jobs.update_one(
+                {"_id": job_id, "owner": owner, "status": "running"},
+                [{"$set": {"heartbeat_at": "$$NOW"}}]
+            )
+            return result.matched_count > 0
+        except PyMongoError as e:
+            logger.error(f"Erro ao renovar heartbeat do job de banimento {job_id}: {e}")
+            return None
+    
+    async def finish_ban_job(self, job_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Marca um job como concluído, se nenhum item estiver pendente.
+        
+        Args:
+            job_id (str): ID do job.
+            owner (str): Réplica que executou o job.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Job concluído, ou None se ainda houver itens
+                                      pendentes, se a réplica não for mais a dona ou
+                                      em caso de erro (o job continua em execução e
+                                      é retomado depois).
+        """
+        try:
+            pending = await self.db.ban_job_items.count_documents({"job_id": job_id, "state": "pending"}, limit=1)
+            if pending:
+                logger.warning(f"Job de banimento {job_id} ainda tem itens pendentes; não será concluído.")
+                return None
+            return await self.db.ban_jobs.find_one_and_update(
+                {"_id": job_id, "owner": owner, "status": "running"},
+                {"$set": {"status": "done", "finished_at": datetime.now(), "updated_at": datetime.now()}},
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError as e:
+            logger.error(f"Erro ao concluir job de banimento {job_id}: {e}")
+            return None
+    
+    async def get_ban_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém um job de banimento.
+        
+        Args:
+            job_id (str): ID do job.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Job, ou None se não existir.
+        """
+        try:
+            return await self.db.ban_jobs.find_one({"_id": job_id})
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter job de banimento {job_id}: {e}")
+            return None
+    
+    async def get_recent_ban_jobs(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Obtém os jobs de banimento mais recentes.
+        
+        Args:
+            limit (int): Número máximo de jobs.
+            
+        Returns:
+            List[Dict[str, Any]]: Jobs, do mais recente para o mais antigo.
+        """
+        try:
+            return await self.db.ban_jobs.find({}).sort("created_at", -1).limit(limit).to_list(length=limit)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter jobs de banimento recentes: {e}")
+            return []
+    
+    async def get_failed_ban_items(self, job_id: str, limit: int = 15) -> List[Dict[str, Any]]:
+        """
+        Obtém os usuários cujo banimento falhou em um job.
+        
+        Args:
+            job_id (str): ID do job.
+            limit (int): Número máximo de itens.
+            
+        Returns:
+            List[Dict[str, Any]]: Itens com falha (user_id, display, error).
+        """
+        try:
+            return await self.db.ban_job_items.find(
+                {"job_id": job_id, "state": "failed"},
+                {"user_id": 1, "display": 1, "error": 1}
+            ).limit(limit).to_list(length=limit)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter falhas do job de banimento {job_id}: {e}")
+            return []
+    
+    # Métodos para o diretório de membros dos grupos (username → user_id)
+    
+    async def upsert_chat_members(self, members: List[Dict[str, Any]]) -> bool:
+        """
+        Grava em lote os membros vistos nos grupos.
+        
+        O último acesso só avança ($max), mesmo que gravações cheguem fora de ordem.
+        
+        Args:
+            members (List[Dict[str, Any]]): Membros com chat_id, user_id, username,
+                username_normalized, status e last_seen.
+                
+        Returns:
+            bool: True se a gravação foi bem-sucedida, False caso contrário.
+        """
+        if not members:
+            return True
+        try:
+            operations = [
+                UpdateOne(
+                    {"chat_id": member["chat_id"], "user_id": member["user_id"]},
+                    {
+                        "$set": {
+                            "username": member.get("username"),
+                            "username_normalized": member.get("username_normalized"),
+                            "status": member.get("status"),
+                        },
+                        "$max": {"last_seen": member["last_seen"]},
+                    },
+                    upsert=True
+                )
+                for member in members
+            ]
+            await self.db.chat_members.bulk_write(operations, ordered=False)
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar diretório de membros: {e}")
+            return False
+    
+    async def find_chat_member_by_username(self, chat_id: int, username_normalized: str) -> Optional[Dict[str, Any]]:
+        """
+        Procura um membro de um grupo pelo username normalizado.
+        
+        Se o username passou de um usuário para outro, retorna o visto mais recentemente.
+        
+        Args:
+            chat_id (int): ID do grupo.
+            username_normalized (str): Username sem @, em minúsculas.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Membro encontrado ou None.
+        """
+        try:
+            return await self.db.chat_members.find_one(
+                {"chat_id": chat_id, "username_normalized": username_normalized},
+                sort=[("last_seen", -1)]
+            )
+        except PyMongoError as e:
+            logger.error(f"Erro ao procurar @{username_normalized} no diretório do chat {chat_id}: {e}")
+            return None
+    
+    # Métodos para o estado persistente das conversas (user_data e ConversationHandlers)
+    
+    async def get_user_state(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Obtém o user_data salvo de um usuário.
+        
+        Args:
+            user_id (int): ID do usuário.
+            
+        Returns:
+            Optional[Dict[str, Any]]: Dados do usuário ({} se não houver ou tiverem expirado)
+                ou None em caso de erro.
+        """
+        try:
+            state = await self.db.user_states.find_one(
+                {"_id": user_id, "expires_at": {"$gt": datetime.now()}}, {"data": 1}
+            )
+            return state.get("data", {}) if state else {}
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter estado do usuário {user_id}: {e}")
+            return None
+    
+    async def save_user_states(self, states: Dict[int, Optional[Dict[str, Any]]], ttl_seconds: int) -> bool:
+        """
+        Grava em lote o user_data de vários usuários.
+        
+        Args:
+            states (Dict[int, Optional[Dict[str, Any]]]): Dados por usuário; None ou vazio remove o estado.
+            ttl_seconds (int): Validade do estado a partir de agora.
+            
+        Returns:
+            bool: True se a gravação foi bem-sucedida, False caso contrário.
+        """
+        if not states:
+            return True
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        operations = [
+            UpdateOne(
+                {"_id": user_id},
+                {"$set": {"data": data, "updated_at": now, "expires_at": expires_at}},
+                upsert=True
+            ) if data else DeleteOne({"_id": user_id})
+            for user_id, data in states.items()
+        ]
+        try:
+            await self.db.user_states.bulk_write(operations, ordered=False)
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar estado de {len(states)} usuários: {e}")
+            return False
+    
+    async def get_conversation_states(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Obtém os estados não expirados de um ConversationHandler.
+        
+        Args:
+            name (str): Nome do ConversationHandler.
+            
+        Returns:
+            List[Dict[str, Any]]: Estados com key (lista de IDs) e state.
+        """
+        try:
+            cursor = self.db.conversation_states.find(
+                {"name": name, "expires_at": {"$gt": datetime.now()}}, {"key": 1, "state": 1}
+            )
+            return await cursor.to_list(length=None)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter estados da conversa {name}: {e}")
+            return []
+    
+    async def save_conversation_states(self, states: Dict[Tuple[str, Tuple[int, ...]], Any], ttl_seconds: int) -> bool:
+        """
+        Grava em lote os estados de conversas.
+        
+        Args:
+            states (Dict[Tuple[str, Tuple[int, ...]], Any]): Estado por (nome, chave da conversa);
+                None remove o estado (conversa encerrada).
+            ttl_seconds (int): Validade do estado a partir de agora.
+            
+        Returns:
+            bool: True se a gravação foi bem-sucedida, False caso contrário.
+        """
+        if not states:
+            return True
+        expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
+        operations = []
+        for (name, key), state in states.items():
+            state_id = f"{name}:{':'.join(str(part) for part in key)}"
+            if state is None:
+                operations.append(DeleteOne({"_id": state_id}))
+            else:
+                operations.append(UpdateOne(
+                    {"_id": state_id},
+                    {"$set": {"name": name, "key": list(key), "state": state, "expires_at": expires_at}},
+                    upsert=True
+                ))
+        try:
+            await self.db.conversation_states.bulk_write(operations, ordered=False)
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar {len(states)} estados de conversas: {e}")
+            return False
+    
+    # Métodos para o outbox de mensagens do Telegram
+    
+    async def enqueue_outbox_messages(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """
+        Grava mensagens no outbox. A chave de idempotência é o _id, então gravar
+        de novo a mesma intenção não cria uma segunda mensagem.
+        
+        Args:
+            messages (List[Dict[str, Any]]): Documentos das mensagens.
+            
+        Returns:
+            List[str]: Chaves gravadas, incluindo as que já estavam no outbox ([] em caso de erro).
+        """
+        if not messages:
+            return []
+        keys = [message["_id"] for message in messages]
+        try:
+            await self.db.outbox.insert_many(messages, ordered=False)
+            return keys
+        except BulkWriteError as e:
+            rejected = {
+                keys[error["index"]] for error in e.details.get("writeErrors", [])
+                if error.get("code") != 11000
+            }
+            if rejected:
+                logger.error(f"Erro ao gravar {len(rejected)} mensagens no outbox: {e}")
+            return [key for key in keys if key not in rejected]
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar mensagens no outbox: {e}")
+            return []
+    
+    async def claim_outbox_messages(self, claim_id: str, limit: int, stale_after_seconds: int) -> List[Dict[str, Any]]:
+        """
+        Reserva atomicamente um lote de mensagens vencidas do outbox.
+        
+        Reservas abandonadas (réplica que caiu no meio do envio) voltam a ficar
+        disponíveis após stale_after_seconds.
+        
+        Args:
+            claim_id (str): Identificador único da reserva.
+            limit (int): Número máximo de mensagens no lote.
+            stale_after_seconds (int): Idade a partir da qual uma reserva é considerada abandonada.
+            
+        Returns:
+            List[Dict[str, Any]]: Mensagens reservadas, da mais antiga à mais nova.
+        """
+        try:
+            now = datetime.now()
+            claimable = {
+                "$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "claimed_at": {"$lt": now - timedelta(seconds=stale_after_seconds)}}
+                ]
             }
+            cursor = self.db.outbox.find(claimable, {"_id": 1}).sort("next_attempt_at", 1).limit(limit)
+            candidate_ids = [doc["_id"] for doc in await cursor.to_list(length=limit)]
+            if not candidate_ids:
+                return []
             
+            await self.db.outbox.update_many(
+                {"_id": {"$in": candidate_ids}, **claimable},
+                {"$set": {"status": "sending", "claim_id": claim_id, "claimed_at": now}}
+            )
+            cursor = self.db.outbox.find({"claim_id": claim_id, "status": "sending"}).sort("created_at", 1)
+            return await cursor.to_list(length=limit)
         except PyMongoError as e:
-            logger.error(f"Erro ao obter estatísticas semanais: {e}")
-            return {"sent": 0, "revealed": 0}
\ No newline at end of file
+            logger.error(f"Erro ao reservar mensagens do outbox: {e}")
+            return []
+    
+    async def record_outbox_results(
+        self,
+        claim_id: str,
+        sent: List[Tuple[str, int]],
+        retry: List[Tuple[str, str, datetime]],
+        failed: List[Tuple[str, str]],
+        retention_days: int = 7
+    ) -> int:
+        """
+        Grava em uma única operação em lote o resultado da entrega de uma reserva.
+        
+        Mensagens encerradas ficam retention_days no outbox, o que mantém a
+        idempotência das chaves nesse período.
+        
+        Args:
+            claim_id (str): Identificador da reserva.
+            sent (List[Tuple[str, int]]): Pares (chave, ID da mensagem enviada).
+            retry (List[Tuple[str, str, datetime]]): Trios (chave, erro, próxima tentativa).
+            failed (List[Tuple[str, str]]): Pares (chave, erro) das mensagens descartadas.
+            retention_days (int): Dias de retenção das mensagens encerradas.
+            
+        Returns:
+            int: Número de mensagens atualizadas.
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(days=retention_days)
+        unset_claim = {"claim_id": "", "claimed_at": ""}
+        operations = [
+            UpdateOne(
+                {"_id": key, "claim_id": claim_id},
+                [{"$set": {
+                    "status": "sent", "message_id": message_id, "sent_at": now, "expires_at": expires_at,
+                    "effect_pending": {"$ne": [{"$ifNull": ["$effect", None]}, None]}
+                }}, {"$unset": list(unset_claim)}]
+            )
+            for key, message_id in sent
+        ]
+        operations.extend(
+            UpdateOne(
+                {"_id": key, "claim_id": claim_id},
+                {
+                    "$set": {"status": "pending", "error": error, "next_attempt_at": next_attempt_at},
+                    "$unset": unset_claim,
+                    "$inc": {"attempts": 1}
+                }
+            )
+            for key, error, next_attempt_at in retry
+        )
+        operations.extend(
+            UpdateOne(
+                {"_id": key, "claim_id": claim_id},
+                [{"$set": {
+                    "status": "failed", "error": error, "expires_at": expires_at,
+                    "effect_pending": {"$ne": [{"$ifNull": ["$effect", None]}, None]}
+                }}, {"$unset": list(unset_claim)}]
+            )
+            for key, error in failed
+        )
+        if not operations:
+            return 0
+        try:
+            result = await self.db.outbox.bulk_write(operations, ordered=False)
+            return result.modified_count
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar resultado da entrega do outbox: {e}")
+            return 0
+    
+    async def get_outbox_pending_effects(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Obtém mensagens encerradas cujo efeito ainda não foi aplicado.
+        
+        Args:
+            limit (int): Número máximo de mensagens.
+            
+        Returns:
+            List[Dict[str, Any]]: Mensagens com status, message_id, error e effect.
+        """
+        try:
+            return await self.db.outbox.find(
+                {"effect_pending": True},
+                {"status": 1, "message_id": 1, "error": 1, "effect": 1}
+            ).limit(limit).to_list(length=limit)
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter efeitos pendentes do outbox: {e}")
+            return []
+    
+    async def clear_outbox_effects(self, keys: List[str]) -> bool:
+        """
+        Marca os efeitos de mensagens do outbox como aplicados.
+        
+        Args:
+            keys (List[str]): Chaves das mensagens.
+            
+        Returns:
+            bool: True se a operação foi bem-sucedida, False caso contrário.
+        """
+        try:
+            await self.db.outbox.update_many({"_id": {"$in": keys}}, {"$unset": {"effect_pending": ""}})
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao marcar efeitos do outbox como aplicados: {e}")
+            return False
+    
+    async def get_outbox_backlog(self) -> Tuple[int, Optional[datetime]]:
+        """
+        Obtém o tamanho da fila do outbox e a criação da mensagem pendente mais antiga.
+        
+        Returns:
+            Tuple[int, Optional[datetime]]: Mensagens pendentes ou em envio e a data da mais antiga.
+        """
+        try:
+            query = {"status": {"$in": ["pending", "sending"]}}
+            count = await self.db.outbox.count_documents(query)
+            oldest = await self.db.outbox.find_one(query, {"created_at": 1}, sort=[("created_at", 1)])
+            return count, oldest["created_at"] if oldest else None
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter fila do outbox: {e}")
+            return 0, None
+    
+    # Métodos para configurações internas do bot
+    
+    async def get_bot_setting(self, key: str) -> Optional[Any]:
+        """
+        Obtém uma configuração interna do bot (coleção bot_settings).
+        
+        Args:
+            key (str): Nome da configuração.
+            
+        Returns:
+            Optional[Any]: Valor gravado, ou None se não existir ou em caso de erro.
+        """
+        try:
+            doc = await self.db.bot_settings.find_one({"_id": key})
+            return doc.get("value") if doc else None
+        except PyMongoError as e:
+            logger.error(f"Erro ao obter configuração {key}: {e}")
+            return None
+    
+    async def set_bot_setting(self, key: str, value: Any) -> bool:
+        """
+        Grava uma configuração interna do bot (coleção bot_settings).
+        
+        Args:
+            key (str): Nome da configuração.
+            value (Any): Valor a gravar.
+            
+        Returns:
+            bool: True se a operação foi bem-sucedida, False caso contrário.
+        """
+        try:
+            await self.db.bot_settings.update_one(
+                {"_id": key},
+                {"$set": {"value": value, "updated_at": datetime.now()}},
+                upsert=True
+            )
+            return True
+        except PyMongoError as e:
+            logger.error(f"Erro ao gravar configuração {key}: {e}")
+            return False
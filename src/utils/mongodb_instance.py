@@ -1,6 +1,8 @@
 """
 Instância compartilhada do cliente MongoDB.
 """
+import asyncio
+
 from src.utils.mongodb_client import MongoDBClient
 
 # Cria uma única instância do cliente MongoDB para ser compartilhada entre todos os módulos
@@ -8,5 +10,15 @@ mongodb_client = MongoDBClient()
 
 # Função para inicializar a conexão com o MongoDB
 async def initialize_mongodb():
-    """Inicializa a conexão com o MongoDB."""
-    await mongodb_client.connect() 
\ No newline at end of file
+    """
+    Inicializa a conexão com o MongoDB, garante os índices e migra dados antigos.
+
+    Depois da conexão, os índices e as migrações (independentes entre si) são
+    executados em paralelo.
+    """
+    await mongodb_client.connect()
+    await asyncio.gather(
+        mongodb_client.ensure_indexes(),
+        mongodb_client.backfill_chat_name_keys(),
+        mongodb_client.ensure_mail_stats(),
+    )
@@ -0,0 +1,389 @@
+"""
+Outbox durável para mensagens enviadas ao Telegram.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from src.utils.config import Config
+from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+from src.utils.rate_limiter import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Resultado de uma entrega: (ID da mensagem enviada, erro, espera antes de tentar de novo).
+# Um erro sem espera é definitivo.
+DeliveryResult = Tuple[Optional[int], Optional[str], Optional[float]]
+
+
+def build_outbox_message(
+    key: str,
+    chat_id: int,
+    text: str,
+    parse_mode: Optional[str] = None,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    effect: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Monta o documento de uma mensagem a enviar pelo outbox.
+
+    Args:
+        key (str): Chave de idempotência (a mesma intenção gera sempre a mesma chave).
+        chat_id (int): ID do chat de destino.
+        text (str): Texto da mensagem.
+        parse_mode (Optional[str]): Modo de formatação do texto.
+        reply_markup (Optional[InlineKeyboardMarkup]): Teclado inline da mensagem.
+        effect (Optional[Dict[str, Any]]): Efeito a aplicar no banco após a entrega
+            (por exemplo, {"type": "mail_published", "mail_id": "..."}).
+
+    Returns:
+        Dict[str, Any]: Documento para a coleção outbox.
+    """
+    now = datetime.now()
+    return {
+        "_id": key,
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": parse_mode,
+        "reply_markup": reply_markup.to_dict() if reply_markup else None,
+        "effect": effect,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+    }
+
+
+class OutboxSender:
+    """
+    Worker que entrega as mensagens gravadas na coleção outbox.
+
+    O código de negócio grava a intenção de enviar (com uma chave de
+    idempotência) antes de qualquer chamada à API; gravar a mesma intenção
+    duas vezes não duplica a mensagem. O worker reserva lotes de forma
+    atômica (seguro com várias réplicas), envia com concorrência limitada
+    respeitando o limite global do bot e o de cada chat, e grava o resultado
+    do lote em uma única operação. Falhas temporárias são tentadas de novo com
+    espera exponencial; erros definitivos (chat inválido, bot bloqueado) ou
+    MAX_ATTEMPTS falhas encerram a mensagem como "failed".
+
+    Depois da entrega, o efeito da mensagem (marcar o correio como publicado,
+    por exemplo) é aplicado a partir do banco, então também é concluído se o
+    processo parar entre o envio e o efeito. Uma reserva abandonada no meio do
+    envio é retomada após STALE_AFTER, o que pode repetir essa mensagem: a
+    entrega é "pelo menos uma vez", limitada a essa janela.
+    """
+
+    # Tamanho de cada lote reservado no banco
+    BATCH_SIZE = 20
+    # Número máximo de envios simultâneos
+    MAX_CONCURRENCY = 5
+    # Limite global de mensagens por segundo do bot
+    GLOBAL_RATE = 25
+    # Intervalo (em segundos) entre verificações de mensagens gravadas por outras réplicas
+    POLL_INTERVAL = 2.0
+    # Tempo (em segundos) após o qual uma reserva sem resultado é retomada
+    STALE_AFTER = 120
+    # Número máximo de tentativas de uma mensagem
+    MAX_ATTEMPTS = 5
+    # Espera (em segundos) antes da primeira nova tentativa (dobra a cada falha)
+    RETRY_BASE_DELAY = 5
+    # Intervalo (em segundos) entre atualizações das métricas de fila
+    BACKLOG_REFRESH_INTERVAL = 15
+    # Número máximo de limitadores por chat mantidos em memória
+    MAX_CHAT_LIMITERS = 1000
+
+    def __init__(self, bot: Bot):
+        """
+        Inicializa o worker.
+
+        Args:
+            bot (Bot): Instância do bot Telegram.
+        """
+        self.bot = bot
+        self.owner = Config.get_instance_id()
+        self.is_running = False
+        self.task: Optional[asyncio.Task] = None
+        self.rate_limiter = AsyncRateLimiter(self.GLOBAL_RATE, period=1)
+        self.group_rate_per_minute = Config.get_mail_publish_rate()
+        self._chat_limiters: Dict[int, AsyncRateLimiter] = {}
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._wakeup = asyncio.Event()
+        self._backlog_checked_at: Optional[datetime] = None
+        # Métricas
+        self.sent_total = 0
+        self.retried_total = 0
+        self.failed_total = 0
+        self.batches_total = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.backlog = 0
+        self.oldest_pending_age = 0.0
+
+    async def start(self) -> None:
+        """Inicia o worker."""
+        if self.is_running:
+            logger.warning("Outbox já está em execução.")
+            return
+
+        self.is_running = True
+        self.task = task_supervisor.spawn(self._run(), name="sender", owner="outbox", drain=False)
+        logger.info("Outbox de mensagens iniciado.")
+
+    async def stop(self, timeout: float = 0.0) -> None:
+        """
+        Para o worker. Mensagens pendentes são entregues no próximo start (ou por outra réplica).
+
+        O lote em andamento é concluído e gravado se terminar dentro do prazo;
+        caso contrário, é cancelado e retomado após STALE_AFTER.
+
+        Args:
+            timeout (float): Prazo (em segundos) para concluir o lote em andamento.
+        """
+        self.is_running = False
+        self._wakeup.set()
+        if self.task:
+            _, pending = await asyncio.wait({self.task}, timeout=timeout)
+            if pending:
+                logger.warning("Prazo esgotado aguardando o lote do outbox. Cancelando.")
+                self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        logger.info("Outbox de mensagens parado.")
+
+    async def enqueue(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """
+        Grava mensagens no outbox e acorda o worker.
+
+        Args:
+            messages (List[Dict[str, Any]]): Documentos criados por build_outbox_message.
+
+        Returns:
+            List[str]: Chaves gravadas (incluindo as que já estavam no outbox).
+        """
+        keys = await mongodb_client.enqueue_outbox_messages(messages)
+        if keys:
+            self._wakeup.set()
+        return keys
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as métricas do outbox.
+
+        Returns:
+            Dict[str, Any]: Fila (mensagens e idade da mais antiga), entregas, novas
+                tentativas, falhas, lotes e latência (gravação até entrega).
+        """
+        return {
+            "backlog": self.backlog,
+            "oldest_pending_age_seconds": round(self.oldest_pending_age, 3),
+            "sent_total": self.sent_total,
+            "retried_total": self.retried_total,
+            "failed_total": self.failed_total,
+            "batches_total": self.batches_total,
+            "last_latency_seconds": round(self.last_latency, 3),
+            "max_latency_seconds": round(self.max_latency, 3),
+        }
+
+    async def _run(self) -> None:
+        """Loop principal do worker."""
+        while self.is_running:
+            try:
+                await self._apply_effects()
+                if not self.is_running:
+                    break
+                processed = await self._process_batch()
+                await self._refresh_backlog()
+                if processed or not self.is_running:
+                    continue
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro no outbox de mensagens: {e}")
+                await asyncio.sleep(1)
+
+    async def _process_batch(self) -> int:
+        """
+        Reserva e entrega um lote de mensagens vencidas.
+
+        Returns:
+            int: Número de mensagens processadas.
+        """
+        claim_id = f"{self.owner}-{uuid.uuid4().hex}"
+        batch = await mongodb_client.claim_outbox_messages(claim_id, self.BATCH_SIZE, self.STALE_AFTER)
+        if not batch:
+            return 0
+
+        results = await asyncio.gather(*(self._deliver(message) for message in batch))
+
+        now = datetime.now()
+        sent: List[Tuple[str, int]] = []
+        retry: List[Tuple[str, str, datetime]] = []
+        failed: List[Tuple[str, str]] = []
+        for message, (message_id, error, retry_delay) in zip(batch, results):
+            if message_id is not None:
+                sent.append((message["_id"], message_id))
+                self.last_latency = (now - message["created_at"]).total_seconds()
+                self.max_latency = max(self.max_latency, self.last_latency)
+            elif retry_delay is not None:
+                retry.append((message["_id"], error, now + timedelta(seconds=retry_delay)))
+            else:
+                failed.append((message["_id"], error))
+                logger.error(f"Mensagem {message['_id']} do outbox descartada: {error}")
+
+        await mongodb_client.record_outbox_results(claim_id, sent, retry, failed)
+        self.sent_total += len(sent)
+        self.retried_total += len(retry)
+        self.failed_total += len(failed)
+        self.batches_total += 1
+        return len(batch)
+
+    async def _deliver(self, message: Dict[str, Any]) -> DeliveryResult:
+        """
+        Envia uma mensagem reservada, respeitando os limites de taxa.
+
+        Args:
+            message (Dict[str, Any]): Documento da mensagem.
+
+        Returns:
+            DeliveryResult: ID da mensagem enviada ou o erro e a espera antes da próxima tentativa.
+        """
+        chat_id = message["chat_id"]
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            chat_limiter = self._chat_limiter(chat_id)
+            await chat_limiter.acquire()
+            try:
+                reply_markup = message.get("reply_markup")
+                sent_message = await self.bot.send_message(
+                    chat_id=chat_id,
+                    text=message["text"],
+                    parse_mode=message.get("parse_mode"),
+                    reply_markup=InlineKeyboardMarkup.de_json(reply_markup, self.bot) if reply_markup else None
+                )
+                return sent_message.message_id, None, None
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                chat_limiter.penalize(retry_after)
+                logger.warning(f"Limite do Telegram no chat {chat_id}. Aguardando {retry_after}s.")
+                return None, str(e), retry_after
+            except (BadRequest, Forbidden) as e:
+                return None, str(e), None
+            except Exception as e:
+                attempts = message.get("attempts", 0) + 1
+                if attempts >= self.MAX_ATTEMPTS:
+                    return None, str(e), None
+                logger.warning(f"Falha ao enviar mensagem {message['_id']} (tentativa {attempts}): {e}")
+                return None, str(e), self.RETRY_BASE_DELAY * 2 ** (attempts - 1)
+
+    def _chat_limiter(self, chat_id: int) -> AsyncRateLimiter:
+        """Obtém o limitador de um chat (grupos: limite por minuto; chats privados: 1 por segundo)."""
+        limiter = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            if len(self._chat_limiters) >= self.MAX_CHAT_LIMITERS:
+                self._chat_limiters.clear()
+            if chat_id < 0:
+                limiter = AsyncRateLimiter(self.group_rate_per_minute, period=60)
+            else:
+                limiter = AsyncRateLimiter(1, period=1)
+            self._chat_limiters[chat_id] = limiter
+        return limiter
+
+    async def _apply_effects(self) -> None:
+        """Aplica os efeitos das mensagens já entregues (ou descartadas) que ainda não foram aplicados."""
+        messages = await mongodb_client.get_outbox_pending_effects(self.BATCH_SIZE)
+        done = []
+        for message in messages:
+            if await self._apply_effect(message):
+                done.append(message["_id"])
+        if done:
+            await mongodb_client.clear_outbox_effects(done)
+
+    async def _apply_effect(self, message: Dict[str, Any]) -> bool:
+        """
+        Aplica o efeito de uma mensagem.
+
+        Args:
+            message (Dict[str, Any]): Documento da mensagem, com status "sent" ou "failed".
+
+        Returns:
+            bool: True se o efeito foi aplicado (ou é desconhecido e deve ser ignorado).
+        """
+        effect = message.get("effect") or {}
+        if effect.get("type") == "mail_published":
+            if message["status"] == "sent":
+                await mongodb_client.publish_mail(effect["mail_id"], message["message_id"])
+                return True
+            return await mongodb_client.mark_mail_publish_failed(effect["mail_id"], message.get("error", ""))
+
+        logger.warning(f"Efeito desconhecido na mensagem {message['_id']} do outbox: {effect}")
+        return True
+
+    async def _refresh_backlog(self) -> None:
+        """Atualiza as métricas de fila, no máximo a cada BACKLOG_REFRESH_INTERVAL."""
+        now = datetime.now()
+        if self._backlog_checked_at and (now - self._backlog_checked_at).total_seconds() < self.BACKLOG_REFRESH_INTERVAL:
+            return
+        self._backlog_checked_at = now
+        self.backlog, oldest = await mongodb_client.get_outbox_backlog()
+        self.oldest_pending_age = (now - oldest).total_seconds() if oldest else 0.0
+
+
+# Worker global do outbox
+outbox_sender: Optional[OutboxSender] = None
+
+
+def get_outbox() -> Optional[OutboxSender]:
+    """
+    Obtém o outbox global, se estiver em execução.
+
+    Returns:
+        Optional[OutboxSender]: Outbox em execução ou None (o chamador envia diretamente).
+    """
+    if outbox_sender is not None and outbox_sender.is_running:
+        return outbox_sender
+    return None
+
+
+async def start_outbox(bot: Bot) -> OutboxSender:
+    """
+    Inicia o outbox global.
+
+    Args:
+        bot (Bot): Instância do bot.
+
+    Returns:
+        OutboxSender: Outbox global.
+    """
+    global outbox_sender
+
+    if outbox_sender is None:
+        outbox_sender = OutboxSender(bot)
+    await outbox_sender.start()
+    return outbox_sender
+
+
+async def stop_outbox(timeout: float = 0.0) -> None:
+    """
+    Para o outbox global.
+
+    Args:
+        timeout (float): Prazo (em segundos) para concluir o lote em andamento.
+    """
+    if outbox_sender:
+        await outbox_sender.stop(timeout)
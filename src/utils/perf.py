@@ -0,0 +1,371 @@
+"""
+Medição de tempo por atualização: handlers, chamadas ao MongoDB, ao Telegram e à LLM.
+"""
+import functools
+import html
+import inspect
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, ConversationHandler, TypeHandler
+from telegram.request import HTTPXRequest
+
+from src.utils import metrics
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Grupos dos handlers que abrem e fecham a medição de cada atualização
+PRE_GROUP = -100
+POST_GROUP = 100
+
+# Categorias de chamadas externas medidas
+IO_CATEGORIES = ("mongo", "telegram", "llm")
+
+
+class UpdateTrace:
+    """Medições de uma atualização em processamento."""
+
+    def __init__(self, update_id: int, queue_delay: Optional[float], update_type: str = "other"):
+        """
+        Args:
+            update_id (int): ID da atualização.
+            queue_delay (Optional[float]): Segundos entre a data da mensagem e o início do processamento.
+            update_type (str): Tipo da atualização (message, callback_query, ...).
+        """
+        self.update_id = update_id
+        self.update_type = update_type
+        self.queue_delay = queue_delay
+        self.started = time.perf_counter()
+        self.handlers: List[Tuple[str, float]] = []
+        self.io: Dict[str, float] = defaultdict(float)
+
+
+# Medição da atualização em processamento na tarefa atual
+_current_trace: ContextVar[Optional[UpdateTrace]] = ContextVar("perf_trace", default=None)
+# Categoria da chamada externa em andamento (chamadas aninhadas não são somadas de novo)
+_current_io: ContextVar[Optional[str]] = ContextVar("perf_io", default=None)
+
+
+class PerfStats:
+    """
+    Amostras recentes de duração por série (handler, atualização completa,
+    atraso de fila e tempo em cada categoria de chamada externa).
+
+    Cada série guarda as últimas WINDOW amostras para os percentis e o total
+    de amostras desde o início (ou desde o último reset).
+    """
+
+    # Número de amostras recentes mantidas por série
+    WINDOW = 1000
+
+    def __init__(self):
+        """Inicializa as séries vazias."""
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Registra uma amostra.
+
+        Args:
+            name (str): Nome da série.
+            seconds (float): Duração em segundos.
+        """
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.WINDOW)
+        samples.append(seconds)
+        self._counts[name] += 1
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Calcula os percentis de cada série.
+
+        Returns:
+            List[Dict[str, Any]]: Séries (name, count, p50, p95, p99, max, em segundos),
+                da maior para a menor p95.
+        """
+        rows = []
+        for name, samples in self._samples.items():
+            ordered = sorted(samples)
+            rows.append({
+                "name": name,
+                "count": self._counts[name],
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "p99": _percentile(ordered, 99),
+                "max": ordered[-1],
+            })
+        rows.sort(key=lambda row: row["p95"], reverse=True)
+        return rows
+
+    def reset(self) -> None:
+        """Descarta todas as amostras."""
+        self._samples = {}
+        self._counts = defaultdict(int)
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    """Percentil pelo método do posto mais próximo, sobre amostras ordenadas."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+# Estatísticas globais
+perf_stats = PerfStats()
+
+
+# Histogramas por operação de cada categoria (as chamadas ao Telegram são registradas em TimedHTTPXRequest)
+_IO_HISTOGRAMS = {"mongo": metrics.MONGO_DURATION, "llm": metrics.LLM_DURATION}
+
+
+@asynccontextmanager
+async def io_timer(category: str, operation: Optional[str] = None):
+    """
+    Mede uma chamada externa: soma seu tempo à atualização em processamento
+    e o registra no histograma da categoria.
+
+    Args:
+        category (str): Categoria da chamada ("mongo", "telegram" ou "llm").
+        operation (Optional[str]): Nome da operação (label do histograma).
+    """
+    if _current_io.get() is not None:
+        yield
+        return
+
+    token = _current_io.set(category)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_io.reset(token)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.io[category] += elapsed
+        histogram = _IO_HISTOGRAMS.get(category)
+        if histogram is not None and operation is not None:
+            histogram.observe(elapsed, operation)
+
+
+def timed_io(category: str, func: Callable) -> Callable:
+    """
+    Envolve uma função assíncrona para que seu tempo conte na categoria informada.
+
+    Args:
+        category (str): Categoria da chamada.
+        func (Callable): Função assíncrona.
+
+    Returns:
+        Callable: Função envolvida.
+    """
+    operation = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with io_timer(category, operation):
+            return await func(*args, **kwargs)
+
+    wrapper._perf_category = category
+    return wrapper
+
+
+def instrument_class(cls: type, category: str) -> int:
+    """
+    Mede todas as corrotinas públicas de uma classe (por exemplo, MongoDBClient).
+
+    Args:
+        cls (type): Classe a instrumentar.
+        category (str): Categoria das chamadas.
+
+    Returns:
+        int: Número de métodos instrumentados.
+    """
+    count = 0
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(attr) or hasattr(attr, "_perf_category"):
+            continue
+        setattr(cls, name, timed_io(category, attr))
+        count += 1
+    return count
+
+
+class TimedHTTPXRequest(HTTPXRequest):
+    """
+    HTTPXRequest que soma o tempo das chamadas à Bot API na atualização em
+    processamento e registra duração, código HTTP e respostas 429 por método.
+    """
+
+    async def do_request(self, url: str, method: str, *args, **kwargs) -> Tuple[int, bytes]:
+        """Executa a requisição, medindo-a na categoria "telegram"."""
+        api_method = url.rsplit("/", 1)[-1]
+        code = None
+        started = time.perf_counter()
+        try:
+            async with io_timer("telegram"):
+                code, payload = await super().do_request(url, method, *args, **kwargs)
+            return code, payload
+        finally:
+            metrics.observe_telegram_call(api_method, code, time.perf_counter() - started)
+
+
+def _handler_name(callback: Callable) -> str:
+    """Nome legível de um callback (por exemplo, MailHandlers.handle_mail_recipient)."""
+    return getattr(callback, "__qualname__", None) or getattr(callback, "__name__", None) or repr(callback)
+
+
+def timed_callback(callback: Callable) -> Callable:
+    """
+    Envolve o callback de um handler para medir sua duração.
+
+    Args:
+        callback (Callable): Callback assíncrono do handler.
+
+    Returns:
+        Callable: Callback envolvido (com o mesmo retorno, inclusive estados de conversa).
+    """
+    if hasattr(callback, "_perf_handler"):
+        return callback
+    name = _handler_name(callback)
+
+    @functools.wraps(callback)
+    async def wrapper(update: object, context: ContextTypes.DEFAULT_TYPE):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            metrics.HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            perf_stats.record(f"handler:{name}", elapsed)
+            metrics.HANDLER_DURATION.observe(elapsed, name)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.handlers.append((name, elapsed))
+
+    wrapper._perf_handler = name
+    return wrapper
+
+
+async def start_update_trace(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Abre a medição de uma atualização (primeiro handler a ser executado).
+
+    Args:
+        update (object): Atualização recebida.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    if not isinstance(update, Update):
+        return
+    queue_delay = None
+    if update.message is not None and update.message.date is not None:
+        queue_delay = max(0.0, (datetime.now(timezone.utc) - update.message.date).total_seconds())
+    update_type = next((kind for kind in Update.ALL_TYPES if getattr(update, kind, None) is not None), "other")
+    _current_trace.set(UpdateTrace(update.update_id, queue_delay, update_type))
+
+
+async def finish_update_trace(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Fecha a medição de uma atualização (último handler), registrando as séries
+    e avisando no log se a atualização foi lenta.
+
+    Args:
+        update (object): Atualização recebida.
+        context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    _current_trace.set(None)
+
+    total = time.perf_counter() - trace.started
+    perf_stats.record("update", total)
+    metrics.UPDATES.inc(trace.update_type)
+    metrics.UPDATE_DURATION.observe(total)
+    if trace.queue_delay is not None:
+        perf_stats.record("queue_delay", trace.queue_delay)
+        metrics.UPDATE_QUEUE_DELAY.observe(trace.queue_delay)
+    for category, seconds in trace.io.items():
+        perf_stats.record(f"io:{category}", seconds)
+
+    if total >= Config.get_slow_update_threshold():
+        handlers = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in trace.handlers) or "nenhum"
+        io = " ".join(f"{category}={trace.io.get(category, 0.0):.3f}s" for category in IO_CATEGORIES)
+        queue = f"{trace.queue_delay:.1f}s" if trace.queue_delay is not None else "-"
+        logger.warning(
+            f"Atualização {trace.update_id} lenta: {total:.3f}s (fila {queue}) | "
+            f"handlers: {handlers} | {io}"
+        )
+
+
+def _instrument_handler(handler: Any) -> int:
+    """Envolve o callback de um handler (e dos handlers internos de um ConversationHandler)."""
+    if isinstance(handler, ConversationHandler):
+        inner = list(handler.entry_points) + list(handler.fallbacks)
+        for state_handlers in handler.states.values():
+            inner.extend(state_handlers)
+        return sum(_instrument_handler(inner_handler) for inner_handler in inner)
+
+    callback = getattr(handler, "callback", None)
+    if callback is None or hasattr(callback, "_perf_handler"):
+        return 0
+    handler.callback = timed_callback(callback)
+    return 1
+
+
+def instrument_application(application: Application) -> int:
+    """
+    Mede todos os handlers registrados e adiciona os handlers que abrem e
+    fecham a medição de cada atualização. Deve ser chamado depois de
+    registrar os handlers.
+
+    Args:
+        application (Application): Aplicação do Telegram.
+
+    Returns:
+        int: Número de callbacks instrumentados.
+    """
+    count = sum(
+        _instrument_handler(handler)
+        for handlers in application.handlers.values()
+        for handler in handlers
+    )
+    application.add_handler(TypeHandler(Update, start_update_trace), group=PRE_GROUP)
+    application.add_handler(TypeHandler(Update, finish_update_trace), group=POST_GROUP)
+    logger.info(f"Medição de desempenho ativa em {count} handlers")
+    return count
+
+
+def format_perf_report(limit: int = 20) -> str:
+    """
+    Monta o relatório de percentis para o comando /perf.
+
+    Args:
+        limit (int): Número máximo de séries listadas.
+
+    Returns:
+        str: Relatório em HTML.
+    """
+    rows = perf_stats.summary()
+    if not rows:
+        return "📊 Nenhuma atualização medida ainda."
+
+    lines = [f"{'série':<32} {'n':>6} {'p50':>7} {'p95':>7} {'p99':>7}"]
+    for row in rows[:limit]:
+        lines.append(
+            f"{row['name'][:32]:<32} {row['count']:>6} "
+            f"{row['p50'] * 1000:>6.0f}ms {row['p95'] * 1000:>6.0f}ms {row['p99'] * 1000:>6.0f}ms"
+        )
+    if len(rows) > limit:
+        lines.append(f"... e mais {len(rows) - limit} séries")
+    return "<b>📊 Desempenho (últimas amostras)</b>\n<pre>" + html.escape("\n".join(lines)) + "</pre>"
@@ -0,0 +1,238 @@
+"""
+Serviço unificado de cotas de uso (perguntas ao bot, correio elegante).
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from src.utils.config import Config
+from src.utils.mongodb_instance import mongodb_client
+
+logger = logging.getLogger(__name__)
+
+# Modos de janela suportados
+CALENDAR_WINDOW = "calendar"
+ROLLING_WINDOW = "rolling"
+
+
+class QuotaReservation:
+    """Unidade reservada de uma cota, usada para devolvê-la em caso de falha."""
+
+    def __init__(self, quota_id: str, hit: Optional[datetime] = None):
+        """
+        Args:
+            quota_id (str): ID do documento da cota.
+            hit (Optional[datetime]): Instante do uso (apenas em janelas deslizantes).
+        """
+        self.quota_id = quota_id
+        self.hit = hit
+
+
+class QuotaResult:
+    """Resultado de uma consulta ou reserva de cota."""
+
+    def __init__(
+        self,
+        allowed: bool,
+        used: int,
+        limit: int,
+        reset_at: datetime,
+        reservation: Optional[QuotaReservation] = None
+    ):
+        """
+        Args:
+            allowed (bool): Se a operação está dentro do limite.
+            used (int): Unidades usadas na janela atual.
+            limit (int): Limite da janela.
+            reset_at (datetime): Quando uma nova unidade fica disponível.
+            reservation (Optional[QuotaReservation]): Reserva feita (apenas em reserve).
+        """
+        self.allowed = allowed
+        self.used = used
+        self.limit = limit
+        self.reset_at = reset_at
+        self.reservation = reservation
+
+    @property
+    def remaining(self) -> int:
+        """Unidades ainda disponíveis na janela."""
+        return max(0, self.limit - self.used)
+
+
+class QuotaService:
+    """
+    Cota de uso por chave (por exemplo, usuário ou usuário+chat).
+
+    A reserva é uma única atualização condicional e atômica no MongoDB, então
+    duas requisições simultâneas (ou duas réplicas) nunca ultrapassam o limite.
+    Se a operação protegida falhar, a unidade é devolvida com `refund`.
+
+    Um cache em memória guarda o último uso conhecido de cada chave. Chaves
+    cuja cota já está esgotada são recusadas sem consultar o banco até o fim
+    da janela; reservas e devoluções atualizam o cache (write-through).
+    """
+
+    # Número máximo de chaves mantidas no cache
+    MAX_CACHE_SIZE = 10000
+
+    def __init__(self, scope: str, limit: int, window: str = CALENDAR_WINDOW, period: timedelta = timedelta(days=1)):
+        """
+        Inicializa o serviço.
+
+        Args:
+            scope (str): Nome da cota (prefixo dos documentos, por exemplo "qa").
+            limit (int): Número de usos permitidos por janela.
+            window (str): "calendar" (janela fixa, que reinicia à meia-noite para
+                          períodos de um dia) ou "rolling" (últimas `period` horas).
+            period (timedelta): Duração da janela.
+        """
+        if window not in (CALENDAR_WINDOW, ROLLING_WINDOW):
+            raise ValueError(f"Janela de cota inválida: {window}")
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.period = period
+        # Formato: {chave: (usados, reset_at)}
+        self._cache: Dict[str, Tuple[int, datetime]] = {}
+
+    async def reserve(self, key: str) -> QuotaResult:
+        """
+        Reserva uma unidade da cota para a chave.
+
+        Se o banco estiver indisponível, a operação é liberada sem reserva (como
+        antes, quando a contagem retornava zero em caso de erro). Com limite
+        zero (ou negativo), a reserva é sempre recusada sem consultar o banco.
+
+        Args:
+            key (str): Chave da cota (por exemplo, "<chat_id>:<user_id>").
+
+        Returns:
+            QuotaResult: Resultado; `reservation` é preenchido quando `allowed` é True.
+        """
+        now = self._now()
+        if self.limit <= 0:
+            # O upsert de reserve_calendar_quota criaria o documento com count=1
+            reset_at = self._calendar_window(key, now)[1] if self.window == CALENDAR_WINDOW else now + self.period
+            return QuotaResult(False, 0, self.limit, reset_at)
+
+        cached = self._cached(key, now)
+        if cached is not None and cached.used >= self.limit:
+            return cached
+
+        if self.window == CALENDAR_WINDOW:
+            quota_id, window_end = self._calendar_window(key, now)
+            outcome = await mongodb_client.reserve_calendar_quota(quota_id, self.limit, window_end)
+            if outcome is None:
+                return QuotaResult(True, 0, self.limit, window_end)
+            reset_at = window_end
+            reservation = QuotaReservation(quota_id) if outcome["allowed"] else None
+        else:
+            quota_id = f"{self.scope}:{key}"
+            outcome = await mongodb_client.reserve_rolling_quota(
+                quota_id, self.limit, now, int(self.period.total_seconds())
+            )
+            if outcome is None:
+                return QuotaResult(True, 0, self.limit, now + self.period)
+            reset_at = (outcome["oldest"] or now) + self.period
+            reservation = QuotaReservation(quota_id, now) if outcome["allowed"] else None
+
+        result = QuotaResult(outcome["allowed"], outcome["used"], self.limit, reset_at, reservation)
+        self._store(key, result)
+        return result
+
+    async def refund(self, reservation: Optional[QuotaReservation], key: Optional[str] = None) -> None:
+        """
+        Devolve uma unidade reservada.
+
+        Args:
+            reservation (Optional[QuotaReservation]): Reserva a devolver (None é ignorado).
+            key (Optional[str]): Chave da cota, para atualizar o cache.
+        """
+        if reservation is None:
+            return
+        await mongodb_client.refund_quota(reservation.quota_id, reservation.hit)
+        if key is not None:
+            self._cache.pop(key, None)
+
+    async def peek(self, key: str) -> QuotaResult:
+        """
+        Consulta o uso da chave sem reservar.
+
+        Args:
+            key (str): Chave da cota.
+
+        Returns:
+            QuotaResult: Uso atual (sem reserva).
+        """
+        now = self._now()
+        cached = self._cached(key, now)
+        if cached is not None:
+            return cached
+
+        if self.window == CALENDAR_WINDOW:
+            quota_id, reset_at = self._calendar_window(key, now)
+            document = await mongodb_client.get_quota_usage(quota_id)
+            used = (document or {}).get("count", 0)
+        else:
+            quota_id = f"{self.scope}:{key}"
+            document = await mongodb_client.get_quota_usage(quota_id)
+            hits = [hit for hit in (document or {}).get("hits", []) if hit > now - self.period]
+            used = len(hits)
+            reset_at = (min(hits) if hits else now) + self.period
+
+        result = QuotaResult(used < self.limit, used, self.limit, reset_at)
+        self._store(key, result)
+        return result
+
+    def _calendar_window(self, key: str, now: datetime) -> Tuple[str, datetime]:
+        """
+        Calcula o ID do documento e o fim da janela fixa que contém `now`.
+
+        Args:
+            key (str): Chave da cota.
+            now (datetime): Instante de referência.
+
+        Returns:
+            Tuple[str, datetime]: (ID do documento, fim da janela).
+        """
+        if self.period == timedelta(days=1):
+            window_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            period_seconds = int(self.period.total_seconds())
+            window_start = datetime.fromtimestamp(int(now.timestamp()) // period_seconds * period_seconds)
+        return f"{self.scope}:{key}:{window_start:%Y%m%d%H%M}", window_start + self.period
+
+    def _cached(self, key: str, now: datetime) -> Optional[QuotaResult]:
+        """Obtém o uso em cache da chave, se ainda for válido."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        used, reset_at = entry
+        if now >= reset_at:
+            self._cache.pop(key, None)
+            return None
+        return QuotaResult(used < self.limit, used, self.limit, reset_at)
+
+    def _store(self, key: str, result: QuotaResult) -> None:
+        """Grava o uso da chave no cache, descartando entradas vencidas se necessário."""
+        if len(self._cache) >= self.MAX_CACHE_SIZE and key not in self._cache:
+            now = self._now()
+            self._cache = {k: v for k, v in self._cache.items() if v[1] > now}
+            if len(self._cache) >= self.MAX_CACHE_SIZE:
+                self._cache.clear()
+        self._cache[key] = (result.used, result.reset_at)
+
+    @staticmethod
+    def _now() -> datetime:
+        """Instante atual com precisão de milissegundos (a mesma do MongoDB)."""
+        now = datetime.now()
+        return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+# Cotas globais do bot
+qa_quota = QuotaService(
+    "qa",
+    limit=Config.get_qa_daily_limit(),
+    window=Config.get_qa_quota_window()
+)
+mail_quota = QuotaService("mail", limit=Config.get_mail_daily_limit())
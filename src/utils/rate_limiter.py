@@ -0,0 +1,62 @@
+"""
+Limitador de taxa assíncrono (token bucket) para chamadas à API do Telegram.
+"""
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket assíncrono.
+
+    Libera até `rate` operações por `period` segundos, permitindo rajadas de
+    até `capacity` operações. As chamadas a `acquire` são atendidas em ordem
+    de chegada.
+    """
+
+    def __init__(self, rate: float, period: float = 1.0, capacity: float = 1.0):
+        """
+        Inicializa o limitador.
+
+        Args:
+            rate (float): Número de operações permitidas por período.
+            period (float): Duração do período em segundos.
+            capacity (float): Tamanho máximo da rajada (em operações).
+        """
+        if rate <= 0 or period <= 0:
+            raise ValueError("A taxa e o período devem ser positivos")
+        self.interval = period / rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """
+        Aguarda até que uma operação possa ser executada.
+
+        Returns:
+            float: Tempo (em segundos) que a chamada esperou.
+        """
+        async with self._lock:
+            waited = 0.0
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) / self.interval)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) * self.interval
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Esvazia o bucket por um tempo, por exemplo após um RetryAfter do Telegram.
+
+        Args:
+            seconds (float): Tempo em segundos durante o qual nada será liberado.
+        """
+        self._tokens = -seconds / self.interval
+        self._updated_at = time.monotonic()
@@ -3,17 +3,34 @@ Gerenciador de mensagens recorrentes.
 """
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import math
 
 from telegram.ext import Application
 from src.utils.mongodb_instance import mongodb_client
+from src.utils.task_supervisor import task_supervisor
+from src.utils.timer_heap import TimerHeap
+from src.utils.outbox import build_outbox_message, get_outbox
 
 logger = logging.getLogger(__name__)
 
 class RecurringMessagesManager:
-    """Gerenciador de mensagens recorrentes."""
+    """
+    Gerenciador de mensagens recorrentes.
+    
+    Todas as mensagens ficam em um único heap de próximos envios, consumido por
+    um só loop: adicionar, desativar ou editar uma mensagem custa O(log n), e o
+    loop dorme até o próximo vencimento. Os dados das mensagens ficam em cache,
+    e apenas as mensagens alteradas desde a última sincronização são relidas
+    do banco.
+    """
+    
+    # Intervalo (em segundos) entre sincronizações de mensagens alteradas
+    SYNC_INTERVAL = 300
+    # Espera (em segundos) antes de tentar novamente um envio que falhou
+    RETRY_DELAY = 300
     
     def __init__(self, application: Application):
         """
@@ -23,8 +40,24 @@ class RecurringMessagesManager:
             application (Application): Aplicação do Telegram.
         """
         self.application = application
-        self.scheduled_tasks = {}  # Dicionário para armazenar as tarefas agendadas
         self.running = False
+        self._messages: Dict[str, Dict] = {}  # Cache dos dados das mensagens ativas
+        self._timers = TimerHeap()  # Próximos envios, indexados pelo ID da mensagem
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._last_sync: Optional[datetime] = None
+        # Token de fencing da liderança atual (None quando não há eleição de líder)
+        self.fencing_token: Optional[int] = None
+        # Métricas
+        self.sent_total = 0
+        self.failed_total = 0
+        self.last_jitter = 0.0
+        self.max_jitter = 0.0
+    
+    @property
+    def scheduled_count(self) -> int:
+        """Número de mensagens agendadas."""
+        return len(self._timers)
     
     async def start(self):
         """Inicia o gerenciador de mensagens recorrentes."""
@@ -37,31 +70,44 @@ class RecurringMessagesManager:
         # Carrega todas as mensagens recorrentes ativas
         await self.load_recurring_messages()
         
-        # Inicia uma tarefa para verificar periodicamente novas mensagens
-        asyncio.create_task(self._check_for_new_messages())
+        # Inicia o loop de envio e a sincronização periódica de alterações
+        self._tasks = [
+            task_supervisor.spawn(self._run(), name="sender", owner="recurring_messages", drain=False),
+            task_supervisor.spawn(
+                self._check_for_new_messages(), name="sync", owner="recurring_messages", drain=False
+            ),
+        ]
     
     async def stop(self):
         """Para o gerenciador de mensagens recorrentes."""
         self.running = False
         logger.info("Parando gerenciador de mensagens recorrentes...")
         
-        # Cancela todas as tarefas agendadas
-        for task in self.scheduled_tasks.values():
+        self._wakeup.set()
+        for task in self._tasks:
             task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
         
-        self.scheduled_tasks = {}
+        self._tasks = []
+        self._timers.clear()
+        self._messages = {}
     
     async def load_recurring_messages(self):
         """Carrega todas as mensagens recorrentes ativas do banco de dados."""
         if mongodb_client.db is None:
             logger.warning("MongoDB não está conectado. Não é possível carregar mensagens recorrentes.")
             return
-            
+        
+        self._last_sync = datetime.now()
         messages = await mongodb_client.get_all_active_recurring_messages()
         logger.info(f"Carregadas {len(messages)} mensagens recorrentes ativas.")
         
         for message in messages:
-            self._schedule_message(message)  # Removido o await, pois _schedule_message não é assíncrono
+            self._schedule_message(message)
     
     async def add_recurring_message(
         self,
@@ -121,10 +167,7 @@ class RecurringMessagesManager:
             
         result = await mongodb_client.delete_recurring_message(message_id)
         
-        if result and message_id in self.scheduled_tasks:
-            # Cancela a tarefa agendada
-            self.scheduled_tasks[message_id].cancel()
-            del self.scheduled_tasks[message_id]
+        if result and self._unschedule_message(message_id):
             logger.info(f"Mensagem recorrente desativada com sucesso: {message_id}")
         
         return result
@@ -145,57 +188,61 @@ class RecurringMessagesManager:
             
         return await mongodb_client.get_recurring_messages_by_chat(chat_id)
     
-    def _schedule_message(self, message_data: Dict) -> None:
+    def get_stats(self) -> Dict[str, Any]:
         """
-        Agenda uma mensagem recorrente para envio.
+        Obtém as métricas do agendador.
+        
+        Returns:
+            Dict[str, Any]: Mensagens agendadas, envios, falhas e atraso (jitter) dos envios.
+        """
+        return {
+            "scheduled": self.scheduled_count,
+            "sent_total": self.sent_total,
+            "failed_total": self.failed_total,
+            "last_jitter_seconds": round(self.last_jitter, 3),
+            "max_jitter_seconds": round(self.max_jitter, 3),
+        }
+    
+    def _schedule_message(self, message_data: Dict, due: Optional[float] = None) -> None:
+        """
+        Agenda (ou reagenda) uma mensagem recorrente no heap de envios.
         
         Args:
             message_data (dict): Dados da mensagem recorrente.
+            due (Optional[float]): Timestamp do próximo envio. Se omitido, é calculado
+                                   a partir do último envio e do intervalo.
         """
         message_id = str(message_data["_id"])
         
-        # Cancela qualquer tarefa existente para esta mensagem
-        if message_id in self.scheduled_tasks:
-            self.scheduled_tasks[message_id].cancel()
-            logger.info(f"Envio da mensagem recorrente {message_id} cancelado.")
-        
-        # Calcula o próximo horário de envio
-        next_send_time = self._calculate_next_send_time(message_data)
+        if due is None:
+            next_send_time = self._calculate_next_send_time(message_data)
+            # Garante que o atraso seja de pelo menos 1 segundo
+            due = max(next_send_time.timestamp(), time.time() + 1.0)
         
-        # Calcula o atraso em segundos
-        now = datetime.now()
-        delay = (next_send_time - now).total_seconds()
-        delay = max(1.0, delay)  # Garante que o atraso seja de pelo menos 1 segundo
-        
-        # Log detalhado para debug
-        last_sent = message_data.get("last_sent_at")
-        interval = message_data.get("interval_hours", 1.0)
-        last_sent_str = last_sent.strftime('%Y-%m-%d %H:%M:%S') if last_sent else "Nunca"
-        
-        logger.info(
-            f"Detalhes do agendamento para mensagem {message_id}:\n"
-            f"- Texto: '{message_data.get('message')[:30]}...'\n"
-            f"- Chat ID: {message_data.get('chat_id')}\n"
-            f"- Intervalo: {interval} horas\n"
-            f"- Último envio: {last_sent_str}\n"
-            f"- Hora atual: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"- Próximo envio: {next_send_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"- Atraso calculado: {delay:.2f} segundos"
-        )
+        self._messages[message_id] = message_data
+        self._timers.push(message_id, due)
         
-        # Cria uma nova tarefa para enviar a mensagem
-        task = asyncio.create_task(
-            self._send_message_after_delay(message_data, delay)
+        logger.debug(
+            "Mensagem recorrente %s agendada para %s",
+            message_id, datetime.fromtimestamp(due).strftime('%Y-%m-%d %H:%M:%S')
         )
         
-        # Armazena a tarefa
-        self.scheduled_tasks[message_id] = task
+        # Acorda o loop apenas se este passou a ser o próximo envio
+        if self._timers.peek_due() == due:
+            self._wakeup.set()
+    
+    def _unschedule_message(self, message_id: str) -> bool:
+        """
+        Remove uma mensagem do heap de envios.
         
-        # Registra o agendamento
-        logger.info(
-            f"Mensagem recorrente agendada: {message_id}, "
-            f"próximo envio em {delay:.2f} segundos ({next_send_time.strftime('%Y-%m-%d %H:%M:%S')})"
-        )
+        Args:
+            message_id (str): ID da mensagem recorrente.
+            
+        Returns:
+            bool: True se a mensagem estava agendada.
+        """
+        self._messages.pop(message_id, None)
+        return self._timers.remove(message_id)
     
     def _calculate_next_send_time(self, message_data: Dict) -> datetime:
         """
@@ -230,107 +277,186 @@ class RecurringMessagesManager:
         
         return next_send_time
     
-    async def _send_message_after_delay(self, message_data: Dict, delay_seconds: float):
+    async def _run(self):
+        """Loop único que envia as mensagens recorrentes vencidas."""
+        while self.running:
+            try:
+                # Limpa o sinal antes de ler o heap para não perder agendamentos
+                self._wakeup.clear()
+                next_due = self._timers.peek_due()
+                timeout = None if next_due is None else max(0.0, next_due - time.time())
+                
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    # Novo envio mais próximo ou parada: recalcula
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+                
+                for message_id, due, _ in self._timers.pop_due(time.time()):
+                    if not self.running:
+                        break
+                    await self._send_recurring_message(message_id, due)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Erro no loop de mensagens recorrentes: {e}")
+                await asyncio.sleep(1)
+    
+    async def _send_recurring_message(self, message_id: str, due: float):
         """
-        Envia uma mensagem recorrente após um determinado tempo.
+        Envia uma mensagem recorrente vencida e agenda o próximo envio.
+        
+        Os dados vêm do cache local, mantido atualizado pela sincronização de
+        alterações, então o envio não consulta o banco.
+        
+        O envio é reivindicado gravando o último envio com o token de fencing.
+        Uma líder antiga (com token menor que o de uma líder mais nova) tem a
+        escrita rejeitada e deixa de enviar.
+        
+        Com o outbox em execução, a mensagem é gravada no outbox antes da
+        reivindicação. A chave de idempotência usa o último envio anterior, então
+        uma nova tentativa (após falha na reivindicação ou reinício entre as duas
+        etapas) e a gravação de uma líder antiga para o mesmo intervalo geram a
+        chave já usada e não duplicam a mensagem; nenhum intervalo é perdido.
+        
+        Sem o outbox, a reivindicação vem antes do envio direto: se o processo
+        parar entre as duas etapas, a mensagem desse intervalo é perdida, não
+        duplicada.
         
         Args:
-            message_data (Dict): Dados da mensagem recorrente.
-            delay_seconds (float): Tempo de espera em segundos.
+            message_id (str): ID da mensagem recorrente.
+            due (float): Timestamp em que o envio estava previsto.
         """
+        message_data = self._messages.get(message_id)
+        if not message_data or not message_data.get("active", True):
+            logger.info(f"Mensagem recorrente {message_id} não está mais ativa.")
+            self._messages.pop(message_id, None)
+            return
+        
         try:
-            message_id = str(message_data["_id"])
+            self.last_jitter = time.time() - due
+            self.max_jitter = max(self.max_jitter, self.last_jitter)
             
-            # Aguarda o tempo especificado
-            await asyncio.sleep(delay_seconds)
+            # O MongoDB guarda datas com precisão de milissegundos: o último envio
+            # (e a chave do próximo) precisa ser o mesmo em memória e após um reinício
+            now = datetime.now()
+            sent_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
             
-            # Obtém os dados atualizados da mensagem
-            updated_message_data = await mongodb_client.get_recurring_message(message_id)
+            # Com o outbox, grava a mensagem antes da reivindicação (chave determinística)
+            outbox = get_outbox()
+            if outbox is not None:
+                last_sent_at = message_data.get("last_sent_at")
+                previous = int(last_sent_at.timestamp() * 1000) if last_sent_at else "first"
+                queued = await outbox.enqueue([build_outbox_message(
+                    f"recurring:{message_id}:{previous}",
+                    message_data["chat_id"],
+                    f"{message_data['message']}",
+                    parse_mode="Markdown"
+                )])
+                if not queued:
+                    raise RuntimeError("mensagem não gravada no outbox")
             
-            if not updated_message_data or not updated_message_data.get("active", False):
-                logger.info(f"Mensagem recorrente {message_id} não está mais ativa.")
-                if message_id in self.scheduled_tasks:
-                    del self.scheduled_tasks[message_id]
+            # Reivindica o envio com o token de fencing
+            claimed = await mongodb_client.update_recurring_message_last_sent(
+                message_id, fencing_token=self.fencing_token, sent_at=sent_at
+            )
+            if claimed is None:
+                raise RuntimeError("último envio não gravado")
+            if not claimed:
+                if self.fencing_token is not None:
+                    logger.warning(
+                        f"Envio da mensagem recorrente {message_id} rejeitado: token de fencing "
+                        f"{self.fencing_token} obsoleto. Deixando de enviar mensagens recorrentes."
+                    )
+                    self._step_down()
+                else:
+                    logger.warning(f"Mensagem recorrente {message_id} não encontrada no banco.")
+                    self._unschedule_message(message_id)
                 return
             
-            # Verifica se o horário de envio ainda é válido
-            last_sent_at = updated_message_data.get("last_sent_at")
-            interval_hours = updated_message_data.get("interval_hours", 1.0)
-            
-            now = datetime.now()
-            
-            # Se já foi enviada e ainda não passou tempo suficiente, reagenda
-            if last_sent_at and (now - last_sent_at).total_seconds() < interval_hours * 3600 * 0.9:
-                next_time = self._calculate_next_send_time(updated_message_data)
-                new_delay = max(1.0, (next_time - now).total_seconds())
-                
-                logger.info(f"Mensagem {message_id} foi enviada recentemente. Reagendando para {next_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                task = asyncio.create_task(
-                    self._send_message_after_delay(updated_message_data, new_delay)
+            if outbox is None:
+                await self.application.bot.send_message(
+                    chat_id=message_data["chat_id"],
+                    text=f"{message_data['message']}",
+                    parse_mode="Markdown"
                 )
-                self.scheduled_tasks[message_id] = task
-                return
-            
-            # Envia a mensagem
-            chat_id = updated_message_data["chat_id"]
-            message_text = updated_message_data["message"]
-            
-            await self.application.bot.send_message(
-                chat_id=chat_id,
-                text=f"{message_text}",
-                parse_mode="Markdown"
-            )
+            self.sent_total += 1
             
             logger.info(f"Mensagem recorrente enviada: {message_id}")
             
-            # Atualiza o timestamp de envio
-            await mongodb_client.update_recurring_message_last_sent(message_id)
-            
-            # Agenda o próximo envio
-            self._schedule_message(updated_message_data)
+            # Atualiza o último envio no cache e agenda o próximo envio
+            message_data["last_sent_at"] = sent_at
+            self._schedule_message(message_data)
             
-        except asyncio.CancelledError:
-            logger.info(f"Envio da mensagem recorrente {str(message_data['_id'])} cancelado.")
         except Exception as e:
-            message_id = str(message_data["_id"])
+            self.failed_total += 1
             logger.error(f"Erro ao enviar mensagem recorrente {message_id}: {e}")
             
-            # Tenta reagendar mesmo em caso de erro
-            try:
-                updated_message_data = await mongodb_client.get_recurring_message(message_id)
-                if updated_message_data and updated_message_data.get("active", False):
-                    # Agenda para tentar novamente em 5 minutos
-                    task = asyncio.create_task(
-                        self._send_message_after_delay(updated_message_data, 300)  # 5 minutos
-                    )
-                    self.scheduled_tasks[message_id] = task
-            except Exception as e2:
-                logger.error(f"Erro ao reagendar mensagem recorrente {message_id}: {e2}")
+            # Tenta novamente em 5 minutos
+            self._schedule_message(message_data, due=time.time() + self.RETRY_DELAY)
+    
+    def _step_down(self) -> None:
+        """
+        Deixa de enviar após uma escrita rejeitada pelo token de fencing.
+        
+        Chamado de dentro do loop de envio, então não aguarda as tarefas (como
+        stop): o loop termina ao ver running falso. A eleição de líder perde o
+        lease na próxima renovação e chama stop; se a réplica voltar a ser
+        líder, start recarrega as mensagens com o novo token.
+        """
+        self.running = False
+        self.fencing_token = None
+        self._timers.clear()
+        self._messages = {}
+        self._wakeup.set()
     
     async def _check_for_new_messages(self):
-        """Verifica periodicamente se há novas mensagens recorrentes."""
+        """Sincroniza periodicamente as mensagens criadas, editadas ou desativadas."""
         while self.running:
             try:
                 # Aguarda 5 minutos entre as verificações
-                await asyncio.sleep(300)
+                await asyncio.sleep(self.SYNC_INTERVAL)
                 
                 if not self.running:
                     break
                 
-                # Carrega todas as mensagens recorrentes ativas
-                messages = await mongodb_client.get_all_active_recurring_messages()
-                
-                # Verifica se há novas mensagens ou mensagens que não estão agendadas
-                for message in messages:
-                    message_id = str(message["_id"])
-                    if message_id not in self.scheduled_tasks:
-                        self._schedule_message(message)  # Removido o await, pois _schedule_message não é assíncrono
+                await self._sync_changes()
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Erro ao verificar novas mensagens recorrentes: {e}")
+    
+    async def _sync_changes(self):
+        """Aplica ao heap apenas as mensagens alteradas desde a última sincronização."""
+        if self._last_sync is None:
+            await self.load_recurring_messages()
+            return
+        
+        # Margem de 1 segundo para não perder alterações gravadas durante a consulta
+        since = self._last_sync - timedelta(seconds=1)
+        self._last_sync = datetime.now()
+        changed = await mongodb_client.get_recurring_messages_changed_since(since)
+        
+        for message in changed:
+            message_id = str(message["_id"])
+            if not message.get("active", False):
+                self._unschedule_message(message_id)
+                continue
+            
+            cached = self._messages.get(message_id)
+            if cached is not None:
+                # O último envio local é mais recente que o do banco quando o
+                # envio ocorreu depois da leitura
+                local_last_sent = cached.get("last_sent_at")
+                remote_last_sent = message.get("last_sent_at")
+                if local_last_sent and (remote_last_sent is None or local_last_sent > remote_last_sent):
+                    message["last_sent_at"] = local_last_sent
+            self._schedule_message(message)
+        
+        if changed:
+            logger.info(f"Sincronizadas {len(changed)} mensagens recorrentes alteradas.")
 
 # Instância global do gerenciador
 recurring_messages_manager = None
@@ -0,0 +1,120 @@
+"""
+Medição das etapas da inicialização do bot e aquecimento dos caches.
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Registra a duração de cada etapa da inicialização e resume no log.
+
+    Etapas executadas em paralelo (gather) aparecem com o tempo de cada uma e
+    o tempo total do grupo, para mostrar qual delas segura a inicialização.
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        """
+        Args:
+            started_at (Optional[float]): Início da contagem (time.perf_counter);
+                por padrão, o momento da criação.
+        """
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        # Formato: [(etapa, segundos)]
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        """Registra a duração de uma etapa."""
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Mede uma etapa.
+
+        Args:
+            name (str): Nome da etapa.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    async def gather(self, name: str, steps: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Executa etapas independentes em paralelo, medindo cada uma.
+
+        Args:
+            name (str): Nome do grupo de etapas.
+            steps (Dict[str, Awaitable[Any]]): Etapas por nome.
+
+        Returns:
+            Dict[str, Any]: Resultado de cada etapa.
+
+        Raises:
+            Exception: A primeira exceção levantada por uma das etapas.
+        """
+        async def timed(step: str, awaitable: Awaitable[Any]) -> Any:
+            started = time.perf_counter()
+            try:
+                return await awaitable
+            finally:
+                self.record(f"{name}/{step}", time.perf_counter() - started)
+
+        with self.phase(name):
+            results = await asyncio.gather(*(timed(step, awaitable) for step, awaitable in steps.items()))
+        return dict(zip(steps, results))
+
+    @property
+    def total(self) -> float:
+        """Tempo desde o início da contagem (em segundos)."""
+        return time.perf_counter() - self.started_at
+
+    def summary(self) -> str:
+        """Resumo das etapas, na ordem em que terminaram."""
+        parts = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.phases)
+        return f"Inicialização concluída em {self.total:.2f}s ({parts})"
+
+
+async def warm_up_caches() -> Dict[str, Any]:
+    """
+    Carrega em paralelo os dados consultados pelas primeiras atualizações.
+
+    - administradores do bot (admin_cache);
+    - índice de chats monitorados (chat_directory);
+    - âncoras de check-in ativas (a consulta abre conexões do pool e traz os
+      documentos para a memória do MongoDB antes das primeiras respostas).
+
+    As mensagens recorrentes são carregadas pela réplica líder, na eleição
+    (executada em paralelo com este aquecimento).
+
+    Returns:
+        Dict[str, Any]: Quantidade carregada (ou exceção) por cache.
+    """
+    from src.utils.admin_cache import admin_cache
+    from src.utils.chat_directory import chat_directory
+    from src.utils.mongodb_instance import mongodb_client
+
+    if mongodb_client.db is None:
+        return {}
+
+    async def bot_admins() -> int:
+        return len(await admin_cache.refresh_bot_admins())
+
+    async def monitored_chats() -> int:
+        await chat_directory.refresh()
+        return len(chat_directory)
+
+    async def active_anchors() -> int:
+        return await mongodb_client.count_active_checkin_anchors()
+
+    results = await asyncio.gather(bot_admins(), monitored_chats(), active_anchors(), return_exceptions=True)
+    loaded = dict(zip(("bot_admins", "monitored_chats", "active_anchors"), results))
+    logger.info(f"Caches aquecidos: {loaded}")
+    return loaded
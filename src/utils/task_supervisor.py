@@ -0,0 +1,260 @@
+"""
+Supervisor das tarefas em segundo plano: registro, métricas e desligamento ordenado.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+from src.utils.metrics import BACKGROUND_TASK_FAILURES, BACKGROUND_TASK_OLDEST_AGE, BACKGROUND_TASKS, registry
+
+logger = logging.getLogger(__name__)
+
+
+class SupervisedTask:
+    """Tarefa registrada no supervisor."""
+
+    __slots__ = ("task", "name", "owner", "drain", "persist", "started_at")
+
+    def __init__(self, task: asyncio.Task, name: str, owner: str, drain: bool,
+                 persist: Optional[Callable[[], Awaitable[Any]]]):
+        """
+        Args:
+            task (asyncio.Task): Tarefa em execução.
+            name (str): Nome da tarefa.
+            owner (str): Componente que criou a tarefa.
+            drain (bool): Se o desligamento deve concluir (ou gravar) a tarefa.
+            persist (Optional[Callable[[], Awaitable[Any]]]): Grava o trabalho pendente da tarefa.
+        """
+        self.task = task
+        self.name = name
+        self.owner = owner
+        self.drain = drain
+        self.persist = persist
+        self.started_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        """Tempo (em segundos) desde a criação da tarefa."""
+        return time.monotonic() - self.started_at
+
+
+class TaskSupervisor:
+    """
+    Registro das tarefas em segundo plano do bot.
+
+    Toda tarefa que continua depois da atualização que a criou (exclusões
+    temporárias, loops dos agendadores, gravações em lote) é criada com
+    spawn, com nome e dono. O supervisor guarda a referência da tarefa (sem
+    referência, ela pode ser coletada antes de terminar), registra exceções
+    não tratadas e expõe, por dono, quantas tarefas estão em execução e a
+    idade da mais antiga: uma contagem que só cresce indica vazamento.
+
+    No desligamento (drain):
+
+    - tarefas com persist são canceladas e o trabalho pendente é gravado
+      (uma exclusão temporária vai para o MongoDB e é feita pelo agendador de
+      exclusões no próximo início);
+    - as demais tarefas com drain=True são aguardadas até o prazo e
+      canceladas se não terminarem;
+    - tarefas com drain=False (loops de serviços) são paradas pelos seus
+      donos; cancel_all cancela as que sobrarem.
+    """
+
+    def __init__(self):
+        """Inicializa o supervisor sem tarefas."""
+        self._tasks: Dict[asyncio.Task, SupervisedTask] = {}
+        # Donos já vistos (os gauges de donos sem tarefas voltam a zero)
+        self._owners: set = set()
+        self.spawned_total = 0
+        self.failed_total = 0
+        self.persisted_total = 0
+        self.cancelled_total = 0
+
+    def __len__(self) -> int:
+        """Número de tarefas em execução."""
+        return len(self._tasks)
+
+    def spawn(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        name: str,
+        owner: str,
+        drain: bool = True,
+        persist: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> asyncio.Task:
+        """
+        Cria e registra uma tarefa em segundo plano.
+
+        Args:
+            coro (Coroutine[Any, Any, Any]): Corrotina da tarefa.
+            name (str): Nome da tarefa (por exemplo, "delete:<chat_id>:<message_id>").
+            owner (str): Componente que criou a tarefa (label das métricas).
+            drain (bool): Se o desligamento deve concluir a tarefa. Use False para
+                loops de serviços, que são parados pelos seus donos.
+            persist (Optional[Callable[[], Awaitable[Any]]]): Grava o trabalho pendente
+                da tarefa; com persist, o desligamento cancela a tarefa e grava o
+                trabalho em vez de aguardá-la.
+
+        Returns:
+            asyncio.Task: Tarefa criada.
+
+        Raises:
+            RuntimeError: Se não houver um loop de eventos em execução.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            coro.close()
+            raise
+        task = loop.create_task(coro, name=f"{owner}:{name}")
+        self._tasks[task] = SupervisedTask(task, name, owner, drain, persist)
+        self._owners.add(owner)
+        self.spawned_total += 1
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        """Remove a tarefa do registro e registra a exceção, se houver."""
+        entry = self._tasks.pop(task, None)
+        if entry is None or task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed_total += 1
+            BACKGROUND_TASK_FAILURES.inc(entry.owner)
+            logger.error(
+                f"Tarefa em segundo plano {entry.owner}/{entry.name} falhou: {error!r}",
+                exc_info=(type(error), error, error.__traceback__)
+            )
+
+    def tasks(self, owner: Optional[str] = None) -> List[SupervisedTask]:
+        """
+        Lista as tarefas em execução.
+
+        Args:
+            owner (Optional[str]): Apenas as tarefas deste dono.
+
+        Returns:
+            List[SupervisedTask]: Tarefas, da mais antiga para a mais nova.
+        """
+        entries = [entry for entry in self._tasks.values() if owner is None or entry.owner == owner]
+        return sorted(entries, key=lambda entry: entry.started_at)
+
+    def owner_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Obtém a contagem e a idade da tarefa mais antiga de cada dono.
+
+        Returns:
+            Dict[str, Dict[str, float]]: {dono: {"tasks": ..., "oldest_age_seconds": ...}}.
+        """
+        stats = {owner: {"tasks": 0, "oldest_age_seconds": 0.0} for owner in self._owners}
+        for entry in self._tasks.values():
+            owner = stats[entry.owner]
+            owner["tasks"] += 1
+            owner["oldest_age_seconds"] = max(owner["oldest_age_seconds"], entry.age)
+        return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtém as métricas do supervisor.
+
+        Returns:
+            Dict[str, Any]: Tarefas em execução, idade da mais antiga e totais.
+        """
+        return {
+            "tasks": len(self._tasks),
+            "oldest_age_seconds": max((entry.age for entry in self._tasks.values()), default=0.0),
+            "spawned_total": self.spawned_total,
+            "failed_total": self.failed_total,
+            "persisted_total": self.persisted_total,
+            "cancelled_total": self.cancelled_total,
+        }
+
+    def collect_metrics(self) -> None:
+        """Atualiza os gauges por dono (coletor chamado a cada leitura de /metrics)."""
+        for owner, stats in self.owner_stats().items():
+            BACKGROUND_TASKS.set(stats["tasks"], owner)
+            BACKGROUND_TASK_OLDEST_AGE.set(stats["oldest_age_seconds"], owner)
+
+    async def drain(self, timeout: float) -> Dict[str, int]:
+        """
+        Conclui ou grava o trabalho pendente das tarefas com drain=True, dentro do prazo.
+
+        Args:
+            timeout (float): Prazo (em segundos).
+
+        Returns:
+            Dict[str, int]: Tarefas concluídas, gravadas e canceladas.
+        """
+        deadline = time.monotonic() + timeout
+        entries = [entry for entry in self._tasks.values() if entry.drain and not entry.task.done()]
+        to_persist = [entry for entry in entries if entry.persist is not None]
+        to_wait = [entry.task for entry in entries if entry.persist is None]
+
+        persisted = 0
+        if to_persist:
+            for entry in to_persist:
+                entry.task.cancel()
+            await asyncio.gather(*(entry.task for entry in to_persist), return_exceptions=True)
+            results = await asyncio.gather(
+                *(asyncio.wait_for(entry.persist(), timeout=max(0.0, deadline - time.monotonic()))
+                  for entry in to_persist),
+                return_exceptions=True
+            )
+            for entry, result in zip(to_persist, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"Erro ao gravar o trabalho pendente de {entry.owner}/{entry.name}: {result!r}")
+                else:
+                    persisted += 1
+            self.persisted_total += persisted
+
+        pending: set = set()
+        if to_wait:
+            _, pending = await asyncio.wait(to_wait, timeout=max(0.0, deadline - time.monotonic()))
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            self.cancelled_total += len(pending)
+
+        summary = {
+            "completed": len(to_wait) - len(pending),
+            "persisted": persisted,
+            "cancelled": len(pending) + len(to_persist) - persisted,
+        }
+        if entries:
+            logger.info(
+                f"Tarefas em segundo plano: {summary['completed']} concluídas, "
+                f"{summary['persisted']} gravadas para o próximo início, "
+                f"{summary['cancelled']} canceladas (prazo de {timeout:.0f}s)"
+            )
+        return summary
+
+    async def cancel_all(self, timeout: float = 5.0) -> int:
+        """
+        Cancela as tarefas que ainda estiverem em execução (após os donos pararem seus serviços).
+
+        Args:
+            timeout (float): Tempo máximo de espera pelo cancelamento (em segundos).
+
+        Returns:
+            int: Número de tarefas canceladas.
+        """
+        entries = self.tasks()
+        if not entries:
+            return 0
+        logger.warning(
+            "Tarefas em segundo plano ainda em execução no desligamento: "
+            + ", ".join(f"{entry.owner}/{entry.name} ({entry.age:.0f}s)" for entry in entries)
+        )
+        for entry in entries:
+            entry.task.cancel()
+        await asyncio.wait([entry.task for entry in entries], timeout=timeout)
+        self.cancelled_total += len(entries)
+        return len(entries)
+
+
+# Supervisor global
+task_supervisor = TaskSupervisor()
+registry.add_collector(task_supervisor.collect_metrics)
@@ -0,0 +1,45 @@
+"""
+Funções de normalização de texto.
+"""
+import re
+import unicodedata
+
+# Acentos do bloco "Combining Diacritical Marks" (todos os do português), exceto
+# U+034F, que não é um caractere de combinação para unicodedata.combining
+_LATIN_COMBINING_MARKS = re.compile("[\u0300-\u034e\u0350-\u036f]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza um texto para comparação: remove acentos, ignora maiúsculas e
+    minúsculas (casefold) e colapsa espaços.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto normalizado ("" para valores vazios).
+    """
+    if not text:
+        return ""
+    if text.isascii():
+        # Sem acentos nem formas de compatibilidade: basta ignorar maiúsculas e espaços
+        return " ".join(text.lower().split())
+    stripped = _LATIN_COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text))
+    if not stripped.isascii():
+        # Outros caracteres de combinação (raros): filtra caractere a caractere
+        stripped = "".join(char for char in stripped if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def normalize_chat_name(name: str) -> str:
+    """
+    Normaliza o título ou username de um chat (também remove o @ inicial).
+
+    Args:
+        name (str): Título ou username do chat.
+
+    Returns:
+        str: Nome normalizado.
+    """
+    return normalize_text(name).lstrip("@").strip()
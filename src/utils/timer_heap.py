@@ -0,0 +1,127 @@
+"""
+Heap de prazos indexado por chave, usado pelos agendadores do bot.
+"""
+import heapq
+import itertools
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class TimerHeap:
+    """
+    Min-heap de prazos indexado por chave.
+
+    Inserção e reagendamento custam O(log n). A remoção é preguiçosa (O(1)):
+    a entrada antiga fica no heap e é descartada quando chega ao topo. O heap
+    é compactado quando o número de entradas obsoletas passa do dobro das válidas.
+    """
+
+    def __init__(self):
+        """Inicializa o heap vazio."""
+        self._heap: List[List[Any]] = []
+        # Formato: {chave: (sequência, prazo, payload)}
+        self._entries: Dict[Hashable, Tuple[int, float, Any]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def push(self, key: Hashable, due: float, payload: Any = None) -> None:
+        """
+        Agenda (ou reagenda) uma chave para o prazo informado.
+
+        Args:
+            key (Hashable): Chave da entrada.
+            due (float): Prazo (timestamp) da entrada.
+            payload (Any): Dados associados à entrada.
+        """
+        seq = next(self._counter)
+        self._entries[key] = (seq, due, payload)
+        heapq.heappush(self._heap, [due, seq, key])
+        self._maybe_compact()
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        Remove uma chave do heap.
+
+        Args:
+            key (Hashable): Chave da entrada.
+
+        Returns:
+            bool: True se a chave existia, False caso contrário.
+        """
+        removed = self._entries.pop(key, None) is not None
+        if removed:
+            self._maybe_compact()
+        return removed
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        """
+        Obtém o prazo e o payload de uma chave.
+
+        Args:
+            key (Hashable): Chave da entrada.
+
+        Returns:
+            Optional[Tuple[float, Any]]: (prazo, payload) ou None se não existir.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[1], entry[2]
+
+    def peek_due(self) -> Optional[float]:
+        """
+        Obtém o prazo mais próximo sem removê-lo.
+
+        Returns:
+            Optional[float]: Prazo mais próximo ou None se o heap estiver vazio.
+        """
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> List[Tuple[Hashable, float, Any]]:
+        """
+        Remove e retorna todas as entradas vencidas.
+
+        Args:
+            now (float): Instante de referência.
+            limit (Optional[int]): Número máximo de entradas retornadas.
+
+        Returns:
+            List[Tuple[Hashable, float, Any]]: Lista de (chave, prazo, payload) em ordem de prazo.
+        """
+        due_entries = []
+        while self._heap and (limit is None or len(due_entries) < limit):
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            due, _, key = heapq.heappop(self._heap)
+            _, _, payload = self._entries.pop(key)
+            due_entries.append((key, due, payload))
+        return due_entries
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        self._heap.clear()
+        self._entries.clear()
+
+    def _discard_stale(self) -> None:
+        """Descarta entradas obsoletas do topo do heap."""
+        while self._heap:
+            _, seq, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self) -> None:
+        """Reconstrói o heap quando há entradas obsoletas demais."""
+        if len(self._heap) <= 2 * len(self._entries) + 64:
+            return
+        self._heap = [
+            [due, seq, key] for key, (seq, due, _) in self._entries.items()
+        ]
+        heapq.heapify(self._heap)
@@ -0,0 +1,319 @@
+"""
+Gravação das atualizações recebidas (anonimizadas) em JSONL, para replay.
+
+Cada arquivo começa com um cabeçalho e tem uma linha por atualização:
+
+    {"type": "header", "recorded_at": 1718000000.0, "bot_id": ..., "bot_username": ..., "owner_id": ...}
+    {"t": 0.412, "update": {...}}
+
+"t" é o tempo (em segundos) desde o início da gravação. O replay
+(benchmarks.replay_updates) reproduz as atualizações no mesmo grafo de
+handlers do bot, respeitando (ou comprimindo) esses intervalos.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Grupo do handler de gravação: roda antes de todos os handlers do bot
+RECORD_GROUP = -101
+
+# Campos com IDs de usuários e chats (inteiros) ou de objetos (texto)
+ID_KEYS = frozenset({"id", "user_id", "chat_id", "sender_chat_id", "migrate_to_chat_id", "migrate_from_chat_id"})
+# Campos com IDs de arquivos do Telegram
+FILE_ID_KEYS = frozenset({"file_id", "file_unique_id"})
+# Campos com dados pessoais, substituídos por pseudônimos
+NAME_KEYS = frozenset({"first_name", "last_name", "title", "username"})
+# Campos com texto livre
+TEXT_KEYS = frozenset({"text", "caption"})
+# Campos descartados (dados pessoais sem utilidade para o replay)
+DROPPED_KEYS = frozenset({
+    "phone_number", "email", "bio", "invite_link", "location", "contact", "venue",
+    "vcard", "address", "description", "shipping_query", "pre_checkout_query",
+})
+# Entidades preservadas no texto anonimizado (decidem qual handler atende a mensagem)
+KEPT_ENTITIES = frozenset({"bot_command", "hashtag"})
+
+
+class UpdateAnonymizer:
+    """
+    Anonimiza atualizações da Bot API de forma consistente dentro de uma gravação.
+
+    IDs são trocados por um HMAC com sal aleatório (o mesmo usuário ou chat
+    recebe sempre o mesmo ID falso, mantendo o sinal), nomes e usernames viram
+    pseudônimos e o texto livre é mascarado caractere a caractere (letras
+    viram "x" e dígitos "0"), preservando o tamanho, os offsets das entidades,
+    comandos, hashtags e menções ao próprio bot. O ID do bot não é alterado,
+    para que respostas ao bot continuem sendo reconhecidas.
+    """
+
+    def __init__(self, bot_id: Optional[int] = None, bot_username: Optional[str] = None,
+                 keep_text: bool = False, salt: Optional[bytes] = None):
+        """
+        Args:
+            bot_id (Optional[int]): ID do bot (mantido como está).
+            bot_username (Optional[str]): Username do bot (menções a ele são mantidas).
+            keep_text (bool): Mantém o texto das mensagens sem mascarar.
+            salt (Optional[bytes]): Sal do HMAC (aleatório se não informado).
+        """
+        self.bot_id = bot_id
+        self.bot_username = (bot_username or "").lower()
+        self.keep_text = keep_text
+        self._salt = salt or secrets.token_bytes(16)
+
+    def _digest(self, value: Any) -> bytes:
+        return hmac.new(self._salt, str(value).encode("utf-8"), hashlib.sha256).digest()
+
+    def anonymize_id(self, value: Any) -> Any:
+        """
+        Troca um ID por outro, de forma consistente.
+
+        Args:
+            value (Any): ID inteiro (usuário ou chat) ou texto (callback query, inline).
+
+        Returns:
+            Any: ID anonimizado, do mesmo tipo (inteiros mantêm o sinal e o ID do bot).
+        """
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int):
+            if value == self.bot_id:
+                return value
+            fake = int.from_bytes(self._digest(abs(value))[:6], "big") % 10 ** 12 + 1
+            return -fake if value < 0 else fake
+        if isinstance(value, str):
+            return self._digest(value).hex()[:16]
+        return value
+
+    def pseudonym(self, key: str, value: Any) -> Any:
+        """Troca um nome, título ou username por um pseudônimo estável."""
+        if not isinstance(value, str):
+            return value
+        if key == "username" and value.lower() == self.bot_username:
+            return value
+        label = {"first_name": "Usuario", "last_name": "Sobrenome", "title": "Grupo", "username": "user"}[key]
+        suffix = self._digest(value).hex()[:8]
+        return f"{label}_{suffix}" if key == "username" else f"{label} {suffix}"
+
+    def mask_text(self, text: str, entities: Optional[list]) -> str:
+        """
+        Mascara o texto livre, preservando entidades relevantes para o roteamento.
+
+        Os offsets das entidades são contados em unidades UTF-16; só caracteres
+        do plano básico são trocados (por outros do plano básico), para que os
+        offsets continuem válidos.
+
+        Args:
+            text (str): Texto original.
+            entities (Optional[list]): Entidades da mensagem (formato da Bot API).
+
+        Returns:
+            str: Texto mascarado.
+        """
+        if self.keep_text or not text:
+            return text
+
+        encoded = text.encode("utf-16-le")
+        kept: Set[int] = set()
+        for entity in entities or []:
+            start, end = entity.get("offset", 0), entity.get("offset", 0) + entity.get("length", 0)
+            segment = encoded[start * 2:end * 2].decode("utf-16-le", errors="ignore")
+            is_bot_mention = entity.get("type") == "mention" and segment[1:].lower() == self.bot_username
+            if entity.get("type") in KEPT_ENTITIES or is_bot_mention:
+                kept.update(range(start, end))
+
+        masked = []
+        position = 0
+        for char in text:
+            width = 2 if ord(char) > 0xFFFF else 1
+            if position not in kept and ord(char) <= 0xFFFF:
+                if char.isalpha():
+                    char = "x"
+                elif char.isdigit():
+                    char = "0"
+            masked.append(char)
+            position += width
+        return "".join(masked)
+
+    def anonymize(self, data: Any) -> Any:
+        """
+        Anonimiza recursivamente uma atualização (ou parte dela) no formato da Bot API.
+
+        Args:
+            data (Any): Atualização serializada (Update.to_dict()).
+
+        Returns:
+            Any: Cópia anonimizada.
+        """
+        if isinstance(data, list):
+            return [self.anonymize(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result: Dict[str, Any] = {}
+        for key, value in data.items():
+            if key in DROPPED_KEYS:
+                continue
+            if key in ID_KEYS:
+                result[key] = self.anonymize_id(value)
+            elif key in FILE_ID_KEYS:
+                result[key] = self.anonymize_id(str(value))
+            elif key in NAME_KEYS:
+                result[key] = self.pseudonym(key, value)
+            elif key in TEXT_KEYS and isinstance(value, str):
+                entities = data.get("entities" if key == "text" else "caption_entities")
+                result[key] = self.mask_text(value, entities)
+            elif key == "query" and isinstance(value, str):
+                result[key] = self.mask_text(value, None)
+            else:
+                result[key] = self.anonymize(value)
+        return result
+
+
+class UpdateRecorder:
+    """
+    Grava cada atualização recebida, anonimizada, em um arquivo JSONL.
+
+    Se o arquivo já existir (por exemplo, após um reinício), a nova gravação
+    vai para um arquivo com data e hora no nome: cada gravação tem seu próprio
+    sal, e misturá-las quebraria a correspondência entre os IDs. A gravação
+    para após MAX_UPDATES atualizações, para não encher o disco.
+    """
+
+    # Número máximo de atualizações gravadas por arquivo
+    MAX_UPDATES = 100_000
+
+    def __init__(self, path: str, keep_text: bool = False):
+        """
+        Args:
+            path (str): Arquivo JSONL de destino.
+            keep_text (bool): Mantém o texto das mensagens sem mascarar.
+        """
+        self.path = path
+        self.keep_text = keep_text
+        self.recorded = 0
+        self._anonymizer: Optional[UpdateAnonymizer] = None
+        self._file = None
+        self._started_at = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """Indica se a gravação está ativa."""
+        return self._file is not None
+
+    def start(self) -> None:
+        """Abre o arquivo de gravação (o cabeçalho é gravado com a primeira atualização)."""
+        if self._file is not None:
+            return
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            root, ext = os.path.splitext(self.path)
+            self.path = f"{root}-{datetime.now().strftime('%Y%m%d-%H%M%S')}{ext or '.jsonl'}"
+
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._started_at = time.time()
+        logger.info(f"Gravando atualizações (anonimizadas) em {self.path}")
+
+    def stop(self) -> None:
+        """Fecha o arquivo."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        logger.info(f"Gravação de atualizações encerrada: {self.recorded} em {self.path}")
+
+    async def record(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """
+        Handler que grava a atualização (registrado no grupo RECORD_GROUP).
+
+        Args:
+            update (Update): Objeto de atualização do Telegram.
+            context (ContextTypes.DEFAULT_TYPE): Contexto do callback.
+        """
+        if self._file is None:
+            return
+        if self._anonymizer is None:
+            # O bot só é conhecido depois do initialize() da Application
+            self._write_header(context.bot.id, context.bot.username)
+
+        try:
+            self._write({
+                "t": round(time.time() - self._started_at, 3),
+                "update": self._anonymizer.anonymize(update.to_dict()),
+            })
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Erro ao gravar a atualização {update.update_id}: {e}")
+            return
+
+        self.recorded += 1
+        if self.recorded >= self.MAX_UPDATES:
+            logger.warning(f"Limite de {self.MAX_UPDATES} atualizações gravadas atingido")
+            self.stop()
+
+    def _write_header(self, bot_id: int, bot_username: Optional[str]) -> None:
+        """Cria o anonimizador desta gravação e grava o cabeçalho."""
+        self._anonymizer = UpdateAnonymizer(bot_id, bot_username, self.keep_text)
+        try:
+            owner_id = self._anonymizer.anonymize_id(Config.get_owner_id())
+        except ValueError:
+            owner_id = None
+        self._write({
+            "type": "header",
+            "recorded_at": self._started_at,
+            "bot_id": bot_id,
+            "bot_username": bot_username,
+            "owner_id": owner_id,
+            "keep_text": self.keep_text,
+        })
+
+    def _write(self, payload: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+# Instância global, criada quando UPDATE_RECORD_FILE está definido
+update_recorder: Optional[UpdateRecorder] = None
+
+
+def start_update_recorder(application: Application) -> Optional[UpdateRecorder]:
+    """
+    Começa a gravar as atualizações recebidas, se UPDATE_RECORD_FILE estiver definido.
+
+    Args:
+        application (Application): Aplicação do Telegram.
+
+    Returns:
+        Optional[UpdateRecorder]: Gravador ativo (None se a gravação estiver desativada).
+    """
+    global update_recorder
+    path = Config.get_update_record_file()
+    if not path or update_recorder is not None:
+        return update_recorder
+
+    update_recorder = UpdateRecorder(path, keep_text=Config.get_update_record_keep_text())
+    try:
+        update_recorder.start()
+    except OSError as e:
+        logger.error(f"Não foi possível gravar as atualizações em {path}: {e}")
+        update_recorder = None
+        return None
+    application.add_handler(TypeHandler(Update, update_recorder.record), group=RECORD_GROUP)
+    return update_recorder
+
+
+def stop_update_recorder() -> None:
+    """Encerra a gravação de atualizações, se ativa."""
+    global update_recorder
+    if update_recorder is not None:
+        update_recorder.stop()
+        update_recorder = None
@@ -0,0 +1,121 @@
+"""
+Testes para o cache de administradores.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.utils.admin_cache import AdminCache
+
+
+def _administrators(*user_ids):
+    """Cria a resposta de getChatAdministrators com os IDs informados."""
+    return [MagicMock(user=MagicMock(id=user_id)) for user_id in user_ids]
+
+
+@pytest.fixture
+def bot():
+    """Bot com getChatAdministrators simulado."""
+    mock_bot = MagicMock()
+    mock_bot.get_chat_administrators = AsyncMock(return_value=_administrators(1, 2))
+    return mock_bot
+
+
+@pytest.mark.asyncio
+async def test_chat_admins_fetched_once(bot):
+    """Testa que a lista é obtida com uma chamada e respostas positivas e negativas vêm do cache."""
+    cache = AdminCache()
+
+    assert await cache.is_chat_admin(bot, -100, 1) is True
+    assert await cache.is_chat_admin(bot, -100, 2) is True
+    assert await cache.is_chat_admin(bot, -100, 3) is False
+    assert await cache.is_chat_admin(bot, -100, 3) is False
+
+    bot.get_chat_administrators.assert_called_once_with(-100)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checks_share_fetch(bot):
+    """Testa que verificações simultâneas no mesmo chat fazem uma única chamada à API."""
+    cache = AdminCache()
+
+    results = await asyncio.gather(*(cache.is_chat_admin(bot, -100, user_id) for user_id in (1, 2, 3)))
+
+    assert results == [True, True, False]
+    bot.get_chat_administrators.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_refetched(bot):
+    """Testa que a lista é recarregada após o TTL."""
+    cache = AdminCache()
+    with patch("src.utils.admin_cache.time.monotonic", return_value=1000.0):
+        await cache.is_chat_admin(bot, -100, 1)
+    with patch("src.utils.admin_cache.time.monotonic", return_value=1000.0 + AdminCache.TTL + 1):
+        await cache.is_chat_admin(bot, -100, 1)
+
+    assert bot.get_chat_administrators.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_failure_is_cached_briefly(bot):
+    """Testa que uma falha na API nega o acesso e não é repetida até o FAILURE_TTL."""
+    bot.get_chat_administrators.side_effect = Exception("Chat not found")
+    cache = AdminCache()
+
+    with patch("src.utils.admin_cache.time.monotonic", return_value=1000.0):
+        assert await cache.is_chat_admin(bot, -100, 1) is False
+        assert await cache.is_chat_admin(bot, -100, 1) is False
+    assert bot.get_chat_administrators.call_count == 1
+
+    with patch("src.utils.admin_cache.time.monotonic", return_value=1000.0 + AdminCache.FAILURE_TTL + 1):
+        await cache.is_chat_admin(bot, -100, 1)
+    assert bot.get_chat_administrators.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_member_update_changes_cached_list(bot):
+    """Testa que promoções e rebaixamentos (chat_member) atualizam a lista sem nova chamada."""
+    cache = AdminCache()
+    await cache.get_chat_admins(bot, -100)
+
+    cache.apply_member_update(-100, 3, True)
+    cache.apply_member_update(-100, 1, False)
+    # Chats fora do cache são ignorados
+    cache.apply_member_update(-200, 3, True)
+
+    assert await cache.is_chat_admin(bot, -100, 3) is True
+    assert await cache.is_chat_admin(bot, -100, 1) is False
+    bot.get_chat_administrators.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(bot):
+    """Testa que o chat menos usado é descartado quando o cache está cheio."""
+    cache = AdminCache()
+    cache.MAX_CHATS = 2
+
+    await cache.get_chat_admins(bot, -1)
+    await cache.get_chat_admins(bot, -2)
+    await cache.get_chat_admins(bot, -1)
+    await cache.get_chat_admins(bot, -3)
+
+    assert list(cache._chats) == [-1, -3]
+
+
+@pytest.mark.asyncio
+async def test_bot_admins_cached_and_invalidated():
+    """Testa que a lista de administradores do bot é lida uma vez e recarregada após invalidação."""
+    cache = AdminCache()
+    with patch("src.utils.admin_cache.mongodb_client") as mock_client:
+        mock_client.get_admins = AsyncMock(return_value=[{"admin_id": 10}])
+
+        assert await cache.is_bot_admin(10) is True
+        assert await cache.is_bot_admin(11) is False
+        assert mock_client.get_admins.call_count == 1
+
+        cache.invalidate_bot_admins()
+        mock_client.get_admins.return_value = [{"admin_id": 10}, {"admin_id": 11}]
+        assert await cache.is_bot_admin(11) is True
+        assert mock_client.get_admins.call_count == 2
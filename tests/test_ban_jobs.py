@@ -0,0 +1,264 @@
+"""
+Testes para os jobs de banimento em massa.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter
+
+from src.utils.ban_jobs import BanJobManager, format_ban_report, group_blacklist_entries
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pelos jobs de banimento."""
+    with patch("src.utils.ban_jobs.mongodb_client") as mock_client:
+        mock_client.create_ban_job = AsyncMock(return_value=True)
+        mock_client.claim_ban_job = AsyncMock(return_value=None)
+        mock_client.get_pending_ban_items = AsyncMock(return_value=[])
+        mock_client.remove_blacklist_items_by_ids = AsyncMock(side_effect=lambda ids: len(ids))
+        mock_client.record_ban_job_results = AsyncMock(return_value=True)
+        mock_client.finish_ban_job = AsyncMock(return_value=None)
+        mock_client.heartbeat_ban_job = AsyncMock(return_value=True)
+        mock_client.get_failed_ban_items = AsyncMock(return_value=[])
+        yield mock_client
+
+
+@pytest.fixture
+def bot():
+    """Bot com as chamadas usadas pelo executor."""
+    mock_bot = MagicMock()
+    mock_bot.ban_chat_member = AsyncMock(return_value=True)
+    mock_bot.edit_message_text = AsyncMock()
+    mock_bot.send_message = AsyncMock()
+    return mock_bot
+
+
+def _job(total):
+    return {
+        "_id": "job1", "chat_id": -100123, "group_name": "Gym <Nation>", "report_chat_id": 42,
+        "status_message_id": 7, "total": total, "banned": 0, "failed": 0, "removed": 0, "status": "running"
+    }
+
+
+def test_group_blacklist_entries_single_pass():
+    """Testa o agrupamento por usuário, preservando a ordem e os detalhes da primeira entrada."""
+    ids = [ObjectId() for _ in range(4)]
+    entries = [
+        {"_id": ids[0], "user_id": 1, "user_name": "User One", "username": "one"},
+        {"_id": ids[1], "user_id": 2, "user_name": "User Two"},
+        {"_id": ids[2], "user_id": 1, "user_name": "Outro nome"},
+        {"_id": ids[3], "user_id": None},
+    ]
+
+    items = group_blacklist_entries(entries)
+
+    assert items == [
+        {"user_id": 1, "display": "@one (1)", "entry_ids": [ids[0], ids[2]]},
+        {"user_id": 2, "display": "User Two (2)", "entry_ids": [ids[1]]},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_job_persists_items_and_runs(mock_mongodb, bot):
+    """Testa que o job é gravado com um item por usuário e só executado após start_job."""
+    entries = [
+        {"_id": ObjectId(), "user_id": 1, "user_name": "User One"},
+        {"_id": ObjectId(), "user_id": 1, "user_name": "User One"},
+        {"_id": ObjectId(), "user_id": 2, "user_name": "User Two"},
+    ]
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.owner = "replica-1"
+
+    job = await manager.create_job(-100123, "Gym", entries, 1, 42, 7)
+
+    stored_job, items = mock_mongodb.create_ban_job.call_args[0]
+    assert stored_job["owner"] == "replica-1"
+    assert stored_job["status_message_id"] == 7
+    assert [item["user_id"] for item in items] == [1, 2]
+    assert job["total"] == 2
+    assert job["_id"] not in manager._jobs
+    manager.start_job(job)
+    assert job["_id"] in manager._jobs
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_run_bans_concurrently_and_reports(mock_mongodb, bot):
+    """Testa a execução: banimentos, remoção das entradas dos banidos, gravação e relatório."""
+    entry_ids = [ObjectId(), ObjectId(), ObjectId()]
+    mock_mongodb.get_pending_ban_items.return_value = [
+        {"user_id": 1, "display": "User One (1)", "entry_ids": [entry_ids[0], entry_ids[2]]},
+        {"user_id": 2, "display": "User Two (2)", "entry_ids": [entry_ids[1]]},
+    ]
+
+    async def ban_side_effect(chat_id, user_id):
+        if user_id == 2:
+            raise BadRequest("User not found")
+        return True
+    bot.ban_chat_member.side_effect = ban_side_effect
+    finished = {**_job(2), "status": "done", "banned": 1, "failed": 1, "removed": 2}
+    mock_mongodb.finish_ban_job.return_value = finished
+    mock_mongodb.get_failed_ban_items.return_value = [
+        {"user_id": 2, "display": "User Two (2)", "error": "User not found"}
+    ]
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.owner = "replica-1"
+
+    await manager._run(_job(2))
+
+    assert bot.ban_chat_member.call_count == 2
+    mock_mongodb.remove_blacklist_items_by_ids.assert_called_once_with([entry_ids[0], entry_ids[2]])
+    mock_mongodb.record_ban_job_results.assert_called_once_with(
+        "job1", "replica-1", [1], [(2, "User not found")], 2
+    )
+    mock_mongodb.finish_ban_job.assert_called_once_with("job1", "replica-1")
+    args, kwargs = bot.edit_message_text.call_args
+    assert kwargs["chat_id"] == 42 and kwargs["message_id"] == 7
+    assert kwargs["parse_mode"] == ParseMode.HTML
+    assert "<b>Banidos com sucesso:</b> ✅ 1" in args[0]
+    assert "- User Two (2): User not found" in args[0]
+
+
+@pytest.mark.asyncio
+async def test_run_stops_when_ownership_is_lost(mock_mongodb, bot):
+    """Testa que o job para se outra réplica assumiu sua execução."""
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.FLUSH_SIZE = 1
+    mock_mongodb.get_pending_ban_items.return_value = [
+        {"user_id": 1, "display": "User One (1)", "entry_ids": []},
+        {"user_id": 2, "display": "User Two (2)", "entry_ids": []},
+    ]
+    mock_mongodb.record_ban_job_results.return_value = False
+
+    await manager._run(_job(2))
+
+    assert bot.ban_chat_member.call_count == 1
+    mock_mongodb.finish_ban_job.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_job_running_when_items_cannot_be_read(mock_mongodb, bot):
+    """Testa que um erro ao ler os itens pendentes não conclui o job."""
+    mock_mongodb.get_pending_ban_items.return_value = None
+    manager = BanJobManager(bot, rate_per_second=1000)
+
+    await manager._run(_job(2))
+
+    bot.ban_chat_member.assert_not_called()
+    mock_mongodb.finish_ban_job.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_is_renewed_during_a_slow_batch(mock_mongodb, bot):
+    """Testa que o heartbeat é renovado enquanto um lote está parado (por exemplo, em um RetryAfter)."""
+    async def slow_ban(chat_id, user_id):
+        await asyncio.sleep(0.1)
+        return True
+    bot.ban_chat_member.side_effect = slow_ban
+    mock_mongodb.get_pending_ban_items.return_value = [{"user_id": 1, "display": "User One (1)", "entry_ids": []}]
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.owner = "replica-1"
+    manager.HEARTBEAT_INTERVAL = 0.02
+
+    await manager._run(_job(1))
+    renewals = mock_mongodb.heartbeat_ban_job.await_count
+    await asyncio.sleep(0.05)
+
+    assert renewals >= 2
+    mock_mongodb.heartbeat_ban_job.assert_awaited_with("job1", "replica-1")
+    # O timer para junto com o job
+    assert mock_mongodb.heartbeat_ban_job.await_count == renewals
+
+
+@pytest.mark.asyncio
+async def test_ban_retries_after_rate_limit(mock_mongodb, bot):
+    """Testa que um RetryAfter pausa o limitador e tenta o banimento novamente."""
+    bot.ban_chat_member.side_effect = [RetryAfter(0), True]
+    manager = BanJobManager(bot, rate_per_second=1000)
+
+    error = await manager._ban(-100123, {"user_id": 1})
+
+    assert error is None
+    assert bot.ban_chat_member.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_resume_stale_jobs(mock_mongodb, bot):
+    """Testa que jobs abandonados são reservados e retomados."""
+    mock_mongodb.claim_ban_job.side_effect = [_job(0), None]
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.owner = "replica-2"
+
+    resumed = await manager.resume_stale_jobs()
+    await asyncio.sleep(0)
+
+    assert resumed == 1
+    assert mock_mongodb.claim_ban_job.call_args_list[0][0][:2] == ("replica-2", BanJobManager.STALE_AFTER)
+    mock_mongodb.get_pending_ban_items.assert_called_with("job1")
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_finishes_in_flight_batch(mock_mongodb, bot):
+    """Testa que stop deixa o lote em andamento ser gravado e não inicia o próximo."""
+    release = asyncio.Event()
+
+    async def slow_ban(chat_id, user_id):
+        await release.wait()
+        return True
+    bot.ban_chat_member.side_effect = slow_ban
+    mock_mongodb.get_pending_ban_items.return_value = [
+        {"user_id": 1, "display": "User One (1)", "entry_ids": []},
+        {"user_id": 2, "display": "User Two (2)", "entry_ids": []},
+    ]
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.FLUSH_SIZE = 1
+    manager.start_job(_job(2))
+    while not bot.ban_chat_member.called:
+        await asyncio.sleep(0)
+
+    stopping = asyncio.create_task(manager.stop(timeout=1))
+    await asyncio.sleep(0)
+    release.set()
+    await stopping
+
+    assert bot.ban_chat_member.call_count == 1
+    mock_mongodb.record_ban_job_results.assert_called_once()
+    mock_mongodb.finish_ban_job.assert_not_called()
+    assert manager._jobs == {}
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_jobs_after_timeout(mock_mongodb, bot):
+    """Testa que jobs que não concluem o lote dentro do prazo são cancelados."""
+    async def hanging_ban(chat_id, user_id):
+        await asyncio.Event().wait()
+    bot.ban_chat_member.side_effect = hanging_ban
+    mock_mongodb.get_pending_ban_items.return_value = [
+        {"user_id": 1, "display": "User One (1)", "entry_ids": []},
+    ]
+    manager = BanJobManager(bot, rate_per_second=1000)
+    manager.start_job(_job(1))
+    while not bot.ban_chat_member.called:
+        await asyncio.sleep(0)
+
+    await manager.stop(timeout=0.01)
+
+    mock_mongodb.record_ban_job_results.assert_not_called()
+    assert manager._jobs == {}
+
+
+def test_format_ban_report_truncates_failures():
+    """Testa o relatório final com mais falhas do que as listadas."""
+    job = {**_job(20), "banned": 15, "failed": 5, "removed": 15}
+    failed_items = [{"user_id": 1, "display": "<User> (1)", "error": "x"}]
+
+    report = format_ban_report(job, failed_items)
+
+    assert "<b>Grupo:</b> Gym &lt;Nation&gt; (ID: <code>-100123</code>)" in report
+    assert "- &lt;User&gt; (1): x" in report
+    assert "... e mais 4 falhas" in report
@@ -7,12 +7,23 @@ from telegram import Update, User, Chat, Message, ChatMember, ReactionTypeEmoji,
 from telegram.constants import ChatType, ParseMode, ReactionType
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
-from datetime import datetime
+from datetime import datetime, timedelta
 from pymongo.errors import PyMongoError
 from bson.objectid import ObjectId
 from html import escape as escape_html
 
-from src.bot.blacklist_handlers import addblacklist_command, blacklist_command, rmblacklist_command, blacklist_button, ban_blacklist_command
+from src.bot.blacklist_handlers import addblacklist_command, blacklist_command, rmblacklist_command, blacklist_button, ban_blacklist_command, ban_status_command
+from src.bot.blacklist_handlers import (
+    BLACKLIST_PAGE_SIZE,
+    blacklist_page_callback,
+    _blacklist_page_callback_data,
+    _decode_blacklist_timestamp,
+    _encode_blacklist_timestamp,
+    _format_blacklist_item,
+    escape_markdown_v2,
+    escape_markdown_v2_url
+)
+from src.utils.chat_directory import ChatLookup
 
 @pytest.fixture
 def mock_update():
@@ -256,10 +267,8 @@ async def test_blacklist_command_current_chat_empty(mock_mongodb, mock_is_admin,
     # Configura is_admin para retornar True
     mock_is_admin.return_value = True
     
-    # Configura mongodb_client.get_blacklist para retornar lista vazia (usando AsyncMock)
-    get_blacklist_mock = AsyncMock()
-    get_blacklist_mock.return_value = []
-    mock_mongodb.get_blacklist = get_blacklist_mock
+    # Configura mongodb_client.get_blacklist_page para retornar uma página vazia
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=([], False))
     
     # Executa a função
     await blacklist_command(mock_update, mock_context)
@@ -267,8 +276,10 @@ async def test_blacklist_command_current_chat_empty(mock_mongodb, mock_is_admin,
     # Verifica se is_admin foi chamado corretamente
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
     
-    # Verifica se get_blacklist foi chamado com os parâmetros corretos
-    mock_mongodb.get_blacklist.assert_called_once_with(mock_update.effective_chat.id)
+    # Verifica se a primeira página foi buscada com os parâmetros corretos
+    mock_mongodb.get_blacklist_page.assert_called_once_with(
+        mock_update.effective_chat.id, BLACKLIST_PAGE_SIZE, cursor=None, newer=False
+    )
     
     # Verifica se a mensagem foi enviada corretamente
     mock_context.bot.send_message.assert_called_once_with(
@@ -280,9 +291,10 @@ async def test_blacklist_command_current_chat_empty(mock_mongodb, mock_is_admin,
     mock_update.message.delete.assert_called_once()
 
 @pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.chat_directory")
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-async def test_blacklist_command_with_group_name(mock_mongodb, mock_is_admin, mock_update, mock_context):
+async def test_blacklist_command_with_group_name(mock_mongodb, mock_is_admin, mock_directory, mock_update, mock_context):
     """
     Testa o comando /blacklist com nome de grupo especificado.
     """
@@ -292,7 +304,8 @@ async def test_blacklist_command_with_group_name(mock_mongodb, mock_is_admin, mo
     # Configura args com nome do grupo
     mock_context.args = ["Test", "Group"]
     
-    # Configura mongodb_client.get_blacklist_by_group_name (usando AsyncMock)
+    # Configura a resolução do nome e mongodb_client.get_blacklist (usando AsyncMock)
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("Test Group", [{"chat_id": -100987, "title": "Test Group"}]))
     item_id = ObjectId()
     mock_item = {
         "_id": item_id,
@@ -304,9 +317,7 @@ async def test_blacklist_command_with_group_name(mock_mongodb, mock_is_admin, mo
         "added_by_name": "Admin GRP",
         "added_at": datetime.now()
     }
-    get_blacklist_mock = AsyncMock()
-    get_blacklist_mock.return_value = [mock_item]
-    mock_mongodb.get_blacklist_by_group_name = get_blacklist_mock
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=([mock_item], False))
     
     # Executa a função
     await blacklist_command(mock_update, mock_context)
@@ -314,8 +325,9 @@ async def test_blacklist_command_with_group_name(mock_mongodb, mock_is_admin, mo
     # Verifica se is_admin foi chamado corretamente
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
     
-    # Verifica se get_blacklist_by_group_name foi chamado com os parâmetros corretos
-    mock_mongodb.get_blacklist_by_group_name.assert_called_once_with("Test Group")
+    # Verifica se o nome foi resolvido e a blacklist do chat encontrado foi obtida
+    mock_directory.resolve.assert_called_once_with("Test Group")
+    mock_mongodb.get_blacklist_page.assert_called_once_with(-100987, BLACKLIST_PAGE_SIZE, cursor=None, newer=False)
     
     # Verifica se a mensagem foi enviada corretamente
     mock_context.bot.send_message.assert_called_once()
@@ -323,12 +335,12 @@ async def test_blacklist_command_with_group_name(mock_mongodb, mock_is_admin, mo
     message_text = call_args["text"]
     
     # Verifica cabeçalho, conteúdo e formato
-    assert "<b>📋 BLACKLIST (Parte 1/1)</b>" in message_text
+    assert "<b>📋 BLACKLIST (Página 1)</b>" in message_text
     assert "@user1" in message_text
     assert f"<code>{str(item_id)}</code>" in message_text
     assert "<a href='https://t.me/c/987/101'>Link</a>" in message_text
     assert call_args["parse_mode"] == ParseMode.HTML
-    assert "reply_markup" not in call_args
+    assert call_args["reply_markup"] is None
     
     # Verifica se a mensagem de comando foi deletada
     mock_update.message.delete.assert_called_once()
@@ -374,10 +386,8 @@ async def test_blacklist_command_with_items(mock_mongodb, mock_is_admin, mock_up
         }
     ]
     
-    # Configura mongodb_client.get_blacklist para retornar a lista de itens
-    get_blacklist_mock = AsyncMock()
-    get_blacklist_mock.return_value = blacklist_items
-    mock_mongodb.get_blacklist = get_blacklist_mock
+    # Configura mongodb_client.get_blacklist_page para retornar a página de itens
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=(blacklist_items, False))
     
     # Executa a função
     await blacklist_command(mock_update, mock_context)
@@ -385,8 +395,10 @@ async def test_blacklist_command_with_items(mock_mongodb, mock_is_admin, mock_up
     # Verifica se is_admin foi chamado corretamente
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
     
-    # Verifica se get_blacklist foi chamado com os parâmetros corretos
-    mock_mongodb.get_blacklist.assert_called_once_with(mock_update.effective_chat.id)
+    # Verifica se a primeira página foi buscada com os parâmetros corretos
+    mock_mongodb.get_blacklist_page.assert_called_once_with(
+        mock_update.effective_chat.id, BLACKLIST_PAGE_SIZE, cursor=None, newer=False
+    )
     
     # Verifica se a mensagem foi enviada corretamente (apenas uma vez para lista curta)
     mock_context.bot.send_message.assert_called_once()
@@ -399,7 +411,7 @@ async def test_blacklist_command_with_items(mock_mongodb, mock_is_admin, mock_up
     assert call_args["chat_id"] == mock_update.effective_chat.id
     
     # Verifica o cabeçalho da paginação
-    assert "<b>📋 BLACKLIST (Parte 1/1)</b>" in message_text
+    assert "<b>📋 BLACKLIST (Página 1)</b>" in message_text
     
     # Verifica elementos essenciais dos itens
     assert "@targetuser" in message_text
@@ -431,16 +443,17 @@ async def test_blacklist_command_with_items(mock_mongodb, mock_is_admin, mock_up
     assert call_args["parse_mode"] == ParseMode.HTML
     assert call_args["disable_web_page_preview"] is True
     
-    # Verifica que reply_markup (botões) não foi enviado
-    assert "reply_markup" not in call_args
+    # Verifica que não há botões de navegação (página única)
+    assert call_args["reply_markup"] is None
     
     # Verifica se a mensagem de comando foi deletada
     mock_update.message.delete.assert_called_once()
 
 @pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.chat_directory")
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-async def test_blacklist_command_with_group_username(mock_mongodb, mock_is_admin, mock_update, mock_context):
+async def test_blacklist_command_with_group_username(mock_mongodb, mock_is_admin, mock_directory, mock_update, mock_context):
     """
     Testa o comando /blacklist quando é executado com o username de um grupo.
     """
@@ -450,7 +463,8 @@ async def test_blacklist_command_with_group_username(mock_mongodb, mock_is_admin
     # Configura os argumentos do comando
     mock_context.args = ["@testgroup"]
     
-    # Configura o mock para get_blacklist_by_group_name
+    # Configura a resolução do username e o mock para get_blacklist
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("testgroup", [{"chat_id": -10012345, "username": "testgroup"}]))
     item_id = ObjectId("60f1a5b5a9c1e2b3c4d5e6f7")
     mock_blacklist = [
         {
@@ -466,9 +480,7 @@ async def test_blacklist_command_with_group_username(mock_mongodb, mock_is_admin
             "added_at": datetime.now()
         }
     ]
-    get_blacklist_by_group_name_mock = AsyncMock()
-    get_blacklist_by_group_name_mock.return_value = mock_blacklist
-    mock_mongodb.get_blacklist_by_group_name = get_blacklist_by_group_name_mock
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=(mock_blacklist, False))
     
     # Executa a função
     await blacklist_command(mock_update, mock_context)
@@ -476,13 +488,14 @@ async def test_blacklist_command_with_group_username(mock_mongodb, mock_is_admin
     # Verifica se is_admin foi chamado corretamente
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
     
-    # Verifica se get_blacklist_by_group_name foi chamado com o username correto
-    mock_mongodb.get_blacklist_by_group_name.assert_called_once_with("testgroup")
+    # Verifica se o username foi resolvido sem o @
+    mock_directory.resolve.assert_called_once_with("testgroup")
+    mock_mongodb.get_blacklist_page.assert_called_once_with(-10012345, BLACKLIST_PAGE_SIZE, cursor=None, newer=False)
     
     # Verifica se a mensagem foi enviada corretamente
     mock_context.bot.send_message.assert_called_once()
     message_text = mock_context.bot.send_message.call_args[1]["text"]
-    assert "BLACKLIST (Parte 1/1)" in message_text
+    assert "BLACKLIST (Página 1)" in message_text
     assert "@testuser" in message_text
     assert "Admin User" in message_text
     assert "Mensagem inapropriada" in message_text
@@ -493,9 +506,10 @@ async def test_blacklist_command_with_group_username(mock_mongodb, mock_is_admin
     mock_update.message.delete.assert_called_once()
 
 @pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.chat_directory")
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-async def test_blacklist_command_with_group_username_not_found(mock_mongodb, mock_is_admin, mock_update, mock_context):
+async def test_blacklist_command_with_group_username_not_found(mock_mongodb, mock_is_admin, mock_directory, mock_update, mock_context):
     """
     Testa o comando /blacklist quando é executado com o username de um grupo que não existe.
     """
@@ -505,10 +519,8 @@ async def test_blacklist_command_with_group_username_not_found(mock_mongodb, moc
     # Configura os argumentos do comando
     mock_context.args = ["@NonExistentGroup"]
     
-    # Configura o mock para get_blacklist_by_group_name retornar lista vazia (usando AsyncMock)
-    get_blacklist_by_group_name_mock = AsyncMock()
-    get_blacklist_by_group_name_mock.return_value = []
-    mock_mongodb.get_blacklist_by_group_name = get_blacklist_by_group_name_mock
+    # Configura a resolução para não encontrar nenhum grupo
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("NonExistentGroup", []))
     
     # Executa a função
     await blacklist_command(mock_update, mock_context)
@@ -516,8 +528,9 @@ async def test_blacklist_command_with_group_username_not_found(mock_mongodb, moc
     # Verifica se is_admin foi chamado corretamente
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
     
-    # Verifica se get_blacklist_by_group_name foi chamado com o username correto
-    mock_mongodb.get_blacklist_by_group_name.assert_called_once_with("NonExistentGroup")
+    # Verifica se a resolução foi chamada com o username correto
+    mock_directory.resolve.assert_called_once_with("NonExistentGroup")
+    mock_mongodb.get_blacklist_page.assert_not_called()
     
     # Verifica se a mensagem foi enviada corretamente (sem verificar parse_mode)
     mock_context.bot.send_message.assert_called_once_with(
@@ -821,9 +834,8 @@ async def test_blacklist_button_success(mock_mongodb, mock_is_admin, mock_update
     mock_mongodb.remove_from_blacklist = AsyncMock()
     mock_mongodb.remove_from_blacklist.return_value = True
     
-    # Configura o mock para get_blacklist retornar uma lista vazia
-    mock_mongodb.get_blacklist = AsyncMock()
-    mock_mongodb.get_blacklist.return_value = []
+    # Configura o mock para get_blacklist_page retornar uma página vazia
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=([], False))
     
     # Configura o callback query
     mock_update.callback_query = AsyncMock()
@@ -935,10 +947,8 @@ async def test_blacklist_command_with_special_characters(mock_mongodb, mock_is_a
         }
     ]
     
-    # Configura mongodb_client.get_blacklist para retornar a lista de itens (usando AsyncMock)
-    get_blacklist_mock = AsyncMock()
-    get_blacklist_mock.return_value = blacklist_items
-    mock_mongodb.get_blacklist = get_blacklist_mock
+    # Configura mongodb_client.get_blacklist_page para retornar a página de itens
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=(blacklist_items, False))
     
     # Executa a função
     await blacklist_command(mock_update, mock_context)
@@ -946,8 +956,10 @@ async def test_blacklist_command_with_special_characters(mock_mongodb, mock_is_a
     # Verifica se is_admin foi chamado corretamente
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
     
-    # Verifica se get_blacklist foi chamado com os parâmetros corretos
-    mock_mongodb.get_blacklist.assert_called_once_with(mock_update.effective_chat.id)
+    # Verifica se a primeira página foi buscada com os parâmetros corretos
+    mock_mongodb.get_blacklist_page.assert_called_once_with(
+        mock_update.effective_chat.id, BLACKLIST_PAGE_SIZE, cursor=None, newer=False
+    )
     
     # Verifica se a mensagem foi enviada corretamente
     mock_context.bot.send_message.assert_called_once()
@@ -964,101 +976,160 @@ async def test_blacklist_command_with_special_characters(mock_mongodb, mock_is_a
     # Verifica se a mensagem de comando foi deletada
     mock_update.message.delete.assert_called_once()
 
+def _make_blacklist_items(count, chat_id, text="Mensagem"):
+    """Cria entradas da blacklist ordenadas da mais recente para a mais antiga."""
+    now = datetime(2025, 1, 10, 12, 0, 0)
+    return [
+        {
+            "_id": ObjectId(),
+            "chat_id": chat_id,
+            "message_id": 1000 + i,
+            "user_id": 50000 + i,
+            "user_name": f"Test User {i}",
+            "username": f"testuser{i}",
+            "message_text": f"{text} {i}",
+            "added_by": 12345,
+            "added_by_name": "Admin User",
+            "added_at": now - timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
 @pytest.mark.asyncio
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-@patch("asyncio.sleep", return_value=None)
-async def test_blacklist_command_with_long_message(mock_sleep, mock_mongodb, mock_is_admin, mock_update, mock_context):
+async def test_blacklist_command_with_long_message(mock_mongodb, mock_is_admin, mock_update, mock_context):
     """
-    Testa o comando /blacklist quando a lista é longa e requer paginação.
+    Testa o comando /blacklist quando a lista tem mais de uma página.
+    Apenas a primeira página é enviada, com o botão para a próxima.
     Verifica também o truncamento do texto da mensagem individual.
     """
-    # Configura is_admin para retornar True
     mock_is_admin.return_value = True
-    
-    # Define um texto base longo para cada item
     base_text = "X" * 300
+    blacklist_items = _make_blacklist_items(BLACKLIST_PAGE_SIZE, mock_update.effective_chat.id, base_text)
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=(blacklist_items, True))
     
-    # Calcula quantos itens cabem aproximadamente por página (estimativa grosseira)
-    # Formato por item: ~ "N. <b>Usuário:</b> ... <b>ID:</b> <code>...</code>\n"
-    # Header: ~ 50 chars
-    # Item formatado: ~ 200 chars (sem o texto) + len(escaped_text) + len(id)
-    # Texto truncado: 103 chars (100 + ...)
-    # ID: 24 chars
-    # Total por item: ~ 200 + 103 + 24 = ~330 chars
-    # Limite: 4000. Header: 50. Disponível: 3950
-    # Itens por página: ~ 3950 / 330 = ~11-12 itens
-    
-    # Cria uma lista longa (ex: 25 itens, deve gerar 3 páginas)
-    num_items = 25
-    blacklist_items = []
-    now = datetime.now()
-    expected_ids = []
-    for i in range(num_items):
-        item_id = ObjectId()
-        expected_ids.append(str(item_id))
-        blacklist_items.append({
-            "_id": item_id,
-            "chat_id": mock_update.effective_chat.id,
-            "message_id": 1000 + i,
-            "user_id": 50000 + i,
-            "user_name": f"Test User {i}",
-            "username": f"testuser{i}",
-            "message_text": f"{base_text} Item {i}",
-            "added_by": 12345,
-            "added_by_name": "Admin User",
-            "added_at": now
-        })
+    await blacklist_command(mock_update, mock_context)
     
-    # Configura mongodb_client.get_blacklist para retornar a lista longa
-    get_blacklist_mock = AsyncMock()
-    get_blacklist_mock.return_value = blacklist_items
-    mock_mongodb.get_blacklist = get_blacklist_mock
+    # Uma única consulta e uma única mensagem
+    mock_mongodb.get_blacklist_page.assert_called_once()
+    mock_context.bot.send_message.assert_called_once()
+    call_args = mock_context.bot.send_message.call_args[1]
+    message_text = call_args["text"]
+    assert "<b>📋 BLACKLIST (Página 1)</b>" in message_text
+    assert "<b>Usuário:</b> @testuser0" in message_text
+    assert f"<i>{escape_html(base_text[:100] + '...')}</i>" in message_text
+    assert f"<code>{blacklist_items[-1]['_id']}</code>" in message_text
+    assert len(message_text) < 4096
+    
+    # Apenas o botão "Próximos", com o cursor da última entrada da página
+    buttons = call_args["reply_markup"].inline_keyboard[0]
+    assert len(buttons) == 1
+    assert buttons[0].text == "Próximos ▶️"
+    callback_data = buttons[0].callback_data
+    assert callback_data.startswith(f"blp:{mock_update.effective_chat.id}:2:n:")
+    assert callback_data.endswith(str(blacklist_items[-1]["_id"]))
+    assert len(callback_data.encode("utf-8")) <= 64
     
-    # Executa a função
-    await blacklist_command(mock_update, mock_context)
+    mock_update.message.delete.assert_called_once()
+
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_blacklist_page_callback_next(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """
+    Testa a navegação para a próxima página a partir do cursor do botão.
+    """
+    mock_is_admin.return_value = True
+    items = _make_blacklist_items(2 * BLACKLIST_PAGE_SIZE, -1001234567890)
+    first_page, second_page = items[:BLACKLIST_PAGE_SIZE], items[BLACKLIST_PAGE_SIZE:]
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=(second_page, False))
     
-    # Verifica se get_blacklist foi chamado
-    mock_mongodb.get_blacklist.assert_called_once_with(mock_update.effective_chat.id)
-    
-    # Verifica quantas chamadas a send_message foram feitas (deve ser > 1)
-    assert mock_context.bot.send_message.call_count > 1 
-    
-    # Calcula o número esperado de páginas (arredondando para cima)
-    # Este cálculo é apenas uma verificação, a lógica real está no código
-    # A lógica de paginação no código é baseada em comprimento, não em contagem de itens
-    # Por isso, verificamos > 1 e os cabeçalhos
-    calls = mock_context.bot.send_message.call_args_list
-    total_parts = len(calls)
-    
-    # Verifica o cabeçalho e conteúdo da primeira parte
-    first_call_args = calls[0][1]
-    first_message_text = first_call_args["text"]
-    assert f"<b>📋 BLACKLIST (Parte 1/{total_parts})</b>" in first_message_text
-    assert f"<b>Usuário:</b> @testuser0" in first_message_text
-    assert f"<i>{escape_html(base_text[:100] + '...')}</i>" in first_message_text
-    assert f"<code>{expected_ids[0]}</code>" in first_message_text
-    assert first_call_args["parse_mode"] == ParseMode.HTML
-    assert first_call_args["disable_web_page_preview"] is True
-    assert "reply_markup" not in first_call_args
-
-    # Verifica o cabeçalho e conteúdo da última parte
-    last_call_args = calls[-1][1]
-    last_message_text = last_call_args["text"]
-    assert f"<b>📋 BLACKLIST (Parte {total_parts}/{total_parts})</b>" in last_message_text
-    assert f"<b>Usuário:</b> @testuser{num_items - 1}" in last_message_text
-    assert f"<i>{escape_html(base_text[:100] + '...')}</i>" in last_message_text
-    assert f"<code>{expected_ids[-1]}</code>" in last_message_text
-    assert last_call_args["parse_mode"] == ParseMode.HTML
-    assert last_call_args["disable_web_page_preview"] is True
-    assert "reply_markup" not in last_call_args
-
-    # Verifica se asyncio.sleep foi chamado entre as mensagens
-    assert mock_sleep.call_count == total_parts - 1
-    mock_sleep.assert_called_with(0.5)
+    mock_update.callback_query = AsyncMock()
+    mock_update.callback_query.data = _blacklist_page_callback_data(-1001234567890, 2, "n", first_page[-1])
+    
+    await blacklist_page_callback(mock_update, mock_context)
+    
+    # O cursor decodificado corresponde à última entrada da página anterior
+    mock_mongodb.get_blacklist_page.assert_called_once_with(
+        -1001234567890,
+        BLACKLIST_PAGE_SIZE,
+        cursor=(first_page[-1]["added_at"], first_page[-1]["_id"]),
+        newer=False
+    )
+    
+    # A mensagem é editada no lugar, com a numeração continuada e só o botão "Anteriores"
+    args, kwargs = mock_update.callback_query.edit_message_text.call_args
+    assert "<b>📋 BLACKLIST (Página 2)</b>" in args[0]
+    assert f"{BLACKLIST_PAGE_SIZE + 1}. <b>Usuário:</b> @testuser{BLACKLIST_PAGE_SIZE}" in args[0]
+    buttons = kwargs["reply_markup"].inline_keyboard[0]
+    assert [button.text for button in buttons] == ["◀️ Anteriores"]
+    assert buttons[0].callback_data.startswith("blp:-1001234567890:1:p:")
+    assert buttons[0].callback_data.endswith(str(second_page[0]["_id"]))
+    mock_context.bot.send_message.assert_not_called()
 
-    # Verifica se a mensagem de comando foi deletada
-    mock_update.message.delete.assert_called_once() 
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_blacklist_page_callback_previous(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """
+    Testa a navegação para a página anterior (entradas mais recentes que o cursor).
+    """
+    mock_is_admin.return_value = True
+    items = _make_blacklist_items(3 * BLACKLIST_PAGE_SIZE, -100987)
+    second_page = items[BLACKLIST_PAGE_SIZE:2 * BLACKLIST_PAGE_SIZE]
+    third_page = items[2 * BLACKLIST_PAGE_SIZE:]
+    mock_mongodb.get_blacklist_page = AsyncMock(return_value=(second_page, True))
+    
+    mock_update.callback_query = AsyncMock()
+    mock_update.callback_query.data = _blacklist_page_callback_data(-100987, 2, "p", third_page[0])
+    
+    await blacklist_page_callback(mock_update, mock_context)
+    
+    assert mock_mongodb.get_blacklist_page.call_args[1]["newer"] is True
+    args, kwargs = mock_update.callback_query.edit_message_text.call_args
+    assert "<b>📋 BLACKLIST (Página 2)</b>" in args[0]
+    buttons = kwargs["reply_markup"].inline_keyboard[0]
+    assert [button.text for button in buttons] == ["◀️ Anteriores", "Próximos ▶️"]
+
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_blacklist_page_callback_not_admin(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """
+    Testa que apenas administradores podem navegar pela blacklist.
+    """
+    mock_is_admin.return_value = False
+    mock_update.callback_query = AsyncMock()
+    mock_update.callback_query.data = "blp:-100987:2:n:0:60f1a5b5a9c1e2b3c4d5e6f7"
+    
+    await blacklist_page_callback(mock_update, mock_context)
+    
+    mock_update.callback_query.answer.assert_called_once_with("Apenas administradores podem ver a blacklist")
+    mock_mongodb.get_blacklist_page.assert_not_called()
+
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_blacklist_page_callback_invalid_data(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """
+    Testa que um callback malformado é recusado sem consultar o banco.
+    """
+    mock_is_admin.return_value = True
+    mock_update.callback_query = AsyncMock()
+    mock_update.callback_query.data = "blp:-100987:2:n:zz:not-an-objectid"
+    
+    await blacklist_page_callback(mock_update, mock_context)
+    
+    mock_update.callback_query.answer.assert_called_once_with("Página inválida")
+    mock_mongodb.get_blacklist_page.assert_not_called()
+
+def test_blacklist_timestamp_roundtrip():
+    """
+    Testa que o instante do cursor é preservado na precisão do MongoDB (milissegundos).
+    """
+    value = datetime(2025, 3, 4, 5, 6, 7, 891000)
+    assert _decode_blacklist_timestamp(_encode_blacklist_timestamp(value)) == value
 
 @pytest.mark.asyncio
 @patch("src.bot.blacklist_handlers.is_admin")
@@ -1089,15 +1160,16 @@ async def test_ban_blacklist_command_no_args(mock_send_temp, mock_is_admin, mock
     mock_context.bot.send_message.assert_not_called()
 
 @pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.chat_directory")
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-async def test_ban_blacklist_command_group_not_found(mock_mongodb, mock_is_admin, mock_update, mock_context):
+async def test_ban_blacklist_command_group_not_found(mock_mongodb, mock_is_admin, mock_directory, mock_update, mock_context):
     """Testa /ban_blacklist quando o grupo não é encontrado."""
     mock_is_admin.return_value = True
     mock_context.args = ["NonExistent Group"]
     
-    # Mock get_chat_id_by_group_name retornando None
-    mock_mongodb.get_chat_id_by_group_name = AsyncMock(return_value=None)
+    # Mock da resolução sem nenhum grupo
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("NonExistent Group", []))
     
     # Mock para a mensagem de processamento
     mock_processing_message = AsyncMock(spec=Message)
@@ -1106,24 +1178,49 @@ async def test_ban_blacklist_command_group_not_found(mock_mongodb, mock_is_admin
     await ban_blacklist_command(mock_update, mock_context)
 
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
-    mock_mongodb.get_chat_id_by_group_name.assert_called_once_with("NonExistent Group")
+    mock_directory.resolve.assert_called_once_with("NonExistent Group", active_only=True)
     mock_context.bot.send_message.assert_called_once() # Chamada para msg inicial
     mock_processing_message.edit_text.assert_called_once_with("❌ Grupo 'NonExistent Group' não encontrado ou não monitorado ativamente.")
     mock_context.bot.ban_chat_member.assert_not_called()
-    mock_mongodb.get_blacklist.assert_not_called()
+    mock_mongodb.get_blacklist_page.assert_not_called()
 
 @pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.chat_directory")
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-async def test_ban_blacklist_command_empty_blacklist(mock_mongodb, mock_is_admin, mock_update, mock_context):
+async def test_ban_blacklist_command_ambiguous_group(mock_mongodb, mock_is_admin, mock_directory, mock_update, mock_context):
+    """Testa /ban_blacklist quando o nome corresponde a mais de um grupo."""
+    mock_is_admin.return_value = True
+    mock_context.args = ["Gym"]
+    matches = [
+        {"chat_id": -1001, "title": "Gym Nation", "active": True},
+        {"chat_id": -1002, "title": "Gym Nation Feminino", "username": "gymfem", "active": True}
+    ]
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("Gym", matches))
+    mock_processing_message = AsyncMock(spec=Message)
+    mock_context.bot.send_message.return_value = mock_processing_message
+
+    await ban_blacklist_command(mock_update, mock_context)
+
+    text = mock_processing_message.edit_text.call_args[0][0]
+    assert "Mais de um grupo" in text
+    assert "Gym Nation Feminino (@gymfem)" in text
+    mock_mongodb.get_blacklist_page.assert_not_called()
+    mock_context.bot.ban_chat_member.assert_not_called()
+
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.chat_directory")
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_ban_blacklist_command_empty_blacklist(mock_mongodb, mock_is_admin, mock_directory, mock_update, mock_context):
     """Testa /ban_blacklist quando a blacklist do grupo está vazia."""
     group_name = "Empty Blacklist Group"
     target_chat_id = -100111222
     mock_is_admin.return_value = True
     mock_context.args = [group_name]
     
-    # Mock get_chat_id_by_group_name retornando ID
-    mock_mongodb.get_chat_id_by_group_name = AsyncMock(return_value=target_chat_id)
+    # Mock da resolução retornando o grupo
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup(group_name, [{"chat_id": target_chat_id, "active": True}]))
     # Mock get_blacklist retornando lista vazia
     mock_mongodb.get_blacklist = AsyncMock(return_value=[])
 
@@ -1134,7 +1231,7 @@ async def test_ban_blacklist_command_empty_blacklist(mock_mongodb, mock_is_admin
     await ban_blacklist_command(mock_update, mock_context)
 
     mock_is_admin.assert_called_once_with(mock_update, mock_context)
-    mock_mongodb.get_chat_id_by_group_name.assert_called_once_with(group_name)
+    mock_directory.resolve.assert_called_once_with(group_name, active_only=True)
     mock_mongodb.get_blacklist.assert_called_once_with(target_chat_id)
     mock_context.bot.send_message.assert_called_once() # Chamada para msg inicial
     mock_processing_message.edit_text.assert_called_once_with(f"✅ A blacklist para o grupo '{group_name}' (ID: {target_chat_id}) já está vazia.")
@@ -1142,136 +1239,150 @@ async def test_ban_blacklist_command_empty_blacklist(mock_mongodb, mock_is_admin
     mock_mongodb.remove_blacklist_items_by_ids.assert_not_called()
 
 @pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.get_ban_job_manager")
+@patch("src.bot.blacklist_handlers.chat_directory")
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-@patch("asyncio.sleep", return_value=None) # Mock asyncio.sleep
-async def test_ban_blacklist_command_success_all(mock_sleep, mock_mongodb, mock_is_admin, mock_update, mock_context):
-    """Testa /ban_blacklist com sucesso para todos os usuários."""
+async def test_ban_blacklist_command_creates_job(mock_mongodb, mock_is_admin, mock_directory, mock_get_manager, mock_update, mock_context):
+    """Testa que /ban_blacklist cria um job em segundo plano e responde sem esperar os banimentos."""
     group_name = "Clean Group"
     target_chat_id = -100333444
     mock_is_admin.return_value = True
     mock_context.args = [group_name]
-
-    # Mock get_chat_id_by_group_name
-    mock_mongodb.get_chat_id_by_group_name = AsyncMock(return_value=target_chat_id)
-
-    # Mock blacklist com 2 usuários (3 entradas, 1 duplicado)
-    user1_id = 50001
-    user2_id = 50002
-    item1_id = ObjectId()
-    item2_id = ObjectId()
-    item3_id = ObjectId()
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup(group_name, [{"chat_id": target_chat_id, "active": True}]))
     blacklist_entries = [
-        {"_id": item1_id, "chat_id": target_chat_id, "user_id": user1_id, "user_name": "User One"},
-        {"_id": item2_id, "chat_id": target_chat_id, "user_id": user2_id, "user_name": "User Two"},
-        {"_id": item3_id, "chat_id": target_chat_id, "user_id": user1_id, "user_name": "User One Again"} # Entrada duplicada user1
+        {"_id": ObjectId(), "chat_id": target_chat_id, "user_id": 50001, "user_name": "User One"},
+        {"_id": ObjectId(), "chat_id": target_chat_id, "user_id": 50002, "user_name": "User Two"}
     ]
     mock_mongodb.get_blacklist = AsyncMock(return_value=blacklist_entries)
+    mock_manager = MagicMock()
+    mock_manager.create_job = AsyncMock(return_value={"_id": "ab12cd34", "total": 2})
+    mock_get_manager.return_value = mock_manager
+    mock_processing_message = AsyncMock(spec=Message)
+    mock_processing_message.message_id = 999
+    # O job só é iniciado depois da edição da mensagem de progresso
+    mock_processing_message.edit_text.side_effect = lambda *args, **kwargs: mock_manager.start_job.assert_not_called()
+    mock_context.bot.send_message.return_value = mock_processing_message
 
-    # Mock ban_chat_member retornando True
-    mock_context.bot.ban_chat_member = AsyncMock(return_value=True)
+    await ban_blacklist_command(mock_update, mock_context)
 
-    # Mock remove_blacklist_items_by_ids
-    mock_mongodb.remove_blacklist_items_by_ids = AsyncMock(return_value=3) # 3 itens removidos
+    mock_get_manager.assert_called_once_with(mock_context.bot)
+    mock_manager.create_job.assert_called_once_with(
+        chat_id=target_chat_id,
+        group_name=group_name,
+        entries=blacklist_entries,
+        requested_by=mock_update.effective_user.id,
+        report_chat_id=mock_update.effective_chat.id,
+        status_message_id=999
+    )
+    mock_context.bot.ban_chat_member.assert_not_called()
+    text = mock_processing_message.edit_text.call_args[0][0]
+    assert "Encontrados 2 usuários únicos" in text
+    assert "/ban_status ab12cd34" in text
+    mock_manager.start_job.assert_called_once_with({"_id": "ab12cd34", "total": 2})
 
-    # Mock para a mensagem de processamento
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.get_ban_job_manager")
+@patch("src.bot.blacklist_handlers.chat_directory")
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_ban_blacklist_command_job_error(mock_mongodb, mock_is_admin, mock_directory, mock_get_manager, mock_update, mock_context):
+    """Testa /ban_blacklist quando o job não pode ser criado."""
+    mock_is_admin.return_value = True
+    mock_context.args = ["Group"]
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("Group", [{"chat_id": -100, "active": True}]))
+    mock_mongodb.get_blacklist = AsyncMock(return_value=[{"_id": ObjectId(), "user_id": 1}])
+    mock_get_manager.return_value.create_job = AsyncMock(return_value=None)
     mock_processing_message = AsyncMock(spec=Message)
     mock_context.bot.send_message.return_value = mock_processing_message
 
     await ban_blacklist_command(mock_update, mock_context)
 
-    # Verificações
-    mock_mongodb.get_chat_id_by_group_name.assert_called_once_with(group_name)
-    mock_mongodb.get_blacklist.assert_called_once_with(target_chat_id)
-    assert mock_context.bot.ban_chat_member.call_count == 2 # Chamado para 2 usuários únicos
-    mock_context.bot.ban_chat_member.assert_has_calls([
-        call(chat_id=target_chat_id, user_id=user1_id),
-        call(chat_id=target_chat_id, user_id=user2_id)
-    ], any_order=True)
-    assert mock_sleep.call_count == 2 # Um sleep após cada ban
-    mock_mongodb.remove_blacklist_items_by_ids.assert_called_once_with([item1_id, item3_id, item2_id]) # Todos os IDs devem ser removidos
-    
-    # Verifica a mensagem final
-    mock_processing_message.edit_text.assert_called_with(
-        f"<b>📊 Relatório de Banimento da Blacklist</b>\n\n"
-        f"<b>Grupo:</b> {group_name} (ID: <code>{target_chat_id}</code>)\n"
-        f"<b>Usuários únicos na blacklist:</b> 2\n"
-        f"<b>Banidos com sucesso:</b> ✅ 2\n"
-        f"<b>Falhas ao banir:</b> ❌ 0\n"
-        f"<b>Itens removidos da blacklist:</b> 🗑️ 3\n"
-        f"<i>(Apenas itens de usuários banidos com sucesso foram removidos)</i>\n",
-        parse_mode=ParseMode.HTML
-    )
+    mock_processing_message.edit_text.assert_called_with("❌ Erro ao criar o job de banimento. Verifique os logs.")
 
 @pytest.mark.asyncio
 @patch("src.bot.blacklist_handlers.is_admin")
 @patch("src.bot.blacklist_handlers.mongodb_client")
-@patch("asyncio.sleep", return_value=None) # Mock asyncio.sleep
-async def test_ban_blacklist_command_partial_failure(mock_sleep, mock_mongodb, mock_is_admin, mock_update, mock_context):
-    """Testa /ban_blacklist com falha para alguns usuários."""
-    group_name = "Mixed Group"
-    target_chat_id = -100555666
+async def test_ban_status_command_running_job(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """Testa /ban_status com o ID de um job em andamento."""
     mock_is_admin.return_value = True
-    mock_context.args = [group_name]
+    mock_context.args = ["ab12cd34"]
+    mock_mongodb.get_ban_job = AsyncMock(return_value={
+        "_id": "ab12cd34", "group_name": "Gym", "chat_id": -100, "status": "running",
+        "total": 10, "banned": 3, "failed": 1, "removed": 4
+    })
 
-    # Mock get_chat_id_by_group_name
-    mock_mongodb.get_chat_id_by_group_name = AsyncMock(return_value=target_chat_id)
+    await ban_status_command(mock_update, mock_context)
 
-    # Mock blacklist com 3 usuários
-    user1_id = 50001 # Sucesso
-    user2_id = 50002 # Falha (BadRequest)
-    user3_id = 50003 # Sucesso
-    item1_id = ObjectId()
-    item2_id = ObjectId()
-    item3_id = ObjectId()
-    blacklist_entries = [
-        {"_id": item1_id, "chat_id": target_chat_id, "user_id": user1_id, "user_name": "User One"},
-        {"_id": item2_id, "chat_id": target_chat_id, "user_id": user2_id, "user_name": "User Two"},
-        {"_id": item3_id, "chat_id": target_chat_id, "user_id": user3_id, "user_name": "User Three"}
-    ]
-    mock_mongodb.get_blacklist = AsyncMock(return_value=blacklist_entries)
+    mock_mongodb.get_ban_job.assert_called_once_with("ab12cd34")
+    text = mock_update.message.reply_text.call_args[0][0]
+    assert "Progresso: 4/10" in text
 
-    # Mock ban_chat_member com falha para user2
-    async def ban_side_effect(chat_id, user_id):
-        if user_id == user2_id:
-            raise BadRequest("User not found")
-        return True
-    mock_context.bot.ban_chat_member = AsyncMock(side_effect=ban_side_effect)
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_ban_status_command_done_job(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """Testa /ban_status com um job concluído: mostra o relatório final."""
+    mock_is_admin.return_value = True
+    mock_context.args = ["ab12cd34"]
+    mock_mongodb.get_ban_job = AsyncMock(return_value={
+        "_id": "ab12cd34", "group_name": "Gym", "chat_id": -100, "status": "done",
+        "total": 2, "banned": 1, "failed": 1, "removed": 1
+    })
+    mock_mongodb.get_failed_ban_items = AsyncMock(return_value=[
+        {"user_id": 2, "display": "User Two (2)", "error": "User not found"}
+    ])
 
-    # Mock remove_blacklist_items_by_ids (só remove itens de user1 e user3)
-    mock_mongodb.remove_blacklist_items_by_ids = AsyncMock(return_value=2) 
+    await ban_status_command(mock_update, mock_context)
 
-    # Mock para a mensagem de processamento
-    mock_processing_message = AsyncMock(spec=Message)
-    mock_context.bot.send_message.return_value = mock_processing_message
+    args, kwargs = mock_update.message.reply_text.call_args
+    assert "Relatório de Banimento" in args[0]
+    assert "- User Two (2): User not found" in args[0]
+    assert kwargs["parse_mode"] == ParseMode.HTML
 
-    await ban_blacklist_command(mock_update, mock_context)
+@pytest.mark.asyncio
+@patch("src.bot.blacklist_handlers.is_admin")
+@patch("src.bot.blacklist_handlers.mongodb_client")
+async def test_ban_status_command_recent_jobs(mock_mongodb, mock_is_admin, mock_update, mock_context):
+    """Testa /ban_status sem argumentos: lista os jobs recentes."""
+    mock_is_admin.return_value = True
+    mock_context.args = []
+    mock_mongodb.get_recent_ban_jobs = AsyncMock(return_value=[
+        {"_id": "ab12cd34", "group_name": "Gym", "status": "done", "total": 2, "banned": 2, "failed": 0},
+        {"_id": "ef56ab78", "group_name": "Run", "status": "running", "total": 5, "banned": 1, "failed": 0}
+    ])
 
-    # Verificações
-    mock_mongodb.get_chat_id_by_group_name.assert_called_once_with(group_name)
-    mock_mongodb.get_blacklist.assert_called_once_with(target_chat_id)
-    assert mock_context.bot.ban_chat_member.call_count == 3 # Chamado para 3 usuários únicos
-    assert mock_sleep.call_count == 3
-    # Verifica se tentou remover apenas itens de user1 e user3
-    mock_mongodb.remove_blacklist_items_by_ids.assert_called_once_with([item1_id, item3_id])
-    
-    # Verifica a mensagem final (precisa checar o conteúdo)
-    assert mock_processing_message.edit_text.call_count == 2 # Corrigido: Verifica 2 chamadas
-    
-    # Pega os argumentos da *última* chamada a edit_text
-    final_call_args = mock_processing_message.edit_text.call_args_list[-1][0]
-    final_kwargs = mock_processing_message.edit_text.call_args_list[-1][1]
-    final_text = final_call_args[0]
-    
-    # Verifica o conteúdo da última mensagem
-    assert f"<b>Grupo:</b> {escape_html(group_name)}" in final_text # Usa escape_html para comparar
-    assert "<b>Usuários únicos na blacklist:</b> 3" in final_text
-    assert "<b>Banidos com sucesso:</b> ✅ 2" in final_text
-    assert "<b>Falhas ao banir:</b> ❌ 1" in final_text
-    assert "<b>Itens removidos da blacklist:</b> 🗑️ 2" in final_text
-    assert "<b>Detalhes das Falhas:</b>" in final_text
-    # Verifica a falha específica (escape_html aplicado ao nome do usuário)
-    expected_failed_user_display = escape_html(f"User Two ({user2_id})")
-    expected_failed_error = escape_html("User not found")
-    assert f"- {expected_failed_user_display}: {expected_failed_error}" in final_text
-    assert final_kwargs.get("parse_mode") == ParseMode.HTML # Verifica parse_mode na última chamada 
\ No newline at end of file
+    await ban_status_command(mock_update, mock_context)
+
+    text = mock_update.message.reply_text.call_args[0][0]
+    assert "ab12cd34 — Gym: 2/2 (✅ concluído)" in text
+    assert "ef56ab78 — Run: 1/5 (⚙️ em andamento)" in text
+
+
+def test_escape_markdown_v2():
+    """Escapa todos os caracteres especiais do MarkdownV2 e mantém o texto sem eles."""
+    assert escape_markdown_v2("João Silva") == "João Silva"
+    assert escape_markdown_v2("Duda (@duda_fit) - 12 check-ins!") == "Duda \\(@duda\\_fit\\) \\- 12 check\\-ins\\!"
+    assert escape_markdown_v2("_*[]()~`>#+-=|{}.!") == "".join(f"\\{char}" for char in "_*[]()~`>#+-=|{}.!")
+    assert escape_markdown_v2_url("https://t.me/c/1/2") == "https://t\\.me/c/1/2"
+
+
+def test_format_blacklist_item_escapes_html_and_formats_date():
+    """Formata a data (dd/mm/aaaa hh:mm), o link e escapa apenas o que tem HTML."""
+    item = {
+        "_id": "abc123",
+        "chat_id": -1002288213607,
+        "message_id": 1452,
+        "user_name": "Ana",
+        "username": None,
+        "message_text": "Promoção <imperdível> & barata",
+        "added_by_name": "Admin",
+        "added_at": datetime(2025, 3, 4, 9, 5),
+    }
+
+    text = _format_blacklist_item(3, item)
+
+    assert text.startswith("3. <b>Usuário:</b> Ana \n")
+    assert "Admin em 04/03/2025 09:05" in text
+    assert "https://t.me/c/2288213607/1452" in text
+    assert "Promoção &lt;imperdível&gt; &amp; barata" in text
@@ -0,0 +1,104 @@
+"""
+Testes para o índice de chats monitorados.
+"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.utils.chat_directory import ChatDirectory
+
+CHATS = [
+    {"chat_id": -1, "title": "GYM NATION 💚", "username": "gymnation", "active": True},
+    {"chat_id": -2, "title": "Gym Nation Feminino", "username": None, "active": True},
+    {"chat_id": -3, "title": "Academia Força Total", "username": "forcatotal", "active": False},
+]
+
+
+@pytest.fixture
+def directory():
+    """Índice com os chats de teste, sem acesso ao banco."""
+    with patch("src.utils.chat_directory.mongodb_client") as mock_client:
+        mock_client.get_monitored_chat_names = AsyncMock(return_value=CHATS)
+        yield ChatDirectory(), mock_client
+
+
+@pytest.mark.asyncio
+async def test_resolve_exact_title(directory):
+    """Testa a correspondência exata, ignorando acentos e maiúsculas."""
+    chat_directory, _ = directory
+    lookup = await chat_directory.resolve("academia FORCA total")
+    assert lookup.chat["chat_id"] == -3
+
+
+@pytest.mark.asyncio
+async def test_resolve_exact_username(directory):
+    """Testa a correspondência exata pelo username, com @."""
+    chat_directory, _ = directory
+    lookup = await chat_directory.resolve("@GymNation")
+    assert lookup.chat["chat_id"] == -1
+
+
+@pytest.mark.asyncio
+async def test_exact_match_wins_over_prefix(directory):
+    """Testa que a correspondência exata não é ambígua com prefixos mais longos."""
+    chat_directory, _ = directory
+    lookup = await chat_directory.resolve("gym nation 💚")
+    assert lookup.chat["chat_id"] == -1
+
+
+@pytest.mark.asyncio
+async def test_resolve_ambiguous_prefix(directory):
+    """Testa que um prefixo compartilhado é reportado como ambíguo."""
+    chat_directory, _ = directory
+    lookup = await chat_directory.resolve("Gym Nat")
+    assert lookup.chat is None
+    assert lookup.is_ambiguous
+    assert {chat["chat_id"] for chat in lookup.matches} == {-1, -2}
+    assert "Gym Nation Feminino" in lookup.describe_candidates()
+
+
+@pytest.mark.asyncio
+async def test_resolve_partial(directory):
+    """Testa a correspondência por trecho do nome."""
+    chat_directory, _ = directory
+    lookup = await chat_directory.resolve("feminino")
+    assert lookup.chat["chat_id"] == -2
+
+
+@pytest.mark.asyncio
+async def test_resolve_active_only(directory):
+    """Testa que chats inativos são ignorados quando solicitado."""
+    chat_directory, _ = directory
+    lookup = await chat_directory.resolve("forca", active_only=True)
+    assert lookup.matches == []
+
+
+@pytest.mark.asyncio
+async def test_index_is_loaded_once(directory):
+    """Testa que o índice é reutilizado entre resoluções."""
+    chat_directory, mock_client = directory
+    await chat_directory.resolve("gymnation")
+    await chat_directory.resolve("feminino")
+    assert mock_client.get_monitored_chat_names.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_reload(directory):
+    """Testa que a invalidação recarrega o índice na próxima resolução."""
+    chat_directory, mock_client = directory
+    await chat_directory.resolve("gymnation")
+    mock_client.get_monitored_chat_names.return_value = CHATS + [{"chat_id": -4, "title": "Novo Grupo", "active": True}]
+    chat_directory.invalidate()
+    lookup = await chat_directory.resolve("novo grupo")
+    assert lookup.chat["chat_id"] == -4
+
+
+@pytest.mark.asyncio
+async def test_miss_reloads_stale_index(directory):
+    """Testa que um nome não encontrado recarrega um índice com alguns segundos."""
+    chat_directory, mock_client = directory
+    await chat_directory.resolve("gymnation")
+    chat_directory._loaded_at -= ChatDirectory.MISS_REFRESH_INTERVAL
+    mock_client.get_monitored_chat_names.return_value = [{"chat_id": -5, "title": "Outro", "active": True}]
+    lookup = await chat_directory.resolve("outro")
+    assert lookup.chat["chat_id"] == -5
@@ -0,0 +1,131 @@
+"""
+Testes para a exportação de coleções por chat.
+"""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from src.utils.chat_export import EXPORT_COLLECTIONS, export_chat_collection
+
+
+class FakeCursor:
+    """Cursor assíncrono com documentos fixos, opcionalmente falhando no meio."""
+
+    def __init__(self, documents, fail_after=None):
+        self.documents = documents
+        self.fail_after = fail_after
+
+    async def __aiter__(self):
+        for index, document in enumerate(self.documents):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise PyMongoError("Erro de teste")
+            yield document
+
+
+def _blacklist_documents(count):
+    return [
+        {
+            "_id": ObjectId(),
+            "chat_id": -100123,
+            "message_id": i,
+            "user_id": 10 + i,
+            "user_name": f"Usuário {i}",
+            "username": None,
+            "message_text": f"texto, com \"aspas\" {i}",
+            "added_by": 1,
+            "added_by_name": "Admin",
+            "added_at": datetime(2025, 1, 1, 12, i)
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pela exportação."""
+    with patch("src.utils.chat_export.mongodb_client") as mock_client:
+        yield mock_client
+
+
+@pytest.mark.asyncio
+async def test_export_csv(mock_mongodb):
+    """Testa a exportação em CSV compactado, com cabeçalho e valores serializados."""
+    documents = _blacklist_documents(3)
+    mock_mongodb.find_chat_documents = MagicMock(return_value=FakeCursor(documents))
+
+    export = await export_chat_collection("blacklist", -100123, "csv")
+
+    collection, fields = EXPORT_COLLECTIONS["blacklist"]
+    mock_mongodb.find_chat_documents.assert_called_once_with(collection, -100123, fields)
+    assert export.count == 3
+    assert export.filename.startswith("blacklist_-100123_")
+    assert export.filename.endswith(".csv.gz")
+    content = export.file.read()
+    assert len(content) == export.size
+    rows = list(csv.reader(io.StringIO(gzip.decompress(content).decode("utf-8"))))
+    assert rows[0] == fields
+    assert rows[1][0] == str(documents[0]["_id"])
+    assert rows[1][fields.index("message_text")] == "texto, com \"aspas\" 0"
+    assert rows[1][fields.index("username")] == ""
+    assert rows[3][fields.index("added_at")] == "2025-01-01T12:02:00"
+    export.close()
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl(mock_mongodb):
+    """Testa a exportação em JSONL compactado, um documento por linha."""
+    documents = [
+        {"_id": ObjectId(), "chat_id": -100123, "user_id": 7, "user_name": "Zé",
+         "checkin_type": "plus", "points_value": 2, "created_at": datetime(2025, 1, 2)}
+    ]
+    mock_mongodb.find_chat_documents = MagicMock(return_value=FakeCursor(documents))
+
+    export = await export_chat_collection("checkins", -100123, "jsonl")
+
+    lines = gzip.decompress(export.file.read()).decode("utf-8").splitlines()
+    record = json.loads(lines[0])
+    assert len(lines) == 1
+    assert record["user_name"] == "Zé"
+    assert record["points_value"] == 2
+    assert record["anchor_id"] is None
+    assert record["created_at"] == "2025-01-02T00:00:00"
+    assert export.filename.endswith(".jsonl.gz")
+    export.close()
+
+
+@pytest.mark.asyncio
+async def test_export_empty(mock_mongodb):
+    """Testa que uma coleção vazia gera um arquivo apenas com o cabeçalho."""
+    mock_mongodb.find_chat_documents = MagicMock(return_value=FakeCursor([]))
+
+    export = await export_chat_collection("mensagens", -100123)
+
+    assert export.count == 0
+    header = gzip.decompress(export.file.read()).decode("utf-8").strip()
+    assert header == ",".join(EXPORT_COLLECTIONS["mensagens"][1])
+    export.close()
+
+
+@pytest.mark.asyncio
+async def test_export_database_error(mock_mongodb):
+    """Testa que um erro durante a leitura descarta a exportação incompleta."""
+    cursor = FakeCursor(_blacklist_documents(5), fail_after=2)
+    mock_mongodb.find_chat_documents = MagicMock(return_value=cursor)
+
+    assert await export_chat_collection("blacklist", -100123) is None
+
+
+@pytest.mark.asyncio
+async def test_export_invalid_arguments(mock_mongodb):
+    """Testa que tipos e formatos desconhecidos são rejeitados."""
+    with pytest.raises(ValueError):
+        await export_chat_collection("usuarios", -100123)
+    with pytest.raises(ValueError):
+        await export_chat_collection("blacklist", -100123, "xlsx")
@@ -14,11 +14,13 @@ from src.bot.checkin_handlers import (
     handle_checkin_response,
     checkinscore_command,
     generate_checkin_response_static,
+    format_checkin_scoreboard,
     confirmcheckin_command
 )
 from src.utils.mongodb_client import MongoDBClient # Para type hinting se necessário
 from bson import ObjectId # Importar ObjectId
 from telegram.constants import ParseMode
+from src.utils.chat_directory import ChatLookup
 
 @pytest.fixture
 def setup_mocks(mocker):
@@ -273,7 +275,7 @@ async def test_checkinscore_command_success(setup_mocks):
     assert kwargs.get("parse_mode") == ParseMode.HTML
 
 @pytest.mark.asyncio
-async def test_checkinscore_command_with_group_name(setup_mocks):
+async def test_checkinscore_command_with_group_name(setup_mocks, mocker):
     """Testa /checkinscore buscando por nome de grupo."""
     mocks = setup_mocks
     update = mocks["update"]
@@ -282,7 +284,8 @@ async def test_checkinscore_command_with_group_name(setup_mocks):
 
     context.args = ["Target", "Group"]
     target_chat_info = {"chat_id": -987, "title": "Target Group Title"}
-    mongodb_client.get_chat_info_by_title.return_value = target_chat_info
+    mock_resolve = AsyncMock(return_value=ChatLookup("Target Group", [target_chat_info]))
+    mocker.patch('src.bot.checkin_handlers.chat_directory.resolve', mock_resolve)
 
     # Corrigido: Garante que user_id está presente e correto
     scoreboard_data = [
@@ -294,14 +297,14 @@ async def test_checkinscore_command_with_group_name(setup_mocks):
 
     await checkinscore_command(update, context)
 
-    mongodb_client.get_chat_info_by_title.assert_called_once_with("Target Group")
+    mock_resolve.assert_called_once_with("Target Group")
     mongodb_client.get_checkin_scoreboard.assert_called_once_with(-987)
     context.bot.send_message.assert_called_once()
     # args, kwargs = context.bot.send_message.call_args
     # ... (verificações de conteúdo adiadas)
 
 @pytest.mark.asyncio
-async def test_checkinscore_command_group_not_found(setup_mocks):
+async def test_checkinscore_command_group_not_found(setup_mocks, mocker):
     """Testa /checkinscore quando o nome do grupo não é encontrado."""
     mocks = setup_mocks
     update = mocks["update"]
@@ -309,11 +312,12 @@ async def test_checkinscore_command_group_not_found(setup_mocks):
     mongodb_client = mocks["mock_mongodb_client"]
 
     context.args = ["Unknown", "Group"]
-    mongodb_client.get_chat_info_by_title.return_value = None
+    mock_resolve = AsyncMock(return_value=ChatLookup("Unknown Group", []))
+    mocker.patch('src.bot.checkin_handlers.chat_directory.resolve', mock_resolve)
 
     await checkinscore_command(update, context)
 
-    mongodb_client.get_chat_info_by_title.assert_called_once_with("Unknown Group")
+    mock_resolve.assert_called_once_with("Unknown Group")
     mongodb_client.get_checkin_scoreboard.assert_not_called()
     update.message.delete.assert_not_called()
     context.bot.send_message.assert_called_once()
@@ -322,6 +326,25 @@ async def test_checkinscore_command_group_not_found(setup_mocks):
     expected_text = "Não foi possível encontrar informações do grupo 'Unknown Group'. Verifique o nome ou se o bot está no grupo."
     # assert args[0] == expected_text # Verificação adiada devido a IndexError
 
+@pytest.mark.asyncio
+async def test_checkinscore_command_ambiguous_group(setup_mocks, mocker):
+    """Testa /checkinscore quando o nome corresponde a mais de um grupo."""
+    mocks = setup_mocks
+    update = mocks["update"]
+    context = mocks["context"]
+    mongodb_client = mocks["mock_mongodb_client"]
+
+    context.args = ["Gym"]
+    matches = [{"chat_id": -1, "title": "Gym Nation"}, {"chat_id": -2, "title": "Gym Nation Off"}]
+    mocker.patch('src.bot.checkin_handlers.chat_directory.resolve', AsyncMock(return_value=ChatLookup("Gym", matches)))
+
+    await checkinscore_command(update, context)
+
+    mongodb_client.get_checkin_scoreboard.assert_not_called()
+    text = context.bot.send_message.call_args[1]["text"]
+    assert "Gym Nation Off" in text
+    assert "Mais de um grupo" in text
+
 @pytest.mark.asyncio
 async def test_checkinscore_command_private_no_args(setup_mocks):
     """Testa /checkinscore em chat privado sem argumentos."""
@@ -485,4 +508,40 @@ async def test_confirmcheckin_command_already_checked_in(setup_mocks):
 # async def test_checkinscore_command_with_many_checkins(setup_mocks): ... (caso implícito)
 # @pytest.mark.asyncio
 # async def test_checkinscore_command(mocker): ... (Versão antiga/duplicada)
-# Fixtures e testes antigos relacionados a mock_update, mock_context, etc. 
\ No newline at end of file
+# Fixtures e testes antigos relacionados a mock_update, mock_context, etc. 
+
+
+def test_format_checkin_scoreboard_groups_by_score():
+    """Agrupa por pontuação (mesmo com entradas fora de ordem) e mostra as estatísticas."""
+    data = [
+        {"user_id": 1, "user_name": "Ana", "username": "ana", "score": 3},
+        {"user_id": 2, "user_name": "Bruno", "username": None, "score": 5},
+        {"user_id": 3, "user_name": "Carla", "username": None, "score": 3},
+        {"user_id": 4, "user_name": "Um nome realmente muito comprido", "username": None, "score": 1},
+    ]
+
+    text = format_checkin_scoreboard("Gym", data, 4, "Hoje")
+
+    assert text == (
+        "🏆 <b>GYM CHECK-INS</b> 🏆\n\n"
+        "🥇 (<b>5</b> check-ins)\n   👤 Bruno\n\n"
+        "🥈 (<b>3</b> check-ins)\n   👤 @ana\n   👤 Carla\n\n"
+        "🥉 (<b>1</b> check-in)\n   👤 Um nome realmente muito …\n"
+        "\n💪 Continue mantendo a consistência! 🔥\n"
+        "\n📊 <b>Estatísticas:</b>\n"
+        "• 4 pessoas já participaram\n"
+        "• 12 check-ins no total\n"
+        "• Primeiro check-in: Hoje"
+    )
+
+
+def test_format_checkin_scoreboard_shows_at_most_20_users():
+    """Exibe no máximo 20 usuários e indica com "..." que há mais."""
+    data = [{"user_id": i, "user_name": f"U{i}", "username": None, "score": 10 - i // 15} for i in range(60)]
+
+    text = format_checkin_scoreboard("Gym", data, 60, "Hoje")
+
+    assert text.count("👤") == 20
+    assert "   👤 U19\n   ..." in text
+    assert "🥉" not in text
+    assert f"• {sum(entry['score'] for entry in data)} check-ins no total" in text
@@ -0,0 +1,86 @@
+"""
+Testes para o filtro de conteúdo ofensivo.
+"""
+from unittest.mock import patch
+
+from src.utils import content_filter as filter_module
+from src.utils.content_filter import (
+    DEFAULT_LEXICON, ContentFilter, diminutive_forms, load_lexicon, normalize_for_filter
+)
+
+
+def test_normalize_for_filter():
+    """Testa acentos, leetspeak, letras espaçadas e letras repetidas."""
+    assert normalize_for_filter("PÓRRAAAA") == "pora"
+    assert normalize_for_filter("p0rr4 m3rd@") == "pora merda"
+    assert normalize_for_filter("i|diota!") == "idiota!"
+    assert "caralho" in normalize_for_filter("o c a r a l h o").split()
+    assert normalize_for_filter("100 kg, 3 séries") == "10 kg, 3 series"
+
+
+def test_detects_disguised_terms():
+    """Testa variações comuns dos termos do léxico."""
+    content_filter = ContentFilter(DEFAULT_LEXICON)
+    for text in ("Você é um idiota", "Que merda é essa?", "PORRA!", "p0rr4", "c a r a l h o",
+                 "p.o.r.r.a", "porraaaa", "Desgraçado", "seus otários", "IDIOTAS"):
+        assert content_filter.contains_offensive(text), text
+
+
+def test_ignores_words_that_only_contain_terms():
+    """Testa que palavras que apenas contêm um termo não são bloqueadas."""
+    content_filter = ContentFilter(DEFAULT_LEXICON)
+    for text in ("Olá, como vai?", "Parabéns pelo shape!", "computador novo", "disputa de supino",
+                 "100 kg no terra, 3 séries de 12", "", None):
+        assert not content_filter.contains_offensive(text), text
+
+
+def test_detects_diminutives_and_derived_forms():
+    """Testa que diminutivos e derivados dos termos padrão são bloqueados."""
+    content_filter = ContentFilter(DEFAULT_LEXICON)
+    for text in ("que merdinha", "sua putinha", "seu viadinho", "para de idiotice", "idiotinha",
+                 "babaquinha", "burrinho demais", "putinhas"):
+        assert content_filter.contains_offensive(text), text
+    for text in ("treino perto do viaduto", "disputa de supino", "computador novo"):
+        assert not content_filter.contains_offensive(text), text
+
+
+def test_diminutive_forms():
+    """Testa os diminutivos regulares gerados para os termos."""
+    assert diminutive_forms("merda") == ["merdinha", "merdinho", "merdazinha", "merdazinho"]
+    assert diminutive_forms("babaca")[0] == "babaquinha"
+    assert diminutive_forms("fdp") == []
+    assert diminutive_forms("putaria") == []
+
+
+def test_verdict_cache_is_bounded():
+    """Testa que os veredictos ficam em cache (LRU) até MAX_CACHE textos."""
+    content_filter = ContentFilter(["merda"])
+    content_filter.MAX_CACHE = 2
+    with patch.object(content_filter._matcher, "search", wraps=content_filter._matcher.search) as search:
+        assert content_filter.contains_offensive("que merda")
+        assert content_filter.contains_offensive("que merda")
+        assert search.call_count == 1
+        content_filter.contains_offensive("a")
+        content_filter.contains_offensive("b")
+        content_filter.contains_offensive("que merda")
+        assert search.call_count == 4
+
+
+def test_load_lexicon_file(tmp_path):
+    """Testa a leitura do arquivo de léxico (comentários e linhas vazias ignorados)."""
+    path = tmp_path / "lexico.txt"
+    path.write_text("# comentário\nbosta\n\n  lixo*  \n", encoding="utf-8")
+    assert load_lexicon(str(path)) == ["bosta", "lixo*"]
+    assert load_lexicon(str(tmp_path / "inexistente.txt")) == []
+
+
+def test_load_content_filter_extends_default_lexicon(tmp_path):
+    """Testa que CONTENT_FILTER_LEXICON_FILE acrescenta termos ao léxico padrão."""
+    path = tmp_path / "lexico.txt"
+    path.write_text("bosta\nlixo*\n", encoding="utf-8")
+    with patch.object(filter_module.Config, "get_content_filter_lexicon_file", return_value=str(path)):
+        content_filter = filter_module.load_content_filter()
+    assert content_filter.term_count == len(DEFAULT_LEXICON) + 2
+    assert content_filter.contains_offensive("que b0st4")
+    assert content_filter.contains_offensive("lixoso")
+    assert content_filter.contains_offensive("merda")
@@ -0,0 +1,140 @@
+"""
+Testes para o agendador de exclusão de mensagens temporárias.
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from telegram.error import BadRequest, RetryAfter
+
+from src.utils.deletion_scheduler import DeletionScheduler
+from src.utils.timer_heap import TimerHeap
+
+
+def test_timer_heap_orders_and_reschedules():
+    """Testa a ordenação, o reagendamento e a remoção no heap de prazos."""
+    timers = TimerHeap()
+    timers.push("a", 30)
+    timers.push("b", 10)
+    timers.push("c", 20)
+
+    # Reagenda "a" para antes de todos e remove "c"
+    timers.push("a", 5)
+    assert timers.remove("c") is True
+    assert timers.remove("c") is False
+
+    assert len(timers) == 2
+    assert timers.peek_due() == 5
+    assert [key for key, _, _ in timers.pop_due(now=100)] == ["a", "b"]
+    assert timers.peek_due() is None
+
+
+def test_timer_heap_pop_due_respects_now():
+    """Testa que apenas as entradas vencidas são retornadas."""
+    timers = TimerHeap()
+    timers.push(1, 10, "x")
+    timers.push(2, 50, "y")
+
+    assert timers.pop_due(now=20) == [(1, 10, "x")]
+    assert 2 in timers
+    assert timers.get(2) == (50, "y")
+
+
+@pytest.mark.asyncio
+async def test_process_due_batches_per_chat():
+    """Testa que as mensagens vencidas são excluídas em lotes por chat."""
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(return_value=True)
+    scheduler = DeletionScheduler(bot, persist=False)
+
+    await scheduler.schedule(1, 10, 0)
+    await scheduler.schedule(1, 11, 0)
+    await scheduler.schedule(2, 20, 0)
+    await scheduler.schedule(2, 21, 3600)
+
+    await scheduler._process_due()
+
+    assert bot.delete_messages.await_count == 2
+    calls = {c.kwargs["chat_id"]: c.kwargs["message_ids"] for c in bot.delete_messages.await_args_list}
+    assert calls == {1: [10, 11], 2: [20]}
+    assert scheduler.pending_count == 1
+    assert scheduler.get_stats()["deleted_total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_process_due_splits_large_batches():
+    """Testa que lotes maiores que o limite da API são divididos."""
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(return_value=True)
+    scheduler = DeletionScheduler(bot, persist=False)
+
+    for message_id in range(250):
+        await scheduler.schedule(1, message_id, 0)
+
+    await scheduler._process_due()
+
+    sizes = [len(c.kwargs["message_ids"]) for c in bot.delete_messages.await_args_list]
+    assert sizes == [100, 100, 50]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_reschedules_batch():
+    """Testa que um RetryAfter reagenda o lote em vez de descartá-lo."""
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(side_effect=RetryAfter(30))
+    scheduler = DeletionScheduler(bot, persist=False)
+
+    await scheduler.schedule(1, 10, 0)
+    await scheduler._process_due()
+
+    assert scheduler.pending_count == 1
+    assert scheduler._timers.peek_due() >= time.time() + 25
+    assert scheduler.get_stats()["failed_total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_telegram_error_drops_batch_and_cleans_persistence():
+    """Testa que erros definitivos descartam o lote e limpam a persistência."""
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(side_effect=BadRequest("Message can't be deleted"))
+
+    with patch("src.utils.deletion_scheduler.mongodb_client") as mock_db:
+        mock_db.add_pending_deletion = AsyncMock(return_value=True)
+        mock_db.remove_pending_deletions = AsyncMock(return_value=1)
+        scheduler = DeletionScheduler(bot, persist=True)
+
+        await scheduler.schedule(1, 10, 0)
+        mock_db.add_pending_deletion.assert_awaited_once()
+
+        await scheduler._process_due()
+
+        assert scheduler.pending_count == 0
+        assert scheduler.get_stats()["failed_total"] == 1
+        mock_db.remove_pending_deletions.assert_awaited_once_with(1, [10])
+
+
+@pytest.mark.asyncio
+async def test_worker_deletes_after_delay_and_restores_persisted():
+    """Testa o worker completo, incluindo exclusões recarregadas do MongoDB."""
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(return_value=True)
+
+    with patch("src.utils.deletion_scheduler.mongodb_client") as mock_db:
+        from datetime import datetime
+        mock_db.get_pending_deletions = AsyncMock(return_value=[
+            {"chat_id": 5, "message_id": 50, "delete_at": datetime.now()}
+        ])
+        mock_db.add_pending_deletion = AsyncMock(return_value=True)
+        mock_db.remove_pending_deletions = AsyncMock(return_value=1)
+
+        scheduler = DeletionScheduler(bot, persist=True)
+        await scheduler.start()
+        await scheduler.schedule(6, 60, 0.05)
+
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    deleted = {c.kwargs["chat_id"]: c.kwargs["message_ids"] for c in bot.delete_messages.await_args_list}
+    assert deleted == {5: [50], 6: [60]}
+    assert scheduler.pending_count == 0
@@ -0,0 +1,150 @@
+"""
+Testes para os handlers de exportação de dados.
+"""
+import io
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from telegram import Update, User, Chat, Message
+from telegram.constants import ChatType
+from telegram.ext import ContextTypes
+
+from src.bot.export_handlers import export_command, EXPORT_USAGE
+from src.utils.chat_directory import ChatLookup
+from src.utils.chat_export import ChatExport, MAX_DOCUMENT_SIZE
+
+@pytest.fixture
+def mock_update():
+    """
+    Mock para Update do Telegram.
+    """
+    update = MagicMock(spec=Update)
+    update.effective_user = MagicMock(spec=User)
+    update.effective_user.id = 12345
+    update.effective_chat = MagicMock(spec=Chat)
+    update.effective_chat.id = 67890
+    update.effective_chat.type = ChatType.PRIVATE
+    update.message = MagicMock(spec=Message)
+    update.message.delete = AsyncMock()
+    return update
+
+@pytest.fixture
+def mock_context():
+    """
+    Mock para ContextTypes.DEFAULT_TYPE do Telegram.
+    """
+    context = MagicMock(spec=ContextTypes.DEFAULT_TYPE)
+    context.bot = MagicMock()
+    context.bot.send_message = AsyncMock()
+    context.bot.send_document = AsyncMock()
+    context.bot.send_chat_action = AsyncMock()
+    context.args = []
+    return context
+
+@pytest.mark.asyncio
+@patch("src.bot.export_handlers.is_admin", new_callable=AsyncMock)
+@patch("src.bot.export_handlers.send_temporary_message", new_callable=AsyncMock)
+async def test_export_command_not_admin(mock_send_temp, mock_is_admin, mock_update, mock_context):
+    """
+    Testa que apenas administradores podem exportar.
+    """
+    mock_is_admin.return_value = False
+    mock_context.args = ["blacklist"]
+
+    await export_command(mock_update, mock_context)
+
+    mock_send_temp.assert_called_once_with(mock_update, mock_context, "Apenas administradores podem usar este comando.")
+    mock_context.bot.send_document.assert_not_called()
+
+@pytest.mark.asyncio
+@patch("src.bot.export_handlers.is_admin", new_callable=AsyncMock)
+@patch("src.bot.export_handlers.send_temporary_message", new_callable=AsyncMock)
+async def test_export_command_invalid_kind(mock_send_temp, mock_is_admin, mock_update, mock_context):
+    """
+    Testa que um tipo de exportação desconhecido mostra o uso do comando.
+    """
+    mock_is_admin.return_value = True
+    mock_context.args = ["usuarios"]
+
+    await export_command(mock_update, mock_context)
+
+    mock_send_temp.assert_called_once_with(mock_update, mock_context, EXPORT_USAGE)
+
+@pytest.mark.asyncio
+@patch("src.bot.export_handlers.export_chat_collection", new_callable=AsyncMock)
+@patch("src.bot.export_handlers.chat_directory")
+@patch("src.bot.export_handlers.is_admin", new_callable=AsyncMock)
+async def test_export_command_group_sends_single_document(mock_is_admin, mock_directory, mock_export, mock_update, mock_context):
+    """
+    Testa a exportação de um grupo pelo nome: um único send_document com o arquivo compactado.
+    """
+    mock_is_admin.return_value = True
+    mock_context.args = ["mensagens", "JSONL", "Gym", "Nation"]
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("Gym Nation", [{"chat_id": -100987, "title": "Gym Nation"}]))
+    export_file = io.BytesIO(b"conteudo")
+    mock_export.return_value = ChatExport(export_file, "mensagens_-100987.jsonl.gz", 42, 8)
+
+    await export_command(mock_update, mock_context)
+
+    mock_directory.resolve.assert_called_once_with("Gym Nation")
+    mock_export.assert_called_once_with("mensagens", -100987, "jsonl")
+    mock_context.bot.send_document.assert_called_once()
+    kwargs = mock_context.bot.send_document.call_args[1]
+    assert kwargs["chat_id"] == 67890
+    assert kwargs["document"] is export_file
+    assert kwargs["filename"] == "mensagens_-100987.jsonl.gz"
+    assert "42 registros" in kwargs["caption"]
+    assert export_file.closed
+    mock_update.message.delete.assert_called_once()
+
+@pytest.mark.asyncio
+@patch("src.bot.export_handlers.export_chat_collection", new_callable=AsyncMock)
+@patch("src.bot.export_handlers.is_admin", new_callable=AsyncMock)
+async def test_export_command_current_chat_empty(mock_is_admin, mock_export, mock_update, mock_context):
+    """
+    Testa que uma exportação sem registros avisa em vez de enviar um arquivo.
+    """
+    mock_is_admin.return_value = True
+    mock_context.args = ["checkins"]
+    mock_export.return_value = ChatExport(io.BytesIO(), "checkins.csv.gz", 0, 20)
+
+    await export_command(mock_update, mock_context)
+
+    mock_export.assert_called_once_with("checkins", 67890, "csv")
+    mock_context.bot.send_document.assert_not_called()
+    assert "Não há registros" in mock_context.bot.send_message.call_args[1]["text"]
+
+@pytest.mark.asyncio
+@patch("src.bot.export_handlers.export_chat_collection", new_callable=AsyncMock)
+@patch("src.bot.export_handlers.is_admin", new_callable=AsyncMock)
+async def test_export_command_too_large(mock_is_admin, mock_export, mock_update, mock_context):
+    """
+    Testa que arquivos acima do limite do Telegram não são enviados.
+    """
+    mock_is_admin.return_value = True
+    mock_context.args = ["mensagens"]
+    mock_export.return_value = ChatExport(io.BytesIO(), "mensagens.csv.gz", 10, MAX_DOCUMENT_SIZE + 1)
+
+    await export_command(mock_update, mock_context)
+
+    mock_context.bot.send_document.assert_not_called()
+    assert "excede o limite" in mock_context.bot.send_message.call_args[1]["text"]
+
+@pytest.mark.asyncio
+@patch("src.bot.export_handlers.export_chat_collection", new_callable=AsyncMock)
+@patch("src.bot.export_handlers.chat_directory")
+@patch("src.bot.export_handlers.is_admin", new_callable=AsyncMock)
+async def test_export_command_group_not_found(mock_is_admin, mock_directory, mock_export, mock_update, mock_context):
+    """
+    Testa a exportação de um grupo que não está no índice.
+    """
+    mock_is_admin.return_value = True
+    mock_context.args = ["blacklist", "Inexistente"]
+    mock_directory.resolve = AsyncMock(return_value=ChatLookup("Inexistente", []))
+
+    await export_command(mock_update, mock_context)
+
+    mock_export.assert_not_called()
+    mock_context.bot.send_message.assert_called_once_with(
+        chat_id=67890,
+        text="❌ Grupo 'Inexistente' não encontrado."
+    )
@@ -15,7 +15,12 @@ from src.bot.handlers import (
     say_command,
     sayrecurrent_command,
     listrecurrent_command,
-    delrecurrent_command
+    delrecurrent_command,
+    is_admin,
+    handle_chat_member_update,
+    record_member_activity,
+    perf_command,
+    spawn_message_deletion
 )
 from src.bot.messages import Messages
 import pytest
@@ -812,5 +817,92 @@ class TestHandlers(unittest.TestCase):
         call_args = self.update.message.reply_text.call_args[0]
         self.assertIn("Erro ao desativar mensagem recorrente", call_args[0])
 
+@pytest.mark.asyncio
+@patch('src.bot.handlers.Config.get_owner_id', return_value=1)
+@patch('src.bot.handlers.admin_cache')
+async def test_is_admin_uses_cached_admin_lists(mock_cache, mock_owner):
+    """Testa que is_admin consulta as listas em cache (bot e chat) sem chamar get_chat_member."""
+    update = MagicMock(spec=Update)
+    update.effective_chat.type = "supergroup"
+    update.effective_chat.id = -100
+    update.effective_user.id = 42
+    context = MagicMock()
+    mock_cache.is_bot_admin = AsyncMock(return_value=False)
+    mock_cache.is_chat_admin = AsyncMock(return_value=True)
+
+    assert await is_admin(update, context) is True
+
+    mock_cache.is_bot_admin.assert_called_once_with(42)
+    mock_cache.is_chat_admin.assert_called_once_with(context.bot, -100, 42)
+    context.bot.get_chat_member.assert_not_called()
+
+@pytest.mark.asyncio
+@patch('src.bot.handlers.admin_cache')
+async def test_handle_chat_member_update_promotion(mock_cache):
+    """Testa que uma promoção a administrador atualiza o cache."""
+    from telegram import ChatMemberAdministrator
+    update = MagicMock(spec=Update)
+    new_member = MagicMock(spec=ChatMemberAdministrator)
+    new_member.user.id = 42
+    update.chat_member.new_chat_member = new_member
+    update.chat_member.chat.id = -100
+
+    await handle_chat_member_update(update, MagicMock())
+
+    mock_cache.apply_member_update.assert_called_once_with(-100, 42, True)
+
+@pytest.mark.asyncio
+@patch('src.bot.handlers.member_directory')
+async def test_record_member_activity(mock_directory):
+    """Testa que o autor, os novos membros e quem saiu são registrados no diretório."""
+    update = MagicMock(spec=Update)
+    update.effective_chat.type = "supergroup"
+    update.effective_chat.id = -100
+    joined = MagicMock(spec=User)
+    left = MagicMock(spec=User)
+    update.effective_message.new_chat_members = [joined]
+    update.effective_message.left_chat_member = left
+
+    await record_member_activity(update, MagicMock())
+
+    mock_directory.observe.assert_any_call(-100, update.effective_message.from_user)
+    mock_directory.observe.assert_any_call(-100, joined)
+    mock_directory.observe.assert_any_call(-100, left, "left")
+
+@pytest.mark.asyncio
+@patch('src.bot.handlers.perf_stats')
+async def test_perf_command_reset(mock_stats):
+    """Testa que /perf reset descarta as amostras."""
+    update = MagicMock(spec=Update)
+    update.message.reply_text = AsyncMock()
+    context = MagicMock()
+    context.args = ["reset"]
+
+    await perf_command(update, context)
+
+    mock_stats.reset.assert_called_once()
+    update.message.reply_text.assert_called_once()
+
+@pytest.mark.asyncio
+@patch('src.bot.handlers.mongodb_client')
+async def test_spawn_message_deletion_persists_on_shutdown(mock_client):
+    """Testa que uma exclusão temporária pendente no desligamento é gravada no MongoDB."""
+    from src.utils.task_supervisor import task_supervisor
+    mock_client.add_pending_deletion = AsyncMock(return_value=True)
+    message = MagicMock()
+    message.chat_id = -100
+    message.message_id = 7
+    message.delete = AsyncMock()
+
+    spawn_message_deletion(message, 60)
+    [entry] = task_supervisor.tasks("temporary_messages")
+    assert entry.name == "delete:-100:7"
+
+    await task_supervisor.drain(5)
+
+    message.delete.assert_not_called()
+    chat_id, message_id, _ = mock_client.add_pending_deletion.await_args.args
+    assert (chat_id, message_id) == (-100, 7)
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Testes para o contador aproximado HyperLogLog.
+"""
+import pytest
+
+from src.utils.hyperloglog import HyperLogLog, hll_register
+
+
+def test_register_is_deterministic():
+    """Testa que o mesmo elemento sempre cai no mesmo registrador."""
+    assert hll_register(123456) == hll_register(123456)
+    index, rank = hll_register(123456)
+    assert 0 <= index < 1024
+    assert rank >= 1
+
+
+def test_duplicates_are_not_counted():
+    """Testa que elementos repetidos não aumentam a contagem."""
+    hll = HyperLogLog()
+    for _ in range(100):
+        hll.add(42)
+    assert hll.count() == 1
+
+
+@pytest.mark.parametrize("cardinality", [100, 5000, 50000])
+def test_estimate_is_close(cardinality):
+    """Testa que a estimativa fica próxima da cardinalidade real."""
+    hll = HyperLogLog()
+    for user_id in range(cardinality):
+        hll.add(user_id)
+    assert abs(hll.count() - cardinality) / cardinality < 0.1
+
+
+def test_merge_is_union():
+    """Testa que a combinação de registradores estima a união dos conjuntos."""
+    first = HyperLogLog()
+    second = HyperLogLog()
+    for user_id in range(0, 3000):
+        first.add(user_id)
+    for user_id in range(2000, 5000):
+        second.add(user_id)
+
+    # Registradores vindos do MongoDB têm índices em texto
+    merged = HyperLogLog(registers={str(k): v for k, v in first.registers.items()})
+    merged.merge(second.registers)
+    assert abs(merged.count() - 5000) / 5000 < 0.1
+
+
+def test_invalid_precision():
+    """Testa que uma precisão fora do intervalo é rejeitada."""
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=20)
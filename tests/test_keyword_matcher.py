@@ -0,0 +1,82 @@
+"""
+Testes para a busca de palavras-chave (Aho-Corasick).
+"""
+from src.utils.keyword_matcher import KeywordMatcher, plural_forms
+
+
+def make_matcher(**kwargs):
+    """Matcher com palavras-chave de duas categorias."""
+    return KeywordMatcher(
+        [("proteína", "nutricao"), ("whey", "nutricao"), ("whey", "suplemento"),
+         ("treino", "treino"), ("pré-treino", "suplemento"), ("ganho de massa", "treino")],
+        **kwargs
+    )
+
+
+def test_plural_forms():
+    """Testa as regras de plural regular."""
+    assert plural_forms("treino") == ["treinos"]
+    assert plural_forms("acao") == ["acoes", "acaes", "acaos"]
+    assert plural_forms("superavit") == []
+    assert plural_forms("mulher") == ["mulheres"]
+    assert plural_forms("anual") == ["anuais"]
+    assert plural_forms("jejum") == ["jejuns"]
+    assert plural_forms("") == []
+
+
+def test_count_ignores_accents_case_and_plurals():
+    """Testa que acentos, maiúsculas e o plural regular são ignorados."""
+    matcher = make_matcher()
+    assert matcher.count("PROTEINA ou proteínas? Treinos!") == {"nutricao": 2, "treino": 1}
+
+
+def test_count_without_inflection():
+    """Testa que, sem inflect, só a forma exata (sem acentos) é reconhecida."""
+    matcher = make_matcher(inflect=False)
+    assert matcher.count("proteínas e proteina") == {"nutricao": 1}
+
+
+def test_matches_only_whole_words():
+    """Testa que ocorrências dentro de outras palavras não contam."""
+    matcher = make_matcher()
+    assert matcher.count("treinou retreino treino_a treino2") == {}
+    assert matcher.search("destreinado") is None
+
+
+def test_overlapping_and_multi_label_matches():
+    """Testa termos sobrepostos, termos com várias palavras e termos com vários rótulos."""
+    matcher = make_matcher()
+    assert matcher.count("pré-treino e whey") == {"suplemento": 2, "treino": 1, "nutricao": 1}
+    assert matcher.count("dieta para  GANHO DE MASSA") == {"treino": 1}
+
+
+def test_finditer_positions():
+    """Testa as posições devolvidas (no texto normalizado)."""
+    matcher = make_matcher()
+    assert list(matcher.finditer("Bom treino")) == [(4, 10, "treino")]
+    assert matcher.search("whey") == "nutricao"
+
+
+def test_add_after_search_rebuilds():
+    """Testa que termos adicionados depois de uma busca são reconhecidos."""
+    matcher = make_matcher()
+    assert matcher.count("creatina") == {}
+    matcher.add("Creatina", "suplemento")
+    assert matcher.count("creatinas") == {"suplemento": 1}
+    assert matcher.term_count == 7
+
+
+def test_empty_terms_and_text():
+    """Testa termos e textos vazios."""
+    matcher = KeywordMatcher([("  ", "vazio")])
+    assert matcher.term_count == 0
+    assert matcher.count("") == {}
+    assert make_matcher().count(None) == {}
+
+
+def test_prefix_terms():
+    """Testa termos terminados em "*" (prefixos, sem plural)."""
+    matcher = KeywordMatcher([("desgraç*", "ofensa")])
+    assert matcher.count("Desgraçado! desgraça") == {"ofensa": 2}
+    assert matcher.count("a desgra") == {}
+    assert matcher.count("indesgracado") == {}
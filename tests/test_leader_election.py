@@ -0,0 +1,104 @@
+"""
+Testes para a eleição de líder entre réplicas.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.utils.leader_election import LeaderElector
+
+
+def make_elector():
+    """Cria um eleitor com callbacks mockados."""
+    on_elected = AsyncMock()
+    on_demoted = AsyncMock()
+    elector = LeaderElector("test", on_elected, on_demoted, ttl_seconds=9, holder_id="replica-a")
+    return elector, on_elected, on_demoted
+
+
+@pytest.mark.asyncio
+async def test_acquires_leadership_with_fencing_token():
+    """Testa que a réplica assume a liderança com o token retornado pelo banco."""
+    elector, on_elected, on_demoted = make_elector()
+
+    with patch("src.utils.leader_election.mongodb_client") as mock_db:
+        mock_db.db = MagicMock()
+        mock_db.acquire_lease = AsyncMock(return_value=7)
+
+        await elector._tick()
+        # Renovação com o mesmo token não dispara nova eleição
+        await elector._tick()
+
+    assert elector.is_leader is True
+    assert elector.fencing_token == 7
+    on_elected.assert_awaited_once_with(7)
+    on_demoted.assert_not_awaited()
+    mock_db.acquire_lease.assert_awaited_with("test", "replica-a", 9)
+
+
+@pytest.mark.asyncio
+async def test_follower_stays_idle_when_lease_is_held():
+    """Testa que a réplica não assume a liderança se o lease pertence a outra."""
+    elector, on_elected, _ = make_elector()
+
+    with patch("src.utils.leader_election.mongodb_client") as mock_db:
+        mock_db.db = MagicMock()
+        mock_db.acquire_lease = AsyncMock(return_value=None)
+
+        await elector._tick()
+
+    assert elector.is_leader is False
+    on_elected.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_lease_cannot_be_renewed():
+    """Testa que a líder se rebaixa antes do fim do lease se não conseguir renovar."""
+    elector, _, on_demoted = make_elector()
+
+    with patch("src.utils.leader_election.mongodb_client") as mock_db:
+        mock_db.db = MagicMock()
+        mock_db.acquire_lease = AsyncMock(return_value=3)
+        await elector._tick()
+
+        # Renovação falha, mas o lease ainda é válido: continua líder
+        mock_db.acquire_lease = AsyncMock(return_value=None)
+        await elector._tick()
+        assert elector.is_leader is True
+
+        # Passado o prazo seguro, a réplica deixa a liderança
+        elector._lease_deadline = 0
+        await elector._tick()
+
+    assert elector.is_leader is False
+    assert elector.fencing_token is None
+    on_demoted.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_stop_releases_lease():
+    """Testa que parar o eleitor libera o lease para failover imediato."""
+    elector, _, on_demoted = make_elector()
+
+    with patch("src.utils.leader_election.mongodb_client") as mock_db:
+        mock_db.db = MagicMock()
+        mock_db.acquire_lease = AsyncMock(return_value=1)
+        mock_db.release_lease = AsyncMock(return_value=True)
+
+        await elector._tick()
+        await elector.stop()
+
+    on_demoted.assert_awaited_once()
+    mock_db.release_lease.assert_awaited_once_with("test", "replica-a")
+
+
+@pytest.mark.asyncio
+async def test_runs_without_election_when_mongodb_is_unavailable():
+    """Testa que, sem MongoDB, a réplica assume o papel sozinha."""
+    elector, on_elected, _ = make_elector()
+
+    with patch("src.utils.leader_election.mongodb_client") as mock_db:
+        mock_db.db = None
+        await elector._tick()
+
+    assert elector.is_leader is True
+    on_elected.assert_awaited_once_with(0)
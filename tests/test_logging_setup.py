@@ -0,0 +1,110 @@
+"""
+Testes para a configuração do logging (fila, formatos, limite e amostragem).
+"""
+import io
+import json
+import logging
+import sys
+from unittest.mock import patch
+
+from src.utils import logging_setup
+from src.utils.logging_setup import JsonFormatter, RateLimitFilter, SamplingFilter, TextFormatter
+
+
+def make_record(msg="Mensagem %s", args=(1,), level=logging.INFO, name="src.teste", lineno=1, **extra):
+    """Cria um LogRecord com campos extras."""
+    record = logging.LogRecord(name, level, __file__, lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_drops_and_counts_repeated_messages():
+    """Testa que o mesmo ponto de log é limitado e os descartes são informados depois."""
+    rate_filter = RateLimitFilter(limit=2, window=60)
+    results = [rate_filter.filter(make_record(args=(index,))) for index in range(5)]
+    assert results == [True, True, False, False, False]
+    assert rate_filter.suppressed_total == 3
+    # Outro ponto de log tem seu próprio limite; erros sempre passam
+    assert rate_filter.filter(make_record(lineno=2))
+    assert rate_filter.filter(make_record(level=logging.ERROR))
+
+    rate_filter._counters[("src.teste", __file__, 1)][0] -= 61
+    record = make_record()
+    assert rate_filter.filter(record)
+    assert record.suppressed == 3
+
+
+def test_rate_limit_groups_fstring_messages_by_call_site():
+    """Testa que mensagens com f-string (texto diferente a cada chamada) são limitadas pelo ponto de log."""
+    rate_filter = RateLimitFilter(limit=2, window=60)
+    results = [rate_filter.filter(make_record(msg=f"Usuário {index} ignorado", args=())) for index in range(4)]
+    assert results == [True, True, False, False]
+
+
+def test_sampling_by_logger_prefix_and_extra():
+    """Testa a amostragem pelo prefixo do logger e pela fração informada no extra."""
+    sampling = SamplingFilter({"httpx": 0.25, "telegram": 0.0})
+    kept = [sampling.filter(make_record(name="httpx._client")) for _ in range(8)]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert not sampling.filter(make_record(name="telegram.ext.Application"))
+    assert sampling.filter(make_record(name="telegram.ext.Application", level=logging.WARNING))
+    assert sampling.filter(make_record(name="src.main"))
+
+    sampled = [sampling.filter(make_record(name="src.main", msg="Ruído", args=(), sample_rate=0.5)) for _ in range(4)]
+    assert sampled == [True, False, True, False]
+
+
+def test_json_formatter_includes_extra_fields():
+    """Testa o formato JSON (mensagem montada, campos de extra= e exceção)."""
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        record = make_record(chat_id=-100, suppressed=2)
+        record.exc_info = sys.exc_info()
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "Mensagem 1"
+    assert payload["level"] == "INFO" and payload["logger"] == "src.teste"
+    assert payload["chat_id"] == -100 and payload["suppressed"] == 2
+    assert "ValueError: falhou" in payload["exc"]
+
+
+def test_text_formatter_reports_suppressed_and_sampled():
+    """Testa que o formato de texto informa descartes e amostragem."""
+    text = TextFormatter().format(make_record(suppressed=4, sampled=10))
+    assert text.endswith("Mensagem 1 (+4 suprimidas) (amostra 1/10)")
+
+
+def test_start_and_stop_logging_writes_through_queue():
+    """Testa que os registros passam pela fila e são escritos pelo listener."""
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_level = root.level
+    with patch.object(logging_setup.Config, "get_log_rate_limit", return_value=1), \
+            patch.object(logging_setup.Config, "get_log_sample_rates", return_value={}):
+        logging_setup.start_logging("INFO", "json", stream)
+    try:
+        logger = logging.getLogger("src.teste_fila")
+        args = {"n": 1}
+        for _ in range(2):
+            logger.info("Valor %s", args)
+        logger.debug("Descartado")
+    finally:
+        logging_setup.stop_logging()
+        root.setLevel(previous_level)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines() if "teste_fila" in line]
+    assert [line["message"] for line in lines] == ["Valor {'n': 1}"]
+    assert logging_setup.log_listener is None
+    assert not any(isinstance(h, logging_setup.DeferredQueueHandler) for h in root.handlers)
+
+
+def test_start_logging_invalid_level_uses_info():
+    """Testa que um LOG_LEVEL inválido vira INFO."""
+    root = logging.getLogger()
+    previous_level = root.level
+    try:
+        logging_setup.start_logging("VERBOSO", "text", io.StringIO())
+        assert root.level == logging.INFO
+    finally:
+        logging_setup.stop_logging()
+        root.setLevel(previous_level)
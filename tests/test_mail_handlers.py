@@ -6,7 +6,10 @@ import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
 
+from telegram.error import TimedOut
+
 from src.bot.mail_handlers import MailHandlers
+from src.utils.quota_service import QuotaResult, QuotaReservation
 
 
 class TestMailHandlers:
@@ -26,8 +29,10 @@ class TestMailHandlers:
         assert not await MailHandlers._contains_offensive_content("Parabéns pelo shape!")
     
     @pytest.mark.asyncio
-    async def test_check_user_in_group_success(self):
+    @patch('src.bot.mail_handlers.member_directory')
+    async def test_check_user_in_group_success(self, mock_directory):
         """Testa verificação de usuário no grupo - sucesso."""
+        mock_directory.lookup = AsyncMock(return_value=None)
         # Mock do bot
         mock_bot = AsyncMock()
         mock_member = MagicMock()
@@ -41,8 +46,10 @@ class TestMailHandlers:
         mock_bot.get_chat_member.assert_called_once_with(-123456789, "@testuser")
     
     @pytest.mark.asyncio
-    async def test_check_user_in_group_not_member(self):
+    @patch('src.bot.mail_handlers.member_directory')
+    async def test_check_user_in_group_not_member(self, mock_directory):
         """Testa verificação de usuário no grupo - não é membro."""
+        mock_directory.lookup = AsyncMock(return_value=None)
         # Mock do bot
         mock_bot = AsyncMock()
         mock_member = MagicMock()
@@ -55,8 +62,10 @@ class TestMailHandlers:
         assert result is False
     
     @pytest.mark.asyncio
-    async def test_check_user_in_group_error(self):
+    @patch('src.bot.mail_handlers.member_directory')
+    async def test_check_user_in_group_error(self, mock_directory):
         """Testa verificação de usuário no grupo - erro."""
+        mock_directory.lookup = AsyncMock(return_value=None)
         # Mock do bot que gera exceção
         mock_bot = AsyncMock()
         mock_bot.get_chat_member.side_effect = Exception("User not found")
@@ -64,7 +73,62 @@ class TestMailHandlers:
         # Teste
         result = await MailHandlers._check_user_in_group(mock_bot, -123456789, "testuser")
         
+        assert result is None
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.member_directory')
+    async def test_check_user_in_group_timeout(self, mock_directory):
+        """Testa que um timeout da API não é tratado como usuário fora do grupo."""
+        mock_directory.lookup = AsyncMock(return_value=None)
+        mock_bot = AsyncMock()
+        mock_bot.get_chat_member.side_effect = TimedOut()
+        
+        result = await MailHandlers._check_user_in_group(mock_bot, -123456789, "testuser")
+        
+        assert result is None
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.member_directory')
+    async def test_check_user_in_group_directory_error(self, mock_directory):
+        """Testa que uma falha no diretório de membros não é tratada como usuário fora do grupo."""
+        mock_directory.lookup = AsyncMock(side_effect=RuntimeError("mongo indisponível"))
+        mock_bot = AsyncMock()
+        
+        result = await MailHandlers._check_user_in_group(mock_bot, -123456789, "testuser")
+        
+        assert result is None
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.member_directory')
+    async def test_check_user_in_group_uses_directory(self, mock_directory):
+        """Testa que um usuário já visto no grupo é verificado sem chamar a API."""
+        mock_directory.lookup = AsyncMock(return_value={"user_id": 42, "status": "left"})
+        mock_bot = AsyncMock()
+        
+        result = await MailHandlers._check_user_in_group(mock_bot, -123456789, "@TestUser")
+        
         assert result is False
+        mock_directory.lookup.assert_called_once_with(-123456789, "TestUser")
+        mock_bot.get_chat_member.assert_not_called()
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.MailHandlers._check_user_in_group', new_callable=AsyncMock)
+    @patch('src.bot.mail_handlers.mongodb_client')
+    async def test_handle_mail_recipient_not_in_group(self, mock_mongodb, mock_check):
+        """Testa que um destinatário que não está no grupo é recusado."""
+        from src.bot.mail_handlers import MAIL_RECIPIENT
+        mock_mongodb.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_check.return_value = False
+        update = MagicMock()
+        update.message.text = "@fulano"
+        update.message.reply_text = AsyncMock()
+        context = MagicMock()
+        
+        result = await MailHandlers.handle_mail_recipient(update, context)
+        
+        assert result == MAIL_RECIPIENT
+        mock_check.assert_called_once_with(context.bot, -100, "fulano")
+        assert "não está no grupo" in update.message.reply_text.call_args[0][0]
     
     @pytest.mark.asyncio
     @patch('src.bot.mail_handlers.mongodb_client')
@@ -118,11 +182,11 @@ class TestMailHandlers:
         assert "chat privado" in call_args
     
     @pytest.mark.asyncio
-    @patch('src.bot.mail_handlers.mongodb_client')
-    async def test_correio_command_daily_limit_reached(self, mock_mongodb):
+    @patch('src.bot.mail_handlers.mail_quota')
+    async def test_correio_command_daily_limit_reached(self, mock_quota):
         """Testa comando /correio com limite diário atingido."""
-        # Mock do MongoDB
-        mock_mongodb.get_daily_mail_count.return_value = 2
+        # Mock da cota
+        mock_quota.peek = AsyncMock(return_value=QuotaResult(False, 2, 2, datetime.now()))
         
         # Mock do update
         mock_update = MagicMock()
@@ -142,14 +206,14 @@ class TestMailHandlers:
         mock_update.message.reply_text.assert_called_once()
         call_args = mock_update.message.reply_text.call_args[0][0]
         assert "2 correios hoje" in call_args
-        mock_mongodb.get_daily_mail_count.assert_called_once_with(123456)
+        mock_quota.peek.assert_called_once_with("123456")
     
     @pytest.mark.asyncio
-    @patch('src.bot.mail_handlers.mongodb_client')
-    async def test_correio_command_success(self, mock_mongodb):
+    @patch('src.bot.mail_handlers.mail_quota')
+    async def test_correio_command_success(self, mock_quota):
         """Testa comando /correio com sucesso."""
-        # Mock do MongoDB
-        mock_mongodb.get_daily_mail_count.return_value = 0
+        # Mock da cota
+        mock_quota.peek = AsyncMock(return_value=QuotaResult(True, 0, 2, datetime.now()))
         
         # Mock do update
         mock_update = MagicMock()
@@ -257,6 +321,75 @@ class TestMailHandlers:
         
         # Verificar se mensagem foi armazenada no contexto
         assert mock_context.user_data['mail_message'] == "Esta é uma mensagem válida para o correio elegante"
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.mail_quota')
+    @patch('src.bot.mail_handlers.mongodb_client')
+    async def test_handle_mail_confirmation_reserves_quota(self, mock_mongodb, mock_quota):
+        """Testa que a confirmação reserva a cota antes de gravar o correio."""
+        mock_quota.reserve = AsyncMock(return_value=QuotaResult(
+            True, 1, 2, datetime.now(), QuotaReservation("mail:123456:202601010000")
+        ))
+        mock_quota.refund = AsyncMock()
+        mock_mongodb.create_mail = AsyncMock(return_value="mail_id")
+        
+        mock_update = MagicMock()
+        mock_update.callback_query.data = "mail_confirm_destinatario"
+        mock_update.callback_query.from_user.id = 123456
+        mock_update.callback_query.answer = AsyncMock()
+        mock_update.callback_query.edit_message_text = AsyncMock()
+        mock_context = MagicMock()
+        mock_context.user_data = {'mail_message': "Mensagem do correio elegante"}
+        
+        await MailHandlers.handle_mail_confirmation(mock_update, mock_context)
+        
+        mock_quota.reserve.assert_called_once_with("123456")
+        mock_mongodb.create_mail.assert_called_once()
+        mock_quota.refund.assert_not_called()
+        assert "sucesso" in mock_update.callback_query.edit_message_text.call_args[0][0]
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.mail_quota')
+    @patch('src.bot.mail_handlers.mongodb_client')
+    async def test_handle_mail_confirmation_limit_reached(self, mock_mongodb, mock_quota):
+        """Testa que a confirmação é recusada quando a cota se esgotou durante a conversa."""
+        mock_quota.reserve = AsyncMock(return_value=QuotaResult(False, 2, 2, datetime.now()))
+        mock_mongodb.create_mail = AsyncMock()
+        
+        mock_update = MagicMock()
+        mock_update.callback_query.data = "mail_confirm_destinatario"
+        mock_update.callback_query.from_user.id = 123456
+        mock_update.callback_query.answer = AsyncMock()
+        mock_update.callback_query.edit_message_text = AsyncMock()
+        mock_context = MagicMock()
+        mock_context.user_data = {'mail_message': "Mensagem do correio elegante"}
+        
+        await MailHandlers.handle_mail_confirmation(mock_update, mock_context)
+        
+        mock_mongodb.create_mail.assert_not_called()
+        assert "2 correios hoje" in mock_update.callback_query.edit_message_text.call_args[0][0]
+    
+    @pytest.mark.asyncio
+    @patch('src.bot.mail_handlers.mail_quota')
+    @patch('src.bot.mail_handlers.mongodb_client')
+    async def test_handle_mail_confirmation_refunds_on_failure(self, mock_mongodb, mock_quota):
+        """Testa que a cota é devolvida quando o correio não pôde ser gravado."""
+        reservation = QuotaReservation("mail:123456:202601010000")
+        mock_quota.reserve = AsyncMock(return_value=QuotaResult(True, 1, 2, datetime.now(), reservation))
+        mock_quota.refund = AsyncMock()
+        mock_mongodb.create_mail = AsyncMock(return_value=None)
+        
+        mock_update = MagicMock()
+        mock_update.callback_query.data = "mail_confirm_destinatario"
+        mock_update.callback_query.from_user.id = 123456
+        mock_update.callback_query.answer = AsyncMock()
+        mock_update.callback_query.edit_message_text = AsyncMock()
+        mock_context = MagicMock()
+        mock_context.user_data = {'mail_message': "Mensagem do correio elegante"}
+        
+        await MailHandlers.handle_mail_confirmation(mock_update, mock_context)
+        
+        mock_quota.refund.assert_called_once_with(reservation, "123456")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+"""
+Testes para o agendador de publicação de correios elegantes.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bson import ObjectId
+from telegram.error import RetryAfter
+
+from src.utils.mail_scheduler import MailScheduler
+
+
+def make_mail(text="Oi"):
+    """Cria um correio reservado de teste."""
+    return {"_id": ObjectId(), "recipient_username": "fulano", "message_text": text}
+
+
+def make_scheduler():
+    """Cria um agendador com bot mockado e sem limite de taxa efetivo."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=lambda **kwargs: MagicMock(message_id=1000))
+    scheduler = MailScheduler(bot)
+    scheduler.rate_limiter = MagicMock()
+    scheduler.rate_limiter.acquire = AsyncMock(return_value=0)
+    return scheduler, bot
+
+
+@pytest.mark.asyncio
+async def test_process_pending_mails_claims_publishes_and_records_in_bulk():
+    """Testa que os lotes reservados são publicados e gravados em uma operação por lote."""
+    scheduler, bot = make_scheduler()
+    mails = [make_mail("a"), make_mail("b")]
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db:
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_db.claim_pending_mails = AsyncMock(side_effect=[mails, []])
+        mock_db.record_mail_publish_results = AsyncMock(return_value=2)
+
+        published = await scheduler._process_pending_mails()
+
+        assert published == 2
+        assert bot.send_message.await_count == 2
+        claim_id, ok, failed = mock_db.record_mail_publish_results.await_args.args
+        assert ok == [(str(mails[0]["_id"]), 1000), (str(mails[1]["_id"]), 1000)]
+        assert failed == []
+        # O chat_id fica em cache entre ciclos
+        await scheduler._process_pending_mails()
+        mock_db.get_gym_nation_chat_id.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_publication_returns_mail_to_queue():
+    """Testa que falhas de envio devolvem o correio para a fila."""
+    scheduler, bot = make_scheduler()
+    mail = make_mail()
+    bot.send_message = AsyncMock(side_effect=RetryAfter(10))
+    scheduler.rate_limiter.penalize = MagicMock()
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db:
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_db.claim_pending_mails = AsyncMock(side_effect=[[mail], []])
+        mock_db.record_mail_publish_results = AsyncMock(return_value=1)
+
+        published = await scheduler._process_pending_mails()
+
+    assert published == 0
+    _, ok, failed = mock_db.record_mail_publish_results.await_args.args
+    assert ok == []
+    assert failed == [str(mail["_id"])]
+    scheduler.rate_limiter.penalize.assert_called_once_with(10)
+
+
+@pytest.mark.asyncio
+async def test_cycle_respects_rate_budget():
+    """Testa que um ciclo não reserva mais correios do que o orçamento do intervalo."""
+    scheduler, _ = make_scheduler()
+    scheduler.rate_per_minute = 1
+    scheduler.interval_minutes = 1
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db:
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_db.claim_pending_mails = AsyncMock(return_value=[make_mail()])
+        mock_db.record_mail_publish_results = AsyncMock(return_value=1)
+
+        published = await scheduler._process_pending_mails()
+
+    assert published == 1
+    mock_db.claim_pending_mails.assert_awaited_once()
+    assert mock_db.claim_pending_mails.await_args.args[1] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_chat_id_skips_publication():
+    """Testa que nada é reservado sem o chat do grupo."""
+    scheduler, _ = make_scheduler()
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db:
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=None)
+        mock_db.claim_pending_mails = AsyncMock()
+
+        assert await scheduler._process_pending_mails() == 0
+        mock_db.claim_pending_mails.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_pending_mails_enqueues_to_outbox():
+    """Testa que, com o outbox em execução, o lote é gravado no outbox em vez de enviado."""
+    scheduler, bot = make_scheduler()
+    mails = [make_mail("a"), make_mail("b")]
+    outbox = MagicMock()
+    # O segundo correio não é gravado e volta para a fila
+    outbox.enqueue = AsyncMock(return_value=[f"mail:{mails[0]['_id']}"])
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db, \
+            patch("src.utils.mail_scheduler.get_outbox", return_value=outbox):
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_db.claim_pending_mails = AsyncMock(side_effect=[mails, []])
+        mock_db.mark_mails_queued = AsyncMock(return_value=1)
+        mock_db.record_mail_publish_results = AsyncMock(return_value=1)
+
+        queued = await scheduler._process_pending_mails()
+
+    assert queued == 1
+    bot.send_message.assert_not_awaited()
+    messages = outbox.enqueue.await_args.args[0]
+    assert messages[0]["_id"] == f"mail:{mails[0]['_id']}"
+    assert messages[0]["effect"] == {"type": "mail_published", "mail_id": str(mails[0]["_id"])}
+    assert "CORREIO ELEGANTE" in messages[0]["text"]
+    claim_id, queued_ids = mock_db.mark_mails_queued.await_args.args
+    assert queued_ids == [str(mails[0]["_id"])]
+    assert mock_db.record_mail_publish_results.await_args.args == (claim_id, [], [str(mails[1]["_id"])])
+
+
+@pytest.mark.asyncio
+async def test_each_batch_uses_a_new_claim():
+    """Testa que cada lote é reservado com um ID de reserva próprio."""
+    scheduler, _ = make_scheduler()
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db:
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_db.claim_pending_mails = AsyncMock(side_effect=[[make_mail()], [make_mail()], []])
+        mock_db.record_mail_publish_results = AsyncMock(return_value=1)
+
+        assert await scheduler._process_pending_mails() == 2
+
+    claim_ids = [call.args[0] for call in mock_db.claim_pending_mails.await_args_list]
+    assert len(set(claim_ids)) == 3
+
+
+@pytest.mark.asyncio
+async def test_cycle_stops_when_results_are_not_recorded():
+    """Testa que o ciclo termina se o resultado de um lote não puder ser gravado."""
+    scheduler, bot = make_scheduler()
+
+    with patch("src.utils.mail_scheduler.mongodb_client") as mock_db:
+        mock_db.get_gym_nation_chat_id = AsyncMock(return_value=-100)
+        mock_db.claim_pending_mails = AsyncMock(side_effect=[[make_mail()], [make_mail()], []])
+        mock_db.record_mail_publish_results = AsyncMock(return_value=None)
+
+        assert await scheduler._process_pending_mails() == 1
+
+    mock_db.claim_pending_mails.assert_awaited_once()
+    bot.send_message.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_manual_publish_without_leadership():
+    """Testa que a publicação manual funciona em uma réplica que não roda o ciclo periódico."""
+    from src.utils import mail_scheduler as scheduler_module
+
+    bot = MagicMock()
+    with patch.object(scheduler_module, "mail_scheduler", None):
+        scheduler = scheduler_module.initialize_mail_scheduler(bot)
+        assert scheduler_module.initialize_mail_scheduler(bot) is scheduler
+        assert not scheduler.is_running
+
+        scheduler._process_pending_mails = AsyncMock(return_value=2)
+        assert await scheduler_module.publish_all_pending_mails() == 2
@@ -4,9 +4,9 @@ Testes para o arquivo main.py.
 import unittest
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from telegram import Update, Chat, User
+from telegram import BotCommand, BotCommandScopeAllGroupChats, BotCommandScopeDefault, Update, Chat, User
 from telegram.ext import ContextTypes
-from src.main import unauthorized_message_handler
+from src.main import COMMANDS_HASH_SETTING, commands_digest, setup_commands, shutdown_bot, unauthorized_message_handler
 
 class TestMain(unittest.TestCase):
     """Testes para o arquivo main.py."""
@@ -45,4 +45,105 @@ class TestMain(unittest.TestCase):
         assert self.update.effective_chat.type in warning_message
         
         # Verifica se o bot não enviou nenhuma mensagem
-        self.context.bot.send_message.assert_not_called() 
\ No newline at end of file
+        self.context.bot.send_message.assert_not_called() 
+
+def _mock_application():
+    """Aplicação com um bot falso para o registro de comandos."""
+    application = MagicMock()
+    application.bot.id = 42
+    application.bot.set_my_commands = AsyncMock()
+    application.bot.delete_my_commands = AsyncMock()
+    return application
+
+
+@pytest.mark.asyncio
+async def test_setup_commands_registers_and_stores_hash():
+    """Sem hash gravado, registra os menus e grava o hash."""
+    application = _mock_application()
+    with patch("src.main.mongodb_client") as mock_client, \
+            patch("src.main.Config.get_owner_id", return_value=1):
+        mock_client.db = MagicMock()
+        mock_client.get_bot_setting = AsyncMock(return_value=None)
+        mock_client.set_bot_setting = AsyncMock(return_value=True)
+        await setup_commands(application)
+
+    assert application.bot.set_my_commands.await_count == 3
+    application.bot.delete_my_commands.assert_awaited_once()
+    key, digest = mock_client.set_bot_setting.await_args.args
+    assert key == COMMANDS_HASH_SETTING
+    assert len(digest) == 64
+
+
+@pytest.mark.asyncio
+async def test_setup_commands_skips_unchanged_menus():
+    """Com o mesmo hash gravado, nenhuma chamada à Bot API é feita."""
+    application = _mock_application()
+    with patch("src.main.mongodb_client") as mock_client, \
+            patch("src.main.Config.get_owner_id", return_value=1):
+        mock_client.db = MagicMock()
+        mock_client.get_bot_setting = AsyncMock(return_value=None)
+        mock_client.set_bot_setting = AsyncMock(return_value=True)
+        await setup_commands(application)
+        digest = mock_client.set_bot_setting.await_args.args[1]
+
+        application = _mock_application()
+        mock_client.get_bot_setting = AsyncMock(return_value=digest)
+        mock_client.set_bot_setting.reset_mock()
+        await setup_commands(application)
+
+    application.bot.set_my_commands.assert_not_awaited()
+    application.bot.delete_my_commands.assert_not_awaited()
+    mock_client.set_bot_setting.assert_not_awaited()
+
+
+def test_commands_digest_changes_with_menus_and_bot():
+    """O hash muda com os comandos, com o escopo e com o bot."""
+    menus = [(BotCommandScopeDefault(), [BotCommand("start", "Inicia o bot")])]
+    digest = commands_digest(42, menus)
+
+    assert commands_digest(42, menus) == digest
+    assert commands_digest(43, menus) != digest
+    assert commands_digest(42, [(BotCommandScopeDefault(), [BotCommand("start", "Começa")])]) != digest
+    assert commands_digest(42, [(BotCommandScopeAllGroupChats(), menus[0][1])]) != digest
+
+
+@pytest.mark.asyncio
+async def test_shutdown_bot_order():
+    """O desligamento para de receber atualizações, drena as tarefas, para os serviços e só então fecha as conexões."""
+    calls = []
+
+    def recorder(name, result=None):
+        async def record(*args, **kwargs):
+            calls.append(name)
+            return result
+        return record
+
+    application = MagicMock()
+    application.updater.running = True
+    application.updater.stop = recorder("updater.stop")
+    application.running = True
+    application.stop = recorder("application.stop")
+    application.shutdown = recorder("application.shutdown")
+    supervisor = MagicMock()
+    supervisor.drain = recorder("drain", {})
+    supervisor.cancel_all = recorder("cancel_all", 0)
+    member_directory = MagicMock()
+    member_directory.stop = recorder("member_directory")
+
+    with patch("src.utils.metrics_server.stop_metrics_server", recorder("metrics")), \
+            patch("src.utils.leader_election.stop_leader_elections", recorder("leader_elections")), \
+            patch("src.utils.ban_jobs.stop_ban_jobs", recorder("ban_jobs")), \
+            patch("src.utils.outbox.stop_outbox", recorder("outbox")), \
+            patch("src.utils.deletion_scheduler.stop_deletion_scheduler", recorder("deletion_scheduler")), \
+            patch("src.utils.member_directory.member_directory", member_directory), \
+            patch("src.utils.update_recorder.stop_update_recorder", lambda: calls.append("recorder")), \
+            patch("src.utils.task_supervisor.task_supervisor", supervisor), \
+            patch("src.main.mongodb_client") as mock_client:
+        mock_client.close = recorder("mongo.close")
+        await shutdown_bot(application)
+
+    assert calls == [
+        "metrics", "updater.stop", "application.stop", "drain",
+        "leader_elections", "ban_jobs", "outbox", "deletion_scheduler",
+        "member_directory", "recorder", "cancel_all", "application.shutdown", "mongo.close",
+    ]
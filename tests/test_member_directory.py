@@ -0,0 +1,133 @@
+"""
+Testes para o diretório de membros dos grupos.
+"""
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.utils.member_directory import MemberDirectory, is_present, normalize_username
+
+
+def _user(user_id, username, is_bot=False):
+    """Cria um usuário do Telegram simulado."""
+    return MagicMock(id=user_id, username=username, is_bot=is_bot)
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pelo diretório."""
+    with patch("src.utils.member_directory.mongodb_client") as mock_client:
+        mock_client.db = MagicMock()
+        mock_client.upsert_chat_members = AsyncMock(return_value=True)
+        mock_client.find_chat_member_by_username = AsyncMock(return_value=None)
+        yield mock_client
+
+
+def test_normalize_username():
+    """Testa a normalização de usernames."""
+    assert normalize_username("@FuLaNo ") == "fulano"
+    assert normalize_username(None) == ""
+
+
+@pytest.mark.asyncio
+async def test_observed_member_is_found_locally(mock_mongodb):
+    """Testa que um membro visto é encontrado pelo username sem consultar o banco."""
+    directory = MemberDirectory()
+    directory.observe(-100, _user(1, "Fulano"))
+
+    member = await directory.lookup(-100, "@fulano")
+
+    assert member["user_id"] == 1
+    assert is_present(member)
+    mock_mongodb.find_chat_member_by_username.assert_not_called()
+    await directory.stop()
+
+
+@pytest.mark.asyncio
+async def test_bots_and_users_without_username_are_ignored(mock_mongodb):
+    """Testa que bots e usuários sem username não entram no diretório."""
+    directory = MemberDirectory()
+    directory.observe(-100, _user(1, "robo_bot", is_bot=True))
+    directory.observe(-100, _user(2, None))
+
+    assert directory._members == {}
+    assert directory._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_writes_are_batched_and_throttled(mock_mongodb):
+    """Testa que mensagens repetidas geram uma única gravação, e mudanças de status uma nova."""
+    directory = MemberDirectory()
+    for _ in range(5):
+        directory.observe(-100, _user(1, "fulano"))
+    directory.observe(-100, _user(2, "beltrano"))
+
+    assert await directory.flush() == 2
+    directory.observe(-100, _user(1, "fulano"))
+    assert await directory.flush() == 0
+
+    directory.observe(-100, _user(1, "fulano"), "left")
+    assert await directory.flush() == 1
+    assert mock_mongodb.upsert_chat_members.call_count == 2
+    assert mock_mongodb.upsert_chat_members.call_args[0][0][0]["status"] == "left"
+    await directory.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried(mock_mongodb):
+    """Testa que alterações não gravadas voltam para a fila."""
+    mock_mongodb.upsert_chat_members.return_value = False
+    directory = MemberDirectory()
+    directory.observe(-100, _user(1, "fulano"))
+
+    assert await directory.flush() == 0
+    mock_mongodb.upsert_chat_members.return_value = True
+    assert await directory.flush() == 1
+    await directory.stop()
+
+
+@pytest.mark.asyncio
+async def test_username_change_moves_index(mock_mongodb):
+    """Testa que a troca de username remove o antigo do índice."""
+    directory = MemberDirectory()
+    directory.observe(-100, _user(1, "antigo"))
+    directory.observe(-100, _user(1, "novo"))
+
+    assert (await directory.lookup(-100, "novo"))["user_id"] == 1
+    assert await directory.lookup(-100, "antigo") is None
+    await directory.stop()
+
+
+@pytest.mark.asyncio
+async def test_lookup_falls_back_to_database_and_caches_misses(mock_mongodb):
+    """Testa a consulta ao banco para usernames fora da memória e o cache de ausências."""
+    mock_mongodb.find_chat_member_by_username.side_effect = [
+        {"_id": "x", "chat_id": -100, "user_id": 7, "username": "Sicrano",
+         "username_normalized": "sicrano", "status": "member", "last_seen": datetime.now()},
+        None,
+    ]
+    directory = MemberDirectory()
+
+    assert (await directory.lookup(-100, "sicrano"))["user_id"] == 7
+    assert (await directory.lookup(-100, "sicrano"))["user_id"] == 7
+    assert await directory.lookup(-100, "ninguem") is None
+    assert await directory.lookup(-100, "ninguem") is None
+
+    assert mock_mongodb.find_chat_member_by_username.call_count == 2
+    # Membro carregado do banco não é regravado
+    assert directory._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_directory_is_bounded(mock_mongodb):
+    """Testa que o membro menos usado é descartado quando o diretório está cheio."""
+    directory = MemberDirectory()
+    directory.MAX_MEMBERS = 2
+    directory.observe(-100, _user(1, "um"))
+    directory.observe(-100, _user(2, "dois"))
+    directory.observe(-100, _user(3, "tres"))
+
+    assert list(directory._members) == [(-100, 2), (-100, 3)]
+    assert (-100, "um") not in directory._usernames
+    await directory.stop()
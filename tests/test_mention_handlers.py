@@ -4,7 +4,7 @@ Testes para os handlers de menção.
 import os
 import unittest
 from unittest.mock import AsyncMock, patch, MagicMock, call
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytest
 from telegram import Update, User, Message, Chat, InlineKeyboardMarkup, CallbackQuery
 
@@ -16,6 +16,7 @@ from src.bot.mention_handlers import (
     QA_DAILY_LIMIT,
     BOT_USERNAME
 )
+from src.utils.quota_service import QuotaResult, QuotaReservation
 
 class TestClassifyQuestion(unittest.TestCase):
     """Testes para a função de classificação de perguntas."""
@@ -50,6 +51,34 @@ class TestClassifyQuestion(unittest.TestCase):
         category = classify_question(question)
         self.assertEqual(category["prefix"], "Resposta sobre Progresso:")
     
+    def test_classify_counts_keywords_inside_hyphenated_keywords(self):
+        """Testa que "pré-treino" pontua também como "treino" (palavra inteira dentro da palavra-chave)."""
+        # pré-treino (suplementação) + treino (treino) + treino (treino): treino vence
+        category = classify_question("pré-treino ou treino em jejum? treino cedo")
+        self.assertEqual(category["prefix"], "Resposta de Treino:")
+        # Empate entre suplementação e treino: vale a ordem das categorias (treino vem antes)
+        category = classify_question("pré-treino")
+        self.assertEqual(category["prefix"], "Resposta de Treino:")
+    
+    def test_classify_ignores_partial_words(self):
+        """Testa que palavras-chave só contam como palavra inteira."""
+        category = classify_question("Metade do pesoal foi pra pesca")
+        self.assertEqual(category["prefix"], "Resposta Off-topic:")
+    
+    def test_classify_ignores_accents_and_plurals(self):
+        """Testa que variantes sem acento e no plural contam como a palavra-chave."""
+        category = classify_question("quanta proteina e quantas calorias por refeicoes?")
+        self.assertEqual(category["prefix"], "Resposta Nutricional:")
+    
+    def test_classify_extra_keywords_from_config(self):
+        """Testa que QA_EXTRA_KEYWORDS acrescenta palavras-chave às categorias existentes."""
+        from src.bot import mention_handlers
+        extra = {"Treino": ["supino", "agachamento"], "inexistente": ["xyz"]}
+        with patch.object(mention_handlers.Config, "get_qa_extra_keywords", return_value=extra):
+            matcher = mention_handlers._build_keyword_matcher()
+        self.assertEqual(matcher.count("Supinos e agachamento livre"), {"treino": 2})
+        self.assertEqual(matcher.count("xyz"), {})
+    
     def test_classify_default(self):
         """Testa classificação padrão para pergunta ambígua."""
         question = "O que você acha sobre esportes?"
@@ -89,9 +118,10 @@ async def test_handle_mention_no_bot_mention():
     update.message.reply_text.assert_not_called()
 
 @pytest.mark.asyncio
+@patch("src.bot.mention_handlers.qa_quota")
 @patch("src.bot.mention_handlers.mongodb_client")
 @patch("src.bot.mention_handlers.BOT_USERNAME", "Nations_bro_bot")
-async def test_handle_mention_limit_exceeded(mock_mongodb):
+async def test_handle_mention_limit_exceeded(mock_mongodb, mock_quota):
     """Testa handler de menção com limite excedido."""
     # Configura mocks
     update = AsyncMock()
@@ -106,21 +136,26 @@ async def test_handle_mention_limit_exceeded(mock_mongodb):
     context = AsyncMock()
     context.bot.username = "Nations_bro_bot"
     
-    # Configura comportamento do MongoDB mock para retornar awaitable
-    mock_mongodb.get_daily_qa_count = AsyncMock(return_value=QA_DAILY_LIMIT)
-    mock_mongodb.get_last_qa_timestamp = AsyncMock(return_value=datetime.now())
+    # Cota esgotada
+    mock_quota.reserve = AsyncMock(return_value=QuotaResult(
+        False, QA_DAILY_LIMIT, QA_DAILY_LIMIT, datetime.now() + timedelta(hours=3)
+    ))
     
     # Executa a função
     await handle_mention(update, context)
     
     # Verifica que enviou mensagem de limite excedido
     update.message.reply_text.assert_called_once()
+    assert "limite diário" in update.message.reply_text.call_args[0][0]
+    mock_quota.reserve.assert_called_once_with("67890:12345")
+    context.bot.send_message.assert_not_called()
 
 @pytest.mark.asyncio
+@patch("src.bot.mention_handlers.qa_quota")
 @patch("src.bot.mention_handlers.mongodb_client")
 @patch("src.bot.mention_handlers.BOT_USERNAME", "Nations_bro_bot")
 @patch("src.bot.mention_handlers.generate_fitness_answer")
-async def test_handle_mention_successful(mock_generate_fitness, mock_mongodb):
+async def test_handle_mention_successful(mock_generate_fitness, mock_mongodb, mock_quota):
     """Testa handler de menção com sucesso."""
     # Configura mocks
     update = AsyncMock()
@@ -139,9 +174,11 @@ async def test_handle_mention_successful(mock_generate_fitness, mock_mongodb):
     context.bot.send_message = AsyncMock(return_value=wait_message)
     
     # Configura comportamento do MongoDB mock para retornar awaitable
-    mock_mongodb.get_daily_qa_count = AsyncMock(return_value=0)
     mock_mongodb.store_qa_interaction = AsyncMock(return_value=True)
-    mock_mongodb.increment_qa_usage = AsyncMock(return_value=True)
+    mock_quota.reserve = AsyncMock(return_value=QuotaResult(
+        True, 1, QA_DAILY_LIMIT, datetime.now(), QuotaReservation("qa:67890:12345")
+    ))
+    mock_quota.refund = AsyncMock()
     
     # Configura comportamento do generate_fitness_answer mock
     mock_generate_fitness.return_value = "Esta é uma resposta de teste sobre agachamento."
@@ -177,7 +214,8 @@ async def test_handle_mention_successful(mock_generate_fitness, mock_mongodb):
     assert qa_interaction["message_id"] == 98765
     assert "timestamp" in qa_interaction
     
-    mock_mongodb.increment_qa_usage.assert_called_once()
+    mock_quota.reserve.assert_called_once()
+    mock_quota.refund.assert_not_called()
     
     # Verifica que a mensagem editada tem botões de feedback
     reply_markup = wait_message.edit_text.call_args[1]["reply_markup"]
@@ -330,11 +368,12 @@ async def test_handle_qa_feedback_already_used(mock_mongodb_client):
     assert result is None
 
 @pytest.mark.asyncio
+@patch("src.bot.mention_handlers.qa_quota")
 @patch("src.bot.mention_handlers.mongodb_client")
 @patch("src.bot.mention_handlers.BOT_USERNAME", "Nations_bro_bot")
 @patch("src.bot.mention_handlers.asyncio.sleep")
 @patch("src.bot.mention_handlers.generate_fitness_answer")
-async def test_handle_mention_error(mock_generate_fitness, mock_sleep, mock_mongodb_client):
+async def test_handle_mention_error(mock_generate_fitness, mock_sleep, mock_mongodb_client, mock_quota):
     """Testa handler de menção com erro na API."""
     # Configura mocks
     update = AsyncMock()
@@ -352,7 +391,11 @@ async def test_handle_mention_error(mock_generate_fitness, mock_sleep, mock_mong
     context.bot.send_message = AsyncMock(return_value=wait_message)
     
     # Configura comportamento do MongoDB mock para retornar awaitable
-    mock_mongodb_client.get_daily_qa_count = AsyncMock(return_value=0)
+    reservation = QuotaReservation("qa:67890:12345")
+    mock_quota.reserve = AsyncMock(return_value=QuotaResult(
+        True, 1, QA_DAILY_LIMIT, datetime.now(), reservation
+    ))
+    mock_quota.refund = AsyncMock()
     
     # Configura para gerar uma exceção durante a geração da resposta
     mock_generate_fitness.side_effect = Exception("API Error")
@@ -372,4 +415,6 @@ async def test_handle_mention_error(mock_generate_fitness, mock_sleep, mock_mong
     
     # Verifica que não chamou as funções do MongoDB para armazenar a interação
     mock_mongodb_client.store_qa_interaction.assert_not_called()
-    mock_mongodb_client.increment_qa_usage.assert_not_called() 
\ No newline at end of file
+    
+    # Verifica que a pergunta reservada foi devolvida à cota
+    mock_quota.refund.assert_called_once_with(reservation, "67890:12345") 
\ No newline at end of file
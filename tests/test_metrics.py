@@ -0,0 +1,79 @@
+"""
+Testes para o registro de métricas no formato do Prometheus.
+"""
+from src.utils.metrics import Counter, Histogram, MetricsRegistry, observe_telegram_call, record_llm_usage
+from src.utils import metrics
+
+
+def test_counter_and_gauge_render():
+    """Testa o texto de exposição de contadores e gauges com labels."""
+    registry = MetricsRegistry()
+    requests = registry.counter("x_requests_total", "Requisições.", ("method", "code"))
+    depth = registry.gauge("x_depth", "Fila.")
+    requests.inc("sendMessage", 200)
+    requests.inc("sendMessage", 200, amount=2)
+    depth.set(3)
+
+    text = registry.render()
+
+    assert "# TYPE x_requests_total counter" in text
+    assert 'x_requests_total{method="sendMessage",code="200"} 3' in text
+    assert "x_depth 3" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Testa os buckets cumulativos, a soma e a contagem do histograma."""
+    histogram = Histogram("x_seconds", "Duração.", ("handler",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, 'a"b')
+
+    lines = histogram.render()
+
+    assert 'x_seconds_bucket{handler="a\\"b",le="0.1"} 1' in lines
+    assert 'x_seconds_bucket{handler="a\\"b",le="1"} 3' in lines
+    assert 'x_seconds_bucket{handler="a\\"b",le="+Inf"} 4' in lines
+    assert 'x_seconds_sum{handler="a\\"b"} 6.05' in lines
+    assert histogram.count('a"b') == 4
+
+
+def test_wrong_label_count_is_rejected():
+    """Testa que labels faltando são um erro de programação."""
+    counter = Counter("x_total", "X.", ("a",))
+    try:
+        counter.inc()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("ValueError esperado")
+
+
+def test_collectors_run_before_render():
+    """Testa que os coletores atualizam os valores a cada leitura."""
+    registry = MetricsRegistry()
+    gauge = registry.gauge("x_backlog", "Fila.")
+    registry.add_collector(lambda: gauge.set(7))
+
+    assert "x_backlog 7" in registry.render()
+
+
+def test_observe_telegram_call_counts_rate_limits_and_polls():
+    """Testa o registro de 429 e do último getUpdates bem-sucedido."""
+    before = metrics.TELEGRAM_RATE_LIMITED.value("sendMessage")
+
+    observe_telegram_call("sendMessage", 429, 0.1)
+    observe_telegram_call("getUpdates", 200, 10.0)
+    observe_telegram_call("sendMessage", None, 0.1)
+
+    assert metrics.TELEGRAM_RATE_LIMITED.value("sendMessage") == before + 1
+    assert metrics.TELEGRAM_REQUESTS.value("sendMessage", "error") >= 1
+    assert metrics.LAST_POLL.value() is not None
+
+
+def test_record_llm_usage():
+    """Testa a soma de tokens da resposta da Anthropic."""
+    before = metrics.LLM_TOKENS.value("output")
+
+    record_llm_usage({"input_tokens": 100, "output_tokens": 20})
+    record_llm_usage(None)
+
+    assert metrics.LLM_TOKENS.value("output") == before + 20
@@ -0,0 +1,96 @@
+"""
+Testes para o servidor de métricas e sondas.
+"""
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from src.utils import metrics
+from src.utils.metrics import MetricsRegistry
+from src.utils.metrics_server import MetricsServer
+
+
+@pytest.fixture
+def application():
+    """Application mockada com polling ativo e fila vazia."""
+    app = MagicMock()
+    app.update_queue.qsize.return_value = 2
+    app.updater.running = True
+    return app
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pela sonda de prontidão."""
+    with patch("src.utils.metrics_server.mongodb_client") as mock_client:
+        mock_client.ping = AsyncMock(return_value=True)
+        yield mock_client
+
+
+@pytest_asyncio.fixture
+async def server(application, mock_mongodb):
+    """Servidor em uma porta livre."""
+    registry = MetricsRegistry()
+    registry.counter("x_total", "X.").inc()
+    metrics_server = MetricsServer(application, port=0, metrics_registry=registry)
+    metrics_server.server.host = "127.0.0.1"
+    await metrics_server.start()
+    yield metrics_server
+    await metrics_server.stop()
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server.port}"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(server):
+    """Testa /metrics com as métricas do registro, a fila de atualizações e os componentes."""
+    outbox = MagicMock()
+    outbox.get_stats.return_value = {"backlog": 4, "sent_total": 10}
+    with patch("src.utils.outbox.outbox_sender", outbox):
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f"{base_url(server)}/metrics")
+            health = await client.get(f"{base_url(server)}/health")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "x_total 1" in response.text
+    assert "bot_update_queue_depth 2" in response.text
+    assert "# TYPE bot_outbox_backlog gauge\nbot_outbox_backlog 4" in response.text
+    assert "# TYPE bot_outbox_sent_total counter" in response.text
+    assert health.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_ready_checks_mongo_and_polling(server, mock_mongodb):
+    """Testa que /ready responde 503 sem MongoDB ou com polling parado."""
+    metrics.LAST_POLL.set(time.time())
+    async with httpx.AsyncClient() as client:
+        ready = await client.get(f"{base_url(server)}/ready")
+
+        mock_mongodb.ping.return_value = False
+        not_ready = await client.get(f"{base_url(server)}/ready")
+
+        mock_mongodb.ping.return_value = True
+        metrics.LAST_POLL.set(time.time() - MetricsServer.POLL_STALE_AFTER - 1)
+        stale = await client.get(f"{base_url(server)}/ready")
+
+    assert ready.status_code == 200
+    assert not_ready.status_code == 503
+    assert not_ready.json()["checks"] == {"mongodb": False, "polling": True}
+    assert stale.json()["checks"]["polling"] is False
+
+
+@pytest.mark.asyncio
+async def test_unknown_route_and_method(server):
+    """Testa as respostas para rotas e métodos não suportados."""
+    async with httpx.AsyncClient() as client:
+        missing = await client.get(f"{base_url(server)}/nada")
+        post = await client.post(f"{base_url(server)}/metrics", content=b"x")
+
+    assert missing.status_code == 404
+    assert post.status_code == 405
@@ -0,0 +1,111 @@
+"""
+Testes para a persistência do bot no MongoDB.
+"""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.utils.mongo_persistence import MongoPersistence
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pela persistência."""
+    with patch("src.utils.mongo_persistence.mongodb_client") as mock_client:
+        mock_client.get_user_state = AsyncMock(return_value={})
+        mock_client.save_user_states = AsyncMock(return_value=True)
+        mock_client.get_conversation_states = AsyncMock(return_value=[])
+        mock_client.save_conversation_states = AsyncMock(return_value=True)
+        yield mock_client
+
+
+@pytest.fixture
+def persistence():
+    """Persistência com intervalo e validade fixos."""
+    return MongoPersistence(update_interval=5, ttl_hours=24)
+
+
+@pytest.mark.asyncio
+async def test_writes_are_coalesced(mock_mongodb, persistence):
+    """Testa que várias alterações viram uma gravação por coleção, com o último valor de cada chave."""
+    await persistence.update_user_data(1, {"mail_message": "oi"})
+    await persistence.update_user_data(1, {"mail_message": "olá"})
+    await persistence.drop_user_data(2)
+    await persistence.update_conversation("correio", (10, 1), 0)
+    await persistence.update_conversation("correio", (10, 1), 1)
+    await persistence.update_conversation("correio", (11, 2), None)
+
+    await persistence.flush()
+
+    mock_mongodb.save_user_states.assert_called_once_with(
+        {1: {"mail_message": "olá"}, 2: None}, 24 * 3600
+    )
+    mock_mongodb.save_conversation_states.assert_called_once_with(
+        {("correio", (10, 1)): 1, ("correio", (11, 2)): None}, 24 * 3600
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_retried(mock_mongodb, persistence):
+    """Testa que alterações não gravadas voltam para a fila sem sobrescrever as mais recentes."""
+    mock_mongodb.save_user_states.return_value = False
+    await persistence.update_user_data(1, {"mail_message": "antiga"})
+    await persistence.flush()
+
+    mock_mongodb.save_user_states.return_value = True
+    await persistence.update_user_data(1, {"mail_message": "nova"})
+    await persistence.flush()
+
+    assert mock_mongodb.save_user_states.call_args[0][0] == {1: {"mail_message": "nova"}}
+
+
+@pytest.mark.asyncio
+async def test_user_data_is_loaded_lazily(mock_mongodb, persistence):
+    """Testa que o user_data é lido na primeira atualização do usuário e não a cada atualização."""
+    mock_mongodb.get_user_state.return_value = {"replying_to_mail": "abc"}
+    user_data = {}
+
+    assert await persistence.get_user_data() == {}
+    await persistence.refresh_user_data(1, user_data)
+    await persistence.refresh_user_data(1, user_data)
+
+    assert user_data == {"replying_to_mail": "abc"}
+    mock_mongodb.get_user_state.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_idle_user_is_reloaded(mock_mongodb, persistence):
+    """Testa que o user_data de um usuário parado é relido (estado gravado por outra réplica)."""
+    user_data = {"mail_message": "local"}
+    with patch("src.utils.mongo_persistence.time.monotonic", return_value=1000.0):
+        await persistence.refresh_user_data(1, user_data)
+    with patch("src.utils.mongo_persistence.time.monotonic", return_value=1000.0 + persistence.reload_after + 1):
+        await persistence.refresh_user_data(1, user_data)
+
+    assert mock_mongodb.get_user_state.call_count == 2
+    assert user_data == {}
+
+
+@pytest.mark.asyncio
+async def test_pending_or_unavailable_state_keeps_memory(mock_mongodb, persistence):
+    """Testa que alterações ainda não gravadas e erros do banco não apagam o user_data em memória."""
+    user_data = {"mail_message": "local"}
+    await persistence.update_user_data(1, dict(user_data))
+    await persistence.refresh_user_data(1, user_data)
+    mock_mongodb.get_user_state.assert_not_called()
+
+    mock_mongodb.get_user_state.return_value = None
+    await persistence.refresh_user_data(2, user_data)
+    assert user_data == {"mail_message": "local"}
+    await persistence.flush()
+
+
+@pytest.mark.asyncio
+async def test_get_conversations(mock_mongodb, persistence):
+    """Testa a restauração dos estados das conversas com chaves em tupla."""
+    mock_mongodb.get_conversation_states.return_value = [{"key": [10, 1], "state": 1}]
+
+    conversations = await persistence.get_conversations("correio")
+
+    assert conversations == {(10, 1): 1}
+    mock_mongodb.get_conversation_states.assert_called_once_with("correio")
@@ -451,125 +451,6 @@ async def test_get_checkin_scoreboard_error(mongodb_setup, mocker):
     mock_user_checkins.aggregate.assert_called_once()
     assert result == [] # Espera lista vazia em caso de erro
 
-@pytest.mark.asyncio
-async def test_get_daily_qa_count(mongodb_setup):
-    """Testa a função get_daily_qa_count."""
-    # Configura o mock
-    mock_db = mongodb_setup["mock_db"]
-    mock_db.qa_usage.count_documents = AsyncMock(return_value=5)
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.get_daily_qa_count(123, 456)
-    
-    # Verifica o resultado
-    assert result == 5
-    mock_db.qa_usage.count_documents.assert_called_once()
-    # Verifica se o filtro contém os campos corretos
-    call_args = mock_db.qa_usage.count_documents.call_args[0][0]
-    assert call_args["user_id"] == 123
-    assert call_args["chat_id"] == 456
-    assert "$gte" in call_args["timestamp"]
-
-@pytest.mark.asyncio
-async def test_get_daily_qa_count_error(mongodb_setup):
-    """Testa a função get_daily_qa_count com erro."""
-    # Configura o mock para lançar uma exceção
-    mock_db = mongodb_setup["mock_db"]
-    mock_db.qa_usage.count_documents = AsyncMock(side_effect=Exception("Test error"))
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.get_daily_qa_count(123, 456)
-    
-    # Verifica o resultado
-    assert result == 0
-
-@pytest.mark.asyncio
-async def test_get_last_qa_timestamp(mongodb_setup):
-    """Testa a função get_last_qa_timestamp."""
-    # Configura o mock
-    mock_db = mongodb_setup["mock_db"]
-    timestamp = datetime.now()
-    mock_db.qa_usage.find_one = AsyncMock(return_value={"timestamp": timestamp})
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.get_last_qa_timestamp(123, 456)
-    
-    # Verifica o resultado
-    assert result == timestamp
-    mock_db.qa_usage.find_one.assert_called_once()
-    # Verifica se os parâmetros estão corretos
-    call_args = mock_db.qa_usage.find_one.call_args[0][0]
-    assert call_args["user_id"] == 123
-    assert call_args["chat_id"] == 456
-    # Verifica se a ordenação está correta
-    sort_args = mock_db.qa_usage.find_one.call_args[1]["sort"]
-    assert sort_args == [("timestamp", -1)]
-
-@pytest.mark.asyncio
-async def test_get_last_qa_timestamp_not_found(mongodb_setup):
-    """Testa a função get_last_qa_timestamp quando não há registros."""
-    # Configura o mock para retornar None
-    mock_db = mongodb_setup["mock_db"]
-    mock_db.qa_usage.find_one = AsyncMock(return_value=None)
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.get_last_qa_timestamp(123, 456)
-    
-    # Verifica o resultado
-    assert result is None
-
-@pytest.mark.asyncio
-async def test_get_last_qa_timestamp_error(mongodb_setup):
-    """Testa a função get_last_qa_timestamp com erro."""
-    # Configura o mock para lançar uma exceção
-    mock_db = mongodb_setup["mock_db"]
-    mock_db.qa_usage.find_one = AsyncMock(side_effect=Exception("Test error"))
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.get_last_qa_timestamp(123, 456)
-    
-    # Verifica o resultado
-    assert result is None
-
-@pytest.mark.asyncio
-async def test_increment_qa_usage(mongodb_setup):
-    """Testa a função increment_qa_usage."""
-    # Configura o mock
-    mock_db = mongodb_setup["mock_db"]
-    mock_db.qa_usage.insert_one = AsyncMock(return_value=MagicMock(acknowledged=True))
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.increment_qa_usage(123, 456)
-    
-    # Verifica o resultado
-    assert result is True
-    mock_db.qa_usage.insert_one.assert_called_once()
-    # Verifica se os dados inseridos estão corretos
-    call_args = mock_db.qa_usage.insert_one.call_args[0][0]
-    assert call_args["user_id"] == 123
-    assert call_args["chat_id"] == 456
-    assert "timestamp" in call_args
-
-@pytest.mark.asyncio
-async def test_increment_qa_usage_error(mongodb_setup):
-    """Testa a função increment_qa_usage com erro."""
-    # Configura o mock para lançar uma exceção
-    mock_db = mongodb_setup["mock_db"]
-    mock_db.qa_usage.insert_one = AsyncMock(side_effect=Exception("Test error"))
-    
-    # Executa a função
-    mongodb_client = mongodb_setup["client_wrapper"]
-    result = await mongodb_client.increment_qa_usage(123, 456)
-    
-    # Verifica o resultado
-    assert result is False
-
 @pytest.mark.asyncio
 async def test_add_to_blacklist(mongodb_setup):
     """Testa a função add_to_blacklist."""
@@ -714,6 +595,74 @@ async def test_get_blacklist_error(mongodb_setup):
     # Verifica o resultado
     assert result == []
 
+def _mock_blacklist_page_cursor(collection, documents):
+    """Configura find().sort().limit().to_list() na coleção da blacklist."""
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=documents)
+    collection.find = MagicMock(return_value=cursor)
+    return cursor
+
+@pytest.mark.asyncio
+async def test_get_blacklist_page_first_page(mongodb_setup):
+    """Testa a primeira página da blacklist: sem cursor, ordem decrescente e limit+1."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    documents = [{"_id": ObjectId(), "added_at": datetime(2023, 1, 3 - i)} for i in range(3)]
+    cursor = _mock_blacklist_page_cursor(mongodb_setup["mock_blacklist"], documents)
+
+    items, has_more = await mongodb_client.get_blacklist_page(123456, 2)
+
+    query = mongodb_setup["mock_blacklist"].find.call_args[0][0]
+    assert query == {"chat_id": 123456}
+    cursor.sort.assert_called_once_with([("added_at", -1), ("_id", -1)])
+    cursor.limit.assert_called_once_with(3)
+    assert items == documents[:2]
+    assert has_more is True
+
+@pytest.mark.asyncio
+async def test_get_blacklist_page_after_cursor(mongodb_setup):
+    """Testa a página seguinte: filtro por chave após (added_at, _id) do cursor."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    documents = [{"_id": ObjectId(), "added_at": datetime(2023, 1, 1)}]
+    _mock_blacklist_page_cursor(mongodb_setup["mock_blacklist"], documents)
+    added_at, item_id = datetime(2023, 1, 2), ObjectId()
+
+    items, has_more = await mongodb_client.get_blacklist_page(123456, 2, cursor=(added_at, item_id))
+
+    query = mongodb_setup["mock_blacklist"].find.call_args[0][0]
+    assert query["$or"] == [
+        {"added_at": {"$lt": added_at}},
+        {"added_at": added_at, "_id": {"$lt": item_id}}
+    ]
+    assert items == documents
+    assert has_more is False
+
+@pytest.mark.asyncio
+async def test_get_blacklist_page_newer_is_reversed(mongodb_setup):
+    """Testa a página anterior: ordem crescente no banco, devolvida em ordem decrescente."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    documents = [{"_id": ObjectId(), "added_at": datetime(2023, 1, 2 + i)} for i in range(2)]
+    cursor = _mock_blacklist_page_cursor(mongodb_setup["mock_blacklist"], list(documents))
+    added_at, item_id = datetime(2023, 1, 1), ObjectId()
+
+    items, has_more = await mongodb_client.get_blacklist_page(123456, 2, cursor=(added_at, item_id), newer=True)
+
+    query = mongodb_setup["mock_blacklist"].find.call_args[0][0]
+    assert query["$or"][0] == {"added_at": {"$gt": added_at}}
+    cursor.sort.assert_called_once_with([("added_at", 1), ("_id", 1)])
+    assert items == list(reversed(documents))
+    assert has_more is False
+
+@pytest.mark.asyncio
+async def test_get_blacklist_page_error(mongodb_setup):
+    """Testa que um erro do banco retorna uma página vazia."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    cursor = _mock_blacklist_page_cursor(mongodb_setup["mock_blacklist"], [])
+    cursor.to_list.side_effect = PyMongoError("Erro de teste")
+
+    assert await mongodb_client.get_blacklist_page(123456, 2) == ([], False)
+
 @pytest.mark.asyncio
 async def test_get_blacklist_by_group_name(mongodb_setup):
     """Testa a função get_blacklist_by_group_name."""
@@ -816,191 +765,82 @@ async def test_get_chat_username_not_found(mongodb_setup):
 
 @pytest.mark.asyncio
 async def test_get_chat_id_by_name(mongodb_setup):
-    """Testa a função _get_chat_id_by_name."""
-    mock_db = mongodb_setup["mock_db"]
+    """Testa a função _get_chat_id_by_name com uma única correspondência."""
     mongodb_client = mongodb_setup["client_wrapper"]
-    mock_monitored_chats = mongodb_setup["mock_monitored_chats"]
-
-    # Configura o banco de dados
-    mongodb_client.db = mock_db
-
-    # Configura find_one para retornar um chat
-    expected_chat = {
-        "chat_id": 123456,
-        "title": "GYM NATION",
-        "username": "gymgroup"
-    }
-    mock_monitored_chats.find_one.return_value = expected_chat
+    mongodb_client.find_monitored_chats_by_name = AsyncMock(return_value=[
+        {"chat_id": 123456, "title": "GYM NATION", "username": "gymgroup"}
+    ])
 
-    # Testa a função
     result = await mongodb_client._get_chat_id_by_name("GYM NATION")
 
-    # Verifica se o resultado está correto
     assert result == 123456
-
-    # Verifica se find_one foi chamado com os parâmetros corretos
-    expected_query = re.escape("GYM NATION")
-    expected_or_query = {
-        "$or": [
-            {"title": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"title": {"$regex": expected_query, "$options": "i"}},
-            {"username": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"username": {"$regex": expected_query, "$options": "i"}}
-        ]
-    }
-    mock_monitored_chats.find_one.assert_called_once_with(expected_or_query)
+    mongodb_client.find_monitored_chats_by_name.assert_called_once_with("GYM NATION")
 
 @pytest.mark.asyncio
-async def test_get_chat_id_by_name_not_found(mongodb_setup, mocker):
+async def test_get_chat_id_by_name_not_found(mongodb_setup):
     """Testa a função _get_chat_id_by_name quando o grupo não é encontrado."""
-    mock_db = mongodb_setup["mock_db"]
     mongodb_client = mongodb_setup["client_wrapper"]
-    mock_monitored_chats = mongodb_setup["mock_monitored_chats"]
-
-    # Configura o banco de dados
-    mongodb_client.db = mock_db
-
-    # Configura find_one para retornar None
-    mock_monitored_chats.find_one.return_value = None
+    mongodb_client.find_monitored_chats_by_name = AsyncMock(return_value=[])
 
-    # Configura find({}) para retornar um iterador async vazio (para o logging)
-    mock_find_cursor = MagicMock()
-    mock_find_iterator = mocker.AsyncMock()
-    mock_find_iterator.__anext__.side_effect = StopAsyncIteration()
-    mock_find_cursor.__aiter__.return_value = mock_find_iterator
-    mock_monitored_chats.find.return_value = mock_find_cursor
-
-    # Executa o método _get_chat_id_by_name
     result = await mongodb_client._get_chat_id_by_name("Non Existent Group")
 
-    # Verifica se o método find_one foi chamado com os parâmetros corretos
-    expected_query = re.escape("Non Existent Group")
-    expected_or_query = {
-        "$or": [
-            {"title": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"title": {"$regex": expected_query, "$options": "i"}},
-            {"username": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"username": {"$regex": expected_query, "$options": "i"}}
-        ]
-    }
-    mock_monitored_chats.find_one.assert_called_once_with(expected_or_query)
-    # Verifica a chamada ao find({}) para o logging
-    mock_monitored_chats.find.assert_called_once_with({})
-
-    # Verifica o resultado
     assert result is None
 
 @pytest.mark.asyncio
-async def test_get_chat_id_by_name_error(mongodb_setup):
-    """
-    Testa a obtenção do ID de um chat quando ocorre um erro.
-    """
-    # Obtém os mocks do fixture
+async def test_get_chat_id_by_name_ambiguous(mongodb_setup):
+    """Testa que _get_chat_id_by_name não escolhe um chat quando o nome é ambíguo."""
     mongodb_client = mongodb_setup["client_wrapper"]
-    mock_db = mongodb_setup["mock_db"]
-    mock_monitored_chats = mongodb_setup["mock_monitored_chats"]
-    
-    # Configura o banco de dados
-    mongodb_client.db = mock_db
-    
-    # Configura o mock para find_one lançar uma exceção
-    mock_monitored_chats.find_one.side_effect = PyMongoError("Database error")
-    
-    # Executa o método _get_chat_id_by_name
-    result = await mongodb_client._get_chat_id_by_name("Test Group")
-    
-    # Verifica se o método find_one foi chamado com os parâmetros corretos
-    expected_query = re.escape("Test Group")
-    expected_or_query = {
-        "$or": [
-            {"title": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"title": {"$regex": expected_query, "$options": "i"}},
-            {"username": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"username": {"$regex": expected_query, "$options": "i"}}
-        ]
-    }
-    mock_monitored_chats.find_one.assert_called_once_with(expected_or_query)
-    
-    # Verifica o resultado
-    assert result is None
+    mongodb_client.find_monitored_chats_by_name = AsyncMock(return_value=[
+        {"chat_id": 1, "title": "Gym Nation"},
+        {"chat_id": 2, "title": "Gym Nation Feminino"}
+    ])
+
+    assert await mongodb_client._get_chat_id_by_name("gym") is None
 
 @pytest.mark.asyncio
-async def test_get_chat_id_by_name_with_username(mongodb_setup):
-    """
-    Testa a obtenção do ID de um chat pelo username.
-    """
-    # Obtém os mocks do fixture
+async def test_find_monitored_chats_by_name_exact(mongodb_setup):
+    """Testa a busca exata pelos campos normalizados (sem acentos e maiúsculas)."""
     mongodb_client = mongodb_setup["client_wrapper"]
-    mock_db = mongodb_setup["mock_db"]
-    mock_monitored_chats = mongodb_setup["mock_monitored_chats"]
-    
-    # Configura o banco de dados
-    mongodb_client.db = mock_db
-    
-    # Configura o mock para find_one
-    expected_chat = {
-        "chat_id": 12345,
-        "title": "Test Group",
-        "username": "testgroup"
-    }
-    mock_monitored_chats.find_one.return_value = expected_chat
-    
-    # Executa o método _get_chat_id_by_name
-    result = await mongodb_client._get_chat_id_by_name("testgroup")
-    
-    # Verifica se o método find_one foi chamado com os parâmetros corretos
-    expected_query = re.escape("testgroup")
-    expected_or_query = {
-        "$or": [
-            {"title": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"title": {"$regex": expected_query, "$options": "i"}},
-            {"username": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"username": {"$regex": expected_query, "$options": "i"}}
-        ]
-    }
-    mock_monitored_chats.find_one.assert_called_once_with(expected_or_query)
-    
-    # Verifica o resultado
-    assert result == expected_chat["chat_id"]
+    mock_chats = MagicMock()
+    exact_cursor = MagicMock()
+    exact_cursor.to_list = AsyncMock(return_value=[{"chat_id": 1, "title": "Academia Força"}])
+    mock_chats.find = MagicMock(return_value=exact_cursor)
+    mongodb_setup["mock_db"].monitored_chats = mock_chats
+
+    result = await mongodb_client.find_monitored_chats_by_name("  ACADEMIA   forca ")
+
+    assert result == [{"chat_id": 1, "title": "Academia Força"}]
+    mock_chats.find.assert_called_once_with({
+        "$or": [{"title_normalized": "academia forca"}, {"username_normalized": "academia forca"}]
+    })
 
 @pytest.mark.asyncio
-async def test_get_chat_id_by_name_with_title(mongodb_setup):
-    """
-    Testa a obtenção do ID de um chat pelo título.
-    """
-    # Obtém os mocks do fixture
+async def test_find_monitored_chats_by_name_prefix(mongodb_setup):
+    """Testa que, sem correspondência exata, a busca usa prefixo ancorado (indexável)."""
     mongodb_client = mongodb_setup["client_wrapper"]
-    mock_db = mongodb_setup["mock_db"]
-    mock_monitored_chats = mongodb_setup["mock_monitored_chats"]
-    
-    # Configura o banco de dados
-    mongodb_client.db = mock_db
-    
-    # Configura o mock para find_one
-    expected_chat = {
-        "chat_id": 12345,
-        "title": "Test Group",
-        "username": "testgroup"
-    }
-    mock_monitored_chats.find_one.return_value = expected_chat
-    
-    # Executa o método _get_chat_id_by_name
-    result = await mongodb_client._get_chat_id_by_name("Test Group")
-    
-    # Verifica se o método find_one foi chamado com os parâmetros corretos
-    expected_query = re.escape("Test Group")
-    expected_or_query = {
-        "$or": [
-            {"title": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"title": {"$regex": expected_query, "$options": "i"}},
-            {"username": {"$regex": f'^{expected_query}$', "$options": "i"}},
-            {"username": {"$regex": expected_query, "$options": "i"}}
-        ]
-    }
-    mock_monitored_chats.find_one.assert_called_once_with(expected_or_query)
-    
-    # Verifica o resultado
-    assert result == expected_chat["chat_id"]
+    mock_chats = MagicMock()
+    exact_cursor = MagicMock()
+    exact_cursor.to_list = AsyncMock(return_value=[])
+    prefix_cursor = MagicMock()
+    prefix_cursor.to_list = AsyncMock(return_value=[{"chat_id": 2, "username": "testgroup"}])
+    mock_chats.find = MagicMock(side_effect=[exact_cursor, prefix_cursor])
+    mongodb_setup["mock_db"].monitored_chats = mock_chats
+
+    result = await mongodb_client.find_monitored_chats_by_name("@test.")
+
+    assert result == [{"chat_id": 2, "username": "testgroup"}]
+    prefix_query = mock_chats.find.call_args_list[1][0][0]
+    assert prefix_query["$or"][0] == {"title_normalized": {"$regex": "^test\\."}}
+
+@pytest.mark.asyncio
+async def test_find_monitored_chats_by_name_error(mongodb_setup):
+    """Testa a busca de chats pelo nome quando ocorre um erro."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    mock_chats = MagicMock()
+    mock_chats.find = MagicMock(side_effect=PyMongoError("Database error"))
+    mongodb_setup["mock_db"].monitored_chats = mock_chats
+
+    assert await mongodb_client.find_monitored_chats_by_name("Test Group") == []
 
 @pytest.mark.asyncio
 async def test_remove_from_blacklist(mongodb_setup):
@@ -1358,3 +1198,419 @@ def monkeypatch_setup(client_wrapper):
     # Substitui o atributo db do cliente pelo mock
     client_wrapper.db = mock_db
     return mock_db 
+
+# --- Testes para eleição de líder ---
+
+@pytest.mark.asyncio
+async def test_acquire_lease_returns_fencing_token(mongodb_setup):
+    """Testa a aquisição de um lease livre ou já pertencente à réplica."""
+    client = mongodb_setup["client_wrapper"]
+    mock_leases = MagicMock()
+    mock_leases.find_one_and_update = AsyncMock(return_value={"_id": "recurring", "holder": "a", "token": 4})
+    mongodb_setup["mock_db"].leases = mock_leases
+
+    token = await client.acquire_lease("recurring", "a", 15)
+
+    assert token == 4
+    args, kwargs = mock_leases.find_one_and_update.call_args
+    assert args[0]["_id"] == "recurring"
+    assert kwargs["upsert"] is True
+
+
+@pytest.mark.asyncio
+async def test_acquire_lease_held_by_other_replica(mongodb_setup):
+    """Testa que um lease válido de outra réplica não é adquirido."""
+    from pymongo.errors import DuplicateKeyError
+    client = mongodb_setup["client_wrapper"]
+    mock_leases = MagicMock()
+    mock_leases.find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("E11000"))
+    mongodb_setup["mock_db"].leases = mock_leases
+
+    assert await client.acquire_lease("recurring", "b", 15) is None
+
+# --- Testes para publicação de correios ---
+
+@pytest.mark.asyncio
+async def test_claim_pending_mails_is_conditional(mongodb_setup):
+    """Testa que a reserva de correios reaplica o filtro de status na atualização."""
+    client = mongodb_setup["client_wrapper"]
+    mail_id = ObjectId()
+    stale_id = ObjectId()
+    mock_mails = MagicMock()
+    candidates_cursor = MagicMock()
+    candidates_cursor.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[
+        {"_id": mail_id, "status": "pending"}, {"_id": stale_id, "status": "publishing"}
+    ])
+    claimed_cursor = MagicMock()
+    claimed_cursor.sort.return_value.to_list = AsyncMock(return_value=[{"_id": mail_id, "message_text": "oi"}])
+    mock_mails.find = MagicMock(side_effect=[candidates_cursor, claimed_cursor])
+    mock_mails.update_many = AsyncMock(return_value=MagicMock(modified_count=1))
+    mock_stats = MagicMock()
+    mock_stats.update_one = AsyncMock()
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+
+    claimed = await client.claim_pending_mails("claim-1", 10)
+
+    assert claimed == [{"_id": mail_id, "message_text": "oi"}]
+    (pending_filter, update), (stale_filter, _) = [c.args for c in mock_mails.update_many.call_args_list]
+    assert pending_filter["_id"] == {"$in": [mail_id]}
+    assert pending_filter["status"] == "pending"
+    assert "$and" in pending_filter
+    assert stale_filter["_id"] == {"$in": [stale_id]}
+    assert update["$set"]["status"] == "publishing"
+    assert update["$set"]["claim_id"] == "claim-1"
+    # Apenas o correio pendente muda de contador (a reserva abandonada já estava em "publishing")
+    mock_stats.update_one.assert_awaited_once_with(
+        {"_id": "total"}, {"$inc": {"status.publishing": 1, "status.pending": -1}}, upsert=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_record_mail_publish_results_uses_bulk_write(mongodb_setup):
+    """Testa que os resultados da publicação são gravados em lote e movem os contadores por status."""
+    client = mongodb_setup["client_wrapper"]
+    mock_mails = MagicMock()
+    mock_mails.bulk_write = AsyncMock(return_value=MagicMock(modified_count=2))
+    mock_stats = MagicMock()
+    mock_stats.update_one = AsyncMock()
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+    published_ids = [str(ObjectId()), str(ObjectId())]
+
+    modified = await client.record_mail_publish_results("claim-1", [(mail_id, 55) for mail_id in published_ids], [])
+
+    assert modified == 2
+    mock_mails.bulk_write.assert_awaited_once()
+    operations = mock_mails.bulk_write.call_args.args[0]
+    assert len(operations) == 2
+    assert mock_mails.bulk_write.call_args.kwargs["ordered"] is False
+    mock_stats.update_one.assert_awaited_once_with(
+        {"_id": "total"}, {"$inc": {"status.published": 2, "status.publishing": -2}}, upsert=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_record_mail_publish_results_counts_failures_separately(mongodb_setup):
+    """Testa que falhas são gravadas em um lote próprio e voltam ao contador de pendentes."""
+    client = mongodb_setup["client_wrapper"]
+    mock_mails = MagicMock()
+    # O correio publicado foi reservado de novo por outra réplica: nada é alterado
+    mock_mails.bulk_write = AsyncMock(side_effect=[MagicMock(modified_count=0), MagicMock(modified_count=1)])
+    mock_stats = MagicMock()
+    mock_stats.update_one = AsyncMock()
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+
+    modified = await client.record_mail_publish_results("claim-1", [(str(ObjectId()), 55)], [str(ObjectId())])
+
+    assert modified == 1
+    mock_stats.update_one.assert_awaited_once_with(
+        {"_id": "total"}, {"$inc": {"status.pending": 1, "status.publishing": -1}}, upsert=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_mark_mails_queued_skips_mails_already_published(mongodb_setup):
+    """Testa que a marcação como "queued" não sobrescreve um correio já publicado pelo outbox."""
+    client = mongodb_setup["client_wrapper"]
+    mock_mails = MagicMock()
+    mock_mails.update_many = AsyncMock(return_value=MagicMock(modified_count=1))
+    mock_stats = MagicMock()
+    mock_stats.update_one = AsyncMock()
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+    mail_id = ObjectId()
+
+    assert await client.mark_mails_queued("claim-1", [str(mail_id)]) == 1
+
+    update_filter, update = mock_mails.update_many.call_args.args
+    assert update_filter == {"_id": {"$in": [mail_id]}, "claim_id": "claim-1", "status": "publishing"}
+    assert update["$set"]["status"] == "queued"
+
+
+@pytest.mark.asyncio
+async def test_publish_mail_moves_previous_status(mongodb_setup):
+    """Testa que marcar um correio como publicado move o contador do status anterior."""
+    client = mongodb_setup["client_wrapper"]
+    mock_mails = MagicMock()
+    mock_mails.find_one_and_update = AsyncMock(side_effect=[{"status": "queued"}, {"status": "published"}, None])
+    mock_stats = MagicMock()
+    mock_stats.update_one = AsyncMock()
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+    mail_id = str(ObjectId())
+
+    assert await client.publish_mail(mail_id, 10) is True
+    # Efeito reaplicado pelo outbox: o correio já estava publicado
+    assert await client.publish_mail(mail_id, 10) is True
+    assert await client.publish_mail(mail_id, 10) is False
+
+    mock_stats.update_one.assert_awaited_once_with(
+        {"_id": "total"}, {"$inc": {"status.published": 1, "status.queued": -1}}, upsert=True
+    )
+
+@pytest.mark.asyncio
+async def test_finish_ban_job_requires_no_pending_items(mongodb_setup):
+    """Testa que um job com itens pendentes não é concluído."""
+    client = mongodb_setup["client_wrapper"]
+    mock_items = MagicMock()
+    mock_items.count_documents = AsyncMock(side_effect=[1, 0])
+    mock_jobs = MagicMock()
+    mock_jobs.find_one_and_update = AsyncMock(return_value={"_id": "job1", "status": "done"})
+    mongodb_setup["mock_db"].ban_job_items = mock_items
+    mongodb_setup["mock_db"].ban_jobs = mock_jobs
+
+    assert await client.finish_ban_job("job1", "replica-1") is None
+    mock_jobs.find_one_and_update.assert_not_called()
+
+    assert await client.finish_ban_job("job1", "replica-1") == {"_id": "job1", "status": "done"}
+    mock_items.count_documents.assert_called_with({"job_id": "job1", "state": "pending"}, limit=1)
+
+
+@pytest.mark.asyncio
+async def test_get_pending_ban_items_error_returns_none(mongodb_setup):
+    """Testa que um erro ao ler os itens pendentes é distinguível de um job sem itens."""
+    client = mongodb_setup["client_wrapper"]
+    mock_items = MagicMock()
+    mock_items.find.return_value.to_list = AsyncMock(side_effect=PyMongoError("falha"))
+    mongodb_setup["mock_db"].ban_job_items = mock_items
+
+    assert await client.get_pending_ban_items("job1") is None
+
+# --- Testes para cotas de uso ---
+
+@pytest.mark.asyncio
+async def test_reserve_calendar_quota_allowed(mongodb_setup):
+    """Testa que a reserva incrementa o contador apenas abaixo do limite."""
+    client = mongodb_setup["client_wrapper"]
+    mock_quotas = MagicMock()
+    mock_quotas.find_one_and_update = AsyncMock(return_value={"_id": "qa:1:2", "count": 2})
+    mongodb_setup["mock_db"].quotas = mock_quotas
+
+    result = await client.reserve_calendar_quota("qa:1:2", 2, datetime.now())
+
+    assert result == {"allowed": True, "used": 2}
+    args, kwargs = mock_quotas.find_one_and_update.call_args
+    assert args[0] == {"_id": "qa:1:2", "count": {"$lt": 2}}
+    assert kwargs["upsert"] is True
+
+
+@pytest.mark.asyncio
+async def test_reserve_calendar_quota_exhausted(mongodb_setup):
+    """Testa que a colisão do upsert indica cota esgotada."""
+    from pymongo.errors import DuplicateKeyError
+    client = mongodb_setup["client_wrapper"]
+    mock_quotas = MagicMock()
+    mock_quotas.find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("E11000"))
+    mongodb_setup["mock_db"].quotas = mock_quotas
+
+    result = await client.reserve_calendar_quota("qa:1:2", 2, datetime.now())
+
+    assert result == {"allowed": False, "used": 2}
+
+
+@pytest.mark.asyncio
+async def test_refund_quota_rolling_pulls_hit(mongodb_setup):
+    """Testa que a devolução de uma cota deslizante remove o uso reservado."""
+    client = mongodb_setup["client_wrapper"]
+    hit = datetime.now()
+    mock_quotas = MagicMock()
+    mock_quotas.update_one = AsyncMock(return_value=MagicMock(modified_count=1))
+    mongodb_setup["mock_db"].quotas = mock_quotas
+
+    assert await client.refund_quota("qa:1:2", hit) is True
+    mock_quotas.update_one.assert_called_once_with({"_id": "qa:1:2"}, {"$pull": {"hits": hit}})
+
+# --- Testes para estatísticas do correio elegante ---
+
+@pytest.mark.asyncio
+async def test_create_mail_updates_stats_rollups(mongodb_setup):
+    """Testa que criar um correio incrementa os resumos do dia e total."""
+    client = mongodb_setup["client_wrapper"]
+    mock_mails = MagicMock()
+    mock_mails.insert_one = AsyncMock(return_value=MagicMock(acknowledged=True, inserted_id=ObjectId()))
+    mock_stats = MagicMock()
+    mock_stats.bulk_write = AsyncMock()
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+
+    assert await client.create_mail(10, "Remetente", "destino", "mensagem de teste")
+
+    operations = mock_stats.bulk_write.call_args[0][0]
+    assert [op._filter["_id"] for op in operations] == [datetime.now().strftime("%Y-%m-%d"), "total"]
+    update = operations[0]._doc
+    assert update["$inc"] == {"sent": 1}
+    assert len(update["$max"]) == 1
+    assert next(iter(update["$max"])).startswith("senders.")
+    # O correio novo entra no contador de pendentes do acumulado
+    assert operations[1]._doc["$inc"] == {"sent": 1, "status.pending": 1}
+    assert operations[1]._doc["$max"] == update["$max"]
+
+
+@pytest.mark.asyncio
+async def test_confirm_pix_payment_counts_revelation_once(mongodb_setup):
+    """Testa que apenas confirmações efetivas contam como revelação."""
+    client = mongodb_setup["client_wrapper"]
+    mock_payments = MagicMock()
+    mock_payments.update_one = AsyncMock(side_effect=[MagicMock(modified_count=1), MagicMock(modified_count=0)])
+    mock_stats = MagicMock()
+    mock_stats.bulk_write = AsyncMock()
+    mongodb_setup["mock_db"].pix_payments = mock_payments
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+
+    assert await client.confirm_pix_payment("pix1", 10) is True
+    assert await client.confirm_pix_payment("pix1", 10) is False
+
+    assert mock_stats.bulk_write.call_count == 1
+    assert mock_stats.bulk_write.call_args[0][0][0]._doc == {"$inc": {"revealed": 1}}
+
+
+@pytest.mark.asyncio
+async def test_get_mail_stats_total_reads_rollup(mongodb_setup):
+    """Testa que o total é lido do resumo, com remetentes únicos estimados."""
+    from src.utils.hyperloglog import HyperLogLog
+    client = mongodb_setup["client_wrapper"]
+    hll = HyperLogLog()
+    for sender_id in range(50):
+        hll.add(sender_id)
+    mock_stats = MagicMock()
+    mock_stats.find_one = AsyncMock(return_value={
+        "_id": "total", "sent": 120, "revealed": 7, "reported": 2,
+        "senders": {str(k): v for k, v in hll.registers.items()},
+        "status": {"pending": 3, "publishing": 1, "queued": 2, "published": 107, "expired": 7}
+    })
+    mock_mails = MagicMock()
+    mock_mails.count_documents = AsyncMock()
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+    mongodb_setup["mock_db"].correio_elegante = mock_mails
+
+    stats = await client.get_mail_stats_total()
+
+    assert stats["total_mails"] == 120
+    assert stats["total_revenue"] == 14.0
+    assert 45 <= stats["unique_senders"] <= 55
+    assert (stats["pending"], stats["publishing"], stats["queued"]) == (3, 1, 2)
+    assert (stats["published"], stats["failed"], stats["expired"]) == (107, 0, 7)
+    # Nenhuma contagem na coleção de correios
+    mock_mails.count_documents.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ensure_mail_stats_rebuilds_without_status_counters(mongodb_setup):
+    """Testa que um acumulado anterior aos contadores por status é reconstruído."""
+    client = mongodb_setup["client_wrapper"]
+    mock_stats = MagicMock()
+    mock_stats.find_one = AsyncMock(side_effect=[{"_id": "total"}, {"_id": "total", "status": {}}])
+    mongodb_setup["mock_db"].mail_stats = mock_stats
+
+    with patch.object(client, "rebuild_mail_stats", AsyncMock(return_value=True)) as rebuild:
+        await client.ensure_mail_stats()
+        await client.ensure_mail_stats()
+
+    rebuild.assert_awaited_once()
+
+def test_find_chat_documents(mongodb_setup):
+    """Testa o cursor de exportação: filtro por chat, projeção, lotes e ordem de inserção."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    mock_collection = MagicMock()
+    mongodb_client.db = MagicMock()
+    mongodb_client.db.__getitem__.return_value = mock_collection
+
+    cursor = mongodb_client.find_chat_documents("monitored_messages", -100123, ["_id", "text"], batch_size=100)
+
+    mongodb_client.db.__getitem__.assert_called_once_with("monitored_messages")
+    mock_collection.find.assert_called_once_with({"chat_id": -100123}, {"_id": 1, "text": 1}, batch_size=100)
+    mock_collection.find.return_value.sort.assert_called_once_with("_id", 1)
+    assert cursor is mock_collection.find.return_value.sort.return_value
+
+@pytest.mark.asyncio
+async def test_claim_ban_job_query(mongodb_setup):
+    """Testa a reserva de jobs de banimento: dono atual ou heartbeat vencido, exceto os já em execução."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    mongodb_client.db = MagicMock()
+    mongodb_client.db.ban_jobs.find_one_and_update = AsyncMock(return_value={"_id": "job1"})
+
+    job = await mongodb_client.claim_ban_job("replica-1", 120, ["job2"])
+
+    query, update = mongodb_client.db.ban_jobs.find_one_and_update.call_args[0]
+    assert job == {"_id": "job1"}
+    assert query["status"] == "running"
+    assert query["_id"] == {"$nin": ["job2"]}
+    assert {"owner": "replica-1"} in query["$or"]
+    assert update == [{"$set": {"owner": "replica-1", "heartbeat_at": "$$NOW"}}]
+
+@pytest.mark.asyncio
+async def test_record_ban_job_results(mongodb_setup):
+    """Testa a gravação em lote dos resultados e a verificação do dono do job."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    mongodb_client.db = MagicMock()
+    mongodb_client.db.ban_job_items.bulk_write = AsyncMock()
+    mongodb_client.db.ban_jobs.update_one = AsyncMock(return_value=MagicMock(modified_count=0))
+
+    still_owner = await mongodb_client.record_ban_job_results("job1", "replica-1", [1, 3], [(2, "erro")], 4)
+
+    operations = mongodb_client.db.ban_job_items.bulk_write.call_args[0][0]
+    assert len(operations) == 3
+    query = mongodb_client.db.ban_jobs.update_one.call_args[0][0]
+    assert query == {"_id": "job1", "owner": "replica-1", "status": "running"}
+    assert still_owner is False
+
+@pytest.mark.asyncio
+async def test_enqueue_outbox_messages_ignores_duplicates(mongodb_setup):
+    """Testa que chaves já gravadas no outbox contam como gravadas e outros erros não."""
+    from pymongo.errors import BulkWriteError
+    mongodb_client = mongodb_setup["client_wrapper"]
+    mongodb_client.db = MagicMock()
+    mongodb_client.db.outbox.insert_many = AsyncMock(side_effect=BulkWriteError({
+        "writeErrors": [{"index": 0, "code": 11000}, {"index": 2, "code": 121}]
+    }))
+
+    keys = await mongodb_client.enqueue_outbox_messages([{"_id": "a"}, {"_id": "b"}, {"_id": "c"}])
+
+    assert keys == ["a", "b"]
+    mongodb_client.db.outbox.insert_many.assert_called_once()
+    assert mongodb_client.db.outbox.insert_many.call_args[1] == {"ordered": False}
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_one_command_per_collection(mongodb_setup):
+    """Testa que cada coleção recebe seus índices em um único createIndexes, mesmo se outra falhar."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    collections = {}
+
+    def collection(name):
+        if name not in collections:
+            collections[name] = MagicMock()
+            collections[name].create_indexes = AsyncMock(
+                side_effect=PyMongoError("erro") if name == "quotas" else None
+            )
+        return collections[name]
+
+    mongodb_client.db = MagicMock()
+    mongodb_client.db.__getitem__.side_effect = collection
+
+    await mongodb_client.ensure_indexes()
+
+    assert set(collections) == set(MongoDBClient.INDEXES)
+    for name, indexes in MongoDBClient.INDEXES.items():
+        collections[name].create_indexes.assert_awaited_once_with(indexes)
+
+
+@pytest.mark.asyncio
+async def test_bot_settings_roundtrip(mongodb_setup):
+    """Testa a leitura e a gravação das configurações internas do bot."""
+    mongodb_client = mongodb_setup["client_wrapper"]
+    mongodb_client.db = MagicMock()
+    mongodb_client.db.bot_settings.find_one = AsyncMock(return_value={"_id": "commands_hash", "value": "abc"})
+    mongodb_client.db.bot_settings.update_one = AsyncMock()
+
+    assert await mongodb_client.get_bot_setting("commands_hash") == "abc"
+    assert await mongodb_client.set_bot_setting("commands_hash", "def") is True
+    args, kwargs = mongodb_client.db.bot_settings.update_one.call_args
+    assert args[0] == {"_id": "commands_hash"}
+    assert args[1]["$set"]["value"] == "def"
+    assert kwargs == {"upsert": True}
+
+    mongodb_client.db.bot_settings.find_one = AsyncMock(side_effect=PyMongoError("erro"))
+    assert await mongodb_client.get_bot_setting("commands_hash") is None
@@ -0,0 +1,199 @@
+"""
+Testes para o outbox de mensagens do Telegram.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from src.utils import outbox as outbox_module
+from src.utils.outbox import OutboxSender, build_outbox_message, get_outbox
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pelo outbox."""
+    with patch("src.utils.outbox.mongodb_client") as mock_client:
+        mock_client.enqueue_outbox_messages = AsyncMock(side_effect=lambda messages: [m["_id"] for m in messages])
+        mock_client.claim_outbox_messages = AsyncMock(return_value=[])
+        mock_client.record_outbox_results = AsyncMock(return_value=0)
+        mock_client.get_outbox_pending_effects = AsyncMock(return_value=[])
+        mock_client.clear_outbox_effects = AsyncMock(return_value=True)
+        mock_client.get_outbox_backlog = AsyncMock(return_value=(0, None))
+        mock_client.publish_mail = AsyncMock(return_value=True)
+        mock_client.mark_mail_publish_failed = AsyncMock(return_value=True)
+        yield mock_client
+
+
+def make_sender():
+    """Cria um outbox com bot mockado e sem limite de taxa efetivo."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=lambda **kwargs: MagicMock(message_id=500))
+    sender = OutboxSender(bot)
+    sender.rate_limiter = MagicMock(acquire=AsyncMock(return_value=0))
+    sender._chat_limiter = MagicMock(return_value=MagicMock(acquire=AsyncMock(return_value=0)))
+    return sender, bot
+
+
+def test_build_outbox_message_serializes_keyboard():
+    """Testa que o teclado inline é gravado como dicionário e a chave vira o _id."""
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Abrir", url="https://t.me/bot")]])
+
+    message = build_outbox_message("mail:1", -100, "Oi", parse_mode="Markdown", reply_markup=keyboard)
+
+    assert message["_id"] == "mail:1"
+    assert message["status"] == "pending"
+    assert message["reply_markup"] == keyboard.to_dict()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_wakes_worker(mock_mongodb):
+    """Testa que gravar mensagens acorda o worker."""
+    sender, _ = make_sender()
+
+    keys = await sender.enqueue([build_outbox_message("k1", 1, "a")])
+
+    assert keys == ["k1"]
+    assert sender._wakeup.is_set()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_records_results_in_bulk(mock_mongodb):
+    """Testa a entrega de um lote: envios, novas tentativas e descartes gravados em uma operação."""
+    sender, bot = make_sender()
+    created_at = datetime.now() - timedelta(seconds=3)
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Abrir", url="https://t.me/bot")]])
+    ok = {**build_outbox_message("ok", -100, "a", reply_markup=keyboard), "created_at": created_at}
+    flaky = build_outbox_message("flaky", -100, "b")
+    invalid = build_outbox_message("invalid", -200, "c")
+    mock_mongodb.claim_outbox_messages.return_value = [ok, flaky, invalid]
+
+    async def send_side_effect(chat_id, text, parse_mode, reply_markup):
+        if text == "b":
+            raise NetworkError("timeout")
+        if text == "c":
+            raise BadRequest("Chat not found")
+        assert reply_markup == keyboard
+        return MagicMock(message_id=500)
+    bot.send_message.side_effect = send_side_effect
+
+    assert await sender._process_batch() == 3
+
+    claim_id, sent, retry, failed = mock_mongodb.record_outbox_results.call_args[0]
+    assert sent == [("ok", 500)]
+    assert [(key, error) for key, error, _ in retry] == [("flaky", "timeout")]
+    assert failed == [("invalid", "Chat not found")]
+    stats = sender.get_stats()
+    assert stats["sent_total"] == 1 and stats["retried_total"] == 1 and stats["failed_total"] == 1
+    assert stats["last_latency_seconds"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_stop_finishes_in_flight_batch(mock_mongodb):
+    """Testa que stop aguarda o lote em andamento, grava o resultado e não reserva outro."""
+    sender, bot = make_sender()
+    release = asyncio.Event()
+
+    async def slow_send(**kwargs):
+        await release.wait()
+        return MagicMock(message_id=500)
+    bot.send_message.side_effect = slow_send
+    mock_mongodb.claim_outbox_messages.return_value = [build_outbox_message("k1", 1, "a")]
+
+    await sender.start()
+    while not bot.send_message.called:
+        await asyncio.sleep(0)
+    stopping = asyncio.create_task(sender.stop(timeout=1))
+    await asyncio.sleep(0)
+    release.set()
+    await stopping
+
+    assert mock_mongodb.claim_outbox_messages.call_count == 1
+    assert mock_mongodb.record_outbox_results.call_args[0][1] == [("k1", 500)]
+    assert sender.task is None
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_batch_after_timeout(mock_mongodb):
+    """Testa que o lote é cancelado sem gravar resultado quando o prazo se esgota."""
+    sender, bot = make_sender()
+
+    async def hanging_send(**kwargs):
+        await asyncio.Event().wait()
+    bot.send_message.side_effect = hanging_send
+    mock_mongodb.claim_outbox_messages.return_value = [build_outbox_message("k1", 1, "a")]
+
+    await sender.start()
+    while not bot.send_message.called:
+        await asyncio.sleep(0)
+    await sender.stop(timeout=0.01)
+
+    mock_mongodb.record_outbox_results.assert_not_called()
+    assert sender.task is None
+
+
+@pytest.mark.asyncio
+async def test_deliver_gives_up_after_max_attempts(mock_mongodb):
+    """Testa que falhas temporárias são descartadas após MAX_ATTEMPTS."""
+    sender, bot = make_sender()
+    bot.send_message.side_effect = NetworkError("timeout")
+    message = {**build_outbox_message("k", 1, "a"), "attempts": OutboxSender.MAX_ATTEMPTS - 1}
+
+    assert await sender._deliver(message) == (None, "timeout", None)
+
+
+@pytest.mark.asyncio
+async def test_deliver_respects_retry_after(mock_mongodb):
+    """Testa que um RetryAfter pausa o chat e agenda nova tentativa após a espera pedida."""
+    sender, bot = make_sender()
+    bot.send_message.side_effect = RetryAfter(7)
+
+    message_id, _, retry_delay = await sender._deliver(build_outbox_message("k", -100, "a"))
+
+    assert message_id is None
+    assert retry_delay == 7
+    sender._chat_limiter.return_value.penalize.assert_called_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_apply_effects_publishes_and_fails_mails(mock_mongodb):
+    """Testa que os efeitos pendentes marcam correios como publicados ou com falha."""
+    sender, _ = make_sender()
+    mock_mongodb.get_outbox_pending_effects.return_value = [
+        {"_id": "mail:1", "status": "sent", "message_id": 10, "effect": {"type": "mail_published", "mail_id": "1"}},
+        {"_id": "mail:2", "status": "failed", "error": "Chat not found",
+         "effect": {"type": "mail_published", "mail_id": "2"}},
+    ]
+
+    await sender._apply_effects()
+
+    mock_mongodb.publish_mail.assert_called_once_with("1", 10)
+    mock_mongodb.mark_mail_publish_failed.assert_called_once_with("2", "Chat not found")
+    mock_mongodb.clear_outbox_effects.assert_called_once_with(["mail:1", "mail:2"])
+
+
+@pytest.mark.asyncio
+async def test_refresh_backlog(mock_mongodb):
+    """Testa as métricas de fila."""
+    sender, _ = make_sender()
+    mock_mongodb.get_outbox_backlog.return_value = (4, datetime.now() - timedelta(seconds=30))
+
+    await sender._refresh_backlog()
+    await sender._refresh_backlog()
+
+    stats = sender.get_stats()
+    assert stats["backlog"] == 4
+    assert stats["oldest_pending_age_seconds"] >= 30
+    mock_mongodb.get_outbox_backlog.assert_called_once()
+
+
+def test_get_outbox_only_when_running():
+    """Testa que o outbox global só é usado quando está em execução."""
+    sender, _ = make_sender()
+    with patch.object(outbox_module, "outbox_sender", sender):
+        assert get_outbox() is None
+        sender.is_running = True
+        assert get_outbox() is sender
@@ -0,0 +1,183 @@
+"""
+Testes para a medição de tempo por atualização.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from telegram import Update
+from telegram.ext import CommandHandler, ConversationHandler, MessageHandler, TypeHandler, filters
+
+from src.utils import perf
+from src.utils.perf import (
+    PerfStats,
+    finish_update_trace,
+    format_perf_report,
+    instrument_application,
+    instrument_class,
+    start_update_trace,
+    timed_callback,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    """Usa estatísticas vazias em cada teste e não deixa medição aberta."""
+    stats = PerfStats()
+    with patch.object(perf, "perf_stats", stats):
+        token = perf._current_trace.set(None)
+        yield stats
+        perf._current_trace.reset(token)
+
+
+def make_update(update_id=1, age_seconds=None):
+    """Cria uma atualização mockada, com mensagem enviada há age_seconds segundos."""
+    update = MagicMock(spec=Update)
+    update.update_id = update_id
+    update.message = None
+    if age_seconds is not None:
+        update.message = MagicMock(date=datetime.now(timezone.utc) - timedelta(seconds=age_seconds))
+    return update
+
+
+class FakeClient:
+    """Cliente com uma chamada externa que chama outra internamente."""
+
+    async def fetch(self):
+        await asyncio.sleep(0.01)
+        return await self.fetch_inner()
+
+    async def fetch_inner(self):
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    def sync_method(self):
+        return "sync"
+
+
+def test_percentiles_nearest_rank():
+    """Testa os percentis pelo posto mais próximo."""
+    stats = PerfStats()
+    for value in range(1, 101):
+        stats.record("x", value / 1000)
+
+    row = stats.summary()[0]
+
+    assert row["count"] == 100
+    assert (row["p50"], row["p95"], row["p99"], row["max"]) == (0.05, 0.095, 0.099, 0.1)
+
+
+def test_window_keeps_recent_samples():
+    """Testa que apenas as últimas WINDOW amostras entram nos percentis."""
+    stats = PerfStats()
+    with patch.object(PerfStats, "WINDOW", 3):
+        stats.record("x", 10.0)
+        for _ in range(3):
+            stats.record("x", 1.0)
+
+    row = stats.summary()[0]
+    assert row["count"] == 4
+    assert row["max"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_update_breakdown(fresh_stats):
+    """Testa o detalhamento de uma atualização: handler, fila e chamadas externas sem dupla contagem."""
+    instrument_class(FakeClient, "mongo")
+    client = FakeClient()
+    assert client.sync_method() == "sync"
+
+    async def handler(update, context):
+        return await client.fetch()
+    wrapped = timed_callback(handler)
+
+    update = make_update(age_seconds=5)
+    await start_update_trace(update, MagicMock())
+    trace = perf._current_trace.get()
+    assert await wrapped(update, MagicMock()) == "ok"
+    await finish_update_trace(update, MagicMock())
+
+    assert trace.queue_delay >= 5
+    assert [name for name, _ in trace.handlers] == [handler.__qualname__]
+    assert 0.02 <= trace.io["mongo"] < trace.handlers[0][1] + 0.001
+    names = {row["name"] for row in fresh_stats.summary()}
+    assert names == {f"handler:{handler.__qualname__}", "update", "queue_delay", "io:mongo"}
+    assert perf._current_trace.get() is None
+
+
+@pytest.mark.asyncio
+async def test_slow_update_is_logged():
+    """Testa que atualizações acima do limite são registradas com o detalhamento."""
+    update = make_update(update_id=42)
+    await start_update_trace(update, MagicMock())
+    perf._current_trace.get().io["telegram"] += 0.5
+
+    with patch("src.utils.perf.Config.get_slow_update_threshold", return_value=0.0), \
+         patch("src.utils.perf.logger") as mock_logger:
+        await finish_update_trace(update, MagicMock())
+
+    message = mock_logger.warning.call_args[0][0]
+    assert "Atualização 42 lenta" in message
+    assert "telegram=0.500s" in message
+
+
+@pytest.mark.asyncio
+async def test_calls_outside_update_are_not_traced():
+    """Testa que chamadas fora de uma atualização (agendadores) não falham nem são medidas."""
+    async def handler(update, context):
+        return 1
+
+    assert await timed_callback(handler)(MagicMock(), MagicMock()) == 1
+    await finish_update_trace(MagicMock(), MagicMock())
+
+
+def test_instrument_application_wraps_conversations():
+    """Testa que handlers simples e os internos de ConversationHandlers são medidos."""
+    async def start(update, context):
+        return 0
+
+    async def step(update, context):
+        return ConversationHandler.END
+
+    conversation = ConversationHandler(
+        entry_points=[CommandHandler("correio", start)],
+        states={0: [MessageHandler(filters.TEXT, step)]},
+        fallbacks=[CommandHandler("cancelar", step)],
+    )
+    simple = CommandHandler("start", start)
+    application = MagicMock()
+    application.handlers = {0: [conversation, simple]}
+
+    assert instrument_application(application) == 4
+    assert simple.callback._perf_handler == start.__qualname__
+    groups = [call.kwargs["group"] for call in application.add_handler.call_args_list]
+    assert groups == [perf.PRE_GROUP, perf.POST_GROUP]
+    assert all(isinstance(call.args[0], TypeHandler) for call in application.add_handler.call_args_list)
+
+
+def test_format_perf_report(fresh_stats):
+    """Testa o relatório do /perf."""
+    assert "Nenhuma" in format_perf_report()
+
+    fresh_stats.record("handler:<lambda>", 0.25)
+    report = format_perf_report()
+
+    assert "&lt;lambda&gt;" in report
+    assert "250ms" in report
+
+
+@pytest.mark.asyncio
+async def test_telegram_requests_are_timed_and_counted():
+    """Testa que as chamadas à Bot API entram no detalhamento e nas métricas (incluindo 429)."""
+    request = perf.TimedHTTPXRequest()
+    before = perf.metrics.TELEGRAM_RATE_LIMITED.value("sendMessage")
+    update = make_update()
+    await start_update_trace(update, MagicMock())
+
+    with patch("telegram.request.HTTPXRequest.do_request", return_value=(429, b"{}")):
+        code, _ = await request.do_request("https://api.telegram.org/botX/sendMessage", "POST")
+
+    assert code == 429
+    assert "telegram" in perf._current_trace.get().io
+    assert perf.metrics.TELEGRAM_RATE_LIMITED.value("sendMessage") == before + 1
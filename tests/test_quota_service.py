@@ -0,0 +1,166 @@
+"""
+Testes para o serviço de cotas de uso.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.utils.quota_service import QuotaReservation, QuotaService
+
+
+@pytest.fixture
+def mock_mongodb():
+    """Substitui o cliente MongoDB usado pelo serviço de cotas."""
+    with patch("src.utils.quota_service.mongodb_client") as mock_client:
+        mock_client.reserve_calendar_quota = AsyncMock()
+        mock_client.reserve_rolling_quota = AsyncMock()
+        mock_client.get_quota_usage = AsyncMock(return_value=None)
+        mock_client.refund_quota = AsyncMock(return_value=True)
+        yield mock_client
+
+
+@pytest.mark.asyncio
+async def test_calendar_reserve_allowed(mock_mongodb):
+    """Testa uma reserva permitida em janela de calendário."""
+    mock_mongodb.reserve_calendar_quota.return_value = {"allowed": True, "used": 1}
+    service = QuotaService("qa", limit=2)
+
+    result = await service.reserve("10:20")
+
+    assert result.allowed is True
+    assert result.remaining == 1
+    assert result.reservation is not None
+    quota_id, limit, expires_at = mock_mongodb.reserve_calendar_quota.call_args[0]
+    assert quota_id.startswith("qa:10:20:")
+    assert limit == 2
+    # A janela diária termina na próxima meia-noite
+    assert expires_at == result.reset_at
+    assert (expires_at.hour, expires_at.minute) == (0, 0)
+    assert expires_at > datetime.now()
+
+
+@pytest.mark.asyncio
+async def test_exhausted_key_is_rejected_from_cache(mock_mongodb):
+    """Testa que uma chave esgotada é recusada sem consultar o banco novamente."""
+    mock_mongodb.reserve_calendar_quota.return_value = {"allowed": False, "used": 2}
+    service = QuotaService("qa", limit=2)
+
+    first = await service.reserve("10:20")
+    second = await service.reserve("10:20")
+
+    assert first.allowed is False and first.reservation is None
+    assert second.allowed is False
+    assert mock_mongodb.reserve_calendar_quota.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("window", ["calendar", "rolling"])
+async def test_zero_limit_rejects_without_database(mock_mongodb, window):
+    """Testa que uma cota com limite zero recusa a reserva sem consultar o banco."""
+    service = QuotaService("qa", limit=0, window=window)
+
+    result = await service.reserve("10:20")
+
+    assert result.allowed is False
+    assert result.reservation is None
+    assert result.remaining == 0
+    mock_mongodb.reserve_calendar_quota.assert_not_awaited()
+    mock_mongodb.reserve_rolling_quota.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_reserve_fails_open_when_database_unavailable(mock_mongodb):
+    """Testa que um erro no banco libera a operação sem reserva."""
+    mock_mongodb.reserve_calendar_quota.return_value = None
+    service = QuotaService("mail", limit=2)
+
+    result = await service.reserve("10")
+
+    assert result.allowed is True
+    assert result.reservation is None
+
+
+@pytest.mark.asyncio
+async def test_refund_clears_cache(mock_mongodb):
+    """Testa que a devolução chama o banco e invalida o cache da chave."""
+    mock_mongodb.reserve_calendar_quota.side_effect = [
+        {"allowed": True, "used": 2},
+        {"allowed": True, "used": 2},
+    ]
+    service = QuotaService("mail", limit=2)
+
+    result = await service.reserve("10")
+    await service.refund(result.reservation, "10")
+    again = await service.reserve("10")
+
+    mock_mongodb.refund_quota.assert_called_once_with(result.reservation.quota_id, None)
+    assert again.allowed is True
+    assert mock_mongodb.reserve_calendar_quota.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_refund_without_reservation_is_noop(mock_mongodb):
+    """Testa que devolver uma reserva inexistente não acessa o banco."""
+    service = QuotaService("mail", limit=2)
+    await service.refund(None, "10")
+    mock_mongodb.refund_quota.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rolling_reserve_reset_follows_oldest_hit(mock_mongodb):
+    """Testa que, na janela deslizante, a cota libera 24h após o uso mais antigo."""
+    oldest = datetime.now() - timedelta(hours=20)
+    mock_mongodb.reserve_rolling_quota.return_value = {"allowed": False, "used": 2, "oldest": oldest}
+    service = QuotaService("qa", limit=2, window="rolling")
+
+    result = await service.reserve("10:20")
+
+    assert result.allowed is False
+    assert result.reset_at == oldest + timedelta(days=1)
+    quota_id, limit, _now, window_seconds = mock_mongodb.reserve_rolling_quota.call_args[0]
+    assert quota_id == "qa:10:20"
+    assert window_seconds == 86400
+
+
+@pytest.mark.asyncio
+async def test_rolling_refund_passes_hit(mock_mongodb):
+    """Testa que a devolução de uma cota deslizante informa o instante reservado."""
+    mock_mongodb.reserve_rolling_quota.return_value = {"allowed": True, "used": 1, "oldest": datetime.now()}
+    service = QuotaService("qa", limit=2, window="rolling")
+
+    result = await service.reserve("10:20")
+    await service.refund(result.reservation)
+
+    assert isinstance(result.reservation, QuotaReservation)
+    mock_mongodb.refund_quota.assert_called_once_with("qa:10:20", result.reservation.hit)
+
+
+@pytest.mark.asyncio
+async def test_peek_does_not_reserve(mock_mongodb):
+    """Testa que a consulta lê o uso sem reservar."""
+    mock_mongodb.get_quota_usage.return_value = {"count": 2}
+    service = QuotaService("mail", limit=2)
+
+    result = await service.peek("10")
+
+    assert result.allowed is False
+    assert result.used == 2
+    mock_mongodb.reserve_calendar_quota.assert_not_called()
+
+
+def test_invalid_window_raises():
+    """Testa que um tipo de janela desconhecido é rejeitado."""
+    with pytest.raises(ValueError):
+        QuotaService("qa", limit=2, window="weekly")
+
+
+def test_cache_is_bounded():
+    """Testa que o cache descarta entradas ao atingir o tamanho máximo."""
+    service = QuotaService("qa", limit=2)
+    service.MAX_CACHE_SIZE = 3
+    result = MagicMock(used=1, reset_at=datetime.now() + timedelta(hours=1))
+    for key in ("a", "b", "c", "d"):
+        service._store(key, result)
+    assert len(service._cache) <= 3
+    assert "d" in service._cache
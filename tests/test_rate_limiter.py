@@ -0,0 +1,43 @@
+"""
+Testes para o limitador de taxa assíncrono.
+"""
+import asyncio
+import time
+import pytest
+
+from src.utils.rate_limiter import AsyncRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_calls():
+    """Testa que as chamadas além da rajada são espaçadas pela taxa."""
+    limiter = AsyncRateLimiter(rate=20, period=1.0)
+    start = time.monotonic()
+    for _ in range(4):
+        await limiter.acquire()
+    elapsed = time.monotonic() - start
+    # Primeira chamada imediata, as outras três a cada 50 ms
+    assert 0.13 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_allows_burst_up_to_capacity():
+    """Testa que a capacidade permite uma rajada sem espera."""
+    limiter = AsyncRateLimiter(rate=1, period=10.0, capacity=3)
+    waits = [await limiter.acquire() for _ in range(3)]
+    assert waits == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_penalize_blocks():
+    """Testa que penalize bloqueia novas liberações pelo tempo indicado."""
+    limiter = AsyncRateLimiter(rate=100, period=1.0)
+    limiter.penalize(0.1)
+    waited = await asyncio.wait_for(limiter.acquire(), timeout=1)
+    assert waited >= 0.09
+
+
+def test_rate_limiter_rejects_invalid_rate():
+    """Testa a validação dos parâmetros."""
+    with pytest.raises(ValueError):
+        AsyncRateLimiter(rate=0)
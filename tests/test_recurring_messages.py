@@ -3,6 +3,7 @@ Testes para os comandos de mensagens recorrentes.
 """
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch, ANY
 from datetime import datetime, timedelta
 
@@ -241,6 +242,224 @@ async def test_recurring_messages_manager():
         assert result is True
         mock_db.delete_recurring_message.assert_called_once_with("test_message_id")
 
+@pytest.mark.asyncio
+async def test_recurring_manager_sends_from_cache():
+    """Testa que o envio usa o cache local e reagenda sem consultar o banco."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    app.bot.send_message = AsyncMock()
+    manager = RecurringMessagesManager(app)
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db:
+        mock_db.get_recurring_message = AsyncMock()
+        mock_db.update_recurring_message_last_sent = AsyncMock(return_value=True)
+        
+        manager._schedule_message({
+            "_id": "msg1",
+            "chat_id": 123,
+            "message": "Olá",
+            "interval_hours": 1.0,
+            "last_sent_at": None,
+            "active": True
+        }, due=time.time())
+        
+        for message_id, due, _ in manager._timers.pop_due(time.time()):
+            await manager._send_recurring_message(message_id, due)
+        
+        app.bot.send_message.assert_awaited_once_with(chat_id=123, text="Olá", parse_mode="Markdown")
+        mock_db.get_recurring_message.assert_not_awaited()
+        mock_db.update_recurring_message_last_sent.assert_awaited_once_with("msg1", fencing_token=None, sent_at=ANY)
+        
+        # O próximo envio fica a cerca de 1 hora
+        next_due = manager._timers.get("msg1")[0]
+        assert 3500 < next_due - time.time() <= 3600
+        assert manager.get_stats()["sent_total"] == 1
+
+@pytest.mark.asyncio
+async def test_recurring_manager_enqueues_to_outbox():
+    """Testa que, com o outbox, a chave de idempotência deriva do último envio e não se repete."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    app.bot.send_message = AsyncMock()
+    manager = RecurringMessagesManager(app)
+    outbox = MagicMock()
+    outbox.enqueue = AsyncMock(side_effect=lambda messages: [m["_id"] for m in messages])
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db, \
+            patch('src.utils.recurring_messages_manager.get_outbox', return_value=outbox):
+        mock_db.update_recurring_message_last_sent = AsyncMock(return_value=True)
+        manager._schedule_message({
+            "_id": "msg1", "chat_id": 123, "message": "Olá", "interval_hours": 1.0,
+            "last_sent_at": None, "active": True
+        }, due=time.time())
+        
+        await manager._send_recurring_message("msg1", time.time())
+        await manager._send_recurring_message("msg1", time.time())
+    
+    app.bot.send_message.assert_not_awaited()
+    first, second = [call.args[0][0] for call in outbox.enqueue.await_args_list]
+    assert first["_id"] == "recurring:msg1:first"
+    sent_at = mock_db.update_recurring_message_last_sent.await_args_list[0].kwargs["sent_at"]
+    assert sent_at.microsecond % 1000 == 0
+    assert second["_id"] == f"recurring:msg1:{int(sent_at.timestamp() * 1000)}"
+
+@pytest.mark.asyncio
+async def test_recurring_manager_claims_before_sending():
+    """Testa que, sem o outbox, o envio é reivindicado com o token de fencing antes de sair."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    calls = []
+    app.bot.send_message = AsyncMock(side_effect=lambda **kwargs: calls.append("send"))
+    manager = RecurringMessagesManager(app)
+    manager.fencing_token = 5
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db:
+        mock_db.update_recurring_message_last_sent = AsyncMock(
+            side_effect=lambda *args, **kwargs: calls.append("claim") or True
+        )
+        manager._schedule_message({
+            "_id": "msg1", "chat_id": 123, "message": "Olá", "interval_hours": 1.0,
+            "last_sent_at": None, "active": True
+        }, due=time.time())
+        
+        await manager._send_recurring_message("msg1", time.time())
+    
+    assert calls == ["claim", "send"]
+    mock_db.update_recurring_message_last_sent.assert_awaited_once_with("msg1", fencing_token=5, sent_at=ANY)
+
+@pytest.mark.asyncio
+async def test_recurring_manager_enqueues_before_claiming():
+    """Testa que, com o outbox, uma falha entre a gravação e a reivindicação não perde nem duplica a mensagem."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    app.bot.send_message = AsyncMock()
+    manager = RecurringMessagesManager(app)
+    manager.fencing_token = 5
+    calls = []
+    outbox = MagicMock()
+    outbox.enqueue = AsyncMock(
+        side_effect=lambda messages: calls.append("enqueue") or [m["_id"] for m in messages]
+    )
+    claims = iter([None, True])
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db, \
+            patch('src.utils.recurring_messages_manager.get_outbox', return_value=outbox):
+        mock_db.update_recurring_message_last_sent = AsyncMock(
+            side_effect=lambda *args, **kwargs: calls.append("claim") or next(claims)
+        )
+        manager._schedule_message({
+            "_id": "msg1", "chat_id": 123, "message": "Olá", "interval_hours": 1.0,
+            "last_sent_at": None, "active": True
+        }, due=time.time())
+        
+        # A reivindicação falha depois da gravação no outbox: o envio é tentado de novo
+        await manager._send_recurring_message("msg1", time.time())
+        assert manager.get_stats()["failed_total"] == 1
+        await manager._send_recurring_message("msg1", time.time())
+    
+    assert calls == ["enqueue", "claim", "enqueue", "claim"]
+    first, retry = [call.args[0][0]["_id"] for call in outbox.enqueue.await_args_list]
+    assert first == retry == "recurring:msg1:first"
+    assert manager.get_stats()["sent_total"] == 1
+    app.bot.send_message.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_recurring_manager_steps_down_when_fenced():
+    """Testa que uma escrita rejeitada pelo token de fencing impede o envio e para o gerenciador."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    app.bot.send_message = AsyncMock()
+    manager = RecurringMessagesManager(app)
+    manager.running = True
+    manager.fencing_token = 5
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db:
+        mock_db.update_recurring_message_last_sent = AsyncMock(return_value=False)
+        for message_id in ("msg1", "msg2"):
+            manager._schedule_message({
+                "_id": message_id, "chat_id": 123, "message": "Olá", "interval_hours": 1.0,
+                "last_sent_at": None, "active": True
+            }, due=time.time())
+        
+        await manager._send_recurring_message("msg1", time.time())
+    
+    app.bot.send_message.assert_not_awaited()
+    assert manager.running is False
+    assert manager.fencing_token is None
+    assert manager.scheduled_count == 0
+
+@pytest.mark.asyncio
+async def test_recurring_manager_retries_when_claim_fails():
+    """Testa que um erro ao gravar a reivindicação reagenda o envio sem enviar."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    app.bot.send_message = AsyncMock()
+    manager = RecurringMessagesManager(app)
+    manager.fencing_token = 5
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db:
+        mock_db.update_recurring_message_last_sent = AsyncMock(return_value=None)
+        manager._schedule_message({
+            "_id": "msg1", "chat_id": 123, "message": "Olá", "interval_hours": 1.0,
+            "last_sent_at": None, "active": True
+        }, due=time.time())
+        
+        await manager._send_recurring_message("msg1", time.time())
+    
+    app.bot.send_message.assert_not_awaited()
+    next_due = manager._timers.get("msg1")[0]
+    assert manager.RETRY_DELAY - 5 < next_due - time.time() <= manager.RETRY_DELAY
+    assert manager.get_stats()["failed_total"] == 1
+
+@pytest.mark.asyncio
+async def test_recurring_manager_sync_applies_only_changes():
+    """Testa que a sincronização aplica apenas as mensagens alteradas."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    manager = RecurringMessagesManager(app)
+    manager._last_sync = datetime.now()
+    
+    manager._schedule_message({"_id": "old", "chat_id": 1, "message": "a", "interval_hours": 1.0, "active": True})
+    manager._schedule_message({"_id": "kept", "chat_id": 1, "message": "b", "interval_hours": 1.0, "active": True})
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db:
+        mock_db.get_all_active_recurring_messages = AsyncMock()
+        mock_db.get_recurring_messages_changed_since = AsyncMock(return_value=[
+            {"_id": "old", "chat_id": 1, "message": "a", "interval_hours": 1.0, "active": False},
+            {"_id": "new", "chat_id": 2, "message": "c", "interval_hours": 2.0, "active": True},
+        ])
+        
+        await manager._sync_changes()
+        
+        mock_db.get_all_active_recurring_messages.assert_not_awaited()
+        assert "old" not in manager._timers
+        assert "kept" in manager._timers
+        assert "new" in manager._timers
+        assert manager.scheduled_count == 2
+
+@pytest.mark.asyncio
+async def test_recurring_manager_loop_sends_when_due():
+    """Testa que o loop único envia a mensagem quando o prazo vence."""
+    app = MagicMock(spec=Application)
+    app.bot = MagicMock()
+    app.bot.send_message = AsyncMock()
+    manager = RecurringMessagesManager(app)
+    
+    with patch('src.utils.recurring_messages_manager.mongodb_client') as mock_db:
+        mock_db.db = MagicMock()
+        mock_db.get_all_active_recurring_messages = AsyncMock(return_value=[])
+        mock_db.update_recurring_message_last_sent = AsyncMock(return_value=True)
+        
+        await manager.start()
+        manager._schedule_message(
+            {"_id": "msg", "chat_id": 9, "message": "Oi", "interval_hours": 1.0, "active": True},
+            due=time.time() + 0.05
+        )
+        await asyncio.sleep(0.2)
+        await manager.stop()
+    
+    app.bot.send_message.assert_awaited_once()
+
 if __name__ == "__main__":
     asyncio.run(test_sayrecurrent_command())
     asyncio.run(test_listrecurrent_command())
@@ -0,0 +1,108 @@
+"""
+Testes para a medição da inicialização e o aquecimento dos caches (src.utils.startup).
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.utils.startup import StartupTimer, warm_up_caches
+
+
+def test_phase_records_duration():
+    """Cada etapa medida entra no resumo, mesmo se levantar uma exceção."""
+    timer = StartupTimer()
+    with timer.phase("mongo"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timer.phase("commands"):
+            raise RuntimeError("falhou")
+
+    assert [name for name, _ in timer.phases] == ["mongo", "commands"]
+    summary = timer.summary()
+    assert summary.startswith("Inicialização concluída em ")
+    assert "mongo=" in summary and "commands=" in summary
+
+
+@pytest.mark.asyncio
+async def test_gather_runs_steps_concurrently():
+    """As etapas de um grupo rodam em paralelo e cada uma é medida."""
+    timer = StartupTimer()
+    both_started = asyncio.Event()
+    started = []
+
+    async def step(name):
+        started.append(name)
+        if len(started) == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+        return name.upper()
+
+    results = await timer.gather("services", {"a": step("a"), "b": step("b")})
+
+    assert results == {"a": "A", "b": "B"}
+    names = [name for name, _ in timer.phases]
+    assert set(names) == {"services/a", "services/b", "services"}
+    assert names[-1] == "services"
+
+
+@pytest.mark.asyncio
+async def test_gather_propagates_errors():
+    """A falha de uma etapa chega ao chamador (o main_async tenta de novo)."""
+    timer = StartupTimer()
+
+    async def fail():
+        raise ValueError("sem conexão")
+
+    with pytest.raises(ValueError):
+        await timer.gather("services", {"ok": asyncio.sleep(0), "fail": fail()})
+    assert "services" in [name for name, _ in timer.phases]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_caches_loads_everything():
+    """O aquecimento carrega administradores, chats monitorados e âncoras ativas."""
+    mock_client = MagicMock()
+    mock_client.count_active_checkin_anchors = AsyncMock(return_value=3)
+    mock_cache = MagicMock()
+    mock_cache.refresh_bot_admins = AsyncMock(return_value=frozenset({1, 2}))
+    mock_directory = MagicMock()
+    mock_directory.refresh = AsyncMock()
+    mock_directory.__len__.return_value = 5
+
+    with patch("src.utils.mongodb_instance.mongodb_client", mock_client), \
+            patch("src.utils.admin_cache.admin_cache", mock_cache), \
+            patch("src.utils.chat_directory.chat_directory", mock_directory):
+        loaded = await warm_up_caches()
+
+    assert loaded == {"bot_admins": 2, "monitored_chats": 5, "active_anchors": 3}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_caches_tolerates_failures():
+    """A falha de um cache não impede os outros nem a inicialização."""
+    mock_client = MagicMock()
+    mock_client.count_active_checkin_anchors = AsyncMock(return_value=0)
+    mock_cache = MagicMock()
+    mock_cache.refresh_bot_admins = AsyncMock(side_effect=RuntimeError("falhou"))
+    mock_directory = MagicMock()
+    mock_directory.refresh = AsyncMock()
+    mock_directory.__len__.return_value = 0
+
+    with patch("src.utils.mongodb_instance.mongodb_client", mock_client), \
+            patch("src.utils.admin_cache.admin_cache", mock_cache), \
+            patch("src.utils.chat_directory.chat_directory", mock_directory):
+        loaded = await warm_up_caches()
+
+    assert isinstance(loaded["bot_admins"], RuntimeError)
+    assert loaded["monitored_chats"] == 0
+    assert loaded["active_anchors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_up_caches_without_mongodb():
+    """Sem MongoDB, não há o que aquecer."""
+    mock_client = MagicMock()
+    mock_client.db = None
+    with patch("src.utils.mongodb_instance.mongodb_client", mock_client):
+        assert await warm_up_caches() == {}
@@ -0,0 +1,131 @@
+"""
+Testes para o supervisor de tarefas em segundo plano (src.utils.task_supervisor).
+"""
+import asyncio
+
+import pytest
+
+from src.utils.metrics import BACKGROUND_TASK_FAILURES, BACKGROUND_TASK_OLDEST_AGE, BACKGROUND_TASKS
+from src.utils.task_supervisor import TaskSupervisor
+
+
+@pytest.mark.asyncio
+async def test_spawn_tracks_task_until_done():
+    """A tarefa fica registrada enquanto executa e sai do registro ao terminar."""
+    supervisor = TaskSupervisor()
+    release = asyncio.Event()
+
+    task = supervisor.spawn(release.wait(), name="espera", owner="teste")
+    await asyncio.sleep(0)
+
+    assert len(supervisor) == 1
+    assert [entry.name for entry in supervisor.tasks("teste")] == ["espera"]
+    assert task.get_name() == "teste:espera"
+
+    release.set()
+    await task
+    assert len(supervisor) == 0
+    assert supervisor.get_stats()["spawned_total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_counted():
+    """Uma exceção não tratada é registrada e contada por dono."""
+    supervisor = TaskSupervisor()
+    before = BACKGROUND_TASK_FAILURES.value("teste_falha")
+
+    async def fail():
+        raise ValueError("erro")
+
+    task = supervisor.spawn(fail(), name="falha", owner="teste_falha")
+    with pytest.raises(ValueError):
+        await task
+    await asyncio.sleep(0)
+
+    assert supervisor.failed_total == 1
+    assert BACKGROUND_TASK_FAILURES.value("teste_falha") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_collect_metrics_per_owner():
+    """Os gauges mostram a contagem por dono e voltam a zero quando as tarefas terminam."""
+    supervisor = TaskSupervisor()
+    release = asyncio.Event()
+    tasks = [supervisor.spawn(release.wait(), name=str(index), owner="teste_metricas") for index in range(3)]
+
+    supervisor.collect_metrics()
+    assert BACKGROUND_TASKS.value("teste_metricas") == 3
+    assert BACKGROUND_TASK_OLDEST_AGE.value("teste_metricas") >= 0
+
+    release.set()
+    await asyncio.gather(*tasks)
+    supervisor.collect_metrics()
+    assert BACKGROUND_TASKS.value("teste_metricas") == 0
+    assert BACKGROUND_TASK_OLDEST_AGE.value("teste_metricas") == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_short_tasks_and_cancels_late_ones():
+    """O desligamento aguarda as tarefas até o prazo e cancela as que não terminarem."""
+    supervisor = TaskSupervisor()
+    finished = []
+
+    async def work(seconds, name):
+        await asyncio.sleep(seconds)
+        finished.append(name)
+
+    supervisor.spawn(work(0.01, "curta"), name="curta", owner="teste")
+    late = supervisor.spawn(work(10, "longa"), name="longa", owner="teste")
+
+    summary = await supervisor.drain(0.2)
+
+    assert finished == ["curta"]
+    assert late.cancelled()
+    assert summary == {"completed": 1, "persisted": 0, "cancelled": 1}
+
+
+@pytest.mark.asyncio
+async def test_drain_persists_pending_work():
+    """Tarefas com persist são canceladas na hora e o trabalho pendente é gravado."""
+    supervisor = TaskSupervisor()
+    persisted = []
+
+    async def persist():
+        persisted.append("exclusao")
+
+    task = supervisor.spawn(asyncio.sleep(60), name="exclusao", owner="teste", persist=persist)
+
+    summary = await supervisor.drain(5)
+
+    assert task.cancelled()
+    assert persisted == ["exclusao"]
+    assert summary == {"completed": 0, "persisted": 1, "cancelled": 0}
+    assert supervisor.persisted_total == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_skips_services_and_cancel_all_stops_leftovers():
+    """Loops de serviços (drain=False) não atrasam o drain; cancel_all cancela os que sobrarem."""
+    supervisor = TaskSupervisor()
+    service = supervisor.spawn(asyncio.sleep(60), name="loop", owner="servico", drain=False)
+
+    summary = await supervisor.drain(5)
+    assert summary == {"completed": 0, "persisted": 0, "cancelled": 0}
+    assert not service.done()
+
+    assert await supervisor.cancel_all() == 1
+    assert service.cancelled()
+    assert len(supervisor) == 0
+
+
+def test_spawn_without_event_loop():
+    """Fora de um loop de eventos, spawn levanta RuntimeError sem deixar a corrotina pendente."""
+    supervisor = TaskSupervisor()
+
+    async def work():
+        pass
+
+    coro = work()
+    with pytest.raises(RuntimeError):
+        supervisor.spawn(coro, name="sem_loop", owner="teste")
+    assert coro.cr_frame is None
@@ -0,0 +1,30 @@
+"""
+Testes para as funções de normalização de texto.
+"""
+from src.utils.text_utils import normalize_chat_name, normalize_text
+
+
+def test_normalize_text_strips_accents_and_case():
+    """Testa que acentos e maiúsculas são ignorados."""
+    assert normalize_text("Ação ÇÃO Força") == "acao cao forca"
+
+
+def test_normalize_text_collapses_whitespace():
+    """Testa que espaços repetidos são colapsados."""
+    assert normalize_text("  GYM \t NATION  💚 ") == "gym nation 💚"
+
+
+def test_normalize_text_empty():
+    """Testa valores vazios."""
+    assert normalize_text("") == ""
+    assert normalize_text(None) == ""
+
+
+def test_normalize_chat_name_removes_at():
+    """Testa que o @ inicial do username é removido."""
+    assert normalize_chat_name("@GymNation") == "gymnation"
+
+
+def test_normalize_text_other_combining_marks():
+    """Testa caracteres de combinação fora do bloco dos acentos latinos e formas de compatibilidade."""
+    assert normalize_text("Ж҃ ﬁt ①") == "ж fit 1"
@@ -0,0 +1,168 @@
+"""
+Testes para a gravação anonimizada de atualizações.
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.utils import update_recorder as recorder_module
+from src.utils.update_recorder import RECORD_GROUP, UpdateAnonymizer, UpdateRecorder
+
+BOT_ID = 999000
+OWNER_ID = 42
+
+
+def make_update(text="/checkin agora", entities=None, user_id=123, chat_id=-100555):
+    """Atualização serializada de uma mensagem de grupo."""
+    return {
+        "update_id": 7,
+        "message": {
+            "message_id": 10,
+            "date": 1700000000,
+            "chat": {"id": chat_id, "type": "supergroup", "title": "GYM NATION"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Ana", "username": "ana_fit"},
+            "text": text,
+            "entities": entities if entities is not None else [{"type": "bot_command", "offset": 0, "length": 8}],
+            "contact": {"phone_number": "+5511999999999", "first_name": "Ana"},
+            "reply_to_message": {
+                "message_id": 9,
+                "date": 1699999990,
+                "chat": {"id": chat_id, "type": "supergroup", "title": "GYM NATION"},
+                "from": {"id": BOT_ID, "is_bot": True, "first_name": "Bot", "username": "gym_bot"},
+                "text": "Check-in de hoje!",
+            },
+        },
+    }
+
+
+@pytest.fixture
+def anonymizer():
+    """Anonimizador com sal fixo."""
+    return UpdateAnonymizer(BOT_ID, "gym_bot", salt=b"sal-de-teste")
+
+
+def test_anonymize_ids_are_consistent_and_keep_sign(anonymizer):
+    """IDs iguais geram o mesmo ID falso, com o mesmo sinal; o ID do bot é mantido."""
+    data = anonymizer.anonymize(make_update())
+    message = data["message"]
+
+    assert message["from"]["id"] not in (123, BOT_ID)
+    assert message["chat"]["id"] < 0 and message["chat"]["id"] != -100555
+    assert message["chat"]["id"] == message["reply_to_message"]["chat"]["id"]
+    assert message["reply_to_message"]["from"]["id"] == BOT_ID
+    assert anonymizer.anonymize_id(123) == message["from"]["id"]
+    assert message["message_id"] == 10 and data["update_id"] == 7
+
+
+def test_anonymize_replaces_names_and_drops_personal_data(anonymizer):
+    """Nomes viram pseudônimos estáveis e contatos são descartados."""
+    message = anonymizer.anonymize(make_update())["message"]
+
+    assert message["from"]["first_name"].startswith("Usuario ")
+    assert message["from"]["username"].startswith("user_")
+    assert message["chat"]["title"].startswith("Grupo ")
+    assert message["reply_to_message"]["from"]["username"] == "gym_bot"
+    assert "contact" not in message
+
+
+def test_mask_text_keeps_commands_and_bot_mentions(anonymizer):
+    """O texto é mascarado, exceto comandos e menções ao próprio bot."""
+    text = "@gym_bot 🏋️ quanto é 2 séries? @fulano"
+    entities = [{"type": "mention", "offset": 0, "length": 8}, {"type": "mention", "offset": 32, "length": 7}]
+
+    masked = anonymizer.mask_text(text, entities)
+
+    assert masked == "@gym_bot 🏋️ xxxxxx x 0 xxxxxx? @xxxxxx"
+    assert len(masked.encode("utf-16-le")) == len(text.encode("utf-16-le"))
+    assert anonymizer.mask_text("/checkin agora", [{"type": "bot_command", "offset": 0, "length": 8}]) == "/checkin xxxxx"
+
+
+def test_keep_text_preserves_messages():
+    """Com keep_text, o texto não é mascarado."""
+    anonymizer = UpdateAnonymizer(BOT_ID, "gym_bot", keep_text=True)
+    assert anonymizer.mask_text("bom treino", None) == "bom treino"
+
+
+def test_different_recordings_use_different_salts():
+    """Cada gravação tem seu próprio sal."""
+    assert UpdateAnonymizer().anonymize_id(123) != UpdateAnonymizer().anonymize_id(123)
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_header_and_updates(tmp_path, monkeypatch):
+    """O arquivo tem o cabeçalho (com o proprietário anonimizado) e uma linha por atualização."""
+    monkeypatch.setenv("OWNER_ID", str(OWNER_ID))
+    path = tmp_path / "updates.jsonl"
+    recorder = UpdateRecorder(str(path))
+    recorder.start()
+
+    update = MagicMock()
+    update.to_dict.return_value = make_update(user_id=OWNER_ID)
+    context = MagicMock()
+    context.bot.id = BOT_ID
+    context.bot.username = "gym_bot"
+
+    await recorder.record(update, context)
+    await recorder.record(update, context)
+    recorder.stop()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    header, first, second = lines
+    assert header["type"] == "header"
+    assert header["bot_id"] == BOT_ID
+    assert header["owner_id"] == first["update"]["message"]["from"]["id"] != OWNER_ID
+    assert first["t"] >= 0 and second["update"] == first["update"]
+    assert recorder.recorded == 2
+
+
+def test_recorder_does_not_overwrite_existing_file(tmp_path):
+    """Uma nova gravação sobre um arquivo existente vai para outro arquivo."""
+    path = tmp_path / "updates.jsonl"
+    path.write_text("anterior\n", encoding="utf-8")
+
+    recorder = UpdateRecorder(str(path))
+    recorder.start()
+    recorder.stop()
+
+    assert path.read_text(encoding="utf-8") == "anterior\n"
+    assert recorder.path != str(path) and recorder.path.endswith(".jsonl")
+
+
+@pytest.mark.asyncio
+async def test_recorder_stops_at_limit(tmp_path):
+    """A gravação para ao atingir MAX_UPDATES."""
+    recorder = UpdateRecorder(str(tmp_path / "updates.jsonl"))
+    recorder.MAX_UPDATES = 2
+    recorder.start()
+    update = MagicMock()
+    update.to_dict.return_value = make_update()
+
+    for _ in range(3):
+        await recorder.record(update, MagicMock(bot=MagicMock(id=BOT_ID, username="gym_bot")))
+
+    assert recorder.recorded == 2
+    assert not recorder.is_running
+
+
+def test_start_update_recorder_disabled_without_file():
+    """Sem UPDATE_RECORD_FILE, nenhum handler é registrado."""
+    application = MagicMock()
+    with patch.object(recorder_module.Config, "get_update_record_file", return_value=""):
+        assert recorder_module.start_update_recorder(application) is None
+    application.add_handler.assert_not_called()
+
+
+def test_start_and_stop_update_recorder(tmp_path):
+    """Com UPDATE_RECORD_FILE, o handler de gravação roda antes dos demais grupos."""
+    application = MagicMock()
+    path = str(tmp_path / "updates.jsonl")
+    with patch.object(recorder_module.Config, "get_update_record_file", return_value=path):
+        recorder = recorder_module.start_update_recorder(application)
+    try:
+        assert recorder is not None and recorder.is_running
+        assert application.add_handler.call_args.kwargs["group"] == RECORD_GROUP
+    finally:
+        recorder_module.stop_update_recorder()
+    assert recorder_module.update_recorder is None
+    assert not recorder.is_running